@@ -31,5 +31,6 @@ To train the algorithm the Runner class is used. The algorithm is passed in the
 """
 
 from ezcoach.core import Runner, train, play
-from ezcoach.enviroment import RemoteEnvironment
-from ezcoach.agent import Player, Learner, MultiLearner
+from ezcoach.enviroment import (RemoteEnvironment, AsyncRemoteEnvironment, BatchedRemoteEnvironment,
+                                VectorizedRemoteEnvironment)
+from ezcoach.agent import Player, Learner, MultiLearner, BatchMultiLearner
@@ -0,0 +1,391 @@
+"""
+This module introduces the actor-learner split of the training procedure. The ActorLearnerRunner starts a number
+of actor processes, each playing with its own copy of the ParameterizedPlayer in its own environment, and streams
+the transitions collected by the actors to the BatchLearner. The learner runs in the process invoking the train
+method. It consumes the batches of transitions and pushes its parameters to the actors at the configured interval,
+so the costly learning does not stall the collection of the experience.
+::
+    from ezcoach.actor_learner import ActorLearnerRunner
+
+    def create_environment(actor):
+        return RemoteEnvironment(Communicator.with_tcp_connection(port=6666 + actor))
+
+    runner = ActorLearnerRunner(player, learner, create_environment, num_actors=4)
+    runner.train(num_episodes=1000)
+
+The player, the environment factory and the parameters must be picklable, as they are sent to the actor processes.
+"""
+
+import abc
+import multiprocessing
+import queue
+import time
+from collections import namedtuple
+from typing import Callable, Dict, List
+
+from ezcoach.agent import Player
+from ezcoach.enviroment import BaseEnvironment, BaseRemoteEnvironment, Manifest
+from ezcoach.log import log
+from ezcoach.metrics import Recorder, MultiRecorder
+
+Transition = namedtuple('Transition', 'actor, player, state, action, reward, accumulated_reward, next_state, running')
+
+_MANIFEST = 'manifest'
+_TRANSITIONS = 'transitions'
+_EPISODE = 'episode'
+
+
+class ParameterizedPlayer(Player):
+    """
+    The abstract class representing a playing agent whose policy is defined by the parameters that can be
+    replaced. The copies of the player act in the actor processes and their parameters are updated
+    with the parameters of the BatchLearner.
+    """
+
+    @abc.abstractmethod
+    def set_parameters(self, parameters):
+        """
+        Replaces the parameters of the policy.
+
+        :param parameters: the parameters obtained from the learner
+        """
+
+    @classmethod
+    def __subclasshook__(cls, obj):
+        if cls is ParameterizedPlayer:
+            methods = ('initialize', 'act', 'set_parameters')
+
+            if all(any(method in superclass.__dict__
+                       for superclass in obj.__mro__)
+                   for method in methods):
+                return True
+
+        return NotImplemented
+
+
+class BatchLearner(abc.ABC):
+    """
+    The abstract class representing a learning algorithm that learns from the batches of transitions
+    collected by the actors. The parameters provided by the learner are pushed to the actors.
+    """
+
+    @abc.abstractmethod
+    def initialize(self, manifest: Manifest):
+        """
+        Initializes the object with the manifest that describe the game.
+
+        :param manifest: a Manifest class obtained from the environment.
+        """
+
+    @abc.abstractmethod
+    def learn(self, transitions: List[Transition]):
+        """
+        Learns from the batch of transitions.
+
+        :param transitions: a list of Transition objects collected by one of the actors
+        """
+
+    @abc.abstractmethod
+    def get_parameters(self):
+        """
+        Returns the parameters of the policy to be pushed to the actors.
+
+        :return: picklable parameters accepted by the set_parameters method of the ParameterizedPlayer
+        """
+
+    @classmethod
+    def __subclasshook__(cls, obj):
+        if cls is BatchLearner:
+            methods = ('initialize', 'learn', 'get_parameters')
+
+            if all(any(method in superclass.__dict__
+                       for superclass in obj.__mro__)
+                   for method in methods):
+                return True
+
+        return NotImplemented
+
+
+def _run_actor(actor: int, player: ParameterizedPlayer, environment_factory: Callable[[int], BaseEnvironment],
+               num_players: int, options: Dict[str, str], batch_size: int, transitions_queue, parameters_queue,
+               stop_event, verbose):
+    """
+    Plays the episodes with the copy of the player until the stop event is set. The transitions are put
+    to the transitions queue in batches and at the end of each episode. The latest parameters are obtained
+    from the parameters queue before each step.
+
+    :param actor: the index of the actor
+    :param player: the copy of the player
+    :param environment_factory: a callable creating the environment for the actor
+    :param num_players: a number of players simultaneously interacting with the environment
+    :param options: a dictionary representing the options sent to the environment
+    :param batch_size: the number of transitions put to the queue at once
+    :param transitions_queue: the queue of the transitions, manifests and episodes metrics
+    :param parameters_queue: the queue of the parameters pushed by the learner
+    :param stop_event: the event set when the actors should stop
+    :param verbose: the value representing the frequency of logging
+    """
+    environment = environment_factory(actor)
+    if isinstance(environment, BaseRemoteEnvironment):
+        # the states are kept in the transitions until the batch is put to the queue
+        environment.copy_on_read = True
+    environment.connect()
+    manifest = environment.manifest
+    player.initialize(manifest)
+    transitions_queue.put((_MANIFEST, actor, manifest))
+    num_players = num_players or manifest.possible_players[0]
+
+    transitions = []
+    while not stop_event.is_set():
+        environment.reset(num_players, options)
+        start_time = time.time()
+        states = environment.obtain_states()
+        num_actions = [0] * num_players
+        while states.running.any() and not stop_event.is_set():
+            parameters = None
+            while True:
+                try:
+                    parameters = parameters_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if parameters is not None:
+                player.set_parameters(parameters)
+
+            actions = [player.act(state) if running else None for state, running in zip(states.states, states.running)]
+            environment.act(actions)
+            next_states = environment.obtain_states()
+            for index, action in enumerate(actions):
+                if action is None:
+                    continue
+                num_actions[index] += 1
+                transitions.append(Transition(actor, index, states.states[index], action,
+                                              next_states.accumulated_rewards[index]
+                                              - states.accumulated_rewards[index],
+                                              next_states.accumulated_rewards[index],
+                                              next_states.states[index], bool(next_states.running[index])))
+
+            if len(transitions) >= batch_size:
+                transitions_queue.put((_TRANSITIONS, actor, transitions))
+                transitions = []
+            states = next_states
+
+        if transitions:
+            transitions_queue.put((_TRANSITIONS, actor, transitions))
+            transitions = []
+        if not states.running.any():
+            episode_time = time.time() - start_time
+            metrics = [(episode_time, actions, reward) for actions, reward in zip(num_actions,
+                                                                                   states.accumulated_rewards)]
+            transitions_queue.put((_EPISODE, actor, (metrics, states.game_metrics)))
+            log(f'Actor {actor} ended episode', verbose, level=2)
+
+    if hasattr(environment, 'disconnect'):
+        environment.disconnect()
+
+
+class ActorLearnerRunner:
+    """
+    The class managing the training procedure split into the actor processes collecting the transitions
+    and the learner consuming them. Each actor uses its own environment created by the environment factory
+    in the actor process, and a copy of the player controlling all players of the environment.
+    The actors send the transitions in batches through the bounded queue, so the actors wait if the learner
+    cannot keep up. The parameters of the learner are pushed to the actors after the configured number
+    of learned batches. The metrics of the episodes ended by all actors are gathered in the Recorder
+    (or the MultiRecorder if the game has a number of players) in the order in which the episodes ended.
+    """
+
+    def __init__(self, player: ParameterizedPlayer, learner: BatchLearner,
+                 environment_factory: Callable[[int], BaseEnvironment], num_actors: int = 2,
+                 batch_size: int = 32, push_interval: int = 1, max_queued_batches: int = 64, verbose=None):
+        """
+        Initializes the runner with the player copied to the actors, the learner and the factory of the
+        environments.
+
+        :param player: a player implementing ParameterizedPlayer interface, copied to each actor
+        :param learner: a learner implementing BatchLearner interface
+        :param environment_factory: a picklable callable creating the environment for the actor with the given index
+        :param num_actors: the number of actor processes
+        :param batch_size: the number of transitions sent by an actor at once
+        :param push_interval: the number of batches learned between pushing the parameters to the actors
+        :param max_queued_batches: the maximal number of batches waiting for the learner
+        :param verbose: the value representing the frequency of logging
+        """
+        assert isinstance(player, ParameterizedPlayer), \
+            f'Player must implement {ParameterizedPlayer.__name__} interface.'
+        assert isinstance(learner, BatchLearner), f'Learner must implement {BatchLearner.__name__} interface.'
+        assert num_actors > 0, f'Number of actors must be positive ({num_actors}).'
+        assert push_interval > 0, f'Push interval must be positive ({push_interval}).'
+
+        self._player = player
+        self._learner = learner
+        self._environment_factory = environment_factory
+        self._num_actors = num_actors
+        self._batch_size = batch_size
+        self._push_interval = push_interval
+        self._max_queued_batches = max_queued_batches
+        self._verbose = verbose
+
+        self._recorder = None
+        self._num_transitions = 0
+        self._num_pushes = 0
+
+    def train(self, num_episodes: int, num_players: int = None, options: Dict[str, str] = None):
+        """
+        Starts the actors and learns from the collected transitions until the given number of episodes
+        has ended. The actors are stopped when the training is finished.
+
+        :param num_episodes: a number of episodes ended by all actors after which the training is finished
+        :param num_players: a number of players simultaneously interacting with each environment
+        :param options: a dictionary representing the options sent to the environments
+        """
+        start_time = time.time()
+        context = multiprocessing.get_context()
+        transitions_queue = context.Queue(self._max_queued_batches)
+        parameters_queues = [context.Queue() for __ in range(self._num_actors)]
+        stop_event = context.Event()
+        actors = [context.Process(target=_run_actor, daemon=True,
+                                  args=(actor, self._player, self._environment_factory, num_players, options,
+                                        self._batch_size, transitions_queue, parameters_queues[actor], stop_event,
+                                        self._verbose))
+                  for actor in range(self._num_actors)]
+        for actor in actors:
+            actor.start()
+
+        self._recorder = None
+        self._num_transitions = 0
+        self._num_pushes = 0
+        try:
+            self._learn(num_episodes, num_players, transitions_queue, parameters_queues, actors)
+        finally:
+            stop_event.set()
+            self._stop_actors(actors, transitions_queue)
+
+        log(f'Training completed in {round(time.time() - start_time)}s.', self._verbose, level=1)
+
+    def _learn(self, num_episodes: int, num_players: int, transitions_queue, parameters_queues, actors):
+        """
+        Consumes the messages of the actors until the given number of episodes has ended.
+
+        :param num_episodes: a number of episodes after which the learning is finished
+        :param num_players: a number of players simultaneously interacting with each environment
+        :param transitions_queue: the queue of the transitions, manifests and episodes metrics
+        :param parameters_queues: the queues of the parameters of each actor
+        :param actors: the actor processes
+        """
+        num_batches = 0
+        num_ended_episodes = 0
+        while num_ended_episodes < num_episodes:
+            try:
+                message_type, actor, content = transitions_queue.get(timeout=1.)
+            except queue.Empty:
+                if not any(actor.is_alive() for actor in actors):
+                    raise RuntimeError('All actors have exited before the training was finished.')
+                continue
+
+            if message_type == _MANIFEST:
+                if self._recorder is None:
+                    self._initialize(content, num_players, parameters_queues)
+                continue
+
+            if message_type == _EPISODE:
+                metrics, game_metrics = content
+                num_ended_episodes += 1
+                if isinstance(self._recorder, MultiRecorder):
+                    self._recorder.add_episode_metrics(metrics, game_metrics)
+                else:
+                    self._recorder.add_episode_metrics(metrics[0] + tuple(game_metrics or ()))
+                log(f'Episode {num_ended_episodes} ended by actor {actor}.', self._verbose, level=2)
+                continue
+
+            self._learner.learn(content)
+            self._num_transitions += len(content)
+            num_batches += 1
+            if num_batches % self._push_interval == 0:
+                self._push_parameters(parameters_queues)
+
+    def _initialize(self, manifest: Manifest, num_players: int, parameters_queues):
+        """
+        Initializes the learner and the recorder with the manifest received from the first actor
+        and pushes the initial parameters to the actors.
+
+        :param manifest: a Manifest of the environment
+        :param num_players: a number of players simultaneously interacting with each environment
+        :param parameters_queues: the queues of the parameters of each actor
+        """
+        self._learner.initialize(manifest)
+        num_players = num_players or manifest.possible_players[0]
+        if num_players > 1:
+            self._recorder = MultiRecorder(num_players, manifest.metrics_names)
+        else:
+            self._recorder = Recorder(additional_metrics_names=manifest.metrics_names)
+        self._push_parameters(parameters_queues)
+
+    def _push_parameters(self, parameters_queues):
+        """
+        Pushes the parameters of the learner to all actors.
+
+        :param parameters_queues: the queues of the parameters of each actor
+        """
+        parameters = self._learner.get_parameters()
+        for parameters_queue in parameters_queues:
+            parameters_queue.put(parameters)
+        self._num_pushes += 1
+        log(f'Parameters pushed to the actors ({self._num_pushes}).', self._verbose, level=3)
+
+    @staticmethod
+    def _stop_actors(actors, transitions_queue, timeout: float = 5.):
+        """
+        Waits for the actors to finish, consuming the messages they put to the queue in the meantime.
+        The actors are terminated if they do not finish in the given time.
+
+        :param actors: the actor processes
+        :param transitions_queue: the queue of the transitions, manifests and episodes metrics
+        :param timeout: the time in seconds to wait for the actors to finish
+        """
+        deadline = time.monotonic() + timeout
+        while any(actor.is_alive() for actor in actors) and time.monotonic() < deadline:
+            try:
+                transitions_queue.get(timeout=.05)
+            except queue.Empty:
+                pass
+
+        for actor in actors:
+            if actor.is_alive():
+                actor.terminate()
+            actor.join()
+
+    @property
+    def metrics(self):
+        """
+        Returns the metrics of the episodes ended during the last training procedure.
+
+        :return: a Recorder (or a MultiRecorder) class containing the metrics
+        """
+        return self._recorder
+
+    @property
+    def learner(self) -> BatchLearner:
+        """
+        Returns the learner.
+
+        :return: the learner trained by the runner
+        """
+        return self._learner
+
+    @property
+    def num_transitions(self) -> int:
+        """
+        Returns the number of transitions learned during the last training procedure.
+
+        :return: the number of transitions
+        """
+        return self._num_transitions
+
+    @property
+    def num_pushes(self) -> int:
+        """
+        Returns the number of times the parameters were pushed to the actors during the last training procedure.
+
+        :return: the number of pushes
+        """
+        return self._num_pushes
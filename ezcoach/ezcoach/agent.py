@@ -5,10 +5,15 @@ The classes are:
 * Player - for an algorithm that cannot learn and can only play
 * Learner - for a learning algorithm controlling a single agent
 * MultiLearner - for a learning algorithm of controlling a number of agents
+
+The MultiLearner can additionally implement the BatchMultiLearner protocol to select the actions and receive
+the rewards of all players in a single call.
 """
 import abc
 from typing import List, Iterable
 
+import numpy as np
+
 from ezcoach.enviroment import Manifest
 
 
@@ -147,3 +152,57 @@ class MultiLearner(Learner):
                 return True
 
         return NotImplemented
+
+
+class BatchMultiLearner(MultiLearner):
+    """
+    The class representing a multi-agent learning algorithm that selects the actions and receives the rewards
+    of all players at once (eg. with a single forward pass of the neural network). It inherits from the MultiLearner
+    class. During an episode the act_batch and receive_rewards_batch methods are invoked once per step
+    with the stacked states of the players instead of the act and receive_reward methods invoked for each player.
+    The episode_ended method is still invoked for each player after the set_acting_player method.
+    The act method remains abstract, it selects the action of the acting player when the learner is used outside
+    the batched procedure (eg. act_batch invoked with the single state of the acting player).
+    The rows of the arrays correspond to the players in the order of the players array.
+    """
+
+    @abc.abstractmethod
+    def act_batch(self, states: np.ndarray, players: np.ndarray) -> Iterable:
+        """
+        Selects the actions to be performed by the players in the given states.
+
+        :param states: an array of the states of the players stacked along the first axis
+        :param players: an array of the numbers identifying the players
+        :return: an iterable of the actions for each player in the order of the players array
+        """
+
+    def receive_rewards_batch(self, previous_states: np.ndarray, actions: List, rewards: np.ndarray,
+                              accumulated_rewards: np.ndarray, next_states: np.ndarray, players: np.ndarray):
+        """
+        Receives the rewards of the players. By default the receive_reward method is invoked for each player.
+
+        :param previous_states: an array of the states preceding the rewards stacked along the first axis
+        :param actions: a list of the actions preceding the rewards
+        :param rewards: an array of the numerical reward signals
+        :param accumulated_rewards: an array of the rewards accumulated during the current episode
+        :param next_states: an array of the states following the rewards stacked along the first axis
+        :param players: an array of the numbers identifying the players
+        """
+        for index, player in enumerate(players):
+            self.set_acting_player(player)
+            self.receive_reward(previous_states[index], actions[index], rewards[index], accumulated_rewards[index],
+                                next_states[index])
+
+    @classmethod
+    def __subclasshook__(cls, obj):
+        if cls is BatchMultiLearner:
+            methods = ('initialize', 'act_batch', 'receive_rewards_batch',
+                       'do_start_episode', 'episode_started', 'episode_ended',
+                       'set_players', 'set_acting_player')
+
+            if all(any(method in superclass.__dict__
+                       for superclass in obj.__mro__)
+                   for method in methods):
+                return True
+
+        return NotImplemented
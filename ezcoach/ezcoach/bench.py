@@ -0,0 +1,327 @@
+"""
+This module contains the benchmark suite measuring the overhead of the framework per step. The Runner trains or plays
+with simple agents in the simulated game (ezcoach.testing package) that runs in process (without encoding
+and transport), in a separate process connected by the loopback TCP or by the shared memory.
+The scenarios cover the distributors, the sizes of the states, the lengths of the adapter chains and the numbers
+of players. The results are printed as JSON, so they can be compared between the releases.
+::
+    python -m ezcoach.bench --steps 2000 --transports inprocess tcp --output results.json
+
+For each scenario the number of steps per second, the percentiles of the step latency (the time between
+the consecutive actions including the round trip to the game and the work of the distributor) and
+the memory allocated per step (measured with tracemalloc in a separate run) are reported.
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from typing import Iterable, List
+
+import numpy as np
+
+from ezcoach.adapter import normalize_adapter, round_adapter, tuple_adapter
+from ezcoach.agent import Learner, MultiLearner
+from ezcoach.communication import Framing
+from ezcoach.core import Runner
+from ezcoach.enviroment import RemoteEnvironment
+from ezcoach.testing.environment import InProcessEnvironment
+from ezcoach.testing.games import GridWorldGame
+from ezcoach.testing.process import GameProcess
+
+Scenario = namedtuple('Scenario', 'mode, transport, distributor, state_size, adapters, players')
+
+MODES = ('train', 'play')
+TRANSPORTS = ('inprocess', 'tcp', 'shm')
+DISTRIBUTORS = ('single', 'list', 'multi')
+
+
+class _BenchLearner(Learner):
+    """
+    The learner moving always right and ignoring the states and rewards.
+    """
+
+    def __init__(self, num_episodes: int):
+        self._num_episodes = num_episodes
+
+    def initialize(self, manifest):
+        pass
+
+    def do_start_episode(self, episode: int) -> bool:
+        return episode <= self._num_episodes
+
+    def act(self, state):
+        return 1
+
+
+class _BenchMultiLearner(_BenchLearner, MultiLearner):
+    """
+    The multi learner moving always right with all players and ignoring the states and rewards.
+    """
+
+    def set_players(self, players: Iterable[int]):
+        pass
+
+    def set_acting_player(self, player):
+        pass
+
+
+class _TimedEnvironment:
+    """
+    The proxy of the environment recording the time of each action and optionally the memory allocated
+    between the actions. All other attributes are delegated to the environment.
+    """
+
+    def __init__(self, environment, trace_memory: bool = False):
+        """
+        Initializes the proxy with the environment.
+
+        :param environment: the measured environment
+        :param trace_memory: if True then the memory allocated between the actions is measured with tracemalloc
+        """
+        self._environment = environment
+        self._trace_memory = trace_memory
+        self._previous_time = None
+        self._step_memory = 0
+        self.num_steps = 0
+        self.latencies = []
+        self.allocated_bytes = []
+
+    def reset(self, num_players=None, options=None):
+        self._environment.reset(num_players, options)
+        self._previous_time = None
+
+    def act(self, actions):
+        now = time.perf_counter_ns()
+        if self._previous_time is not None:
+            self.latencies.append(now - self._previous_time)
+            if self._trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                self.allocated_bytes.append(peak - self._step_memory)
+        if self._trace_memory:
+            tracemalloc.reset_peak()
+            self._step_memory = tracemalloc.get_traced_memory()[0]
+
+        self._environment.act(actions)
+        self.num_steps += 1
+        self._previous_time = now
+
+    def __getattr__(self, item):
+        return getattr(self._environment, item)
+
+
+def scenarios(modes: Iterable[str] = ('train',), transports: Iterable[str] = ('inprocess', 'tcp'),
+              distributors: Iterable[str] = DISTRIBUTORS, state_sizes: Iterable[int] = (16, 1024),
+              adapters: Iterable[int] = (0, 3), players: Iterable[int] = (1, 4)) -> List[Scenario]:
+    """
+    Creates the scenarios for all combinations of the parameters. The single agent distributor is used
+    only with one player.
+
+    :param modes: an iterable of the procedures of the Runner (train or play)
+    :param transports: an iterable of the transports (inprocess, tcp or shm)
+    :param distributors: an iterable of the distributors (single, list or multi)
+    :param state_sizes: an iterable of the numbers of values in the state observation of each player
+    :param adapters: an iterable of the lengths of the state adapter chains (from 0 to 3)
+    :param players: an iterable of the numbers of players
+    :return: a list of scenarios
+    """
+    return [Scenario(*parameters)
+            for parameters in itertools.product(modes, transports, distributors, state_sizes, adapters, players)
+            if parameters[2] != 'single' or parameters[5] == 1]
+
+
+def _state_adapters(game: GridWorldGame, length: int):
+    """
+    Creates the chain of the state adapters.
+
+    :param game: the simulated game
+    :param length: the length of the chain (from 0 to 3)
+    :return: a list of the adapters or None if the length is 0
+    """
+    assert 0 <= length <= 3, f'Length of the adapter chain must be between 0 and 3 ({length}).'
+    if length == 0:
+        return None
+    return [normalize_adapter(game.states_definition), round_adapter, tuple_adapter][:length]
+
+
+def _run(scenario: Scenario, environment, num_steps: int, episode_length: int, state_adapters):
+    """
+    Runs the procedure of the scenario in the connected environment.
+
+    :param scenario: the benchmark scenario
+    :param environment: the environment wrapped in the timing proxy
+    :param num_steps: the minimal number of steps
+    :param episode_length: a number of steps in each episode
+    :param state_adapters: the chain of the state adapters
+    :return: the time of the procedure in seconds
+    """
+    num_episodes = math.ceil(num_steps / episode_length)
+    if scenario.distributor == 'single':
+        agent = _BenchLearner(num_episodes)
+    elif scenario.distributor == 'list':
+        agent = [_BenchLearner(num_episodes) for __ in range(scenario.players)]
+    else:
+        agent = _BenchMultiLearner(num_episodes)
+
+    runner = Runner(agent, environment, state_adapters=state_adapters, verbose=0)
+    start = time.perf_counter()
+    if scenario.mode == 'train':
+        runner.train(num_players=scenario.players)
+    else:
+        runner.play(num_episodes)
+    return time.perf_counter() - start
+
+
+def _measure(scenario: Scenario, game: GridWorldGame, num_steps: int, episode_length: int, state_adapters,
+             framing: str, trace_memory: bool):
+    """
+    Starts the game, runs the procedure of the scenario and stops the game.
+
+    :param scenario: the benchmark scenario
+    :param game: the simulated game
+    :param num_steps: the minimal number of steps
+    :param episode_length: a number of steps in each episode
+    :param state_adapters: the chain of the state adapters
+    :param framing: the framing requested from the game in the tcp and shm transports
+    :param trace_memory: if True then the memory allocated in each step is measured
+    :return: a tuple consisting of the timing proxy of the environment, the time of the procedure in seconds
+        and the number of memory blocks retained after the procedure
+    """
+    process = None
+    if scenario.transport == 'inprocess':
+        environment = _TimedEnvironment(InProcessEnvironment(game, verbose=0), trace_memory)
+    else:
+        process = GameProcess(game, shared_memory=scenario.transport == 'shm')
+        process.start()
+        environment = _TimedEnvironment(RemoteEnvironment(process.communicator(verbose=0, framing=framing),
+                                                          verbose=0), trace_memory)
+
+    try:
+        if trace_memory:
+            tracemalloc.start()
+        allocated_blocks = sys.getallocatedblocks()
+        seconds = _run(scenario, environment, num_steps, episode_length, state_adapters)
+        allocated_blocks = sys.getallocatedblocks() - allocated_blocks
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        environment.disconnect()
+        if process is not None:
+            process.stop()
+    return environment, seconds, allocated_blocks
+
+
+def run_scenario(scenario: Scenario, num_steps: int = 1000, memory_steps: int = 200, episode_length: int = 100,
+                 framing: str = None) -> dict:
+    """
+    Measures the scenario. The memory is measured in a separate run, so tracemalloc does not affect
+    the time of the steps.
+
+    :param scenario: the benchmark scenario
+    :param num_steps: the minimal number of measured steps
+    :param memory_steps: the minimal number of steps of the run measuring the memory, not measured if 0
+    :param episode_length: a number of steps in each episode
+    :param framing: the framing requested from the game in the tcp and shm transports
+    :return: a dictionary with the scenario and the results
+    """
+    assert scenario.transport in TRANSPORTS, f'Unknown transport {scenario.transport}.'
+    assert scenario.distributor in DISTRIBUTORS, f'Unknown distributor {scenario.distributor}.'
+    game = GridWorldGame(width=scenario.state_size, height=1, end_points=(), rewards={},
+                         max_moves=episode_length, possible_players=(scenario.players,))
+    state_adapters = _state_adapters(game, scenario.adapters)
+
+    environment, seconds, allocated_blocks = _measure(scenario, game, num_steps, episode_length, state_adapters,
+                                                      framing, False)
+    allocated_bytes = None
+    if memory_steps > 0:
+        memory_environment, __, __ = _measure(scenario, game, memory_steps, episode_length, state_adapters,
+                                              framing, True)
+        allocated_bytes = float(np.mean(memory_environment.allocated_bytes))
+
+    latencies = np.array(environment.latencies) / 1000.
+    num_steps = environment.num_steps
+    result = dict(scenario._asdict())
+    result.update(steps=num_steps,
+                  seconds=seconds,
+                  steps_per_second=num_steps / seconds,
+                  latency_us={'p50': float(np.percentile(latencies, 50)), 'p99': float(np.percentile(latencies, 99))},
+                  allocated_bytes_per_step=allocated_bytes,
+                  retained_blocks_per_step=allocated_blocks / num_steps)
+    return result
+
+
+def run_suite(suite: Iterable[Scenario], num_steps: int = 1000, memory_steps: int = 200, episode_length: int = 100,
+              framing: str = None, verbose: bool = False) -> dict:
+    """
+    Measures all scenarios of the suite.
+
+    :param suite: an iterable of the scenarios
+    :param num_steps: the minimal number of measured steps of each scenario
+    :param memory_steps: the minimal number of steps measuring the memory, not measured if 0
+    :param episode_length: a number of steps in each episode
+    :param framing: the framing requested from the game in the tcp and shm transports
+    :param verbose: if True then the progress is printed to the standard error
+    :return: a dictionary with the description of the platform and the results of the scenarios
+    """
+    results = []
+    suite = list(suite)
+    for i, scenario in enumerate(suite):
+        if verbose:
+            print(f'[{i + 1}/{len(suite)}] {scenario}', file=sys.stderr)
+        results.append(run_scenario(scenario, num_steps, memory_steps, episode_length, framing))
+
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'framing': framing or Framing.RAW,
+            'episode_length': episode_length,
+            'results': results}
+
+
+def main(args=None):
+    """
+    Runs the benchmark suite with the command line arguments and prints the results as JSON. The messages
+    logged by the framework and the game during the benchmark are printed to the standard error.
+
+    :param args: a list of the command line arguments, sys.argv is used if None
+    """
+    parser = argparse.ArgumentParser(prog='python -m ezcoach.bench',
+                                     description='Measures the overhead of the EZ-Coach framework per step.')
+    parser.add_argument('--steps', type=int, default=1000, help='minimal number of measured steps per scenario')
+    parser.add_argument('--memory-steps', type=int, default=200,
+                        help='minimal number of steps measuring the memory per scenario (0 disables)')
+    parser.add_argument('--episode-length', type=int, default=100, help='number of steps in each episode')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=['train'])
+    parser.add_argument('--transports', nargs='+', choices=TRANSPORTS, default=['inprocess', 'tcp'])
+    parser.add_argument('--distributors', nargs='+', choices=DISTRIBUTORS, default=list(DISTRIBUTORS))
+    parser.add_argument('--state-sizes', nargs='+', type=int, default=[16, 1024])
+    parser.add_argument('--adapters', nargs='+', type=int, choices=range(4), default=[0, 3],
+                        help='lengths of the state adapter chains')
+    parser.add_argument('--players', nargs='+', type=int, default=[1, 4])
+    parser.add_argument('--framing', choices=(Framing.RAW, Framing.LENGTH_PREFIXED), default=None)
+    parser.add_argument('--output', help='file the JSON results are written to, standard output if not provided')
+    parser.add_argument('--quiet', action='store_true', help='do not print the progress')
+    arguments = parser.parse_args(args)
+
+    suite = scenarios(arguments.modes, arguments.transports, arguments.distributors, arguments.state_sizes,
+                      arguments.adapters, arguments.players)
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run_suite(suite, arguments.steps, arguments.memory_steps, arguments.episode_length,
+                            arguments.framing, not arguments.quiet)
+
+    if arguments.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
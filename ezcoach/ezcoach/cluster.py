@@ -0,0 +1,398 @@
+"""
+This module introduces the Coordinator and Worker classes distributing the experiments (eg. the runs of
+the hyperparameter sweep) over a number of nodes. The coordinator listens for the workers and hands out the jobs
+consisting of the agent factory, the configuration and the number of episodes. Each worker manages the environments
+of the local games and the Runner, conducts the job and sends the recorded metrics back to the coordinator.
+The jobs of the workers that have failed (disconnected) are handed out again to other workers.
+::
+    # on the coordinator node
+    with Coordinator(port=7000) as coordinator:
+        for alpha in (.1, .2, .5):
+            coordinator.submit(create_agent, {'alpha': alpha}, num_episodes=100)
+        results = coordinator.wait()
+
+    # on each worker node
+    Worker('coordinator-host', 7000, create_environment).run()
+
+The messages are pickled and sent in the length-prefixed frames over TCP, so the agent factory and the environment
+factory must be picklable (eg. module-level functions available on all nodes). Pickled messages can execute code
+when loaded, so the coordinator and the workers must be run only in a trusted network.
+"""
+
+import pickle
+import queue
+import socket
+import threading
+from collections import namedtuple
+from typing import Any, Callable, Dict, List
+
+from ezcoach.communication import FrameReader, TCPConnection, encode_frame
+from ezcoach.core import Runner
+from ezcoach.enviroment import BaseEnvironment
+from ezcoach.exception import Disconnected
+from ezcoach.log import log
+
+Job = namedtuple('Job', 'job_id, agent_factory, config, num_episodes, training')
+JobResult = namedtuple('JobResult', 'job_id, config, metrics, attempts, error')
+
+
+class _JobMessageTypes:
+    """
+    The class containing the types of the messages exchanged between the coordinator and the workers.
+    """
+    JOB = 'job'
+    STARTED = 'started'
+    RESULT = 'result'
+    FAILED = 'failed'
+    SHUTDOWN = 'shutdown'
+
+
+class _MessageChannel:
+    """
+    The class sending and receiving the pickled messages in the length-prefixed frames using the TCPConnection.
+    """
+
+    def __init__(self, connection: TCPConnection):
+        """
+        Initializes the channel with the connected connection.
+
+        :param connection: a connected TCPConnection
+        """
+        self._connection = connection
+        self._reader = FrameReader()
+        self._messages = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def send(self, message: dict):
+        """
+        Sends the message. Throws Disconnected error if the channel has been closed.
+
+        :param message: a dictionary representing the message
+        """
+        frame = encode_frame(pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            if self._closed:
+                raise Disconnected()
+            self._connection.send_bytes(frame)
+
+    def receive(self) -> dict:
+        """
+        Waits (blocking) until the message is received. Can throw Disconnected error.
+
+        :return: a dictionary representing the message
+        """
+        while not self._messages:
+            frames = self._reader.feed(self._connection.recv_bytes())
+            self._messages.extend(pickle.loads(payload) for __, payload in frames)
+        return self._messages.pop(0)
+
+    def close(self):
+        """
+        Closes the connection. Can be invoked from other thread to interrupt the receiving, the messages
+        sent afterwards are not sent.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._connection.close()
+
+
+class Coordinator:
+    """
+    The class handing out the jobs to the workers and collecting the results. Each connected worker is served
+    on a separate thread and is given one job at a time. If the worker disconnects before sending the result
+    of the job, the job is put back to the queue and handed out to the next free worker. If the job fails
+    with an error (or the workers disconnect) the given number of times, the result contains the error.
+    The job is counted as handed out only when the worker confirms it has started the job, so the workers
+    that disconnected while idle do not use up the attempts of the job.
+    """
+
+    def __init__(self, ip: str = '0.0.0.0', port: int = 0, max_attempts: int = 3, verbose=None):
+        """
+        Initializes the coordinator with the address to listen on. If the port is 0 then a free port is selected
+        when the coordinator is started.
+
+        :param ip: a string representing the IP address to listen on
+        :param port: a port number
+        :param max_attempts: the maximal number of times each job is handed out
+        :param verbose: the value representing the frequency of logging
+        """
+        self._ip = ip
+        self._port = port
+        self._max_attempts = max_attempts
+        self._verbose = verbose
+
+        self._socket = None
+        self._running = False
+        self._accept_thread = None
+        self._worker_threads = []
+        self._channels = []
+        self._pending = queue.Queue()
+        self._jobs: Dict[int, Job] = {}
+        self._attempts: Dict[int, int] = {}
+        self._results: Dict[int, JobResult] = {}
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+
+    def start(self):
+        """
+        Starts listening for the workers on the separate thread.
+        """
+        self._socket = socket.socket()
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self._ip, self._port))
+        self._port = self._socket.getsockname()[1]
+        self._socket.listen()
+
+        self._running = True
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+        log(f'Coordinator listening on {self._port}', self._verbose, level=1)
+
+    def stop(self):
+        """
+        Stops the coordinator and shuts down the connected workers. The connections are closed, so the workers
+        conducting the jobs are disconnected and the shutdown message is sent only to the idle workers that were
+        served before the connections were closed.
+        """
+        self._running = False
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+        if self._accept_thread is not None:
+            self._accept_thread.join()
+
+        for channel in self._channels:
+            channel.close()
+        for thread in self._worker_threads:
+            thread.join()
+        log('Coordinator stopped', self._verbose, level=1)
+
+    def submit(self, agent_factory: Callable[[Dict[str, Any], int], Any], config: Dict[str, Any] = None,
+               num_episodes: int = 1, training: bool = True) -> int:
+        """
+        Submits the job. The agent is created by the worker with the agent factory invoked with the configuration
+        and the number of episodes. In the training procedure the agent decides on the number of episodes
+        (see Learner.do_start_episode), in the testing procedure the number of episodes is played. The job fails
+        if the game disconnects (or fewer episodes are played in the testing procedure).
+
+        :param agent_factory: a picklable callable creating the agent (or a list of agents) from the configuration
+            and the number of episodes
+        :param config: a dictionary with the configuration of the agent
+        :param num_episodes: a number of episodes
+        :param training: if True then the training procedure is conducted, otherwise the testing procedure
+        :return: the identifier of the job
+        """
+        with self._lock:
+            job = Job(len(self._jobs), agent_factory, config or {}, num_episodes, training)
+            self._jobs[job.job_id] = job
+            self._attempts[job.job_id] = 0
+        self._pending.put(job.job_id)
+        return job.job_id
+
+    def wait(self, timeout: float = None) -> List[JobResult]:
+        """
+        Waits until the results of all submitted jobs are collected.
+
+        :param timeout: the maximal time in seconds to wait, waits without limit if None
+        :return: a list of the results ordered by the identifiers of the jobs
+        """
+        with self._finished:
+            finished = self._finished.wait_for(lambda: len(self._results) == len(self._jobs), timeout)
+            if not finished:
+                raise TimeoutError(f'{len(self._jobs) - len(self._results)} jobs not finished in {timeout}s.')
+            return [self._results[job_id] for job_id in sorted(self._results)]
+
+    def _accept(self):
+        """
+        Accepts the workers while the coordinator is running and serves each of them on a separate thread.
+        """
+        while self._running:
+            try:
+                worker_socket, address = self._socket.accept()
+            except OSError:
+                break
+
+            log(f'Coordinator accepted worker {address}', self._verbose, level=1)
+            channel = _MessageChannel(TCPConnection.from_socket(worker_socket, verbose=self._verbose))
+            self._channels.append(channel)
+            thread = threading.Thread(target=self._serve, args=(channel, address), daemon=True)
+            self._worker_threads.append(thread)
+            thread.start()
+
+    def _serve(self, channel: _MessageChannel, address):
+        """
+        Hands out the jobs to the worker and collects the results until the coordinator is stopped
+        or the worker is disconnected. The shutdown message is sent only to the connected worker.
+
+        :param channel: the channel connected to the worker
+        :param address: the address of the worker
+        """
+        while self._running:
+            try:
+                job_id = self._pending.get(timeout=.1)
+            except queue.Empty:
+                continue
+
+            job = self._jobs[job_id]
+            started = False
+            try:
+                channel.send({'type': _JobMessageTypes.JOB, 'job': job})
+                message = channel.receive()
+                if message['type'] == _JobMessageTypes.STARTED:
+                    started = True
+                    with self._lock:
+                        self._attempts[job_id] += 1
+                    message = channel.receive()
+            except (Disconnected, OSError):
+                if started:
+                    log(f'Worker {address} disconnected during job {job_id}', self._verbose, level=1)
+                    self._fail(job, 'Worker disconnected.')
+                else:
+                    log(f'Worker {address} disconnected before starting job {job_id}', self._verbose, level=1)
+                    self._pending.put(job_id)
+                channel.close()
+                return
+
+            if message['type'] == _JobMessageTypes.RESULT:
+                self._finish(JobResult(job_id, job.config, message['metrics'], self._attempts[job_id], None))
+            else:
+                log(f'Job {job_id} failed on worker {address}: {message["error"]}', self._verbose, level=1)
+                self._fail(job, message['error'])
+
+        try:
+            channel.send({'type': _JobMessageTypes.SHUTDOWN})
+        except (Disconnected, OSError):
+            pass
+        channel.close()
+
+    def _fail(self, job: Job, error: str):
+        """
+        Puts the failed job back to the queue or finishes it with the error if it was handed out
+        the maximal number of times.
+
+        :param job: the failed job
+        :param error: the description of the error
+        """
+        if self._attempts[job.job_id] < self._max_attempts:
+            self._pending.put(job.job_id)
+        else:
+            self._finish(JobResult(job.job_id, job.config, None, self._attempts[job.job_id], error))
+
+    def _finish(self, result: JobResult):
+        """
+        Stores the result of the job.
+
+        :param result: the result of the job
+        """
+        with self._finished:
+            self._results[result.job_id] = result
+            self._finished.notify_all()
+
+    @property
+    def port(self) -> int:
+        """
+        Returns the port the coordinator is listening on.
+
+        :return: the port number
+        """
+        return self._port
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class Worker:
+    """
+    The class conducting the jobs handed out by the coordinator. For each job the environment is created
+    with the environment factory, the agent is created with the agent factory of the job, and the Runner
+    trains or tests the agent. The metrics recorded by the Runner are sent to the coordinator.
+    """
+
+    def __init__(self, coordinator_ip: str, coordinator_port: int,
+                 environment_factory: Callable[[], BaseEnvironment], verbose=None):
+        """
+        Initializes the worker with the address of the coordinator and the factory of the environments.
+
+        :param coordinator_ip: a string representing the IP address of the coordinator
+        :param coordinator_port: a port of the coordinator
+        :param environment_factory: a callable creating the environment of the local game, the environment
+            is disconnected when the job is finished
+        :param verbose: the value representing the frequency of logging
+        """
+        self._coordinator_ip = coordinator_ip
+        self._coordinator_port = coordinator_port
+        self._environment_factory = environment_factory
+        self._verbose = verbose
+
+    def run(self):
+        """
+        Connects to the coordinator and conducts the jobs until the coordinator shuts the worker down
+        or is disconnected.
+        """
+        connection = TCPConnection(self._coordinator_ip, self._coordinator_port, verbose=self._verbose)
+        connection.connect()
+        channel = _MessageChannel(connection)
+        log(f'Worker connected to the coordinator', self._verbose, level=1)
+
+        while True:
+            try:
+                message = channel.receive()
+            except Disconnected:
+                break
+
+            if message['type'] == _JobMessageTypes.SHUTDOWN:
+                break
+
+            job = message['job']
+            try:
+                channel.send({'type': _JobMessageTypes.STARTED, 'job_id': job.job_id})
+            except (Disconnected, OSError):
+                break
+
+            try:
+                metrics = self._run_job(job)
+            except Exception as error:
+                channel.send({'type': _JobMessageTypes.FAILED, 'job_id': job.job_id, 'error': repr(error)})
+            else:
+                channel.send({'type': _JobMessageTypes.RESULT, 'job_id': job.job_id, 'metrics': metrics})
+
+        channel.close()
+        log(f'Worker disconnected from the coordinator', self._verbose, level=1)
+
+    def _run_job(self, job: Job):
+        """
+        Trains or tests the agent created for the job. Throws Disconnected error if the game has disconnected
+        during the procedure, or if fewer episodes than requested were played in the testing procedure
+        (in the training procedure the agent decides on the number of episodes).
+
+        :param job: the job
+        :return: the metrics recorded by the Runner
+        """
+        log(f'Worker running job {job.job_id} with config {job.config}', self._verbose, level=1)
+        agent = job.agent_factory(job.config, job.num_episodes)
+        environment = self._environment_factory()
+        runner = Runner(agent, environment, verbose=self._verbose)
+        try:
+            if job.training:
+                runner.train()
+            else:
+                runner.play(job.num_episodes)
+
+            # the Runner stops the procedure without an error if the game has disconnected
+            num_episodes = len(runner.metrics.metrics)
+            if not environment.connected or (not job.training and num_episodes < job.num_episodes):
+                raise Disconnected(f'Game disconnected after {num_episodes} of {job.num_episodes} episodes.')
+        finally:
+            if hasattr(environment, 'disconnect'):
+                environment.disconnect()
+        return runner.metrics
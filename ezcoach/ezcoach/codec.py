@@ -0,0 +1,259 @@
+"""
+This module contains codecs used to encode and decode the messages exchanged with the game.
+The codec is negotiated in the connect message: the Training Module lists the codecs it can use
+(the most preferred first) and the game confirms the chosen one in the manifest.
+The following codecs are defined:
+
+* JsonCodec - JSON encoding (used by default), uses orjson package if it is installed
+* MsgpackCodec - compact binary encoding, requires msgpack package
+
+Codecs other than JSON can be used only with the length-prefixed framing.
+New codecs can be registered with the codec decorator.
+
+The module also contains the compressors applied to the frames larger than the threshold. The compressor is
+negotiated in the same way as the codec. The ZlibCompressor is defined and new compressors can be registered
+with the compressor decorator.
+"""
+import abc
+import json
+import zlib
+from typing import Dict, List, Iterable, Type
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+_codecs_classes: Dict[str, Type['BaseCodec']] = {}
+_compressors_classes: Dict[str, Type['BaseCompressor']] = {}
+
+
+def to_builtin(obj):
+    """
+    Converts numpy arrays and scalars to the built-in types supported by all codecs.
+    Used as the default function of the encoders, so values of other types are not converted.
+
+    :param obj: an object not supported by the encoder
+    :return: a list or a built-in scalar
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'Object of type {obj.__class__.__name__} cannot be encoded')
+
+
+class BaseCodec(abc.ABC):
+    """
+    The abstract class representing a codec. The name of the codec is used in the negotiation with the game.
+    Encoders must accept numpy arrays and scalars (eg. actions selected by the agents).
+    """
+    name = None
+
+    @classmethod
+    def available(cls) -> bool:
+        """
+        Returns if the packages required by the codec are installed.
+
+        :return: True if the codec can be used, False otherwise
+        """
+        return True
+
+    @abc.abstractmethod
+    def encode(self, message) -> bytes:
+        """
+        Encodes the message.
+
+        :param message: a string keyed dictionary representing a message
+        :return: the encoded message
+        """
+
+    @abc.abstractmethod
+    def decode(self, data) -> dict:
+        """
+        Decodes the message.
+
+        :param data: bytes or an object supporting the buffer protocol containing the encoded message
+        :return: the decoded message
+        """
+
+
+def codec(definition):
+    """
+    Registers class as a codec. It must implement BaseCodec interface and define a unique name.
+
+    :param definition: a class to be registered
+    :return: the provided class without any changes
+    """
+    assert issubclass(definition, BaseCodec), f'A class definition must implement {BaseCodec.__name__} interface.'
+    assert definition.name is not None, 'A codec must define its name.'
+    _codecs_classes[definition.name] = definition
+    return definition
+
+
+@codec
+class JsonCodec(BaseCodec):
+    """
+    The codec encoding the messages in JSON. The orjson package is used if it is installed,
+    otherwise the json module from the standard library is used.
+    """
+    name = 'json'
+
+    def __init__(self, use_orjson: bool = True):
+        """
+        Initializes the codec.
+
+        :param use_orjson: if False then the json module is used even if the orjson package is installed
+        """
+        self._use_orjson = use_orjson and orjson is not None
+
+    def encode(self, message) -> bytes:
+        if self._use_orjson:
+            return orjson.dumps(message, default=to_builtin, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(message, default=to_builtin, separators=(',', ':')).encode('UTF-8')
+
+    def decode(self, data) -> dict:
+        if self._use_orjson:
+            return orjson.loads(data)
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+
+@codec
+class MsgpackCodec(BaseCodec):
+    """
+    The codec encoding the messages in the compact binary MessagePack format. Requires msgpack package.
+    """
+    name = 'msgpack'
+
+    @classmethod
+    def available(cls) -> bool:
+        return msgpack is not None
+
+    def encode(self, message) -> bytes:
+        return msgpack.packb(message, default=to_builtin)
+
+    def decode(self, data) -> dict:
+        return msgpack.unpackb(data)
+
+
+def create_codec(name: str) -> BaseCodec:
+    """
+    Creates the codec registered under the name. Raises ValueError if no codec is registered under the name
+    and ImportError if the codec requires the packages that are not installed.
+
+    :param name: the name of the codec
+    :return: the codec
+    """
+    if name not in _codecs_classes:
+        raise ValueError(f'Codec {name} is not registered.')
+    codec_class = _codecs_classes[name]
+    if not codec_class.available():
+        raise ImportError(f'Codec {name} requires packages that are not installed.')
+    return codec_class()
+
+
+def available_codecs(preferred: Iterable[str] = ('msgpack', 'json')) -> List[str]:
+    """
+    Returns the names of the registered codecs that can be used.
+
+    :param preferred: the names of the codecs in the order of preference, other codecs follow them
+    :return: a list of the names of the available codecs starting with the most preferred
+    """
+    names = [name for name in preferred if name in _codecs_classes]
+    names += [name for name in _codecs_classes if name not in names]
+    return [name for name in names if _codecs_classes[name].available()]
+
+
+class BaseCompressor(abc.ABC):
+    """
+    The abstract class representing a compressor of the frames. The name of the compressor is used
+    in the negotiation with the game.
+    """
+    name = None
+
+    @abc.abstractmethod
+    def compress(self, data) -> bytes:
+        """
+        Compresses the data.
+
+        :param data: bytes or an object supporting the buffer protocol
+        :return: the compressed data
+        """
+
+    @abc.abstractmethod
+    def decompress(self, data) -> bytes:
+        """
+        Decompresses the data.
+
+        :param data: bytes or an object supporting the buffer protocol containing the compressed data
+        :return: the decompressed data
+        """
+
+
+def compressor(definition):
+    """
+    Registers class as a compressor. It must implement BaseCompressor interface and define a unique name.
+
+    :param definition: a class to be registered
+    :return: the provided class without any changes
+    """
+    assert issubclass(definition, BaseCompressor), \
+        f'A class definition must implement {BaseCompressor.__name__} interface.'
+    assert definition.name is not None, 'A compressor must define its name.'
+    _compressors_classes[definition.name] = definition
+    return definition
+
+
+@compressor
+class ZlibCompressor(BaseCompressor):
+    """
+    The compressor using the zlib module. The lowest level of compression is used by default
+    as it is the fastest one.
+    """
+    name = 'zlib'
+
+    def __init__(self, level: int = 1):
+        """
+        Initializes the compressor with the level of compression.
+
+        :param level: the level of compression from 1 (fastest) to 9 (best compression)
+        """
+        self._level = level
+
+    def compress(self, data) -> bytes:
+        return zlib.compress(data, self._level)
+
+    def decompress(self, data) -> bytes:
+        return zlib.decompress(data)
+
+
+def create_compressor(name: str) -> BaseCompressor:
+    """
+    Creates the compressor registered under the name. Raises ValueError if no compressor is registered
+    under the name.
+
+    :param name: the name of the compressor
+    :return: the compressor
+    """
+    if name not in _compressors_classes:
+        raise ValueError(f'Compressor {name} is not registered.')
+    return _compressors_classes[name]()
+
+
+def available_compressors() -> List[str]:
+    """
+    Returns the names of the registered compressors.
+
+    :return: a list of the names of the compressors
+    """
+    return list(_compressors_classes)
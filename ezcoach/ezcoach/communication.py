@@ -2,13 +2,28 @@
 This module contains classes responsible for establishing and maintaining the communication with the game.
 """
 import abc
+import asyncio
+import collections
 import json
+import multiprocessing
+import os
 import socket
+import struct
 import threading
-import queue
-from ezcoach.exception import Disconnected
-import ezcoach.json_utils as json_utils
+import re
+import selectors
+import time
+from codecs import getincrementaldecoder
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple, Iterable
+
+import numpy as np
+
+from ezcoach.codec import (BaseCodec, BaseCompressor, JsonCodec, available_codecs, create_codec, create_compressor,
+                           to_builtin)
+from ezcoach.exception import Disconnected, NegotiationError
 from ezcoach.log import log
+from ezcoach.profiling import Phases, Profiler
 
 
 class MessageAttributes:
@@ -26,6 +41,20 @@ class MessageAttributes:
     ACCUMULATED_REWARDS = 'acc_rewards'
     RUNNING = 'running'
     METRICS = 'metrics'
+    OPTIONS = 'options'
+    FRAMING = 'framing'
+    BINARY_STATES = 'binary_states'
+    BINARY = 'binary'
+    CODECS = 'codecs'
+    CODEC = 'codec'
+    DELTA_STATES = 'delta_states'
+    DELTA = 'delta'
+    INDICES = 'indices'
+    VALUES = 'values'
+    COMPRESSION = 'compression'
+    COMPRESSION_THRESHOLD = 'compression_threshold'
+    INSTANCES = 'instances'
+    RESET = 'reset'
 
 
 class OutgoingMessageTypes:
@@ -48,7 +77,855 @@ class IncomingMessageTypes:
     DISCONNECTED = 'disconnected'
 
 
-DISCONNECTED_MESSAGE_JSON = json.dumps({MessageAttributes.TYPE: IncomingMessageTypes.DISCONNECTED})
+class Framing:
+    """
+    The class aggregating the framings of the messages. Raw framing (used by default) means that JSON messages
+    are written one after another to the stream. Length-prefixed framing means that each message is preceded
+    by the header containing the length of the message. The framing is negotiated in the connect message
+    and confirmed by the game in the manifest.
+    """
+    RAW = 'raw'
+    LENGTH_PREFIXED = 'length_prefixed'
+
+
+DISCONNECTED_MESSAGE = {MessageAttributes.TYPE: IncomingMessageTypes.DISCONNECTED}
+
+
+class ReceivePolicy:
+    """
+    The class aggregating the policies of the queue of the received messages. With the block sender policy (used
+    by default) no messages are dropped but the receiving stops while the queue is full, so the game is blocked
+    when the buffers of the connection are filled. With the keep latest policy the full state message replaces
+    the state messages waiting in the queue (they are dropped), so the agents always react to the latest state.
+    With the keep all policy all messages are queued without limit (the maximal size of the queue is ignored),
+    so the memory grows as long as the agents are slower than the game.
+    """
+    KEEP_ALL = 'keep_all'
+    KEEP_LATEST = 'keep_latest'
+    BLOCK_SENDER = 'block_sender'
+
+
+class FrameFlags:
+    """
+    The class aggregating the flags stored in the header of the length-prefixed frame.
+    The BINARY flag indicates that the payload consists of the JSON header followed by raw bytes. The name
+    of the attribute that holds the raw bytes is stored in the binary attribute of the JSON header.
+    The COMPRESSED flag indicates that the payload is compressed with the negotiated compressor.
+    """
+    BINARY = 0x01
+    COMPRESSED = 0x02
+
+
+FRAME_HEADER = struct.Struct('!IB')
+"""
+The header of the length-prefixed frame: the length of the payload as an unsigned 32-bit big-endian integer
+followed by a byte of flags (see FrameFlags class).
+"""
+
+BINARY_HEADER = struct.Struct('!I')
+"""
+The header of the binary payload: the length of the JSON header as an unsigned 32-bit big-endian integer.
+"""
+
+
+def encode_frame(payload: bytes, flags: int = 0, compressor: BaseCompressor = None, threshold: int = 0) -> bytes:
+    """
+    Encodes the payload as a length-prefixed frame. If the compressor is provided then the payloads
+    of at least threshold bytes are compressed, unless the compressed payload is not smaller.
+
+    :param payload: the bytes to be sent in the frame
+    :param flags: the flags stored in the header of the frame
+    :param compressor: the compressor of the payload, the payload is not compressed if not provided
+    :param threshold: the minimal size of the compressed payload in bytes
+    :return: the header followed by the payload
+    """
+    if compressor is not None and len(payload) >= threshold:
+        compressed_payload = compressor.compress(payload)
+        if len(compressed_payload) < len(payload):
+            payload = compressed_payload
+            flags |= FrameFlags.COMPRESSED
+    return FRAME_HEADER.pack(len(payload), flags) + payload
+
+
+def encode_binary_payload(message: dict, attribute: str, data, codec: BaseCodec = None) -> bytes:
+    """
+    Encodes the message as a binary payload in which the value of the attribute is sent as raw bytes
+    following the header instead of being encoded by the codec.
+
+    :param message: a message as a dictionary
+    :param attribute: the name of the attribute sent as raw bytes
+    :param data: the raw bytes (or an object supporting the buffer protocol) of the attribute
+    :param codec: the codec encoding the header, JSON is used if not provided
+    :return: the binary payload
+    """
+    codec = codec or JsonCodec()
+    header = {key: value for key, value in message.items() if key != attribute}
+    header[MessageAttributes.BINARY] = attribute
+    encoded_header = codec.encode(header)
+    return b''.join((BINARY_HEADER.pack(len(encoded_header)), encoded_header, memoryview(data).cast('B')))
+
+
+def encode_binary_frame(message: dict, attribute: str, data, codec: BaseCodec = None) -> bytes:
+    """
+    Encodes the message as a length-prefixed frame with the binary payload (see encode_binary_payload).
+
+    :param message: a message as a dictionary
+    :param attribute: the name of the attribute sent as raw bytes
+    :param data: the raw bytes (or an object supporting the buffer protocol) of the attribute
+    :param codec: the codec encoding the header, JSON is used if not provided
+    :return: the frame with the binary payload
+    """
+    return encode_frame(encode_binary_payload(message, attribute, data, codec), FrameFlags.BINARY)
+
+
+def decompress_payload(flags: int, payload, compressor: BaseCompressor = None) -> Tuple[int, bytes]:
+    """
+    Decompresses the payload of the frame if the frame is compressed. The compressed flag is cleared.
+    Raises NegotiationError if the frame is compressed but no compressor was negotiated.
+
+    :param flags: the flags of the frame
+    :param payload: the payload of the frame
+    :param compressor: the compressor used to decompress the compressed payload
+    :return: a tuple of the flags and the decompressed payload (the same payload if not compressed)
+    """
+    if flags & FrameFlags.COMPRESSED:
+        if compressor is None:
+            raise NegotiationError('Compressed frame received but no compressor was negotiated.')
+        payload = compressor.decompress(payload)
+        flags &= ~FrameFlags.COMPRESSED
+    return flags, payload
+
+
+def decode_payload(flags: int, payload: bytearray, codec: BaseCodec = None, compressor: BaseCompressor = None) -> dict:
+    """
+    Decodes the payload of the frame. If the payload is binary then the raw bytes are not copied and are
+    returned as a memoryview in the attribute indicated by the header.
+
+    :param flags: the flags of the frame
+    :param payload: the payload of the frame
+    :param codec: the codec decoding the payload, JSON is used if not provided
+    :param compressor: the compressor used to decompress the compressed payload
+    :return: the decoded message
+    """
+    codec = codec or JsonCodec()
+    flags, payload = decompress_payload(flags, payload, compressor)
+    if not flags & FrameFlags.BINARY:
+        return codec.decode(payload)
+
+    header_length, = BINARY_HEADER.unpack_from(payload)
+    header_end = BINARY_HEADER.size + header_length
+    message = codec.decode(memoryview(payload)[BINARY_HEADER.size:header_end])
+    message[message.pop(MessageAttributes.BINARY)] = memoryview(payload)[header_end:]
+    return message
+
+
+class ByteCounters:
+    """
+    The class counting the bytes of the messages sent and received by the communicator. The size
+    of the messages (payload) is counted separately from the size transferred by the connection (wire),
+    which is smaller if the messages are compressed. The headers of the frames are not counted.
+    """
+
+    def __init__(self):
+        """
+        Initializes the counters with zeros.
+        """
+        self.payload_bytes_sent = 0
+        self.wire_bytes_sent = 0
+        self.payload_bytes_received = 0
+        self.wire_bytes_received = 0
+
+    def reset(self):
+        """
+        Sets all counters to zero.
+        """
+        self.__init__()
+
+    def count_sent(self, payload_size: int, wire_size: int):
+        """
+        Counts the sent message.
+
+        :param payload_size: the size of the message before compression
+        :param wire_size: the size of the message after compression
+        """
+        self.payload_bytes_sent += payload_size
+        self.wire_bytes_sent += wire_size
+
+    def count_received(self, payload_size: int, wire_size: int):
+        """
+        Counts the received message.
+
+        :param payload_size: the size of the message after decompression
+        :param wire_size: the size of the received message
+        """
+        self.payload_bytes_received += payload_size
+        self.wire_bytes_received += wire_size
+
+    @property
+    def compression_ratio(self) -> float:
+        """
+        Returns the ratio of the bytes transferred by the connection to the size of the messages
+        (both sent and received). The value lower than 1 means that the compression reduces the transfer.
+
+        :return: the compression ratio or 1 if nothing has been transferred
+        """
+        payload_bytes = self.payload_bytes_sent + self.payload_bytes_received
+        if payload_bytes == 0:
+            return 1.
+        return (self.wire_bytes_sent + self.wire_bytes_received) / payload_bytes
+
+    def __str__(self):
+        return f'ByteCounters(sent: {self.payload_bytes_sent} ({self.wire_bytes_sent} on wire), ' \
+               f'received: {self.payload_bytes_received} ({self.wire_bytes_received} on wire))'
+
+
+class MessageQueue:
+    """
+    The queue of the received messages passed from the receiving thread to the main thread according
+    to the receive policy (see ReceivePolicy). The state messages dropped by the keep latest policy are counted.
+    """
+
+    def __init__(self, policy: str = ReceivePolicy.BLOCK_SENDER, max_size: int = 1024):
+        """
+        Initializes the empty queue.
+
+        :param policy: the receive policy (one of the values defined in the ReceivePolicy class)
+        :param max_size: the maximal number of the queued messages, ignored with the keep all policy
+        """
+        assert policy in (ReceivePolicy.KEEP_ALL, ReceivePolicy.KEEP_LATEST, ReceivePolicy.BLOCK_SENDER), \
+            f'Unknown receive policy {policy}.'
+        assert max_size > 0, f'Maximal size of the queue must be positive ({max_size}).'
+        self._policy = policy
+        self._max_size = max_size
+        self._messages = collections.deque()
+        self._condition = threading.Condition()
+        self._dropped = 0
+
+    def put(self, message: dict, block: bool = True, timeout: float = None) -> bool:
+        """
+        Puts the message to the queue. If the queue is bounded and full, waits until the messages are obtained.
+        The message is put without waiting if block is False (eg. when the queue is filled and emptied
+        by the same thread).
+
+        :param message: a received message
+        :param block: if False then the message is put even if the queue is full
+        :param timeout: the maximal time in seconds to wait, waits without limit if None
+        :return: True if the message was put, False if the queue remained full
+        """
+        with self._condition:
+            if self._policy == ReceivePolicy.KEEP_LATEST and _is_full_state(message):
+                self._drop_states()
+
+            if block and self._policy != ReceivePolicy.KEEP_ALL:
+                if not self._condition.wait_for(lambda: len(self._messages) < self._max_size, timeout):
+                    return False
+
+            self._messages.append(message)
+            self._condition.notify_all()
+            return True
+
+    def get_all(self, timeout: float = None) -> List[dict]:
+        """
+        Waits until at least one message is queued and obtains all queued messages.
+
+        :param timeout: the maximal time in seconds to wait, waits without limit if None
+        :return: a list of the messages, empty if no message was queued in time
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._messages, timeout):
+                return []
+
+            messages = list(self._messages)
+            self._messages.clear()
+            self._condition.notify_all()
+            return messages
+
+    def _drop_states(self):
+        """
+        Removes the queued state messages.
+        """
+        kept = [message for message in self._messages
+                if message[MessageAttributes.TYPE] != IncomingMessageTypes.STATE]
+        self._dropped += len(self._messages) - len(kept)
+        self._messages = collections.deque(kept)
+
+    @property
+    def policy(self) -> str:
+        """
+        Returns the receive policy.
+
+        :return: one of the values defined in the ReceivePolicy class
+        """
+        return self._policy
+
+    @property
+    def dropped(self) -> int:
+        """
+        Returns the number of the state messages dropped by the keep latest policy.
+
+        :return: the number of the dropped state messages
+        """
+        return self._dropped
+
+    def __len__(self):
+        return len(self._messages)
+
+
+def _is_full_state(message: dict) -> bool:
+    """
+    Checks if the message is the state message containing the full states (not the changes of the states).
+
+    :param message: a received message
+    :return: True if the message contains the full states, False otherwise
+    """
+    return message[MessageAttributes.TYPE] == IncomingMessageTypes.STATE \
+        and not message.get(MessageAttributes.DELTA, False)
+
+
+def compute_delta(previous: np.ndarray, current: np.ndarray) -> dict:
+    """
+    Computes the difference between two arrays of the same shape. The difference consists of the indices
+    of the changed elements in the flattened array and their new values.
+
+    :param previous: the previous array
+    :param current: the current array
+    :return: a dictionary containing the indices and the values of the changed elements
+    """
+    previous = np.asarray(previous).reshape(-1)
+    current = np.asarray(current).reshape(-1)
+    indices = np.flatnonzero(previous != current)
+    return {MessageAttributes.INDICES: indices, MessageAttributes.VALUES: current[indices]}
+
+
+def apply_delta(buffer: np.ndarray, delta: dict):
+    """
+    Patches the buffer in place with the difference computed with compute_delta function.
+
+    :param buffer: a C-contiguous array to be patched
+    :param delta: a dictionary containing the indices and the values of the changed elements
+    """
+    assert buffer.flags.c_contiguous, 'The patched buffer must be C-contiguous.'
+    indices = np.asarray(delta[MessageAttributes.INDICES], dtype=np.intp)
+    buffer.reshape(-1)[indices] = delta[MessageAttributes.VALUES]
+
+
+class FrameReader:
+    """
+    The class extracting length-prefixed frames from the stream of bytes. Received bytes are buffered until
+    the whole frame is available. Only the headers of the frames are inspected so partial frames are never parsed.
+    """
+
+    def __init__(self):
+        """
+        Initializes the reader with an empty buffer.
+        """
+        self._buffer = bytearray()
+
+    def feed(self, data) -> List[Tuple[int, bytearray]]:
+        """
+        Appends the received bytes to the buffer and returns all frames that are complete.
+
+        :param data: bytes received from the stream
+        :return: a list of tuples consisting of the flags and the payload of each complete frame
+        """
+        buffer = self._buffer
+        buffer += data
+
+        frames = []
+        start = 0
+        end = len(buffer)
+        header_size = FRAME_HEADER.size
+        while end - start >= header_size:
+            length, flags = FRAME_HEADER.unpack_from(buffer, start)
+            frame_end = start + header_size + length
+            if frame_end > end:
+                break
+
+            frames.append((flags, buffer[start + header_size:frame_end]))
+            start = frame_end
+
+        del buffer[:start]
+        return frames
+
+    @property
+    def buffered(self) -> int:
+        """
+        Returns the number of bytes of the partially received frame.
+
+        :return: the number of buffered bytes
+        """
+        return len(self._buffer)
+
+
+class RawMessageDecoder:
+    """
+    The class incrementally decoding JSON messages written one after another to the stream (raw framing).
+    Every received chunk is scanned only once: the scanner tracks the nesting depth of the message while
+    skipping the strings, so braces inside the strings do not split the messages. A message completed within
+    the chunk is decoded in place with json.JSONDecoder.raw_decode at the cursor pointing at its beginning.
+    Only the parts of the messages spanning several chunks are kept and joined once the message is complete,
+    which keeps the decoding linear in the received bytes.
+    """
+
+    _OUTSIDE_STRING = re.compile(r'[{}\[\]"]')
+    _INSIDE_STRING = re.compile(r'["\\]')
+
+    def __init__(self, counters: ByteCounters = None):
+        """
+        Initializes the decoder with no partial message.
+
+        :param counters: the counters of the received bytes (the UTF-8 encoded size of the received text)
+        """
+        self._json_decoder = json.JSONDecoder()
+        self._counters = counters
+        self._partial_message = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def receive(self, connection) -> List[dict]:
+        """
+        Receives the data from the connection and decodes the messages.
+
+        :param connection: the connection used to receive the data
+        :return: a list of decoded messages
+        """
+        return self.feed(self.read(connection))
+
+    @staticmethod
+    def read(connection) -> str:
+        """
+        Receives the text from the connection without decoding it.
+
+        :param connection: the connection used to receive the data
+        :return: the received text
+        """
+        return connection.recv()
+
+    def feed(self, text: str) -> List[dict]:
+        """
+        Decodes all messages completed by the received text.
+
+        :param text: a string received from the connection
+        :return: a list of decoded messages
+        """
+        if self._counters is not None:
+            size = len(text) if text.isascii() else len(text.encode('UTF-8'))
+            self._counters.count_received(size, size)
+
+        messages = []
+        cursor = 0
+        position = 0
+        end = len(text)
+        if self._escaped and text:
+            self._escaped = False
+            position = 1
+
+        while position < end:
+            if self._in_string:
+                match = self._INSIDE_STRING.search(text, position)
+                if match is None:
+                    break
+
+                position = match.end()
+                if match.group() == '"':
+                    self._in_string = False
+                elif position == end:
+                    self._escaped = True
+                else:
+                    position += 1
+                continue
+
+            match = self._OUTSIDE_STRING.search(text, position)
+            if match is None:
+                break
+
+            position = match.end()
+            character = match.group()
+            if character == '"':
+                self._in_string = True
+            elif character in '{[':
+                if self._depth == 0 and not self._partial_message:
+                    cursor = match.start()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    messages.append(self._decode(text, cursor, position))
+                    cursor = position
+
+        if self._depth > 0:
+            self._partial_message.append(text[cursor:])
+        return messages
+
+    def _decode(self, text: str, cursor: int, end: int):
+        """
+        Decodes the message ending in the text at the given position. The message starts at the cursor
+        or in the previously received chunks.
+
+        :param text: the currently decoded chunk
+        :param cursor: the position in the chunk where the message starts
+        :param end: the position in the chunk following the message
+        :return: the decoded message
+        """
+        if self._partial_message:
+            self._partial_message.append(text[:end])
+            text = ''.join(self._partial_message)
+            self._partial_message = []
+            cursor = 0
+            end = len(text)
+
+        message, message_end = self._json_decoder.raw_decode(text, cursor)
+        if message_end != end:
+            raise json.JSONDecodeError('Malformed message', text, message_end)
+        return message
+
+    @property
+    def buffered(self) -> int:
+        """
+        Returns the number of characters of the partially received message.
+
+        :return: the number of buffered characters
+        """
+        return sum(len(part) for part in self._partial_message)
+
+
+class FrameDecoder:
+    """
+    The class decoding messages sent in length-prefixed frames.
+    """
+
+    def __init__(self, codec: BaseCodec = None, compressor: BaseCompressor = None, counters: ByteCounters = None):
+        """
+        Initializes the decoder with an empty frame reader.
+
+        :param codec: the codec decoding the payloads of the frames, JSON is used if not provided
+        :param compressor: the compressor used to decompress the compressed payloads
+        :param counters: the counters of the received bytes
+        """
+        self._reader = FrameReader()
+        self._codec = codec or JsonCodec()
+        self._compressor = compressor
+        self._counters = counters
+
+    def receive(self, connection) -> List[dict]:
+        """
+        Receives the bytes from the connection and decodes the messages.
+
+        :param connection: the connection used to receive the data
+        :return: a list of decoded messages
+        """
+        return self.feed(self.read(connection))
+
+    @staticmethod
+    def read(connection) -> bytes:
+        """
+        Receives the bytes from the connection without decoding them.
+
+        :param connection: the connection used to receive the data
+        :return: the received bytes
+        """
+        return connection.recv_bytes()
+
+    def feed(self, data) -> List[dict]:
+        """
+        Decodes the messages contained in the complete frames.
+
+        :param data: bytes received from the connection
+        :return: a list of decoded messages
+        """
+        messages = []
+        for flags, payload in self._reader.feed(data):
+            wire_size = len(payload)
+            flags, payload = decompress_payload(flags, payload, self._compressor)
+            if self._counters is not None:
+                self._counters.count_received(len(payload), wire_size)
+            messages.append(decode_payload(flags, payload, self._codec))
+        return messages
+
+
+class MessageProtocol:
+    """
+    The class encapsulating the encoding and decoding of the messages according to the options negotiated
+    with the game. The requested options are sent in the connect message and are used only if the game confirms
+    them in the manifest. The class does not perform any I/O on its own so it is shared by the communicators
+    using different means of receiving the data.
+    The codec and the compressor are negotiated only with the length-prefixed framing, the raw framing always
+    uses JSON without compression. The sizes of the sent and received messages are counted in the byte counters.
+    """
+
+    def __init__(self, framing=None, binary_states=False, codecs: Iterable[str] = None, delta_states=False,
+                 compression: str = None, compression_threshold: int = 1024, verbose=None):
+        """
+        Initializes the protocol with the options requested from the game.
+
+        :param framing: the framing requested from the game (one of the values defined in the Framing class)
+        :param binary_states: if True then the game is asked to send the states as raw bytes
+        :param codecs: the names of the codecs requested from the game in the order of preference,
+            all available codecs are requested if not provided
+        :param delta_states: if True then the game is asked to send only the changes of the states
+        :param compression: the name of the compressor requested from the game (eg. zlib), no compression if None
+        :param compression_threshold: the minimal size of the compressed messages in bytes, requested also
+            from the game
+        :param verbose: the value indicating the frequency of the logging
+        """
+        self._requested_framing = framing
+        self._requested_binary_states = binary_states
+        self._requested_codecs = list(codecs) if codecs is not None else available_codecs()
+        self._requested_delta_states = delta_states
+        self._requested_compression = compression
+        self._compression_threshold = compression_threshold
+        self._verbose = verbose
+
+        self._framing = Framing.RAW
+        self._binary_states = False
+        self._delta_states = False
+        self._codec = JsonCodec()
+        self._compressor = None
+        self._counters = ByteCounters()
+        self._decoder = RawMessageDecoder(self._counters)
+        self._text_decoder = getincrementaldecoder('UTF-8')()
+        self.profiler = Profiler(enabled=False)
+
+    def reset(self):
+        """
+        Resets the negotiated options and the byte counters. Must be invoked before connecting to the game.
+        """
+        self._codec = JsonCodec()
+        self._compressor = None
+        self._counters.reset()
+        self._use_framing(Framing.RAW)
+        self._binary_states = False
+        self._delta_states = False
+        self._text_decoder.reset()
+
+    def connect_message(self, instances: int = None) -> dict:
+        """
+        Creates the connect message containing the requested options.
+
+        :param instances: the number of instances of the environment requested from the game, the game is not
+            asked to run a batch of the environments if None
+        :return: a connect message as a dictionary
+        """
+        connect_message = {MessageAttributes.TYPE: OutgoingMessageTypes.CONNECT}
+        if instances is not None:
+            connect_message[MessageAttributes.INSTANCES] = instances
+        if self._requested_framing is not None:
+            connect_message[MessageAttributes.FRAMING] = self._requested_framing
+        if self._requested_framing == Framing.LENGTH_PREFIXED:
+            connect_message[MessageAttributes.CODECS] = self._requested_codecs
+        if self._requested_binary_states:
+            connect_message[MessageAttributes.BINARY_STATES] = True
+        if self._requested_delta_states:
+            connect_message[MessageAttributes.DELTA_STATES] = True
+        if self._requested_framing == Framing.LENGTH_PREFIXED and self._requested_compression is not None:
+            connect_message[MessageAttributes.COMPRESSION] = self._requested_compression
+            connect_message[MessageAttributes.COMPRESSION_THRESHOLD] = self._compression_threshold
+        return connect_message
+
+    @staticmethod
+    def start_message(players, options=None, instances: Iterable[int] = None) -> dict:
+        """
+        Creates the start message.
+
+        :param players: a number of players that will be simultaneously interacting with the game
+        :param options: an optional dictionary of options sent to the game
+        :param instances: the indices of the instances of the environment to be started, all instances
+            are started if None
+        :return: a start message as a dictionary
+        """
+        start_message = {MessageAttributes.TYPE: OutgoingMessageTypes.START,
+                         MessageAttributes.PLAYERS: players,
+                         MessageAttributes.OPTIONS: options}
+        if instances is not None:
+            start_message[MessageAttributes.INSTANCES] = list(instances)
+        return start_message
+
+    @staticmethod
+    def stop_message() -> dict:
+        """
+        Creates the stop message.
+
+        :return: a stop message as a dictionary
+        """
+        return {MessageAttributes.TYPE: OutgoingMessageTypes.STOP}
+
+    @staticmethod
+    def actions_message(actions, reset: Iterable[int] = None) -> dict:
+        """
+        Creates the action message. The numpy arrays are not converted, they are encoded directly by the codec.
+
+        :param actions: a list or an array of actions selected by the agents, or a list of such lists for each
+            instance of the environment
+        :param reset: the indices of the instances of the environment to be restarted instead of performing
+            the actions
+        :return: an action message as a dictionary
+        """
+        actions_message = {MessageAttributes.TYPE: OutgoingMessageTypes.ACTION,
+                           MessageAttributes.ACTIONS: actions if isinstance(actions, np.ndarray) else list(actions)}
+        if reset:
+            actions_message[MessageAttributes.RESET] = list(reset)
+        return actions_message
+
+    def encode(self, message) -> bytes:
+        """
+        Encodes the message according to the framing and the codec in use.
+
+        :param message: a string keyed dictionary representing a message
+        :return: the encoded message
+        """
+        encoded_message = self._codec.encode(message)
+        if self._framing == Framing.LENGTH_PREFIXED:
+            frame = encode_frame(encoded_message, 0, self._compressor, self._compression_threshold)
+            self._counters.count_sent(len(encoded_message), len(frame) - FRAME_HEADER.size)
+            return frame
+
+        self._counters.count_sent(len(encoded_message), len(encoded_message))
+        return encoded_message
+
+    def send(self, connection, message):
+        """
+        Encodes the message and sends it using the connection.
+
+        :param connection: the connection used to send the message
+        :param message: a string keyed dictionary representing a message
+        """
+        if self._framing == Framing.LENGTH_PREFIXED:
+            connection.send_bytes(self.encode(message))
+        else:
+            message_json = json.dumps(message, default=to_builtin)
+            self._counters.count_sent(len(message_json), len(message_json))
+            connection.send(message_json)
+
+    def receive(self, connection) -> List[dict]:
+        """
+        Receives the data from the connection and decodes the messages.
+
+        :param connection: the connection used to receive the data
+        :return: a list of decoded messages
+        """
+        decoder = self._decoder
+        read_start = time.perf_counter_ns()
+        data = decoder.read(connection)
+        self.profiler.trace('read', read_start)
+        start = time.perf_counter_ns()
+        messages = self._negotiate(decoder.feed(data))
+        self.profiler.record_since(Phases.DECODE, start)
+        return messages
+
+    def decode(self, data: bytes) -> List[dict]:
+        """
+        Decodes the messages contained in the received bytes.
+
+        :param data: the bytes received from the game
+        :return: a list of decoded messages
+        """
+        start = time.perf_counter_ns()
+        if self._framing == Framing.RAW:
+            data = self._text_decoder.decode(data)
+        messages = self._negotiate(self._decoder.feed(data))
+        self.profiler.record_since(Phases.DECODE, start)
+        return messages
+
+    def _negotiate(self, messages: List[dict]) -> List[dict]:
+        """
+        Sets the options confirmed by the game if the manifest is among the received messages.
+        Raises NegotiationError if the game confirms the codec or the compression that was not requested.
+
+        :param messages: a list of received messages
+        :return: the same list of messages
+        """
+        for message in messages:
+            if message.get(MessageAttributes.TYPE) != IncomingMessageTypes.MANIFEST:
+                continue
+
+            framing = message.get(MessageAttributes.FRAMING, Framing.RAW)
+            if framing == Framing.LENGTH_PREFIXED and self._requested_framing == Framing.LENGTH_PREFIXED:
+                codec = message.get(MessageAttributes.CODEC, JsonCodec.name)
+                if codec not in self._requested_codecs and codec != JsonCodec.name:
+                    raise NegotiationError(f'The game confirmed codec {codec} that was not requested.')
+                self._codec = create_codec(codec)
+                compression = message.get(MessageAttributes.COMPRESSION)
+                if compression is not None:
+                    if compression != self._requested_compression:
+                        raise NegotiationError(f'The game confirmed compression {compression} that was not requested.')
+                    self._compressor = create_compressor(compression)
+                self._use_framing(framing)
+                log(f'Communication switched to the length-prefixed framing with {codec} codec'
+                    f' and {compression} compression', self._verbose, 2)
+
+            self._binary_states = self._framing == Framing.LENGTH_PREFIXED \
+                and bool(message.get(MessageAttributes.BINARY_STATES, False))
+            self._delta_states = self._requested_delta_states \
+                and bool(message.get(MessageAttributes.DELTA_STATES, False))
+
+        return messages
+
+    def _use_framing(self, framing):
+        """
+        Sets the framing of the messages sent and received after this method is invoked.
+
+        :param framing: one of the values defined in the Framing class
+        """
+        self._framing = framing
+        if framing == Framing.LENGTH_PREFIXED:
+            self._decoder = FrameDecoder(self._codec, self._compressor, self._counters)
+        else:
+            self._decoder = RawMessageDecoder(self._counters)
+
+    @property
+    def framing(self):
+        """
+        Returns the framing of the messages currently in use.
+
+        :return: one of the values defined in the Framing class
+        """
+        return self._framing
+
+    @property
+    def codec(self) -> str:
+        """
+        Returns the name of the codec currently in use.
+
+        :return: the name of the codec
+        """
+        return self._codec.name
+
+    @property
+    def compression(self) -> str:
+        """
+        Returns the name of the compressor currently in use.
+
+        :return: the name of the compressor or None if the messages are not compressed
+        """
+        return self._compressor.name if self._compressor is not None else None
+
+    @property
+    def byte_counters(self) -> ByteCounters:
+        """
+        Returns the counters of the bytes sent and received since the connection.
+
+        :return: a ByteCounters object
+        """
+        return self._counters
+
+    @property
+    def binary_states(self) -> bool:
+        """
+        Returns if the game confirmed sending the states as raw bytes.
+
+        :return: True if the states are sent as raw bytes, False otherwise
+        """
+        return self._binary_states
+
+    @property
+    def delta_states(self) -> bool:
+        """
+        Returns if the game confirmed sending only the changes of the states.
+
+        :return: True if the changes of the states are sent, False otherwise
+        """
+        return self._delta_states
 
 
 class BaseCommunication(abc.ABC):
@@ -56,24 +933,29 @@ class BaseCommunication(abc.ABC):
     The abstract class encapsulating communication. Messages are received on the separate thread
     and passed to the main thread using queue. Messages are sent in the main thread.
     This class relies on the provided connection to actually send and receive messages.
-    Messages are encoded in JSON and can be obtained using get_messages method.
+    Messages are encoded in JSON and decoded on the receiving thread according to the protocol in use.
+    Decoded messages can be obtained using get_messages method.
     This method clears the received messages so each message can be received only once.
     """
-    def __init__(self, connection, verbose=None):
+    def __init__(self, connection, verbose=None, protocol: MessageProtocol = None,
+                 receive_policy: str = ReceivePolicy.BLOCK_SENDER, max_queued_messages: int = 1024):
         """
         Initializes the communication with the connection (eg. TCPConnection).
 
         :param connection: an object sed to send and receive messages
         :param verbose: a number indicating the frequency of logged information
+        :param protocol: the protocol used to encode and decode messages (no options are requested if None)
+        :param receive_policy: the policy of the queue of the received messages (see ReceivePolicy)
+        :param max_queued_messages: the maximal number of the queued messages, ignored with the keep all policy
         """
         self._connection = connection
         self._verbose = verbose
+        self._protocol = protocol if protocol is not None else MessageProtocol(verbose=verbose)
 
         self._thread = None
         self._connected = False
-        self._messages = queue.Queue()
+        self._messages = MessageQueue(receive_policy, max_queued_messages)
         self._running = False
-        self._last_partial_message = None
 
     def start(self):
         """
@@ -85,7 +967,7 @@ class BaseCommunication(abc.ABC):
             return
 
         self._running = True
-        self._thread = threading.Thread(target=self._run)
+        self._thread = threading.Thread(target=self._run, name='Communicator')
         self._thread.start()
 
     def _run(self):
@@ -108,6 +990,7 @@ class BaseCommunication(abc.ABC):
         Connects to the other end of the communication.
         This may be ignored depending on the connection provided in the constructor.
         """
+        self._protocol.reset()
         self._connection.connect()
         self._connected = True
 
@@ -124,18 +1007,22 @@ class BaseCommunication(abc.ABC):
         Receives the messages from the connection instance. Requires the connection to be connected.
         Typically this method is invoked in the separate thread managed by the class but can be
         alternatively invoked manually if the start method has not been invoked.
-        Messages are put to the _messages queue and can be obtained using get_messages method.
+        Messages are decoded, put to the _messages queue and can be obtained using get_messages method.
         """
         if not self._connected:
             return
 
         try:
-            message = self._connection.recv()
+            messages = self._protocol.receive(self._connection)
         except Disconnected:
             self._report_disconnected()
             self._running = False
         else:
-            self._messages.put(message)
+            block = self._running and threading.current_thread() is self._thread
+            for message in messages:
+                while not self._messages.put(message, block, timeout=.1):
+                    if not self._running:
+                        return
 
     def send(self, message):
         """
@@ -146,39 +1033,18 @@ class BaseCommunication(abc.ABC):
         """
         log(f'Communication sending message: {message}', self._verbose, 3)
         self._assert_connected()
-        self._connection.send(json.dumps(message))
+        self._protocol.send(self._connection, message)
 
     def get_messages(self):
         """
         Obtains the messages received from the connection and put into a queue. The queue is emptied after
         this method is invoked. If a message is received only partially it will be returned only after
-        it is fully received. messages are returned as a list of dictionaries.
+        it is fully received. Waits (blocking) until at least one message is received.
+        Messages are returned as a list of dictionaries.
 
         :return: a list of messages as a dictionaries
         """
-        messages = []
-        while True:
-            raw_message = self._messages.get(block=True)
-            try:
-                message_json = json.loads(raw_message)
-                messages.append(message_json)
-            except json.decoder.JSONDecodeError:
-                if self._last_partial_message is not None:
-                    raw_message = self._last_partial_message + raw_message
-                    self._last_partial_message = None
-
-                for m in json_utils.split_jsons(raw_message):
-                    try:
-                        m_json = json.loads(m)
-                        messages.append(m_json)
-                    except json.decoder.JSONDecodeError:
-                        self._last_partial_message = m
-
-            self._messages.task_done()
-
-            if self._messages.empty() and len(messages) > 0:
-                break
-
+        messages = self._messages.get_all()
         log(f'Communication receiving messages: {messages}', self._verbose, 3)
         return messages
 
@@ -188,6 +1054,37 @@ class BaseCommunication(abc.ABC):
         """
         self._connected = False
 
+    @property
+    def profiler(self) -> Profiler:
+        """
+        Returns the profiler recording the durations of decoding the received messages.
+
+        :return: a Profiler object
+        """
+        return self._protocol.profiler
+
+    @profiler.setter
+    def profiler(self, profiler: Profiler):
+        self._protocol.profiler = profiler
+
+    @property
+    def receive_policy(self) -> str:
+        """
+        Returns the policy of the queue of the received messages.
+
+        :return: one of the values defined in the ReceivePolicy class
+        """
+        return self._messages.policy
+
+    @property
+    def dropped_states(self) -> int:
+        """
+        Returns the number of the state messages dropped by the keep latest policy before they were obtained.
+
+        :return: the number of the dropped state messages
+        """
+        return self._messages.dropped
+
     def _assert_connected(self):
         """
         Asserts that the connection is connected.
@@ -203,148 +1100,801 @@ class BaseCommunication(abc.ABC):
         """
         return self._connected
 
+    @property
+    def connection(self):
+        """
+        Returns the connection used to send and receive the messages (eg. TCPConnection).
+
+        :return: the connection provided in the constructor
+        """
+        return self._connection
+
+    @property
+    def framing(self):
+        """
+        Returns the framing of the messages currently in use.
+
+        :return: one of the values defined in the Framing class
+        """
+        return self._protocol.framing
+
+    @property
+    def codec(self) -> str:
+        """
+        Returns the name of the codec currently in use.
+
+        :return: the name of the codec
+        """
+        return self._protocol.codec
+
+    @property
+    def compression(self) -> str:
+        """
+        Returns the name of the compressor currently in use.
+
+        :return: the name of the compressor or None if the messages are not compressed
+        """
+        return self._protocol.compression
+
+    @property
+    def byte_counters(self) -> ByteCounters:
+        """
+        Returns the counters of the bytes sent and received since the connection. The counters show
+        the sizes of the messages before and after compression.
+
+        :return: a ByteCounters object
+        """
+        return self._protocol.byte_counters
+
+    @property
+    def binary_states(self) -> bool:
+        """
+        Returns if the game confirmed sending the states as raw bytes.
+
+        :return: True if the states are sent as raw bytes, False otherwise
+        """
+        return self._protocol.binary_states
+
+    @property
+    def delta_states(self) -> bool:
+        """
+        Returns if the game confirmed sending only the changes of the states.
+
+        :return: True if the changes of the states are sent, False otherwise
+        """
+        return self._protocol.delta_states
+
+
+class Communicator(BaseCommunication):
+    """
+    The class representing the communication between the Training Module and the game engine Plugin.
+    It must be initiated with the connection and class methods are provided to construct this object
+    with TCP (or Unix domain socket), Pipe and shared memory connection. TCP connection is used by default in the framework.
+    The messages can be sent by the methods provided by this class.
+    The length-prefixed framing can be requested in the constructor. It is used only if the game confirms it
+    in the manifest, otherwise the raw framing is used. With the length-prefixed framing the game can also be asked
+    to send the states as raw bytes (binary states) which is supported for image observations (PixelList).
+    The codec of the messages (see codec module) is negotiated together with the length-prefixed framing.
+    The game can also be asked to send only the changes of the states relative to the previous state (delta states).
+    With the length-prefixed framing the messages larger than the threshold can be compressed with the requested
+    compressor. The numbers of bytes before and after the compression are counted in the byte counters.
+    The received messages are queued according to the receive policy (see ReceivePolicy), which bounds the queue
+    when the game sends the states faster than the agents react to them.
+    """
+
+    @classmethod
+    def with_tcp_connection(cls, ip: str = '127.0.0.1', port: int = 6666, buffer_size=4096, verbose=None,
+                            framing=None, binary_states=False, codecs: Iterable[str] = None, no_delay: bool = True,
+                            receive_buffer_size: int = None, send_buffer_size: int = None, delta_states=False,
+                            compression: str = None, compression_threshold: int = 1024,
+                            receive_policy: str = ReceivePolicy.BLOCK_SENDER, max_queued_messages: int = 1024):
+        """
+        Creates Communicator class with the TCP connection.
+
+        :param ip: a string representing IP address of the game
+        :param port: a port of the TCP connection as an integer
+        :param buffer_size: the initial buffer size of the TCP connection, the buffer grows with the messages
+        :param verbose: the value indicating the frequency of the logging
+        :param framing: the framing requested from the game (one of the values defined in the Framing class)
+        :param binary_states: if True then the game is asked to send the states as raw bytes
+        :param codecs: the names of the codecs requested from the game in the order of preference
+        :param no_delay: if True then Nagle's algorithm is disabled (TCP_NODELAY)
+        :param receive_buffer_size: the size of the receive buffer of the socket (SO_RCVBUF), system default if None
+        :param send_buffer_size: the size of the send buffer of the socket (SO_SNDBUF), system default if None
+        :param delta_states: if True then the game is asked to send only the changes of the states
+        :param compression: the name of the compressor requested from the game (eg. zlib), no compression if None
+        :param compression_threshold: the minimal size of the compressed messages in bytes
+        :param receive_policy: the policy of the queue of the received messages (see ReceivePolicy)
+        :param max_queued_messages: the maximal number of the queued messages, ignored with the keep all policy
+        :return: Communicator class initiated with the TCP connection
+        """
+        tcp_connection = TCPConnection(ip, port, buffer_size, verbose, no_delay, receive_buffer_size, send_buffer_size)
+        return cls(tcp_connection, verbose, framing, binary_states, codecs, delta_states,
+                   compression, compression_threshold, receive_policy, max_queued_messages)
+
+    @classmethod
+    def with_unix_socket_connection(cls, path: str, buffer_size=4096, verbose=None, framing=None,
+                                    binary_states=False, codecs: Iterable[str] = None,
+                                    receive_buffer_size: int = None, send_buffer_size: int = None,
+                                    delta_states=False, compression: str = None, compression_threshold: int = 1024,
+                                    receive_policy: str = ReceivePolicy.BLOCK_SENDER, max_queued_messages: int = 1024):
+        """
+        Creates Communicator class with the connection using the Unix domain socket.
+        The game must run on the same host.
+
+        :param path: the path of the socket the game listens on
+        :param buffer_size: the initial buffer size of the connection, the buffer grows with the messages
+        :param verbose: the value indicating the frequency of the logging
+        :param framing: the framing requested from the game (one of the values defined in the Framing class)
+        :param binary_states: if True then the game is asked to send the states as raw bytes
+        :param codecs: the names of the codecs requested from the game in the order of preference
+        :param receive_buffer_size: the size of the receive buffer of the socket (SO_RCVBUF), system default if None
+        :param send_buffer_size: the size of the send buffer of the socket (SO_SNDBUF), system default if None
+        :param delta_states: if True then the game is asked to send only the changes of the states
+        :param compression: the name of the compressor requested from the game (eg. zlib), no compression if None
+        :param compression_threshold: the minimal size of the compressed messages in bytes
+        :param receive_policy: the policy of the queue of the received messages (see ReceivePolicy)
+        :param max_queued_messages: the maximal number of the queued messages, ignored with the keep all policy
+        :return: Communicator class initiated with the Unix domain socket connection
+        """
+        connection = TCPConnection.with_unix_socket(path, buffer_size, verbose, receive_buffer_size, send_buffer_size)
+        return cls(connection, verbose, framing, binary_states, codecs, delta_states,
+                   compression, compression_threshold, receive_policy, max_queued_messages)
+
+    @classmethod
+    def with_pipe_connection(cls, connection, verbose=None):
+        """
+        Creates Communicator class with the pipe connection.
+
+        :param connection: the pipe connection
+        :param verbose: the value indicating the frequency of the logging
+        :return: Communicator class initiated with the pipe connection
+        """
+        def connect(): pass
+        connection.connect = connect
+        return cls(connection, verbose)
+
+    @classmethod
+    def with_shared_memory_connection(cls, connection, verbose=None, framing=None, binary_states=False,
+                                      codecs: Iterable[str] = None, delta_states=False,
+                                      compression: str = None, compression_threshold: int = 1024,
+                                      receive_policy: str = ReceivePolicy.BLOCK_SENDER, max_queued_messages: int = 1024):
+        """
+        Creates Communicator class with the shared memory connection. The game must run on the same host.
+
+        :param connection: the SharedMemoryConnection used by the Training Module
+        :param verbose: the value indicating the frequency of the logging
+        :param framing: the framing requested from the game (one of the values defined in the Framing class)
+        :param binary_states: if True then the game is asked to send the states as raw bytes
+        :param codecs: the names of the codecs requested from the game in the order of preference
+        :param delta_states: if True then the game is asked to send only the changes of the states
+        :param compression: the name of the compressor requested from the game (eg. zlib), no compression if None
+        :param compression_threshold: the minimal size of the compressed messages in bytes
+        :param receive_policy: the policy of the queue of the received messages (see ReceivePolicy)
+        :param max_queued_messages: the maximal number of the queued messages, ignored with the keep all policy
+        :return: Communicator class initiated with the shared memory connection
+        """
+        return cls(connection, verbose, framing, binary_states, codecs, delta_states,
+                   compression, compression_threshold, receive_policy, max_queued_messages)
+
+    def __init__(self, connection, verbose=None, framing=None, binary_states=False, codecs: Iterable[str] = None,
+                 delta_states=False, compression: str = None, compression_threshold: int = 1024,
+                 receive_policy: str = ReceivePolicy.BLOCK_SENDER, max_queued_messages: int = 1024):
+        """
+        Initializes the Communicator class with the connection.
+
+        :param connection: the connection used by the Communicator
+        :param verbose: the value indicating the frequency of the logging
+        :param framing: the framing requested from the game (one of the values defined in the Framing class)
+        :param binary_states: if True then the game is asked to send the states as raw bytes
+        :param codecs: the names of the codecs requested from the game in the order of preference
+        :param delta_states: if True then the game is asked to send only the changes of the states
+        :param compression: the name of the compressor requested from the game (eg. zlib), no compression if None
+        :param compression_threshold: the minimal size of the compressed messages in bytes
+        :param receive_policy: the policy of the queue of the received messages (see ReceivePolicy)
+        :param max_queued_messages: the maximal number of the queued messages, ignored with the keep all policy
+        """
+        protocol = MessageProtocol(framing, binary_states, codecs, delta_states,
+                                   compression, compression_threshold, verbose)
+        super(Communicator, self).__init__(connection, verbose, protocol, receive_policy, max_queued_messages)
+
+    def connect(self, instances: int = None):
+        """
+        Connects to the game and sends the connect message.
+
+        :param instances: the number of instances of the environment requested from the game, the game is not
+            asked to run a batch of the environments if None
+        """
+        super(Communicator, self).connect()
+        self.send(self._protocol.connect_message(instances))
+
+    def send_start(self, players, options=None, instances: Iterable[int] = None):
+        """
+        Sends start message to the game. Options dictionary can optionally be provided to be sent
+        as a part of the start message.
+
+        :param players: a number of players that will be simultaneously interacting with the game
+        :param options: an optional dictionary of options sent to the game
+        :param instances: the indices of the instances of the environment to be started, all instances
+            are started if None
+        """
+        self.send(self._protocol.start_message(players, options, instances))
+
+    def send_stop(self):
+        """
+        Sends stop message to the game that will stop current episode.
+        """
+        self.send(self._protocol.stop_message())
+
+    def send_actions(self, actions, reset: Iterable[int] = None):
+        """
+        Sends actions selected by the algorithms reacting to the state of the environment to the game.
+
+        :param actions: a list of actions selected by the agents, or a list of such lists for each instance
+            of the environment
+        :param reset: the indices of the instances of the environment to be restarted instead of performing
+            the actions
+        """
+        self.send(self._protocol.actions_message(actions, reset))
+
+    def _report_disconnected(self):
+        super(Communicator, self)._report_disconnected()
+        self._messages.put(DISCONNECTED_MESSAGE, block=False)
+
+
+class AsyncCommunicator:
+    """
+    The class representing the communication between the Training Module and the game engine Plugin built
+    on the asyncio streams. No separate thread is used - the data is received when get_messages coroutine
+    is awaited, so a single event loop can drive the communication with many games.
+    The messages are encoded and decoded in the same way as in the Communicator class.
+    """
+
+    def __init__(self, ip: str = '127.0.0.1', port: int = 6666, buffer_size: int = 65536, verbose=None,
+                 framing=None, binary_states=False, codecs: Iterable[str] = None, delta_states=False,
+                 compression: str = None, compression_threshold: int = 1024):
+        """
+        Initializes the communicator with the address of the game and the options requested from the game.
+
+        :param ip: a string representing IP address of the game
+        :param port: a port of the TCP connection as an integer
+        :param buffer_size: the maximal number of bytes read from the stream at once
+        :param verbose: the value indicating the frequency of the logging
+        :param framing: the framing requested from the game (one of the values defined in the Framing class)
+        :param binary_states: if True then the game is asked to send the states as raw bytes
+        :param codecs: the names of the codecs requested from the game in the order of preference
+        :param delta_states: if True then the game is asked to send only the changes of the states
+        :param compression: the name of the compressor requested from the game (eg. zlib), no compression if None
+        :param compression_threshold: the minimal size of the compressed messages in bytes
+        """
+        self._ip = ip
+        self._port = port
+        self._buffer_size = buffer_size
+        self._verbose = verbose
+        self._protocol = MessageProtocol(framing, binary_states, codecs, delta_states,
+                                         compression, compression_threshold, verbose)
+
+        self._reader = None
+        self._writer = None
+        self._connected = False
+
+    async def connect(self):
+        """
+        Opens the connection with the game and sends the connect message.
+        """
+        self._protocol.reset()
+        self._reader, self._writer = await asyncio.open_connection(self._ip, self._port)
+        self._connected = True
+        await self.send(self._protocol.connect_message())
+
+    async def disconnect(self):
+        """
+        Closes the connection with the game.
+        """
+        self._connected = False
+        if self._writer is None:
+            return
+
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+
+    async def send(self, message):
+        """
+        Sends the message to the game. Message is a dictionary encoded according to the negotiated protocol.
+        Requires the connection to be connected.
+
+        :param message: a string keyed dictionary representing a message to be sent
+        """
+        log(f'Communication sending message: {message}', self._verbose, 3)
+        assert self._connected, 'Connection not established.'
+        self._writer.write(self._protocol.encode(message))
+        await self._writer.drain()
+
+    async def get_messages(self):
+        """
+        Receives the data from the game until at least one message is fully received.
+        If the connection is closed by the game, the disconnected message is returned.
+
+        :return: a list of messages as a dictionaries
+        """
+        messages = []
+        while not messages:
+            try:
+                data = await self._reader.read(self._buffer_size)
+            except (ConnectionResetError, ConnectionAbortedError):
+                data = b''
+
+            if not data:
+                log(f'Communication disconnected', self._verbose, level=1)
+                self._connected = False
+                return [DISCONNECTED_MESSAGE]
+
+            messages = self._protocol.decode(data)
+
+        log(f'Communication receiving messages: {messages}', self._verbose, 3)
+        return messages
+
+    async def send_start(self, players, options=None):
+        """
+        Sends start message to the game. Options dictionary can optionally be provided to be sent
+        as a part of the start message.
+
+        :param players: a number of players that will be simultaneously interacting with the game
+        :param options: an optional dictionary of options sent to the game
+        """
+        await self.send(self._protocol.start_message(players, options))
+
+    async def send_stop(self):
+        """
+        Sends stop message to the game that will stop current episode.
+        """
+        await self.send(self._protocol.stop_message())
+
+    async def send_actions(self, actions):
+        """
+        Sends actions selected by the algorithms reacting to the state of the environment to the game.
+
+        :param actions: a list of actions selected by the agents
+        """
+        await self.send(self._protocol.actions_message(actions))
+
+    @property
+    def connected(self):
+        """
+        Returns if the communication is connected.
+
+        :return: bool value representing if the communication is connected
+        """
+        return self._connected
+
+    @property
+    def framing(self):
+        """
+        Returns the framing of the messages currently in use.
+
+        :return: one of the values defined in the Framing class
+        """
+        return self._protocol.framing
+
+    @property
+    def codec(self) -> str:
+        """
+        Returns the name of the codec currently in use.
+
+        :return: the name of the codec
+        """
+        return self._protocol.codec
+
+    @property
+    def compression(self) -> str:
+        """
+        Returns the name of the compressor currently in use.
+
+        :return: the name of the compressor or None if the messages are not compressed
+        """
+        return self._protocol.compression
+
+    @property
+    def profiler(self) -> Profiler:
+        """
+        Returns the profiler recording the durations of decoding the received messages.
+
+        :return: a Profiler object
+        """
+        return self._protocol.profiler
+
+    @profiler.setter
+    def profiler(self, profiler: Profiler):
+        self._protocol.profiler = profiler
+
+    @property
+    def byte_counters(self) -> ByteCounters:
+        """
+        Returns the counters of the bytes sent and received since the connection. The counters show
+        the sizes of the messages before and after compression.
+
+        :return: a ByteCounters object
+        """
+        return self._protocol.byte_counters
+
+    @property
+    def binary_states(self) -> bool:
+        """
+        Returns if the game confirmed sending the states as raw bytes.
+
+        :return: True if the states are sent as raw bytes, False otherwise
+        """
+        return self._protocol.binary_states
+
+    @property
+    def delta_states(self) -> bool:
+        """
+        Returns if the game confirmed sending only the changes of the states.
+
+        :return: True if the changes of the states are sent, False otherwise
+        """
+        return self._protocol.delta_states
+
 
-class Communicator(BaseCommunication):
+class SelectorCommunicator:
     """
-    The class representing the communication between the Training Module and the game engine Plugin.
-    It must be initiated with the connection and two class methods are provided to construct this object
-    with TCP and Pipe connection. TCP connection is used by default in the framework.
-    The messages can be sent by the methods provided by this class.
+    The class representing the communication with a number of games. The sockets of all games are multiplexed
+    by a single selector in the calling thread - no separate threads are used and the data is received only
+    when the get_messages method is invoked. The messages are sent to all games before waiting for any response,
+    so the games advance concurrently. Each game negotiates the protocol separately but the same options
+    are requested from all games. The games are identified by the indices of their endpoints.
     """
 
-    @classmethod
-    def with_tcp_connection(cls, ip: str = '127.0.0.1', port: int = 6666, buffer_size=1024, verbose=None):
+    def __init__(self, endpoints: Iterable[Tuple[str, int]], buffer_size: int = 65536, verbose=None,
+                 framing=None, binary_states=False, codecs: Iterable[str] = None, delta_states=False,
+                 compression: str = None, compression_threshold: int = 1024):
         """
-        Creates Communicator class with the TCP connection.
+        Initializes the communicator with the addresses of the games and the options requested from the games.
 
-        :param ip: a string representing IP address of the game
-        :param port: a port of the TCP connection as an integer
-        :param buffer_size: the buffer size of the TCP connection
+        :param endpoints: an iterable of tuples consisting of the IP address and the port of each game
+        :param buffer_size: the maximal number of bytes read from a socket at once
         :param verbose: the value indicating the frequency of the logging
-        :return: Communicator class initiated with the TCP connection
+        :param framing: the framing requested from the games (one of the values defined in the Framing class)
+        :param binary_states: if True then the games are asked to send the states as raw bytes
+        :param codecs: the names of the codecs requested from the games in the order of preference
+        :param delta_states: if True then the games are asked to send only the changes of the states
+        :param compression: the name of the compressor requested from the games (eg. zlib), no compression if None
+        :param compression_threshold: the minimal size of the compressed messages in bytes
         """
-        tcp_connection = TCPConnection(ip, port, buffer_size, verbose)
-        return cls(tcp_connection, verbose)
+        self._endpoints = [tuple(endpoint) for endpoint in endpoints]
+        assert self._endpoints, 'At least one endpoint must be provided.'
+        self._verbose = verbose
+        self._protocols = [MessageProtocol(framing, binary_states, codecs, delta_states,
+                                           compression, compression_threshold, verbose)
+                           for __ in self._endpoints]
 
-    @classmethod
-    def with_pipe_connection(cls, connection, verbose=None):
+        self._buffer = memoryview(bytearray(buffer_size))
+        self._selector = None
+        self._sockets = [None] * len(self._endpoints)
+
+    def connect(self, instances: int = None):
         """
-        Creates Communicator class with the pipe connection.
+        Opens the connections with all games and sends the connect messages.
 
-        :param connection: the pipe connection
-        :param verbose: the value indicating the frequency of the logging
-        :return: Communicator class initiated with the pipe connection
+        :param instances: the number of instances of the environment requested from each game
         """
-        def connect(): pass
-        connection.connect = connect
-        return cls(connection, verbose)
+        self._selector = selectors.DefaultSelector()
+        for index, (ip, port) in enumerate(self._endpoints):
+            self._protocols[index].reset()
+            connected_socket = socket.create_connection((ip, port))
+            connected_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._selector.register(connected_socket, selectors.EVENT_READ, index)
+            self._sockets[index] = connected_socket
+
+        for index, protocol in enumerate(self._protocols):
+            self.send(index, protocol.connect_message(instances))
 
-    def __init__(self, connection, verbose=None):
+    def disconnect(self):
         """
-        Initializes the Communicator class with the connection.
+        Closes the connections with all games.
+        """
+        for index, connected_socket in enumerate(self._sockets):
+            if connected_socket is not None:
+                self._close(index)
 
-        :param connection: the connection used by the Communicator
-        :param verbose: the value indicating the frequency of the logging
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+
+    def send(self, index: int, message):
         """
-        super(Communicator, self).__init__(connection, verbose)
+        Sends the message to the game. Message is a dictionary encoded according to the protocol negotiated
+        with the game. Requires the connection with the game to be connected.
 
-    def connect(self):
-        super(Communicator, self).connect()
-        connect_message = {'type': OutgoingMessageTypes.CONNECT}
-        self.send(connect_message)
+        :param index: the index of the game
+        :param message: a string keyed dictionary representing a message to be sent
+        """
+        log(f'Communication sending message to game {index}: {message}', self._verbose, 3)
+        assert self._sockets[index] is not None, f'Connection with game {index} not established.'
+        self._sockets[index].sendall(self._protocols[index].encode(message))
+
+    def get_messages(self, timeout: float = None) -> Dict[int, List[dict]]:
+        """
+        Waits until at least one message is fully received from any game and returns the messages received
+        from all games that are ready. If the connection is closed by a game, the disconnected message
+        is returned for the game.
 
-    def send_start(self, players, options=None):
+        :param timeout: the maximal time of waiting in seconds, waits without limit if None
+        :return: a dictionary with the lists of messages keyed by the indices of the games, empty on timeout
+        """
+        messages = {}
+        while not messages:
+            assert self._selector is not None and self._selector.get_map(), 'No connection established.'
+            events = self._selector.select(timeout)
+            for key, __ in events:
+                index = key.data
+                try:
+                    received = key.fileobj.recv_into(self._buffer)
+                except (ConnectionResetError, ConnectionAbortedError):
+                    received = 0
+
+                if received == 0:
+                    log(f'Communication with game {index} disconnected', self._verbose, level=1)
+                    self._close(index)
+                    messages[index] = [DISCONNECTED_MESSAGE]
+                    continue
+
+                game_messages = self._protocols[index].decode(self._buffer[:received])
+                if game_messages:
+                    messages[index] = game_messages
+
+            if timeout is not None:
+                break
+
+        log(f'Communication receiving messages: {messages}', self._verbose, 3)
+        return messages
+
+    def send_start(self, index: int, players, options=None):
         """
         Sends start message to the game. Options dictionary can optionally be provided to be sent
         as a part of the start message.
 
+        :param index: the index of the game
         :param players: a number of players that will be simultaneously interacting with the game
         :param options: an optional dictionary of options sent to the game
         """
-        start_message = {'type': OutgoingMessageTypes.START,
-                         'players': players,
-                         'options': options}
-        self.send(start_message)
+        self.send(index, self._protocols[index].start_message(players, options))
 
-    def send_stop(self):
+    def send_stop(self, index: int):
         """
         Sends stop message to the game that will stop current episode.
+
+        :param index: the index of the game
         """
-        start_message = {'type': OutgoingMessageTypes.STOP}
-        self._connection.send(json.dumps(start_message))
+        self.send(index, self._protocols[index].stop_message())
 
-    def send_actions(self, actions):
+    def send_actions(self, index: int, actions):
         """
         Sends actions selected by the algorithms reacting to the state of the environment to the game.
 
+        :param index: the index of the game
         :param actions: a list of actions selected by the agents
         """
-        action_message = {'type': OutgoingMessageTypes.ACTION,
-                          'actions': list(actions)}
-        self.send(action_message)
+        self.send(index, self._protocols[index].actions_message(actions))
 
-    def _report_disconnected(self):
-        super(Communicator, self)._report_disconnected()
-        self._messages.put(DISCONNECTED_MESSAGE_JSON)
+    def _close(self, index: int):
+        """
+        Unregisters and closes the socket of the game.
+
+        :param index: the index of the game
+        """
+        connected_socket, self._sockets[index] = self._sockets[index], None
+        if self._selector is not None:
+            self._selector.unregister(connected_socket)
+        try:
+            connected_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        connected_socket.close()
+
+    @property
+    def num_endpoints(self) -> int:
+        """
+        Returns the number of the games.
+
+        :return: the number of the endpoints
+        """
+        return len(self._endpoints)
+
+    @property
+    def connected(self) -> List[bool]:
+        """
+        Returns if the connections with the games are connected.
+
+        :return: a list of bool values for each game
+        """
+        return [connected_socket is not None for connected_socket in self._sockets]
+
+    @property
+    def profiler(self) -> Profiler:
+        """
+        Returns the profiler recording the durations of decoding the messages received from the games.
+
+        :return: a Profiler object
+        """
+        return self._protocols[0].profiler
+
+    @profiler.setter
+    def profiler(self, profiler: Profiler):
+        for protocol in self._protocols:
+            protocol.profiler = profiler
+
+    @property
+    def byte_counters(self) -> List[ByteCounters]:
+        """
+        Returns the counters of the bytes sent to and received from each game.
+
+        :return: a list of ByteCounters objects
+        """
+        return [protocol.byte_counters for protocol in self._protocols]
 
 
 class TCPConnection:
     """
-    The class representing TCP or socket connection.
+    The class representing TCP or socket connection. Unix domain socket can be used instead of TCP
+    if the game runs on the same host (see with_unix_socket class method).
+    The data is received into a reusable buffer that grows when the received messages do not fit in it,
+    up to the maximal size. Nagle's algorithm is disabled by default (TCP_NODELAY) so small messages,
+    like actions, are sent without delay. The sizes of the socket buffers can be configured.
     """
-    def __init__(self, ip: str, port: int, buffer_size: int = 4096, verbose=None):
+
+    MAX_BUFFER_SIZE = 1 << 24
+
+    @classmethod
+    def from_socket(cls, connected_socket: socket.socket, buffer_size: int = 4096, verbose=None,
+                    no_delay: bool = True):
+        """
+        Creates the connection using already connected socket (eg. accepted by the server).
+
+        :param connected_socket: a connected socket
+        :param buffer_size: an initial size of the buffer
+        :param verbose: the value representing the frequency of the logging
+        :param no_delay: if True then Nagle's algorithm is disabled for TCP sockets
+        :return: TCPConnection class initiated with the socket
+        """
+        if connected_socket.family == socket.AF_UNIX:
+            connection = cls(None, None, buffer_size, verbose, no_delay, path=connected_socket.getsockname())
+        else:
+            ip, port = connected_socket.getpeername()[:2]
+            connection = cls(ip, port, buffer_size, verbose, no_delay)
+        connection._configure(connected_socket)
+        connection._socket = connected_socket
+        connection._connected = True
+        return connection
+
+    @classmethod
+    def with_unix_socket(cls, path: str, buffer_size: int = 4096, verbose=None,
+                         receive_buffer_size: int = None, send_buffer_size: int = None):
+        """
+        Creates the connection using the Unix domain socket.
+
+        :param path: the path of the socket
+        :param buffer_size: an initial size of the buffer
+        :param verbose: the value representing the frequency of the logging
+        :param receive_buffer_size: the size of the receive buffer of the socket (SO_RCVBUF), system default if None
+        :param send_buffer_size: the size of the send buffer of the socket (SO_SNDBUF), system default if None
+        :return: TCPConnection class using the Unix domain socket
+        """
+        return cls(None, None, buffer_size, verbose, receive_buffer_size=receive_buffer_size,
+                   send_buffer_size=send_buffer_size, path=path)
+
+    def __init__(self, ip: str, port: int, buffer_size: int = 4096, verbose=None, no_delay: bool = True,
+                 receive_buffer_size: int = None, send_buffer_size: int = None, path: str = None):
         """
         Initiates the TCP Connection with the IP address, port and buffer size.
 
         :param ip: a string representing the IP address
         :param port: a port number
-        :param buffer_size: a size of the buffer
+        :param buffer_size: an initial size of the buffer
         :param verbose: the value representing the frequency of the logging
+        :param no_delay: if True then Nagle's algorithm is disabled (TCP_NODELAY)
+        :param receive_buffer_size: the size of the receive buffer of the socket (SO_RCVBUF), system default if None
+        :param send_buffer_size: the size of the send buffer of the socket (SO_SNDBUF), system default if None
+        :param path: the path of the Unix domain socket used instead of the IP address and port
         """
         self._ip = ip
         self._port = port
+        self._path = path
         self._buffer_size = buffer_size
         self._verbose = verbose
+        self._no_delay = no_delay
+        self._receive_buffer_size = receive_buffer_size
+        self._send_buffer_size = send_buffer_size
 
         self._socket = None
         self._connected = False
+        self._connected_event = threading.Event()
+        self._closed = False
+        self._buffer = memoryview(bytearray(buffer_size))
+        self._text_decoder = getincrementaldecoder('UTF-8')()
 
     def connect(self):
         """
-        Connects the socket using IP address and port provided in the constructor.
+        Connects the socket using IP address and port (or the path) provided in the constructor.
         """
-        self._socket = socket.socket()
-        self._socket.connect((self._ip, self._port))
+        self._closed = False
+        self._text_decoder.reset()
+        if self._path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._configure(self._socket)
+            self._socket.connect(self._path)
+        else:
+            self._socket = socket.socket()
+            self._configure(self._socket)
+            self._socket.connect((self._ip, self._port))
         self._socket.setblocking(True)
         self._connected = True
+        self._connected_event.set()
+
+    def _configure(self, configured_socket: socket.socket):
+        """
+        Sets the options of the socket requested in the constructor.
+
+        :param configured_socket: a socket to be configured
+        """
+        if self._no_delay and configured_socket.family in (socket.AF_INET, socket.AF_INET6):
+            configured_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self._receive_buffer_size is not None:
+            configured_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self._receive_buffer_size)
+        if self._send_buffer_size is not None:
+            configured_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self._send_buffer_size)
 
     def recv(self) -> str:
         """
         Receives the string message from the socket. Waits (blocking) if not connected.
-        Can throw Disconnected error.
+        The bytes are decoded incrementally so the characters split between the received chunks are kept
+        until completed. Can throw Disconnected error.
 
         :return: the received message as a string
         """
+        return self._text_decoder.decode(self.recv_bytes())
+
+    def recv_bytes(self) -> memoryview:
+        """
+        Receives the bytes from the socket into the reusable buffer. Waits (blocking) if not connected.
+        The returned memoryview is valid only until the next invocation of this method. If the received bytes
+        fill the buffer, the buffer is doubled for the next invocation.
+        Can throw Disconnected error, also if the connection was closed while waiting.
+
+        :return: the memoryview of the received bytes
+        """
         while not self._connected:
-            # print(f'TCP connection, recv(), connected: {self._connected}')
-            pass
+            if self._closed:
+                raise Disconnected()
+            self._connected_event.wait(0.1)
+
+        buffer = self._buffer
+        connected_socket = self._socket
+        if connected_socket is None:
+            self._connected = False
+            raise Disconnected()
 
         try:
-            message = self._socket.recv(self._buffer_size)
-            if message is None or message == b'':
+            received = connected_socket.recv_into(buffer)
+            if received == 0:
                 log(f'TCP Connection disconnected', self._verbose, level=1)
                 self._socket = None
                 self._connected = False
                 raise Disconnected()
 
-        except (ConnectionResetError, ConnectionAbortedError):
+        except (ConnectionResetError, ConnectionAbortedError, OSError):
             log(f'TCP Connection disconnected', self._verbose, level=1)
             self._socket = None
             self._connected = False
             raise Disconnected()
 
-        else:
-            return message.decode('UTF-8')
+        if received == len(buffer) and len(buffer) < self.MAX_BUFFER_SIZE:
+            self._buffer = memoryview(bytearray(min(2 * len(buffer), self.MAX_BUFFER_SIZE)))
+            log(f'TCP Connection buffer enlarged to {len(self._buffer)} bytes', self._verbose, level=3)
+        return buffer[:received]
 
     def send(self, message: str):
         """
@@ -352,14 +1902,35 @@ class TCPConnection:
 
         :param message: a message as a string
         """
-        self._socket.send(message.encode('UTF-8'))
+        self.send_bytes(message.encode('UTF-8'))
+
+    def send_bytes(self, data: bytes):
+        """
+        Sends all the bytes. Can throw Disconnected error if the connection is closed.
+
+        :param data: bytes to be sent
+        """
+        connected_socket = self._socket
+        if connected_socket is None:
+            raise Disconnected()
+        connected_socket.sendall(data)
 
     def close(self):
         """
-        Closes the socket.
+        Closes the socket. The socket is shut down first so the thread waiting for the data is released.
         """
+        self._closed = True
         self._connected = False
-        self._socket.close()
+        self._connected_event.set()
+        connected_socket, self._socket = self._socket, None
+        if connected_socket is None:
+            return
+
+        try:
+            connected_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        connected_socket.close()
 
     @property
     def connected(self):
@@ -370,6 +1941,24 @@ class TCPConnection:
         """
         return self._connected
 
+    @property
+    def socket(self) -> socket.socket:
+        """
+        Returns the connected socket (eg. to inspect its options), None if the connection is not connected.
+
+        :return: the connected socket or None
+        """
+        return self._socket
+
+    @property
+    def buffer_size(self) -> int:
+        """
+        Returns the current size of the reusable receive buffer, which grows with the received messages.
+
+        :return: the size of the buffer in bytes
+        """
+        return len(self._buffer)
+
 
 class PipeConnectionWrapper:
     """
@@ -398,6 +1987,14 @@ class PipeConnectionWrapper:
         """
         return self._connection.recv()
 
+    def recv_bytes(self) -> bytes:
+        """
+        Receives the bytes from the pipe.
+
+        :return: bytes received from the pipe
+        """
+        return self._connection.recv_bytes()
+
     def send(self, message: str):
         """
         Sends the string message through the pipe.
@@ -406,6 +2003,14 @@ class PipeConnectionWrapper:
         """
         self._connection.send(message)
 
+    def send_bytes(self, data: bytes):
+        """
+        Sends the bytes through the pipe.
+
+        :param data: bytes to be sent
+        """
+        self._connection.send_bytes(data)
+
     def close(self):
         """
         Closes the pipe.
@@ -421,3 +2026,336 @@ class PipeConnectionWrapper:
         :return: bool value indicating if the socket is connected
         """
         return self._connected
+
+
+class SharedMemoryRing:
+    """
+    The class representing the ring buffer of bytes placed in the shared memory. It is written by one process
+    and read by another one. The positions of writing and reading are stored in the header of the shared memory
+    and the data is copied directly to and from the shared memory, so no system calls are needed while the data
+    is flowing. The semaphores are used only when one of the sides must wait for the data or for the free space,
+    and they are released only if the other side announced the waiting in the header. The waiting side wakes up
+    periodically to check the header, so the notification is never lost.
+    The shared memory block stays mapped after the ring buffer is closed, so the data written before closing
+    can still be read, until the release method unmaps it.
+    """
+
+    POSITION = struct.Struct('=Q')
+    HEAD_OFFSET = 0
+    TAIL_OFFSET = 8
+    CLOSED_OFFSET = 16
+    READER_WAITING_OFFSET = 17
+    WRITER_WAITING_OFFSET = 18
+    DATA_OFFSET = 64
+    WAIT_TIMEOUT = 0.05
+
+    def __init__(self, size: int = 1 << 20, name: str = None, data_ready=None, space_ready=None):
+        """
+        Creates the ring buffer in the new shared memory block or attaches to the existing block if the name
+        is provided.
+
+        :param size: the number of bytes that can be stored in the ring buffer
+        :param name: the name of the existing shared memory block
+        :param data_ready: the semaphore signalling the written data, created if not provided
+        :param space_ready: the semaphore signalling the free space, created if not provided
+        """
+        self._size = size
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=self.DATA_OFFSET + size)
+            self._memory.buf[:self.DATA_OFFSET] = bytes(self.DATA_OFFSET)
+            self._owner_pid = os.getpid()
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            self._owner_pid = None
+
+        self._name = self._memory.name
+        self._buffer = self._memory.buf
+        self._data_ready = data_ready if data_ready is not None else multiprocessing.Semaphore(0)
+        self._space_ready = space_ready if space_ready is not None else multiprocessing.Semaphore(0)
+        self._condition = threading.Condition()
+        self._active = 0
+
+    def __reduce__(self):
+        return self.__class__, (self._size, self._name, self._data_ready, self._space_ready)
+
+    def write(self, data):
+        """
+        Writes all the bytes to the ring buffer. Waits (blocking) for the free space if the buffer is full.
+        Can throw Disconnected error if the ring buffer is closed.
+
+        :param data: bytes or an object supporting the buffer protocol
+        """
+        self._enter()
+        try:
+            self._write(data)
+        finally:
+            self._exit()
+
+    def _write(self, data):
+        """
+        Writes all the bytes to the ring buffer. Must be invoked between _enter and _exit.
+
+        :param data: bytes or an object supporting the buffer protocol
+        """
+        if self.closed:
+            raise Disconnected()
+
+        view = memoryview(data).cast('B')
+        written = 0
+        while written < len(view):
+            head, tail = self._positions()
+            free = self._size - (head - tail)
+            if free == 0:
+                self._wait(self._space_ready, self.WRITER_WAITING_OFFSET, lambda: self._positions()[1] != tail)
+                continue
+
+            length = min(free, len(view) - written)
+            start = head % self._size
+            first = min(length, self._size - start)
+            data_start = self.DATA_OFFSET + start
+            self._buffer[data_start:data_start + first] = view[written:written + first]
+            if length > first:
+                self._buffer[self.DATA_OFFSET:self.DATA_OFFSET + length - first] = view[written + first:written + length]
+
+            self.POSITION.pack_into(self._buffer, self.HEAD_OFFSET, head + length)
+            written += length
+            self._notify(self._data_ready, self.READER_WAITING_OFFSET)
+
+    def read(self) -> bytes:
+        """
+        Reads all the bytes available in the ring buffer. Waits (blocking) if the buffer is empty.
+        Can throw Disconnected error if the ring buffer is closed and empty.
+
+        :return: the read bytes
+        """
+        self._enter()
+        try:
+            return self._read()
+        finally:
+            self._exit()
+
+    def _read(self) -> bytes:
+        """
+        Reads all the bytes available in the ring buffer. Must be invoked between _enter and _exit.
+
+        :return: the read bytes
+        """
+        while True:
+            head, tail = self._positions()
+            if head != tail:
+                break
+            self._wait(self._data_ready, self.READER_WAITING_OFFSET, lambda: self._positions()[0] != head)
+
+        start = tail % self._size
+        end = start + head - tail
+        data_start = self.DATA_OFFSET + start
+        if end <= self._size:
+            data = bytes(self._buffer[data_start:data_start + end - start])
+        else:
+            data = b''.join((self._buffer[data_start:self.DATA_OFFSET + self._size],
+                             self._buffer[self.DATA_OFFSET:self.DATA_OFFSET + end - self._size]))
+
+        self.POSITION.pack_into(self._buffer, self.TAIL_OFFSET, head)
+        self._notify(self._space_ready, self.WRITER_WAITING_OFFSET)
+        return data
+
+    def close(self):
+        """
+        Marks the ring buffer as closed and wakes up both sides. The shared memory block is unlinked
+        by the process that created it. Ignored if the ring buffer has been released.
+        """
+        with self._condition:
+            if self._memory is None:
+                return
+
+            self._buffer[self.CLOSED_OFFSET] = 1
+            self._data_ready.release()
+            self._space_ready.release()
+            if self._owner_pid == os.getpid():
+                self._owner_pid = None
+                self._memory.unlink()
+
+    def release(self):
+        """
+        Closes the ring buffer and unmaps the shared memory block in this process. Waits until the threads reading
+        from and writing to the ring buffer are woken up by closing and leave it. The reading and writing
+        throw Disconnected error after the ring buffer is released.
+        """
+        self.close()
+        with self._condition:
+            if self._memory is None:
+                return
+
+            self._condition.wait_for(lambda: self._active == 0)
+            memory, self._memory = self._memory, None
+            self._buffer = None
+            memory.close()
+
+    def _enter(self):
+        """
+        Marks the start of reading or writing, so the shared memory block is not unmapped in the meantime.
+        Throws Disconnected error if the ring buffer has been released.
+        """
+        with self._condition:
+            if self._memory is None:
+                raise Disconnected()
+            self._active += 1
+
+    def _exit(self):
+        """
+        Marks the end of reading or writing and wakes up the thread waiting to release the ring buffer.
+        """
+        with self._condition:
+            self._active -= 1
+            if self._active == 0:
+                self._condition.notify_all()
+
+    def _positions(self) -> Tuple[int, int]:
+        """
+        Returns the positions of writing (head) and reading (tail) counted from the creation of the buffer.
+
+        :return: a tuple consisting of the head and the tail
+        """
+        return (self.POSITION.unpack_from(self._buffer, self.HEAD_OFFSET)[0],
+                self.POSITION.unpack_from(self._buffer, self.TAIL_OFFSET)[0])
+
+    def _wait(self, semaphore, waiting_offset: int, changed):
+        """
+        Announces the waiting in the header and waits until the other side releases the semaphore.
+        The waiting is skipped if the condition changed after the announcement.
+
+        :param semaphore: the semaphore released by the other side
+        :param waiting_offset: the offset of the waiting flag in the header
+        :param changed: a function returning True if the awaited condition has already changed
+        """
+        if self.closed:
+            raise Disconnected()
+
+        self._buffer[waiting_offset] = 1
+        if not changed():
+            semaphore.acquire(timeout=self.WAIT_TIMEOUT)
+        self._buffer[waiting_offset] = 0
+
+    def _notify(self, semaphore, waiting_offset: int):
+        """
+        Releases the semaphore if the other side announced the waiting.
+
+        :param semaphore: the semaphore awaited by the other side
+        :param waiting_offset: the offset of the waiting flag in the header
+        """
+        if self._buffer[waiting_offset]:
+            self._buffer[waiting_offset] = 0
+            semaphore.release()
+
+    @property
+    def closed(self) -> bool:
+        """
+        Returns if the ring buffer is closed.
+
+        :return: True if the ring buffer is closed (or released), False otherwise
+        """
+        with self._condition:
+            return self._memory is None or bool(self._buffer[self.CLOSED_OFFSET])
+
+
+class SharedMemoryConnection:
+    """
+    The class representing the connection with the process running on the same host that uses two ring buffers
+    placed in the shared memory: one for each direction. The connections are created in pairs with the pair
+    class method. One of them is used by the Communicator (see Communicator.with_shared_memory_connection)
+    and the other one is passed to the game process (eg. the process started with ezcoach.testing.GameProcess).
+    """
+
+    @classmethod
+    def pair(cls, size: int = 1 << 20, verbose=None):
+        """
+        Creates two connected connections.
+
+        :param size: the size of each ring buffer in bytes
+        :param verbose: the value indicating the frequency of the logging
+        :return: a tuple consisting of the connection of the Training Module and the connection of the game
+        """
+        to_game = SharedMemoryRing(size)
+        from_game = SharedMemoryRing(size)
+        return cls(from_game, to_game, verbose), cls(to_game, from_game, verbose)
+
+    def __init__(self, receive_ring: SharedMemoryRing, send_ring: SharedMemoryRing, verbose=None):
+        """
+        Initializes the connection with the ring buffers.
+
+        :param receive_ring: the ring buffer written by the other side
+        :param send_ring: the ring buffer read by the other side
+        :param verbose: the value indicating the frequency of the logging
+        """
+        self._receive_ring = receive_ring
+        self._send_ring = send_ring
+        self._verbose = verbose
+        self._connected = True
+        self._text_decoder = getincrementaldecoder('UTF-8')()
+
+    def __reduce__(self):
+        return self.__class__, (self._receive_ring, self._send_ring, self._verbose)
+
+    def connect(self):
+        """
+        Empty method for compliance with the interface used by BaseCommunication class.
+        """
+
+    def recv(self) -> str:
+        """
+        Receives the string message from the shared memory. Waits (blocking) if no data is available.
+        Can throw Disconnected error.
+
+        :return: the received message as a string
+        """
+        return self._text_decoder.decode(self.recv_bytes())
+
+    def recv_bytes(self) -> bytes:
+        """
+        Receives the bytes from the shared memory. Waits (blocking) if no data is available.
+        Can throw Disconnected error.
+
+        :return: the received bytes
+        """
+        try:
+            return self._receive_ring.read()
+        except Disconnected:
+            log(f'Shared memory connection disconnected', self._verbose, level=1)
+            self._connected = False
+            raise
+
+    def send(self, message: str):
+        """
+        Sends the string message.
+
+        :param message: a message as a string
+        """
+        self.send_bytes(message.encode('UTF-8'))
+
+    def send_bytes(self, data: bytes):
+        """
+        Sends all the bytes. Can throw Disconnected error.
+
+        :param data: bytes to be sent
+        """
+        self._send_ring.write(data)
+
+    def close(self):
+        """
+        Closes both ring buffers so the other side and the thread waiting for the data are released.
+        Then the shared memory blocks are unmapped in this process.
+        """
+        self._connected = False
+        self._send_ring.close()
+        self._receive_ring.close()
+        self._send_ring.release()
+        self._receive_ring.release()
+
+    @property
+    def connected(self):
+        """
+        Returns if the connection is connected.
+
+        :return: bool value indicating if the connection is connected
+        """
+        return self._connected
@@ -7,19 +7,45 @@ with the agent or a list of agents. Agents must subclass one of the three classe
 * Learner,
 * MultiLearner.
 
-Use train or play methods to conduct training or testing procedures.
+Use train or play methods to conduct training or testing procedures. If the Runner is initialized with
+the AsyncRemoteEnvironment, the train_async and play_async coroutines are used instead, so a number of runners
+can be driven by a single asyncio event loop. The loop is released only while waiting for the games: the callbacks
+of the agents are invoked synchronously on the thread of the loop and block the other runners until they return,
+so the coroutines pay off when the games, not the agents, are the bottleneck. If the Runner is initialized
+with the BatchedRemoteEnvironment, the episodes are played in all instances of the environment in parallel.
+Each instance is operated by its own agents, the agents of the instances other than the first one are created
+with the agent factory provided in the constructor:
+::
+    environment = BatchedRemoteEnvironment(num_instances=4)
+    runner = Runner(RandomAlgorithm(10), environment, agent_factory=lambda instance: RandomAlgorithm(10))
+    runner.train()
+
+The procedures are refused if the game runs more than one instance and the agent factory is not provided
+(see the ezcoach.actor_learner module for the parallel actors feeding a single learner).
+
+The durations of the phases of each step (eg. waiting for the game, decoding the messages, the actions
+of the agents) are recorded during the procedures and are available through the profile property:
+::
+    runner.train()
+    print(runner.profile.summary())
+
+The timeline of the procedures is written to the file if the Tracer is provided in the constructor.
 
 """
 
 import time
 from enum import Enum
-from typing import Union, Iterable, Dict
+from typing import Callable, Union, Iterable, Dict, List
 
 from ezcoach.agent import MultiLearner, Player, Learner
-from ezcoach.distributor import MultiLearnerDistributor, SingleAgentDistributor, AgentListDistributor
-from ezcoach.enviroment import RemoteEnvironment, RemoteEnvironment
+from ezcoach.distributor import BaseDistributor, MultiLearnerDistributor, SingleAgentDistributor, \
+    AgentListDistributor
+from ezcoach.enviroment import RemoteEnvironment, AsyncRemoteEnvironment, BatchedRemoteEnvironment
 from ezcoach.exception import Disconnected
+from ezcoach.isolation import IsolatedPlayer, isolate
 from ezcoach.log import log
+from ezcoach.profiling import Phases, Profiler
+from ezcoach.tracing import Tracer
 
 
 class Mode(Enum):
@@ -60,15 +86,21 @@ class Runner:
     Adapters for states, actions and rewards can be provided as a callable of a list of callables.
     Training procedure is initiated using the train method and testing testing is initiated using the play method.
     Metrics are gathered during both procedures and are available through the metrics property.
+    The latencies of the phases of the steps are available through the profile property.
     """
 
     def __init__(self,
                  agent: Union[Player, Iterable[Player]],
-                 environment: RemoteEnvironment = None,
+                 environment: Union[RemoteEnvironment, AsyncRemoteEnvironment, BatchedRemoteEnvironment] = None,
                  state_adapters=None,
                  action_adapters=None,
                  reward_adapters=None,
-                 verbose=None):
+                 verbose=None,
+                 tracer: Tracer = None,
+                 agent_threads: int = None,
+                 agent_processes: bool = False,
+                 profile: bool = True,
+                 agent_factory: Callable[[int], Union[Player, Iterable[Player]]] = None):
         """
         Initializes the runner with the algorithm or an iterable of algorithms and optionally with the environment.
         If a single agent is provided than a list of agents must be left as None. Similarly if the list of agents
@@ -82,35 +114,80 @@ class Runner:
         :param action_adapters: an iterable of action adapters or a single action adapter
         :param reward_adapters: an iterable of reward adapters or a single reward adapter
         :param verbose: the value representing the frequency of logging
+        :param tracer: the tracer writing the timeline of the procedures (see the ezcoach.tracing module),
+            the timeline is not written if None
+        :param agent_threads: the number of threads invoking the callbacks of the list of agents in parallel
+            (see AgentListDistributor), the callbacks are invoked one after another if None
+        :param agent_processes: if True then each agent of the list is hosted in its own worker process
+            (see the ezcoach.isolation module) and, unless agent_threads is provided, the callbacks of all agents
+            are invoked in parallel; the processes are stopped with the close method or when the runner is used
+            as a context manager and the with block exits; the agents passed to the constructor are not trained,
+            the trained agents are obtained with the fetch method of the proxies (see the agent property)
+        :param profile: if False then the durations of the phases are not recorded (see the profile property),
+            the spans are still written to the timeline if the tracer is provided
+        :param agent_factory: the callable creating the agent (or the list of agents) of the instance
+            of the batched environment with the given index, the first instance uses the agent of the runner;
+            the agents are created before the first procedure using the instance and kept for the next procedures
+            (see the instance_agents property), the procedures raise ValueError if the environment runs more than
+            one instance and the factory is not provided
         """
 
         # TODO: change to an error?
         assert agent is not None, 'Provide single agent or list of agents'
 
+        if agent_processes:
+            assert isinstance(agent, Iterable), 'Agent processes require a list of agents.'
+            agent = [isolate(single_agent) for single_agent in agent]
+            if agent_threads is None:
+                agent_threads = len(agent)
+
         self._agent = agent
         self._state_adapters = state_adapters
         self._action_adapters = action_adapters
         self._reward_adapters = reward_adapters
         self._verbose = verbose
+        self._agent_threads = agent_threads
+        self._agent_processes = agent_processes
+        self._agent_factory = agent_factory
 
-        if isinstance(self._agent, Iterable):
-            self._distributor = AgentListDistributor(self._agent, self._state_adapters, verbose=self._verbose)
-        elif isinstance(self._agent, MultiLearner):
-            self._distributor = MultiLearnerDistributor(self._agent, self._state_adapters, verbose=self._verbose)
-        else:
-            self._distributor = SingleAgentDistributor(self._agent, self._state_adapters, verbose=self._verbose)
+        self._profiler = Profiler(tracer, profile)
+        self._distributor = self._create_distributor(self._agent)
+        self._instance_agents = [self._agent]
+        self._instance_distributors = [self._distributor]
 
         if environment is not None:
             self._environment = environment
         else:
             self._environment = RemoteEnvironment(verbose=verbose)
 
+        self._environment.profiler = self._profiler
+
+    def _create_distributor(self, agent: Union[Player, Iterable[Player]]) -> BaseDistributor:
+        """
+        Creates the distributor matching the type of the agent.
+
+        :param agent: an agent or an iterable of agents
+        :return: the distributor passing the states to the agent and recording the profile with the runner
+        """
+        if isinstance(agent, Iterable):
+            distributor = AgentListDistributor(agent, self._state_adapters, verbose=self._verbose,
+                                               num_threads=self._agent_threads)
+        elif isinstance(agent, MultiLearner):
+            distributor = MultiLearnerDistributor(agent, self._state_adapters, verbose=self._verbose)
+        else:
+            distributor = SingleAgentDistributor(agent, self._state_adapters, verbose=self._verbose)
+
+        distributor.profiler = self._profiler
+        return distributor
+
     def play(self, num_episodes=1, options: Dict[str, str] = None):
         """
         Starts the testing procedure using agent or agents provided in the constructor.
         If an iterable of agents or a single MultiLearner agent was provided and the environment supports
         multi-agent training than it will be used. Otherwise the single-agent training will be performed.
         The metrics gathered during the testing procedure can be accessed using metrics property.
+        This method will throw an error if the batched environment runs more than one instance and the agent
+        factory is not provided (the instances would share the agents).
 
         :param num_episodes: a number of episodes to be run
         :param options: a dictionary representing the options sent to the environment
@@ -132,7 +209,9 @@ class Runner:
     def train(self, num_players: int = None, options: Dict[str, str] = None):
         """
         Starts the training procedure using agent or agents provided in the constructor.
-        This method will throw an error if training is not supported by the provided agents.
+        This method will throw an error if training is not supported by the provided agents, or if the batched
+        environment runs more than one instance and the agent factory is not provided (the instances would share
+        the agents).
         Agents must implement Learner to be compatible with the training procedure.
         Number of players can optionally be provided. If the number of players is not provided the maximum supported
         number of players will be selected. Options in the form of dictionary can be provided to be sent
@@ -173,23 +252,301 @@ class Runner:
         num_players = self._distributor.select_players_num(num_players)
         _assert_num_players_supported(num_players, self._environment.manifest.possible_players)
 
-        episode = 0
-        while (mode is Mode.Playing and episode < num_episodes
-               or mode is mode.Training and self._distributor.do_start_episode(episode + 1)):
+        self._profiler.reset()
+        try:
+            if isinstance(self._environment, BatchedRemoteEnvironment):
+                self._run_batched(mode, num_episodes, num_players, options)
+            else:
+                self._run_episodes(mode, num_episodes, num_players, options)
+        finally:
+            self._distributor.close()
 
+    def _run_episodes(self, mode: Mode, num_episodes, num_players: int, options: Dict[str, str]):
+        """
+        Plays the episodes one after another.
+
+        :param mode: an enum identifying the procedure
+        :param num_episodes: a number of episodes used in the testing procedure
+        :param num_players: a number of players simultaneously interacting with the environment
+        :param options: a dictionary representing options sent to the environment
+        """
+        profiler = self._profiler
+        episode = 0
+        while self._do_start_episode(mode, episode + 1, num_episodes):
             episode += 1
+            start = time.perf_counter_ns()
             self._environment.reset(num_players, options)
+            profiler.record_since(Phases.RESET, start)
             self._distributor.initialize_episode(episode)
             while self._distributor.is_episode_running():
+                start = time.perf_counter_ns()
+                states = self._environment.obtain_states()
+                profiler.trace('obtain_states', start)
                 if mode is Mode.Playing:
-                    actions = self._distributor.react_to_states(self._environment.obtain_states())
+                    actions = self._distributor.react_to_states(states)
                 else:  # mode is Mode.Learning
-                    actions = self._distributor.learn_from_states(self._environment.obtain_states())
+                    actions = self._distributor.learn_from_states(states)
 
+                act_start = time.perf_counter_ns()
+                profiler.record_span(Phases.DISTRIBUTE, start, act_start)
                 if actions is not None:
                     self._environment.act(actions)
+                    profiler.record_since(Phases.ENVIRONMENT_ACT, act_start)
+                profiler.record_since(Phases.STEP, start)
             else:
                 log(f'Episode {episode} ended.', self._verbose, level=2)
+            profiler.end_episode(episode)
+
+    def _run_batched(self, mode: Mode, num_episodes, num_players: int, options: Dict[str, str]):
+        """
+        Plays the episodes in all instances of the batched environment in parallel. Each instance is operated
+        by its own agents and distributor, the distributors record the metrics together. Raises ValueError
+        if there is more than one instance and the agent factory is not provided. When the episode ends
+        in an instance, the next episode is started in its place while the other instances continue.
+        The testing procedure plays the number of episodes in all instances together, while in the training
+        procedure the agents of each instance decide on its episodes. The episodes of the instances overlap,
+        so the durations of the phases are not summarized per episode.
+
+        :param mode: an enum identifying the procedure
+        :param num_episodes: a number of episodes used in the testing procedure
+        :param num_players: a number of players simultaneously interacting with each instance
+        :param options: a dictionary representing options sent to the environment
+        """
+        num_instances = self._environment.num_instances
+        distributors = self._create_instance_distributors(num_instances)
+        try:
+            for distributor in distributors[1:]:
+                distributor.initialize_players(self._environment.manifest)
+                distributor.select_players_num(num_players)
+                distributor.share_metrics(self._distributor)
+                if mode is Mode.Training:
+                    distributor.assert_training_supported()
+
+            self._run_instances(mode, distributors, num_episodes, num_players, options)
+        finally:
+            for distributor in distributors[1:]:
+                distributor.close()
+
+    def _create_instance_distributors(self, num_instances: int) -> List[BaseDistributor]:
+        """
+        Returns the distributors of the instances of the batched environment, the agents of the instances
+        without the distributors are created with the agent factory.
+
+        :param num_instances: the number of instances of the batched environment
+        :return: the list of distributors, the first one is the distributor of the runner
+        """
+        if num_instances > 1 and self._agent_factory is None:
+            raise ValueError(f'The {num_instances} instances of the batched environment would share the agents. '
+                             f'Provide the agent factory creating the agents of each instance, use a single '
+                             f'instance or the actor-learner procedure (see the ezcoach.actor_learner module).')
+
+        for instance in range(len(self._instance_distributors), num_instances):
+            agent = self._agent_factory(instance)
+            if self._agent_processes:
+                assert isinstance(agent, Iterable), 'Agent processes require a list of agents.'
+                agent = [isolate(single_agent) for single_agent in agent]
+            self._instance_agents.append(agent)
+            self._instance_distributors.append(self._create_distributor(agent))
+
+        return self._instance_distributors[:num_instances]
+
+    def _run_instances(self, mode: Mode, distributors: List[BaseDistributor], num_episodes, num_players: int,
+                       options: Dict[str, str]):
+        """
+        Runs the episode loop of the batched environment.
+
+        :param mode: an enum identifying the procedure
+        :param distributors: the distributors of the instances
+        :param num_episodes: a number of episodes used in the testing procedure
+        :param num_players: a number of players simultaneously interacting with each instance
+        :param options: a dictionary representing options sent to the environment
+        """
+        num_instances = len(distributors)
+        episodes = [0] * num_instances
+
+        episode = 0
+        started = []
+        for instance, distributor in enumerate(distributors):
+            if not self._do_start_instance_episode(mode, distributor, episodes[instance] + 1,
+                                                   episode + 1, num_episodes):
+                continue
+            episode += 1
+            episodes[instance] += 1
+            started.append(instance)
+
+        if not started:
+            return
+
+        profiler = self._profiler
+        start = time.perf_counter_ns()
+        self._environment.reset(num_players, options)
+        profiler.record_since(Phases.RESET, start)
+        running = set(started)
+        while running:
+            for instance in started:
+                distributors[instance].initialize_episode(episodes[instance])
+
+            start = time.perf_counter_ns()
+            states = self._environment.obtain_states()
+            profiler.trace('obtain_states', start)
+            actions = [None] * num_instances
+            started = []
+            for instance in sorted(running):
+                distributor = distributors[instance]
+                if mode is Mode.Playing:
+                    actions[instance] = distributor.react_to_states(states[instance])
+                else:  # mode is Mode.Learning
+                    actions[instance] = distributor.learn_from_states(states[instance])
+
+                if distributor.is_episode_running():
+                    continue
+
+                log(f'Episode {episodes[instance]} of instance {instance} ended.', self._verbose, level=2)
+                if self._do_start_instance_episode(mode, distributor, episodes[instance] + 1,
+                                                   episode + 1, num_episodes):
+                    episode += 1
+                    episodes[instance] += 1
+                    started.append(instance)
+                else:
+                    running.remove(instance)
+
+            act_start = time.perf_counter_ns()
+            profiler.record_span(Phases.DISTRIBUTE, start, act_start)
+            if running:
+                self._environment.act(actions, started)
+                profiler.record_since(Phases.ENVIRONMENT_ACT, act_start)
+            profiler.record_since(Phases.STEP, start)
+
+    @staticmethod
+    def _do_start_instance_episode(mode: Mode, distributor: BaseDistributor, instance_episode: int, episode: int,
+                                   num_episodes=None) -> bool:
+        """
+        Checks weather the next episode should be started in the instance of the batched environment.
+        The number of episodes is controlled by the agents of each instance during the training procedure.
+
+        :param mode: an enum identifying the procedure
+        :param distributor: the distributor of the instance
+        :param instance_episode: the number of the episode to be started in the instance
+        :param episode: the number of the episode to be started in all instances
+        :param num_episodes: a number of episodes used in the testing procedure
+        :return: the bool value indicating if the next episode should be started
+        """
+        if mode is Mode.Playing:
+            return episode <= num_episodes
+        return distributor.do_start_episode(instance_episode)
+
+    def _do_start_episode(self, mode: Mode, episode: int, num_episodes=None) -> bool:
+        """
+        Checks weather the next episode should be started. The number of episodes is controlled by the agents
+        during the training procedure.
+
+        :param mode: an enum identifying the procedure
+        :param episode: the number of the episode to be started
+        :param num_episodes: a number of episodes used in the testing procedure
+        :return: the bool value indicating if the next episode should be started
+        """
+        if mode is Mode.Playing:
+            return episode <= num_episodes
+        return self._distributor.do_start_episode(episode)
+
+    async def play_async(self, num_episodes=1, options: Dict[str, str] = None):
+        """
+        Starts the testing procedure in the same way as the play method. The environment provided
+        in the constructor must be the AsyncRemoteEnvironment. The callbacks of the agents block the event loop
+        (see the ezcoach.core module).
+
+        :param num_episodes: a number of episodes to be run
+        :param options: a dictionary representing the options sent to the environment
+        """
+        self._assert_async_environment()
+        start_time = time.time()
+
+        try:
+            await self._run_async(Mode.Playing, num_episodes=num_episodes, options=options)
+        except Disconnected:
+            log(f'Disconnected from environment.', level=1)
+        except ConnectionRefusedError:
+            log(f'Error: Cannot connect to a game process. Make sure that the game is running.', level=0)
+        else:
+            log(f'Playing completed in {time.time() - start_time}s.', self._verbose, level=1)
+
+    async def train_async(self, num_players: int = None, options: Dict[str, str] = None):
+        """
+        Starts the training procedure in the same way as the train method. The environment provided
+        in the constructor must be the AsyncRemoteEnvironment. The callbacks of the agents block the event loop
+        (see the ezcoach.core module).
+
+        :param num_players: a number of players simultaneously interacting with the environment
+        :param options: a dictionary representing the options sent to the environment
+        """
+        self._assert_async_environment()
+        self._distributor.assert_training_supported()
+        start_time = time.time()
+
+        try:
+            await self._run_async(Mode.Training, num_players=num_players, options=options)
+        except Disconnected:
+            log(f'Disconnected from environment.', level=1)
+        except ConnectionRefusedError:
+            log(f'Error: Cannot connect to a game process. Make sure that the game is running.', level=0)
+        else:
+            log(f'Training completed in {round(time.time() - start_time)}s.', self._verbose, level=1)
+
+    async def _run_async(self, mode: Mode, num_episodes=None, num_players: int = None,
+                         options: Dict[str, str] = None):
+        """
+        Starts the training or testing procedure identified byt the mode enum using the asynchronous environment.
+        The agents are invoked synchronously on the thread of the event loop, which is released only while waiting
+        for the game.
+
+        :param mode: an enum identifying the procedure
+        :param num_episodes: a number of episodes used in the testing procedure
+        :param num_players: a number of players used in the training procedure
+        :param options: a dictionary representing options sent to the environment
+        """
+        await self._environment.connect()
+        self._distributor.initialize_players(self._environment.manifest)
+
+        num_players = self._distributor.select_players_num(num_players)
+        _assert_num_players_supported(num_players, self._environment.manifest.possible_players)
+
+        profiler = self._profiler
+        profiler.reset()
+        try:
+            episode = 0
+            while self._do_start_episode(mode, episode + 1, num_episodes):
+                episode += 1
+                start = time.perf_counter_ns()
+                await self._environment.reset(num_players, options)
+                profiler.record_since(Phases.RESET, start)
+                self._distributor.initialize_episode(episode)
+                while self._distributor.is_episode_running():
+                    start = time.perf_counter_ns()
+                    states = await self._environment.obtain_states()
+                    profiler.trace('obtain_states', start)
+                    if mode is Mode.Playing:
+                        actions = self._distributor.react_to_states(states)
+                    else:  # mode is Mode.Learning
+                        actions = self._distributor.learn_from_states(states)
+
+                    act_start = time.perf_counter_ns()
+                    profiler.record_span(Phases.DISTRIBUTE, start, act_start)
+                    if actions is not None:
+                        await self._environment.act(actions)
+                        profiler.record_since(Phases.ENVIRONMENT_ACT, act_start)
+                    profiler.record_since(Phases.STEP, start)
+                else:
+                    log(f'Episode {episode} ended.', self._verbose, level=2)
+                profiler.end_episode(episode)
+        finally:
+            self._distributor.close()
+
+    def _assert_async_environment(self):
+        """
+        Asserts that the environment provided in the constructor supports asynchronous procedures.
+        """
+        assert isinstance(self._environment, AsyncRemoteEnvironment), \
+            'Asynchronous procedures require the AsyncRemoteEnvironment.'
 
     @property
     def metrics(self):
@@ -201,14 +558,61 @@ class Runner:
         """
         return self._distributor.metrics
 
+    @property
+    def profile(self) -> Profiler:
+        """
+        Returns the profiler with the durations of the phases of the steps recorded during the current
+        training or testing procedure. If the new procedure is started the existing durations will be lost.
+        No durations are recorded if the profiling was disabled in the constructor.
+
+        :return: a Profiler object (see its summary and episodes methods)
+        """
+        return self._profiler
+
     @property
     def agent(self):
         """
         Returns the agent initialized in the constructor.
+        If the agents are hosted in the worker processes (see the agent_processes parameter of the constructor),
+        the proxies of the agents are returned. The proxies train the copies of the agents living in the worker
+        processes, the agents passed to the constructor stay untrained. The trained agents must be obtained with
+        the fetch method of the proxies, after the runner is closed the fetched agents keep the final states.
+
         :return: the agent (or agents) operated by the runner
         """
         return self._agent
 
+    @property
+    def instance_agents(self) -> list:
+        """
+        Returns the agents of the instances of the batched environment created so far. The first element
+        is the agent initialized in the constructor, the others are created with the agent factory.
+
+        :return: the list of the agents (or the lists of agents) of the instances
+        """
+        return list(self._instance_agents)
+
+    def close(self):
+        """
+        Stops the worker processes hosting the agents (see the agent_processes parameter of the constructor)
+        and the threads invoking the callbacks of the agents. The final states of the agents can be obtained
+        with the fetch method of the proxies. The closed proxies raise RuntimeError if the runner is used again,
+        unless they are started again with their start method.
+        """
+        for distributor in self._instance_distributors:
+            distributor.close()
+        for instance_agent in self._instance_agents:
+            if isinstance(instance_agent, Iterable):
+                for agent in instance_agent:
+                    if isinstance(agent, IsolatedPlayer):
+                        agent.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
 
 def train(agent: Union[Player, Iterable[Player]],
           environment: RemoteEnvironment = None,
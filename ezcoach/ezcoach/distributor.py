@@ -6,13 +6,17 @@ state observations and rewards to the agents, and obtain agents' action selectio
 import abc
 import statistics
 import time
-from typing import Any, Iterable, Optional, Union, Sized
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, List, Optional, Union, Sized
+
+import numpy as np
 
 from ezcoach.adapter import adapt_object
-from ezcoach.agent import MultiLearner, Player, Learner
+from ezcoach.agent import BatchMultiLearner, MultiLearner, Player, Learner
 from ezcoach.enviroment import StateInfo, Manifest, StatesInfo
 from ezcoach.log import log
 from ezcoach.metrics import Recorder, MultiRecorder
+from ezcoach.profiling import DeferredRecorder, Phases, Profiler
 
 
 class _AgentRunningState:
@@ -106,6 +110,7 @@ class BaseDistributor(abc.ABC):
         self._reward_adapters = reward_adapters
         self._manifest = None
         self._verbose = verbose
+        self._profiler = Profiler(enabled=False)
 
     @abc.abstractmethod
     def is_training_supported(self) -> bool:
@@ -192,29 +197,38 @@ class BaseDistributor(abc.ABC):
         """
 
     def _react_to_state(self, training: bool, agent: Union[Player, Learner], state_info: StateInfo,
-                        agent_state: _AgentRunningState) -> Optional[Any]:
+                        agent_state: _AgentRunningState,
+                        profiler: Union[Profiler, DeferredRecorder] = None) -> Optional[Any]:
         """
         Passes the state to the agent. In case of training the agent is also informed about the reward.
         The action selected by the agent is returned.
 
         :param training: a flag indicating if an agent should be informed about the reward
         :param agent: an agent that will react to a state and select an action
-        :param state_info: a StateInfo object representing state and reward information
+        :param state_info: a StateInfo object representing state and reward information, not used (and may be None)
+            if the episode has ended for the agent
         :param agent_state: an AgentRunningState object representing current state of the agent
+        :param profiler: the object recording the durations of the phases, the profiler of the distributor if None
         :return: an action selected by the agent or None if the episode has ended
         """
         if not agent_state.running:
             return None
 
+        if profiler is None:
+            profiler = self._profiler
+        start = time.perf_counter_ns()
         state, accumulated_reward, running = state_info
-        state = adapt_object(state, self._state_adapters)
-        accumulated_reward = adapt_object(accumulated_reward, self._reward_adapters)
+        state = self._adapt(state, self._state_adapters, profiler)
+        accumulated_reward = self._adapt(accumulated_reward, self._reward_adapters, profiler)
+        profiler.record_since(Phases.ADAPT, start)
 
         if training and agent_state.state is not None:
+            start = time.perf_counter_ns()
             agent.receive_reward(agent_state.state, agent_state.action,
                                  accumulated_reward - agent_state.accumulated_reward,
                                  accumulated_reward,
                                  state)
+            profiler.record_since(Phases.RECEIVE_REWARD, start)
 
             log(f'Learner receive_reward(): previous_state: {agent_state.state},'
                 f' previous_action:{agent_state.action},'
@@ -223,17 +237,68 @@ class BaseDistributor(abc.ABC):
                 f' next_state: {state}',
                 self._verbose, level=4)
 
-        action = agent.act(state) if running else None
+        if running:
+            start = time.perf_counter_ns()
+            action = agent.act(state)
+            profiler.record_since(Phases.ACT, start)
+        else:
+            action = None
+
         if agent_state.running:
             agent_state.update(state, action, accumulated_reward)
             if not running:
                 agent_state.ended()
 
         if action is not None:
-            return adapt_object(action, self._action_adapters)
+            return self._adapt(action, self._action_adapters, profiler)
         else:
             return None
 
+    @staticmethod
+    def _adapt(obj, adapters, profiler: Union[Profiler, DeferredRecorder]):
+        """
+        Applies the adapters to the object. If the profiler has the tracer, the span of each adapter is traced
+        under the name of the adapter.
+
+        :param obj: an object to be adapted
+        :param adapters: adapters as a single callable or an iterable of callables
+        :param profiler: the object passing the spans to the tracer
+        :return: an object transformed by applying the adapters
+        """
+        if adapters is None or profiler.tracer is None:
+            return adapt_object(obj, adapters)
+
+        for adapter in adapters if isinstance(adapters, Iterable) else (adapters,):
+            start = time.perf_counter_ns()
+            obj = adapter(obj)
+            profiler.trace(getattr(adapter, '__name__', type(adapter).__name__), start)
+        return obj
+
+    @property
+    def profiler(self) -> Profiler:
+        """
+        Returns the profiler recording the durations of adapting the states, selecting the actions
+        and receiving the rewards by the agents. The profiler is disabled until the enabled one is set
+        (eg. by the Runner).
+
+        :return: a Profiler object
+        """
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler: Profiler):
+        self._profiler = profiler
+
+    def share_metrics(self, distributor: 'BaseDistributor'):
+        """
+        Makes the distributor record the metrics with the recorder of the other distributor, so the metrics
+        of the distributors are gathered together (eg. by the distributors of the instances of the batched
+        environment). Must be called after the number of players is selected.
+
+        :param distributor: the distributor of the same type whose recorder is shared
+        """
+        self._recorder = distributor._recorder
+
     # TODO: change to throwing an error?
     def assert_training_supported(self):
         """
@@ -241,6 +306,11 @@ class BaseDistributor(abc.ABC):
         """
         assert self.is_training_supported(), 'Learning is not supported for this agent.'
 
+    def close(self):
+        """
+        Releases the resources of the distributor (eg. the threads). The distributor can be used again afterwards.
+        """
+
 
 class SingleAgentDistributor(BaseDistributor):
     """
@@ -290,7 +360,9 @@ class SingleAgentDistributor(BaseDistributor):
         self._agent_state = _AgentRunningState()
         self._agent_state.start()
 
+        start = time.perf_counter_ns()
         self._agent.episode_started(episode)
+        self._profiler.trace('episode_started', start)
 
     def do_start_episode(self, episode: int) -> bool:
         return self._agent.do_start_episode(episode)
@@ -310,7 +382,9 @@ class SingleAgentDistributor(BaseDistributor):
         action = self._react_to_state(True, self._agent, state_info, self._agent_state)
 
         if not self._agent_state.running:
+            start = time.perf_counter_ns()
             self._agent.episode_ended(self._agent_state.state, self._agent_state.accumulated_reward)
+            self._profiler.trace('episode_ended', start)
             self._collect_metrics(states)
 
         return (action,) if action is not None else None
@@ -337,10 +411,20 @@ class AgentListDistributor(BaseDistributor):
     """
     The class distributing states and rewards to a list of agents. It is the basic type of multi-agent training
     and testing. It inherits from the BaseDistributor class.
+    If the number of threads is provided, the callbacks of the agents in each step (receive_reward and act)
+    and at the end of the episode (episode_ended) are dispatched to the thread pool, which speeds up the agents
+    releasing the GIL (eg. using NumPy or TensorFlow). The callbacks of each agent are invoked in the same order
+    as without the thread pool and the actions are gathered in the order of the players. The running state of each
+    agent (eg. its accumulated reward and number of actions) is updated by its own callbacks on the worker thread,
+    while the state shared by the agents (the metrics and the profile) is updated on the calling thread after all
+    callbacks have finished. The agents must not share the mutable state, as the callbacks of different agents
+    run concurrently. The thread pool is shut down with the close method (the Runner closes the distributor
+    at the end of each procedure) and is started again when needed.
     """
 
     def __init__(self, agents: Iterable[Union[Player, Learner]],
-                 state_adapters=None, action_adapters=None, reward_adapters=None, verbose=None):
+                 state_adapters=None, action_adapters=None, reward_adapters=None, verbose=None,
+                 num_threads: int = None):
         """
         Initializes the class with an iterable of agents that implements Player or Learner interfaces.
         State, action and reward adapters can be provided as an iterable of callables or a single callable.
@@ -350,8 +434,11 @@ class AgentListDistributor(BaseDistributor):
         :param action_adapters: an iterable of action adapters or a single action adapter
         :param reward_adapters: an iterable of reward adapters or a single reward adapter
         :param verbose: the value representing the frequency of logging
+        :param num_threads: the number of threads invoking the callbacks of the agents in parallel, the callbacks
+            are invoked one after another on the calling thread if None
         """
         super().__init__(state_adapters, action_adapters, reward_adapters, verbose)
+        assert num_threads is None or num_threads > 0, f'Number of threads must be positive ({num_threads}).'
         self._agents = tuple(agents)
 
         self._num_agents = len(self._agents)
@@ -360,6 +447,10 @@ class AgentListDistributor(BaseDistributor):
         self._agents_states = None
         self._recorder = None
 
+        self._num_threads = num_threads
+        self._executor = None
+        self._deferred_recorders = [DeferredRecorder() for __ in range(self._num_agents)]
+
     def is_training_supported(self) -> bool:
         return self._learning_supported
 
@@ -386,7 +477,9 @@ class AgentListDistributor(BaseDistributor):
 
         for agent, agent_state in zip(self._agents, self._agents_states):
             agent_state.start()
+            start = time.perf_counter_ns()
             agent.episode_started(episode)
+            self._profiler.trace('episode_started', start)
 
     def do_start_episode(self, episode: int) -> bool:
         return any(agent.do_start_episode(episode) for agent in self._agents)
@@ -406,17 +499,34 @@ class AgentListDistributor(BaseDistributor):
         if training:
             self.assert_training_supported()
 
-        selected_actions = []
-        for agent, state_info, agent_state in zip(self._agents, states, self._agents_states):
-            action = self._react_to_state(training, agent, state_info, agent_state)
-            selected_actions.append(action)
+        running = [index for index, agent_state in enumerate(self._agents_states) if agent_state.running]
+        if self._is_parallel(len(running)):
+            selected_actions = [None] * self._num_agents
+            actions = self._invoke_in_parallel(
+                lambda index: self._react_to_state(training, self._agents[index], states[index],
+                                                   self._agents_states[index], self._deferred_recorders[index]),
+                running)
+            for index, action in zip(running, actions):
+                selected_actions[index] = action
+                self._deferred_recorders[index].flush(self._profiler)
+        else:
+            selected_actions = []
+            for index, (agent, agent_state) in enumerate(zip(self._agents, self._agents_states)):
+                state_info = states[index] if agent_state.running else None
+                action = self._react_to_state(training, agent, state_info, agent_state)
+                selected_actions.append(action)
 
         if all(not agent_state.running for agent_state in self._agents_states):
-            metrics = []
-            for agent, agent_state in zip(self._agents, self._agents_states):
-                if training:
-                    agent.episode_ended(agent_state.state, agent_state.accumulated_reward)
+            if training:
+                agents = range(self._num_agents)
+                if self._is_parallel(self._num_agents):
+                    self._invoke_in_parallel(self._end_episode, agents)
+                else:
+                    for index in agents:
+                        self._end_episode(index)
 
+            metrics = []
+            for agent_state in self._agents_states:
                 metrics.append((agent_state.episode_time, agent_state.num_actions, agent_state.accumulated_reward))
 
             self._recorder.add_episode_metrics(metrics, states.game_metrics)
@@ -424,6 +534,62 @@ class AgentListDistributor(BaseDistributor):
 
         return selected_actions
 
+    def _end_episode(self, index: int):
+        """
+        Informs the agent that the episode has ended.
+
+        :param index: the index of the agent
+        """
+        agent_state = self._agents_states[index]
+        start = time.perf_counter_ns()
+        self._agents[index].episode_ended(agent_state.state, agent_state.accumulated_reward)
+        self._profiler.trace('episode_ended', start)
+
+    def _is_parallel(self, num_callbacks: int) -> bool:
+        """
+        Checks if the callbacks of the agents should be dispatched to the thread pool.
+
+        :param num_callbacks: the number of the callbacks to be invoked
+        :return: True if the thread pool is used and more than one callback is invoked
+        """
+        return self._num_threads is not None and num_callbacks > 1
+
+    def _invoke_in_parallel(self, function: Callable[[int], Any], indices: Iterable[int]) -> List[Any]:
+        """
+        Invokes the function for each index of the agent in the thread pool and waits until all invocations
+        have finished. If any invocation raises an exception, the exception of the first agent is raised.
+
+        :param function: a callable invoked with the index of the agent
+        :param indices: the indices of the agents
+        :return: a list of the results in the order of the indices
+        """
+        tracer = self._profiler.tracer
+        for recorder in self._deferred_recorders:
+            recorder.tracer = tracer
+
+        executor = self._get_executor()
+        futures = [executor.submit(function, index) for index in indices]
+        wait(futures)
+        return [future.result() for future in futures]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        Returns the thread pool invoking the callbacks, the thread pool is created on the first invocation.
+
+        :return: the ThreadPoolExecutor object
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._num_threads, thread_name_prefix='Agent')
+        return self._executor
+
+    def close(self):
+        """
+        Shuts down the thread pool invoking the callbacks and waits for its threads.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     def react_to_states(self, states: StatesInfo) -> Optional[Iterable[Any]]:
         return self._react_to_states(False, states)
 
@@ -434,11 +600,22 @@ class AgentListDistributor(BaseDistributor):
     def metrics(self):
         return self._recorder
 
+    @property
+    def num_threads(self) -> Optional[int]:
+        """
+        Returns the number of threads invoking the callbacks of the agents in parallel.
+
+        :return: the number of threads or None if the callbacks are invoked on the calling thread
+        """
+        return self._num_threads
+
 
 class MultiLearnerDistributor(BaseDistributor):
     """
     The class distributing states and rewards to a single multi-agent. A multi-agent is an algorithm capable
     or representing a number of agents and it must implement MultiLearner interface.
+    If the multi-agent implements the BatchMultiLearner interface, the states and rewards of all running players
+    are passed in a single call of the act_batch and receive_rewards_batch methods in each step.
     This class inherits from the BaseDistributor class.
     """
 
@@ -461,6 +638,7 @@ class MultiLearnerDistributor(BaseDistributor):
         self._num_players = None
         self._agents_states = None
         self._recorder = None
+        self._batched = isinstance(learner, BatchMultiLearner)
 
     def is_training_supported(self) -> bool:
         return True
@@ -484,7 +662,9 @@ class MultiLearnerDistributor(BaseDistributor):
             agent_state.start()
 
         self._agent.set_players(range(self._num_players))
+        start = time.perf_counter_ns()
         self._agent.episode_started(episode)
+        self._profiler.trace('episode_started', start)
 
     def do_start_episode(self, episode: int) -> bool:
         return self._agent.do_start_episode(episode)
@@ -504,18 +684,27 @@ class MultiLearnerDistributor(BaseDistributor):
         if training:
             self.assert_training_supported()
 
-        selected_actions = []
-        for player, (state_info, agent_state) in enumerate(zip(states, self._agents_states)):
-            self._agent.set_acting_player(player)
-            action = self._react_to_state(training, self._agent, state_info, agent_state)
-            selected_actions.append(action)
+        if self._batched:
+            selected_actions = self._react_to_states_batch(training, states)
+        else:
+            selected_actions = []
+            for player, agent_state in enumerate(self._agents_states):
+                if not agent_state.running:
+                    selected_actions.append(None)
+                    continue
+
+                self._agent.set_acting_player(player)
+                action = self._react_to_state(training, self._agent, states[player], agent_state)
+                selected_actions.append(action)
 
         if all(not agent_state.running for agent_state in self._agents_states):
             metrics = []
             for player, agent_state in enumerate(self._agents_states):
                 if training:
                     self._agent.set_acting_player(player)
+                    start = time.perf_counter_ns()
                     self._agent.episode_ended(agent_state.state, agent_state.accumulated_reward)
+                    self._profiler.trace('episode_ended', start)
 
                 metrics.append((agent_state.episode_time, agent_state.num_actions, agent_state.accumulated_reward))
 
@@ -524,6 +713,67 @@ class MultiLearnerDistributor(BaseDistributor):
 
         return selected_actions
 
+    def _react_to_states_batch(self, training: bool, states: StatesInfo) -> List[Any]:
+        """
+        Passes the states of the running players to the batch multi-agent. In case of training the multi-agent
+        is also informed about the rewards of the players that have acted before. The states are adapted
+        for each player separately and stacked, the actions are adapted for each player separately.
+
+        :param training: a flag indicating if the rewards should be reported to the multi-agent
+        :param states: a StatesInfo object representing states and rewards for each agent
+        :return: a list of actions selected for each player, None for the players whose episode has ended
+        """
+        profiler = self._profiler
+        players = np.array([player for player, agent_state in enumerate(self._agents_states) if agent_state.running])
+        selected_actions = [None] * self._num_players
+        if len(players) == 0:
+            return selected_actions
+
+        start = time.perf_counter_ns()
+        if self._state_adapters is None:
+            next_states = states.states[players]
+        else:
+            next_states = np.stack([self._adapt(states.states[player], self._state_adapters, profiler)
+                                    for player in players])
+        if self._reward_adapters is None:
+            accumulated_rewards = states.accumulated_rewards[players]
+        else:
+            accumulated_rewards = np.array([self._adapt(states.accumulated_rewards[player], self._reward_adapters,
+                                                        profiler)
+                                            for player in players])
+        running = states.running[players]
+        profiler.record_since(Phases.ADAPT, start)
+
+        agents_states = [self._agents_states[player] for player in players]
+        if training:
+            acted = [index for index, agent_state in enumerate(agents_states) if agent_state.state is not None]
+            if acted:
+                start = time.perf_counter_ns()
+                previous_accumulated_rewards = np.array([agents_states[index].accumulated_reward for index in acted])
+                self._agent.receive_rewards_batch(np.stack([agents_states[index].state for index in acted]),
+                                                  [agents_states[index].action for index in acted],
+                                                  accumulated_rewards[acted] - previous_accumulated_rewards,
+                                                  accumulated_rewards[acted],
+                                                  next_states[acted],
+                                                  players[acted])
+                profiler.record_since(Phases.RECEIVE_REWARD, start)
+
+        actions = [None] * len(players)
+        if running.any():
+            start = time.perf_counter_ns()
+            actions_batch = self._agent.act_batch(next_states[running], players[running])
+            profiler.record_since(Phases.ACT, start)
+            for index, action in zip(np.flatnonzero(running), actions_batch):
+                actions[index] = action
+
+        for index, (player, agent_state) in enumerate(zip(players, agents_states)):
+            agent_state.update(next_states[index], actions[index], accumulated_rewards[index])
+            if not running[index]:
+                agent_state.ended()
+            elif actions[index] is not None:
+                selected_actions[player] = self._adapt(actions[index], self._action_adapters, profiler)
+        return selected_actions
+
     def react_to_states(self, states) -> Optional[Iterable[Any]]:
         return self._react_to_states(False, states)
 
@@ -3,27 +3,106 @@ This module introduces the Environment class which is used as a representation o
 on the separate thread. To connect to the environment use connect method of the RemoteEnvironment class.
 When the connection is established the Manifest object is available to be obtained from the RemoteEnvironment.
 This class contains necessary information about the connected game.
+The AsyncRemoteEnvironment class provides the same functionality with coroutines to be used with asyncio.
+The BatchedRemoteEnvironment class runs a number of independent instances of the environment in one game,
+exchanging the states and actions of all instances in single messages.
+The VectorizedRemoteEnvironment class interacts with a number of games at once, multiplexing their connections
+in a single thread, and provides the stacked states of all games.
 """
 
 import abc
+import time
 from collections import namedtuple
 from typing import Tuple, Dict, Iterable, Sized
 import numpy as np
 
 import ezcoach.value as val
-from ezcoach.communication import Communicator, IncomingMessageTypes, MessageAttributes
+from ezcoach.communication import (AsyncCommunicator, Communicator, IncomingMessageTypes, MessageAttributes,
+                                   SelectorCommunicator, apply_delta)
 from ezcoach.exception import Disconnected
 from ezcoach.log import log
+from ezcoach.profiling import Phases, Profiler
 
 StateInfo = namedtuple('StateInfo', 'state, accumulated_reward, running')
 
+_UNDECODED = object()
+
+VALIDATION_MODES = ('full', 'sampled', 'off')
+
+
+class StatesDecoder:
+    """
+    The class decoding the values of the state messages according to the manifest of the game.
+    The states, accumulated rewards and running flags are decoded with the ValueDecoder objects into the arrays
+    for the number of players. By default each message is decoded into the new arrays (the values are copied on read),
+    so the agents may keep the states (eg. in the replay buffers or the episode memories). If the values
+    are not copied on read, two preallocated arrays are used alternately for each value, so the values decoded
+    previously remain valid only until the values of two following messages are decoded.
+    """
+
+    def __init__(self, states_definition, copy_on_read: bool = True):
+        """
+        Initializes the decoder with the definition of the states.
+
+        :param states_definition: a value definition (BaseValue) of the states provided by the manifest
+        :param copy_on_read: if True then the values are decoded into the new arrays instead of the reused ones
+        """
+        self._states_decoder = states_definition.decoder(copy_on_read)
+        self._rewards_decoder = val.ValueDecoder(None, (), np.float64, copy_on_read)
+        self._running_decoder = val.ValueDecoder(None, (), np.bool_, copy_on_read)
+
+    def decode_states(self, raw_states):
+        """
+        Decodes the states of all players.
+
+        :param raw_states: a list of the states or the memoryview of the states sent as raw bytes
+        :return: a numpy array of the states
+        """
+        if isinstance(raw_states, memoryview):
+            return self._states_decoder.decode_buffer(raw_states)
+        return self._states_decoder.decode(raw_states)
+
+    def decode_accumulated_rewards(self, raw_rewards) -> np.ndarray:
+        """
+        Decodes the accumulated rewards of all players.
+
+        :param raw_rewards: a list of the accumulated rewards
+        :return: a numpy array of the accumulated rewards
+        """
+        return self._rewards_decoder.decode(raw_rewards)
+
+    def decode_running(self, raw_running) -> np.ndarray:
+        """
+        Decodes the running flags of all players.
+
+        :param raw_running: a list of the running flags
+        :return: a numpy array of the running flags
+        """
+        return self._running_decoder.decode(raw_running)
+
+    @property
+    def copy_on_read(self) -> bool:
+        """
+        Returns if the values are decoded into the new arrays.
+
+        :return: True if the values are copied on read, False if the arrays are reused
+        """
+        return self._states_decoder.copy_on_read
+
 
 class StatesInfo:
     """
     The class representing the states, rewards and flags indicating if an episode is running for each agent
     interacting with the environment.
+    If created from the state message (see from_message), the values are decoded on the first access, so the values
+    that are not used (eg. the game metrics during an episode) are never decoded. If the environment does not copy
+    the values on read, the states, rewards and running flags are decoded when the object is created into the arrays
+    reused by the following states (see StatesDecoder) and must be copied to be kept for longer than two steps.
+    The StateInfo objects representing the agents are created on the first access and cached.
     """
 
+    __slots__ = ('_states', '_accumulated_rewards', '_running', '_game_metrics', '_message', '_decoder', '_views')
+
     def __init__(self, states, accumulated_rewards, running, game_metrics):
         """
         Initializes the object with states, rewards (accumulated through the episode) and a flags indicating
@@ -34,20 +113,127 @@ class StatesInfo:
         :param running: a flag indicating if an episode is running for each agent
         :param game_metrics: a list of floats representing game metrics
         """
-        self.states = states
-        self.accumulated_rewards = accumulated_rewards
-        self.running = running
-        self.game_metrics = game_metrics
+        self._states = states
+        self._accumulated_rewards = accumulated_rewards
+        self._running = running
+        self._game_metrics = game_metrics
+        self._message = None
+        self._decoder = None
+        self._views = None
+
+    @classmethod
+    def from_message(cls, states_message: dict, decoder: StatesDecoder) -> 'StatesInfo':
+        """
+        Creates the object decoding the values of the state message on the first access. If the decoder reuses
+        the arrays (does not copy on read), the states, rewards and running flags are decoded immediately,
+        so the values are bound to the arrays of this message regardless of the order of the accesses.
+
+        :param states_message: a state message
+        :param decoder: the decoder of the values
+        :return: the StatesInfo object
+        """
+        states_info = cls(_UNDECODED, _UNDECODED, _UNDECODED, _UNDECODED)
+        states_info._message = states_message
+        states_info._decoder = decoder
+        if not decoder.copy_on_read:
+            states_info._states = decoder.decode_states(states_message[MessageAttributes.STATES])
+            states_info._accumulated_rewards = decoder.decode_accumulated_rewards(
+                states_message[MessageAttributes.ACCUMULATED_REWARDS])
+            states_info._running = decoder.decode_running(states_message[MessageAttributes.RUNNING])
+        return states_info
+
+    @property
+    def states(self):
+        """
+        Returns the state observations for each agent.
+
+        :return: a list or numpy array of the states
+        """
+        if self._states is _UNDECODED:
+            self._states = self._decoder.decode_states(self._message[MessageAttributes.STATES])
+        return self._states
+
+    @states.setter
+    def states(self, states):
+        self._states = states
+        self._views = None
+
+    @property
+    def accumulated_rewards(self):
+        """
+        Returns the reward signal accumulated through the episode for each agent.
+
+        :return: a numpy array of the accumulated rewards
+        """
+        if self._accumulated_rewards is _UNDECODED:
+            self._accumulated_rewards = self._decoder.decode_accumulated_rewards(
+                self._message[MessageAttributes.ACCUMULATED_REWARDS])
+        return self._accumulated_rewards
+
+    @accumulated_rewards.setter
+    def accumulated_rewards(self, accumulated_rewards):
+        self._accumulated_rewards = accumulated_rewards
+        self._views = None
+
+    @property
+    def running(self):
+        """
+        Returns the flags indicating if an episode is running for each agent.
+
+        :return: a numpy array of the running flags
+        """
+        if self._running is _UNDECODED:
+            self._running = self._decoder.decode_running(self._message[MessageAttributes.RUNNING])
+        return self._running
+
+    @running.setter
+    def running(self, running):
+        self._running = running
+        self._views = None
+
+    @property
+    def game_metrics(self):
+        """
+        Returns the game metrics.
+
+        :return: a tuple of floats representing game metrics
+        """
+        if self._game_metrics is _UNDECODED:
+            self._game_metrics = tuple(self._message[MessageAttributes.METRICS])
+        return self._game_metrics
+
+    @game_metrics.setter
+    def game_metrics(self, game_metrics):
+        self._game_metrics = game_metrics
 
     def __getitem__(self, item):
         """
         Returns a StateInfo object representing state, accumulated reward and a running flag for the given agent.
+        The object is created on the first access and cached.
 
         :param item: an index of the agent
         :return: a StateInfo object consisting of a state, accumulated reward and a running flag for an agent
         identified by the specified index (item)
         """
-        return StateInfo(self.states[item, ...], self.accumulated_rewards[item], self.running[item])
+        if self._views is None:
+            self._views = [None] * len(self.running)
+
+        view = self._views[item]
+        if view is None:
+            view = StateInfo(self.states[item, ...], self.accumulated_rewards[item], self.running[item])
+            self._views[item] = view
+        return view
+
+    def __len__(self):
+        """
+        Returns the number of agents.
+
+        :return: the number of agents
+        """
+        return len(self.running)
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
 
 
 class Manifest:
@@ -144,8 +330,23 @@ class BaseEnvironment(abc.ABC):
     The abstract class representing the environment that the agents can interact with.
     """
 
-    def __init__(self, verbose=None):
+    sampled_validation_interval = 64
+
+    def __init__(self, verbose=None, validate: str = 'full'):
+        """
+        Initializes the environment with the mode of the validation of the actions: 'full' validates the actions
+        at every step, 'sampled' validates the actions at every sampled_validation_interval-th step and 'off'
+        skips the validation.
+
+        :param verbose: the value representing the frequency of logging
+        :param validate: the mode of the validation of the actions ('full', 'sampled' or 'off')
+        """
+        assert validate in VALIDATION_MODES, f'Validation mode must be one of {VALIDATION_MODES} ({validate}).'
         self._verbose = verbose
+        self._validate = validate
+        self._validator = None
+        self._num_checks = 0
+        self._profiler = Profiler(enabled=False)
 
         self._manifest = None
 
@@ -189,16 +390,34 @@ class BaseEnvironment(abc.ABC):
         """
         Checks the actions against the manifest of the environment.
 
+        The actions of all players are checked at once with the validator compiled from the actions definition.
+        Raises the ValueError if the actions are not compatible.
+
         :param actions: a list of actions to be checked
-        :return: True if actions are correct, False otherwise
         """
-        if not all(self._manifest.actions_definition.contains(action) or action is None for action in actions):
+        if self._validate == 'off':
+            return
+
+        self._num_checks += 1
+        if self._validate == 'sampled' and (self._num_checks - 1) % self.sampled_validation_interval != 0:
+            return
+
+        start = time.perf_counter_ns()
+        actions_definition = self._manifest.actions_definition
+        if self._validator is None or self._validator.definition is not actions_definition:
+            self._validator = val.ValueValidator(actions_definition)
+
+        valid = self._validator.validate(actions)
+        self._profiler.record_since(Phases.VALIDATE, start)
+        if not valid:
             raise ValueError(f'Actions {actions} not compatible with environment')
 
     def obtain_states(self) -> StatesInfo:
         """
         Returns the state observations as a StatesInfo object representing state observations, rewards,
         and running flag fo reach agent. States are cleared after this method is invoked.
+        If the remote environment does not copy the values on read (see BaseRemoteEnvironment.copy_on_read),
+        the arrays of the states, rewards and running flags are overwritten two steps later.
 
         :return: a StatesInfo object representing state observations, rewards and running flag for each agent
         """
@@ -213,6 +432,39 @@ class BaseEnvironment(abc.ABC):
         """
         return self._states_ready and self._states is not None
 
+    @property
+    def validate(self) -> str:
+        """
+        Returns the mode of the validation of the actions.
+
+        :return: 'full', 'sampled' or 'off'
+        """
+        return self._validate
+
+    @validate.setter
+    def validate(self, validate: str):
+        """
+        Sets the mode of the validation of the actions.
+
+        :param validate: the mode of the validation of the actions ('full', 'sampled' or 'off')
+        """
+        assert validate in VALIDATION_MODES, f'Validation mode must be one of {VALIDATION_MODES} ({validate}).'
+        self._validate = validate
+
+    @property
+    def profiler(self) -> Profiler:
+        """
+        Returns the profiler recording the durations of validating the actions and exchanging the messages
+        with the game. The profiler is disabled until the enabled one is set (eg. by the Runner).
+
+        :return: a Profiler object
+        """
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler: Profiler):
+        self._profiler = profiler
+
     @property
     def connected(self):
         """
@@ -233,20 +485,201 @@ class BaseEnvironment(abc.ABC):
         return self._manifest
 
 
-class RemoteEnvironment(BaseEnvironment):
+def _read_only_view(array: np.ndarray) -> np.ndarray:
+    """
+    Creates the view of the array that cannot be modified, so the agents do not modify the persistent buffers.
+
+    :param array: the viewed array
+    :return: the read-only view of the array
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class BaseRemoteEnvironment(BaseEnvironment, abc.ABC):
+    """
+    The abstract class representing the environment running in a separate process (the game). It parses
+    the messages received from the game and updates the manifest and states accordingly.
+    If the game sends only the changes of the states (delta states), the changes are patched in place
+    into the persistent buffers holding the previous states and the copies of the buffers are provided
+    to the agents, so the states obtained earlier are never modified. If copying on read is disabled, the read-only
+    views of the buffers are provided instead, which are patched with the next changes.
+    The full states are decoded lazily, on the first access to the values of the StatesInfo object, into the new
+    arrays, or into the arrays reused every two steps if copying on read is disabled (see copy_on_read).
+    Subclasses are responsible for exchanging the messages with the game.
+    """
+
+    def __init__(self, verbose=None, validate: str = 'full'):
+        super(BaseRemoteEnvironment, self).__init__(verbose, validate)
+
+        self._copy_on_read = True
+        self._coalesced_states = 0
+        self._decoder = None
+        self._full_states = None
+        self._delta_buffers = None
+
+    def _parse_messages(self, messages):
+        """
+        Parses the messages received from the game.
+
+        :param messages: list of messages received from the game
+        """
+        state_message = None
+        coalesced = 0
+        for message in messages:
+            log(f'Environment received message {message}', self._verbose, level=3)
+            message_type = message[MessageAttributes.TYPE]
+            if message_type == IncomingMessageTypes.STATE:
+                if state_message is not None:
+                    if message.get(MessageAttributes.DELTA, False):
+                        self._parse_states(state_message)
+                    else:
+                        coalesced += 1
+                state_message = message
+
+            else:
+                handling_method = getattr(self, '_parse_' + message_type)
+                handling_method(message)
+
+        if state_message is not None:
+            if coalesced:
+                self._coalesced_states += coalesced
+                log(f'Warning!!!!! Skipped {coalesced} state messages - consider sending state less frequent.',
+                    self._verbose, level=2)
+
+            self._parse_states(state_message)
+
+    def _parse_manifest(self, message):
+        """
+        Parses the manifest message and sets the manifest attribute according to the message.
+
+        :param message: a message containing manifest
+        """
+        name = message[MessageAttributes.NAME]
+        description = message[MessageAttributes.DESCRIPTION]
+        actions_definition = val.from_json(message[MessageAttributes.ACTIONS])
+        states_definition = val.from_json(message[MessageAttributes.STATES])
+        metrics_names = message[MessageAttributes.METRICS_NAMES]
+        possible_players = message[MessageAttributes.PLAYERS]
+
+        self._manifest = Manifest(name, description, actions_definition, states_definition,
+                                  possible_players, metrics_names)
+        self._decoder = StatesDecoder(states_definition, self._copy_on_read)
+        self._connected = True
+
+        log(f'Connected to a game with manifest:\n{self._manifest}', self._verbose, level=1)
+
+    def _parse_stopped(self, message):
+        """
+        Parses a stopped message informing that the episode has been stopped.
+
+        :param message: a stopped message
+        """
+        self._running = False
+
+    def _parse_disconnected(self, message):
+        """
+        Parses a disconnected message and rises the Disconnected exception.
+
+        :param message: a disconnected message
+        """
+        log(f'disconnected - message: {message}', self._verbose, level=1)
+        self._connected = False
+        raise Disconnected()
+
+    def _parse_states(self, states_message):
+        """
+        Parses a states message and sets the states attribute according to the message.
+
+        :param states_message: a states message
+        """
+        # self._running = True
+        if states_message.get(MessageAttributes.DELTA, False):
+            states, accumulated_rewards, running = self._patch_states(states_message)
+            metrics = tuple(states_message[MessageAttributes.METRICS])
+            self._states = StatesInfo(states, accumulated_rewards, running, metrics)
+            self._states_ready = True
+            return
+
+        self._delta_buffers = None
+        self._states = StatesInfo.from_message(states_message, self._decoder)
+        self._full_states = self._states
+        self._states_ready = True
+
+    def _patch_states(self, states_message):
+        """
+        Patches the persistent buffers with the changes of the states, rewards and running flags.
+        The buffers are created from the copies of the last full states when the first change is received,
+        so the rewards and running flags keep the types of the decoded values (float and bool).
+
+        :param states_message: a states message containing the changes
+        :return: a tuple consisting of the copies of the patched states, rewards and running flags,
+            or of the read-only views of the buffers if copying on read is disabled
+        """
+        attributes = (MessageAttributes.STATES, MessageAttributes.ACCUMULATED_REWARDS, MessageAttributes.RUNNING)
+        if self._delta_buffers is None:
+            assert self._full_states is not None, 'The changes of the states received before the full states.'
+            full_states = self._full_states
+            self._delta_buffers = (np.array(full_states.states),
+                                   np.array(full_states.accumulated_rewards, dtype=np.float64),
+                                   np.array(full_states.running, dtype=np.bool_))
+
+        for buffer, attribute in zip(self._delta_buffers, attributes):
+            apply_delta(buffer, states_message[attribute])
+        if self._copy_on_read:
+            return tuple(buffer.copy() for buffer in self._delta_buffers)
+        return tuple(_read_only_view(buffer) for buffer in self._delta_buffers)
+
+    @property
+    def coalesced_states(self) -> int:
+        """
+        Returns the number of the state messages skipped because a newer state message was received
+        before the states were obtained. The growing number indicates that the agents are too slow for the game.
+
+        :return: the number of the coalesced state messages
+        """
+        return self._coalesced_states
+
+    @property
+    def copy_on_read(self) -> bool:
+        """
+        Returns if the states are decoded into the new arrays instead of the arrays reused every two steps.
+
+        :return: True if the states are copied on read, False otherwise
+        """
+        return self._copy_on_read
+
+    @copy_on_read.setter
+    def copy_on_read(self, copy_on_read: bool):
+        """
+        Sets if the states are decoded into the new arrays (the default). It may be disabled to avoid
+        the allocations only if none of the agents keeps the states for longer than two steps (eg. in the replay
+        buffers or the episode memories of the Monte Carlo algorithms). The states patched with the changes
+        (delta states) are not copied either, they are valid only until the next states are received.
+
+        :param copy_on_read: if True then the states are decoded into the new arrays
+        """
+        self._copy_on_read = copy_on_read
+        if self._manifest is not None:
+            self._decoder = StatesDecoder(self._manifest.states_definition, copy_on_read)
+
+
+class RemoteEnvironment(BaseRemoteEnvironment):
     """
     The class representing the environment that is running in separate thread. It needs the Communicator to send
     and receive messages with the process. It inherits from the BaseEnvironment.
     """
 
-    def __init__(self, communicator: Communicator = None, verbose=None):
+    def __init__(self, communicator: Communicator = None, verbose=None, validate: str = 'full'):
         """
         Initializes the object with the communicator used to exchange messages with the process running the game.
 
         :param communicator: a Communicator object
         :param verbose: the value representing the frequency of logging
+        :param validate: the mode of the validation of the actions ('full', 'sampled' or 'off')
         """
-        super(RemoteEnvironment, self).__init__(verbose)
+        super(RemoteEnvironment, self).__init__(verbose, validate)
 
         if communicator is None:
             communicator = Communicator.with_tcp_connection()
@@ -285,7 +718,9 @@ class RemoteEnvironment(BaseEnvironment):
         log(f'Environment acting: {actions}', self._verbose, level=2)
         self._states_ready = False
         self._check_actions(actions)
+        start = time.perf_counter_ns()
         self._communicator.send_actions(actions)
+        self._profiler.record_since(Phases.SEND, start)
         while not self.states_ready:
             self._update()
 
@@ -296,80 +731,537 @@ class RemoteEnvironment(BaseEnvironment):
         while self._running:
             self._update()
 
+    def disconnect(self):
+        """
+        Disconnects from the game and stops the communication.
+        """
+        self._communicator.disconnect()
+        self._connected = False
+        self._running = False
+        log('Environment disconnected', self._verbose, level=2)
+
     def _update(self):
         """
         Obtains the messages from the communicator and invokes parse_messages method.
         """
+        start = time.perf_counter_ns()
         messages = self._communicator.get_messages()
+        parse_start = time.perf_counter_ns()
         self._parse_messages(messages)
+        self._profiler.record_span(Phases.WAIT, start, parse_start)
+        self._profiler.record_since(Phases.PARSE, parse_start)
 
-    def _parse_messages(self, messages):
+    @BaseEnvironment.profiler.setter
+    def profiler(self, profiler: Profiler):
         """
-        Parses the messages received from the game.
+        Sets the profiler of the environment and the communicator, which records the durations
+        of decoding the messages.
 
-        :param messages: list of messages received from the game
+        :param profiler: a Profiler object
         """
-        state_message = None
-        num_state_messages = 0
-        for message in messages:
-            log(f'Environment received message {message}', self._verbose, level=3)
-            message_type = message[MessageAttributes.TYPE]
-            if message_type == IncomingMessageTypes.STATE:
-                num_state_messages += 1
-                state_message = message
+        self._profiler = profiler
+        self._communicator.profiler = profiler
 
-            else:
-                handling_method = getattr(self, '_parse_' + message_type)
-                handling_method(message)
+    @property
+    def dropped_states(self) -> int:
+        """
+        Returns the number of the state messages dropped by the communicator before they were obtained
+        (see ReceivePolicy).
 
-        if state_message is not None:
-            if num_state_messages > 1:
-                log('Warning!!!!! Received multiple state messages - consider sending state less frequent.',
-                    self._verbose, level=2)
+        :return: the number of the dropped state messages
+        """
+        return self._communicator.dropped_states
 
-            self._parse_states(state_message)
+
+class BatchedRemoteEnvironment(RemoteEnvironment):
+    """
+    The class representing a batch of independent instances of the environment run by one game (eg. a number
+    of boards of the Grid World). The actions of all instances are sent in a single action message and the game
+    responds with a single state message containing the states of all instances. Each instance can be restarted
+    independently when its episode ends. The number of instances is confirmed by the game in the manifest.
+    If the game does not support the batches then a single instance is used with the ordinary messages.
+    The Runner class plays the episodes of all instances in parallel. Each instance is operated by its own agents,
+    so the Runner requires the agent factory if the game runs more than one instance.
+    """
+
+    def __init__(self, communicator: Communicator = None, num_instances: int = 2, verbose=None,
+                 validate: str = 'full'):
+        """
+        Initializes the object with the communicator and the number of instances requested from the game.
+
+        :param communicator: a Communicator object
+        :param num_instances: the number of instances of the environment requested from the game
+        :param verbose: the value representing the frequency of logging
+        :param validate: the mode of the validation of the actions ('full', 'sampled' or 'off')
+        """
+        super(BatchedRemoteEnvironment, self).__init__(communicator, verbose, validate)
+        assert num_instances > 0, f'Number of instances must be positive ({num_instances}).'
+        self._requested_instances = num_instances
+        self._num_instances = 1
+        self._batched = False
+        self._num_players = None
+        self._options = None
+
+    def connect(self):
+        self._communicator.start()
+
+        if self._connected:
+            log('Environment already connected', self._verbose, level=2)
+            return
+
+        self._communicator.connect(self._requested_instances)
+
+        while not self._connected:
+            self._update()
+
+        log(f'Environment connected with {self._num_instances} instances', self._verbose, level=2)
+
+    def reset(self, num_players=None, options=None, instances: Iterable[int] = None):
+        """
+        Starts new episodes in the instances of the environment. The remaining instances are not changed.
+
+        :param num_players: a number of players simultaneously interacting with each instance
+        :param options: a dictionary representing the options passed to the environment
+        :param instances: an iterable of the indices of the instances to be started, all instances are started
+            if None
+        """
+        if num_players is None:
+            num_players = self._manifest.possible_players[0]
+
+        self._running = False
+        self._states = None
+        self._num_players = num_players
+        self._options = options
+
+        if self._batched:
+            self._communicator.send_start(num_players, options, instances)
+        else:
+            self._communicator.send_start(num_players, options)
+        while not self.states_ready:
+            self._update()
+        else:
+            self._running = True
+            log(f'Environment reset for {num_players} players.', self._verbose, level=2)
+
+    def act(self, actions, reset: Iterable[int] = None):
+        """
+        Performs the actions in the instances of the environment and restarts the selected instances
+        with the number of players and the options of the last reset.
+
+        :param actions: a list containing a list of actions for each instance or None if the instance
+            does not perform actions
+        :param reset: an iterable of the indices of the instances to be restarted instead of performing the actions
+        """
+        log(f'Environment acting: {actions}', self._verbose, level=2)
+        reset = list(reset) if reset is not None else []
+        self._states_ready = False
+        for instance, instance_actions in enumerate(actions):
+            if instance_actions is not None and instance not in reset:
+                self._check_actions(instance_actions)
+
+        start = time.perf_counter_ns()
+        if self._batched:
+            self._communicator.send_actions(actions, reset)
+        elif reset:
+            self._communicator.send_start(self._num_players, self._options)
+        else:
+            self._communicator.send_actions(actions[0])
+        self._profiler.record_since(Phases.SEND, start)
+        while not self.states_ready:
+            self._update()
+
+    def obtain_states(self) -> Tuple[StatesInfo]:
+        """
+        Returns the state observations of each instance of the environment.
+
+        :return: a tuple of StatesInfo objects, one for each instance
+        """
+        return self._states
 
     def _parse_manifest(self, message):
+        super(BatchedRemoteEnvironment, self)._parse_manifest(message)
+        self._batched = MessageAttributes.INSTANCES in message
+        self._num_instances = message.get(MessageAttributes.INSTANCES, 1)
+
+    def _parse_states(self, states_message):
+        if not self._batched:
+            super(BatchedRemoteEnvironment, self)._parse_states(states_message)
+            self._states = (self._states,)
+            return
+
+        raw_running = states_message[MessageAttributes.RUNNING]
+        running = self._decoder.decode_running([flag for flags in raw_running for flag in flags])
+        running = running.reshape((len(raw_running), -1))
+        accumulated_rewards = self._decoder.decode_accumulated_rewards(
+            [reward for rewards in states_message[MessageAttributes.ACCUMULATED_REWARDS] for reward in rewards])
+        accumulated_rewards = accumulated_rewards.reshape(running.shape)
+        raw_states = states_message[MessageAttributes.STATES]
+        if not isinstance(raw_states, memoryview):
+            raw_states = [state for instance_states in raw_states for state in instance_states]
+        states = self._decoder.decode_states(raw_states)
+        states = states.reshape(running.shape + states.shape[1:])
+
+        self._states = tuple(StatesInfo(instance_states, instance_rewards, instance_running, tuple(metrics))
+                             for instance_states, instance_rewards, instance_running, metrics
+                             in zip(states, accumulated_rewards, running, states_message[MessageAttributes.METRICS]))
+        self._states_ready = True
+
+    @property
+    def num_instances(self) -> int:
         """
-        Parses the manifest message and sets the manifest attribute according to the message.
+        Returns the number of instances of the environment confirmed by the game.
 
-        :param message: a message containing manifest
+        :return: the number of instances
         """
-        name = message[MessageAttributes.NAME]
-        description = message[MessageAttributes.DESCRIPTION]
-        actions_definition = val.from_json(message[MessageAttributes.ACTIONS])
-        states_definition = val.from_json(message[MessageAttributes.STATES])
-        metrics_names = message[MessageAttributes.METRICS_NAMES]
-        possible_players = message[MessageAttributes.PLAYERS]
+        return self._num_instances
 
-        self._manifest = Manifest(name, description, actions_definition, states_definition,
-                                  possible_players, metrics_names)
-        self._connected = True
 
-        log(f'Connected to a game with manifest:\n{self._manifest}', self._verbose, level=1)
+class _SelectedGameEnvironment(BaseRemoteEnvironment):
+    """
+    The environment representing a single game of the VectorizedRemoteEnvironment. The messages are sent
+    without waiting for the response. The received messages are parsed when they are passed
+    by the VectorizedRemoteEnvironment.
+    """
 
-    def _parse_disconnected(self, message):
+    def __init__(self, communicator: SelectorCommunicator, index: int, verbose=None, validate: str = 'full'):
         """
-        Parses a disconnected message and rises the Disconnected exception.
+        Initializes the environment with the communicator shared by all games and the index of the game.
 
-        :param message: a disconnected message
+        :param communicator: a SelectorCommunicator object
+        :param index: the index of the game in the communicator
+        :param verbose: the value representing the frequency of logging
+        :param validate: the mode of the validation of the actions ('full', 'sampled' or 'off')
+        """
+        super(_SelectedGameEnvironment, self).__init__(verbose, validate)
+        self._communicator = communicator
+        self._index = index
+
+    def connect(self):
+        """
+        The connection is established by the VectorizedRemoteEnvironment.
         """
-        log(f'disconnected - message: {message}', self._verbose, level=1)
-        self._connected = False
-        raise Disconnected()
+
+    def reset(self, num_players=None, options=None):
+        self._running = False
+        self._states = None
+        self._states_ready = False
+        self._communicator.send_start(self._index, num_players, options)
+
+    def act(self, actions):
+        self._states_ready = False
+        self._check_actions(actions)
+        start = time.perf_counter_ns()
+        self._communicator.send_actions(self._index, actions)
+        self._profiler.record_since(Phases.SEND, start)
+
+    def stop(self):
+        self._communicator.send_stop(self._index)
 
     def _parse_states(self, states_message):
+        super(_SelectedGameEnvironment, self)._parse_states(states_message)
+        self._running = True
+
+    @property
+    def running(self) -> bool:
         """
-        Parses a states message and sets the states attribute according to the message.
+        Returns if the episode is running (was not stopped).
 
-        :param states_message: a states message
+        :return: True if the episode is running, False otherwise
         """
-        # self._running = True
-        raw_states = states_message[MessageAttributes.STATES]
-        states = self._manifest.states_definition.parse(raw_states)
-        accumulated_rewards = np.array(states_message[MessageAttributes.ACCUMULATED_REWARDS])
-        running = np.array(states_message[MessageAttributes.RUNNING])
-        metrics = tuple(states_message[MessageAttributes.METRICS])
+        return self._running
 
-        self._states = StatesInfo(states, accumulated_rewards, running, metrics)
+    @property
+    def episode_ended(self) -> bool:
+        """
+        Returns if the episode has ended for all players of the game.
+
+        :return: True if the episode has ended, False otherwise
+        """
+        return self._states is not None and not np.any(self._states.running)
+
+
+class VectorizedRemoteEnvironment(BaseEnvironment):
+    """
+    The class representing a number of games (eg. processes of the headless game builds) driven as one environment.
+    The connections with all games are multiplexed by the SelectorCommunicator in the calling thread. The actions
+    are sent to all games before waiting for any states, so the games advance concurrently and the time of a step
+    is determined by the slowest game rather than the sum of the times of all games.
+    The states of all games are stacked: the first dimension of the states, rewards and running flags
+    is the index of the game and the metrics are a tuple of the metrics of each game. All games must provide
+    the same manifest. The games whose episode has ended are reset automatically at the next step instead of
+    performing the actions, so the terminal states are obtained once and the first states of the next episodes
+    are obtained after the following step.
+    """
+
+    def __init__(self, communicator: SelectorCommunicator, auto_reset: bool = True, verbose=None,
+                 validate: str = 'full'):
+        """
+        Initializes the object with the communicator connecting to all games.
+
+        :param communicator: a SelectorCommunicator object
+        :param auto_reset: if True then the games whose episode has ended are reset at the next step
+        :param verbose: the value representing the frequency of logging
+        :param validate: the mode of the validation of the actions in each game ('full', 'sampled' or 'off')
+        """
+        super(VectorizedRemoteEnvironment, self).__init__(verbose, validate)
+        self._communicator = communicator
+        self._auto_reset = auto_reset
+        self._games = [_SelectedGameEnvironment(communicator, index, verbose, validate)
+                       for index in range(communicator.num_endpoints)]
+        self._num_players = None
+        self._options = None
+
+    def connect(self):
+        if self._connected:
+            log('Environment already connected', self._verbose, level=2)
+            return
+
+        self._communicator.connect()
+        while not all(game.connected for game in self._games):
+            self._update()
+
+        self._manifest = self._games[0].manifest
+        for game in self._games[1:]:
+            assert (game.manifest.name, game.manifest.possible_players) \
+                   == (self._manifest.name, self._manifest.possible_players), \
+                f'Games provide different manifests ({game.manifest.name} and {self._manifest.name}).'
+
+        self._connected = True
+        log(f'Environment connected to {len(self._games)} games', self._verbose, level=2)
+
+    def reset(self, num_players=None, options=None):
+        """
+        Starts new episodes in all games.
+
+        :param num_players: a number of players simultaneously interacting with each game
+        :param options: a dictionary representing the options passed to the games
+        """
+        if num_players is None:
+            num_players = self._manifest.possible_players[0]
+
+        self._running = False
+        self._num_players = num_players
+        self._options = options
+        for game in self._games:
+            game.reset(num_players, options)
+
+        self._wait_for_states()
+        self._running = True
+        log(f'Environment reset for {num_players} players in {len(self._games)} games.', self._verbose, level=2)
+
+    def act(self, actions):
+        """
+        Performs the actions in all games. The games whose episode has ended are reset instead
+        if the automatic resets are enabled.
+
+        :param actions: a list containing a list of actions for each game
+        """
+        log(f'Environment acting: {actions}', self._verbose, level=2)
+        assert len(actions) == len(self._games), \
+            f'Actions provided for {len(actions)} games instead of {len(self._games)}.'
+
+        for game, game_actions in zip(self._games, actions):
+            if self._auto_reset and game.episode_ended:
+                game.reset(self._num_players, self._options)
+            else:
+                game.act(game_actions)
+
+        self._wait_for_states()
+
+    def stop(self):
+        """
+        Stops the episodes in all games.
+        """
+        for game in self._games:
+            game.stop()
+
+        while any(game.running for game in self._games):
+            self._update()
+        self._running = False
+
+    def disconnect(self):
+        """
+        Disconnects from all games.
+        """
+        self._communicator.disconnect()
+        self._connected = False
+        self._running = False
+        log('Environment disconnected', self._verbose, level=2)
+
+    def _wait_for_states(self):
+        """
+        Receives the messages until the states of all games are ready and stacks the states.
+        """
+        self._states_ready = False
+        while not all(game.states_ready for game in self._games):
+            self._update()
+
+        games_states = [game.obtain_states() for game in self._games]
+        self._states = StatesInfo(np.stack([states.states for states in games_states]),
+                                  np.stack([states.accumulated_rewards for states in games_states]),
+                                  np.stack([states.running for states in games_states]),
+                                  tuple(states.game_metrics for states in games_states))
         self._states_ready = True
+
+    def _update(self):
+        """
+        Obtains the messages from the communicator and passes them to the games they were received from.
+        """
+        start = time.perf_counter_ns()
+        games_messages = self._communicator.get_messages()
+        parse_start = time.perf_counter_ns()
+        for index, messages in games_messages.items():
+            self._games[index]._parse_messages(messages)
+        self._profiler.record_span(Phases.WAIT, start, parse_start)
+        self._profiler.record_since(Phases.PARSE, parse_start)
+
+    @BaseEnvironment.validate.setter
+    def validate(self, validate: str):
+        """
+        Sets the mode of the validation of the actions in all games.
+
+        :param validate: the mode of the validation of the actions ('full', 'sampled' or 'off')
+        """
+        BaseEnvironment.validate.fset(self, validate)
+        for game in self._games:
+            game.validate = validate
+
+    @BaseEnvironment.profiler.setter
+    def profiler(self, profiler: Profiler):
+        """
+        Sets the profiler of the environment, all games and the communicator.
+
+        :param profiler: a Profiler object
+        """
+        self._profiler = profiler
+        self._communicator.profiler = profiler
+        for game in self._games:
+            game.profiler = profiler
+
+    @property
+    def num_games(self) -> int:
+        """
+        Returns the number of games.
+
+        :return: the number of games
+        """
+        return len(self._games)
+
+    @property
+    def episodes_ended(self) -> np.ndarray:
+        """
+        Returns if the episodes have ended in each game. These games will be reset at the next step
+        if the automatic resets are enabled.
+
+        :return: a numpy array of bool values for each game
+        """
+        return np.array([game.episode_ended for game in self._games])
+
+
+class AsyncRemoteEnvironment(BaseRemoteEnvironment):
+    """
+    The class representing the environment that is running in separate process and communicating
+    using the AsyncCommunicator. The methods connect, reset, act, stop, obtain_states and disconnect
+    are coroutines and must be awaited. It inherits from the BaseRemoteEnvironment.
+    """
+
+    def __init__(self, communicator: AsyncCommunicator = None, verbose=None, validate: str = 'full'):
+        """
+        Initializes the object with the communicator used to exchange messages with the process running the game.
+
+        :param communicator: an AsyncCommunicator object
+        :param verbose: the value representing the frequency of logging
+        :param validate: the mode of the validation of the actions ('full', 'sampled' or 'off')
+        """
+        super(AsyncRemoteEnvironment, self).__init__(verbose, validate)
+
+        if communicator is None:
+            communicator = AsyncCommunicator()
+
+        self._communicator = communicator
+
+    async def connect(self):
+        if self._connected:
+            log('Environment already connected', self._verbose, level=2)
+            return
+
+        await self._communicator.connect()
+
+        while not self._connected:
+            await self._update()
+
+        log('Environment connected', self._verbose, level=2)
+
+    async def reset(self, num_players=None, options=None):
+        if num_players is None:
+            num_players = self._manifest.possible_players[0]
+
+        self._running = False
+        self._states = None
+
+        await self._communicator.send_start(num_players, options)
+        while not self.states_ready:
+            await self._update()
+
+        self._running = True
+        log(f'Environment reset for {num_players} players.', self._verbose, level=2)
+
+    async def act(self, actions):
+        log(f'Environment acting: {actions}', self._verbose, level=2)
+        self._states_ready = False
+        self._check_actions(actions)
+        start = time.perf_counter_ns()
+        await self._communicator.send_actions(actions)
+        self._profiler.record_since(Phases.SEND, start)
+        while not self.states_ready:
+            await self._update()
+
+        log(f'Environment states are ready: {self._states}', self._verbose, level=2)
+
+    async def stop(self):
+        await self._communicator.send_stop()
+        while self._running:
+            await self._update()
+
+    async def obtain_states(self) -> StatesInfo:
+        """
+        Returns the state observations as a StatesInfo object. Waits until the states are received if they
+        are not ready yet.
+
+        :return: a StatesInfo object representing state observations, rewards and running flag for each agent
+        """
+        while not self.states_ready:
+            await self._update()
+
+        return self._states
+
+    async def disconnect(self):
+        """
+        Disconnects from the game.
+        """
+        await self._communicator.disconnect()
+        self._connected = False
+        self._running = False
+        log('Environment disconnected', self._verbose, level=2)
+
+    async def _update(self):
+        """
+        Awaits the messages from the communicator and invokes parse_messages method.
+        """
+        start = time.perf_counter_ns()
+        messages = await self._communicator.get_messages()
+        parse_start = time.perf_counter_ns()
+        self._parse_messages(messages)
+        self._profiler.record_span(Phases.WAIT, start, parse_start)
+        self._profiler.record_since(Phases.PARSE, parse_start)
+
+    @BaseEnvironment.profiler.setter
+    def profiler(self, profiler: Profiler):
+        """
+        Sets the profiler of the environment and the communicator, which records the durations
+        of decoding the messages.
+
+        :param profiler: a Profiler object
+        """
+        self._profiler = profiler
+        self._communicator.profiler = profiler
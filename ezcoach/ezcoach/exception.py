@@ -4,3 +4,10 @@ This module defines the exceptions used in the EZ-Coach framework.
 
 class Disconnected(Exception):
     pass
+
+
+class NegotiationError(Exception):
+    """
+    Raised when the game confirms the options of the communication (eg. the codec or the compressor)
+    that were not requested.
+    """
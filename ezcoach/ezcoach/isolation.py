@@ -0,0 +1,228 @@
+"""
+This module introduces the isolated agents hosted in the separate worker processes, so the pure-Python agents
+bound by the GIL (eg. the tabular learners) can act and learn in parallel in the multi-agent procedures.
+The isolated agent is a proxy implementing the same interface (Player or Learner) as the hosted agent
+and forwarding the callbacks through the pipe. Only the callbacks returning a value (act and do_start_episode)
+wait for the worker, the other callbacks are sent without waiting, so a step of the training procedure takes
+a single round trip. The Runner hosts each agent of the list in its own process if the agent_processes flag
+is set and dispatches the callbacks of the agents to the thread pool, which waits for the workers in parallel:
+::
+    with Runner([learner_1, learner_2], environment, agent_processes=True) as runner:
+        runner.train()
+        runner.agent[0].save('learner_1.tab')
+    trained = runner.agent[0].fetch()
+
+The processes are stopped when the with block exits (or with the close method of the Runner), also if the procedure
+raises an error. The learners passed to the Runner are not trained, the trained copies are obtained with fetch.
+The other methods of the hosted agent (eg. save) are forwarded to the worker and wait for the result.
+After the proxy is closed, the forwarded calls raise RuntimeError until the process is started again
+with the start method.
+The hosted agent lives in the worker process, so the agents sharing an object (eg. the same Q-function) do not
+share it when they are isolated. The agent must be picklable if the processes are spawned.
+"""
+
+import multiprocessing
+from typing import Union
+
+from ezcoach.agent import Learner, Player
+from ezcoach.enviroment import Manifest
+
+_FETCH = '__fetch__'
+
+
+def _host_agent(connection, agent):
+    """
+    Invokes the methods of the agent requested through the connection until the connection is closed
+    or the stop request (None) is received. The error raised by a method that does not wait for the result
+    is reported in the response to the next request waiting for the result, and the requests in between are skipped.
+
+    :param connection: the end of the pipe connected to the proxy
+    :param agent: the hosted agent
+    """
+    error = None
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+
+        if request is None:
+            break
+
+        method, args, reply = request
+        result = None
+        if error is None:
+            try:
+                result = agent if method == _FETCH else getattr(agent, method)(*args)
+            except Exception as exception:
+                error = exception
+
+        if reply:
+            try:
+                connection.send((error, result))
+            except Exception as exception:
+                connection.send((RuntimeError(f'Cannot send the result of {method}: {exception!r}'), None))
+            error = None
+
+    connection.close()
+
+
+class IsolatedPlayer(Player):
+    """
+    The class hosting the player in the separate worker process. The process is started when the proxy
+    is initialized and stopped with the close method (or when the main process exits). The closed proxy
+    does not start the process again on its own, only the start method does.
+    """
+
+    def __init__(self, agent: Player, context: str = None):
+        """
+        Initializes the proxy of the agent. The process is not started until the proxy is initialized.
+
+        :param agent: the hosted agent
+        :param context: the start method of the process (eg. 'fork' or 'spawn'), the default if None
+        """
+        self._agent = agent
+        self._context = multiprocessing.get_context(context)
+        self._connection = None
+        self._process = None
+        self._closed = False
+
+    def start(self):
+        """
+        Starts the worker process hosting the agent. Ignored if the process has already been started.
+        The process of the closed proxy is started again with the fetched agent.
+        """
+        self._closed = False
+        if self._process is not None:
+            return
+
+        self._connection, worker_connection = self._context.Pipe()
+        self._process = self._context.Process(target=_host_agent, args=(worker_connection, self._agent),
+                                              daemon=True)
+        self._process.start()
+        worker_connection.close()
+
+    def close(self):
+        """
+        Stops the worker process. The hosted agent is fetched before the process is stopped, so the fetch method
+        returns its final state. If the agent cannot be fetched (eg. is not picklable), the last fetched copy
+        is kept. The forwarded calls raise RuntimeError after the proxy is closed.
+        """
+        self._closed = True
+        if self._process is None:
+            return
+
+        try:
+            self._agent = self._call(_FETCH)
+            self._connection.send(None)
+        except Exception:
+            self._process.terminate()
+        self._process.join()
+        self._connection.close()
+        self._connection = None
+        self._process = None
+
+    def fetch(self) -> Player:
+        """
+        Returns the copy of the hosted agent with its current state (eg. after the training procedure).
+        If the process is not running, the agent fetched when the process was stopped is returned.
+
+        :return: the copy of the hosted agent
+        """
+        if self._process is None:
+            return self._agent
+        return self._call(_FETCH)
+
+    def _send(self, method: str, *args):
+        """
+        Requests the method of the hosted agent without waiting for the result.
+
+        :param method: the name of the method
+        :param args: the arguments of the method
+        """
+        self._start_on_request(method)
+        self._connection.send((method, args, False))
+
+    def _call(self, method: str, *args):
+        """
+        Requests the method of the hosted agent and waits for the result. Raises the error of the method
+        or of the methods requested before without waiting.
+
+        :param method: the name of the method
+        :param args: the arguments of the method
+        :return: the result of the method
+        """
+        self._start_on_request(method)
+        self._connection.send((method, args, True))
+        try:
+            error, result = self._connection.recv()
+        except EOFError:
+            raise RuntimeError(f'Process hosting the agent {self._agent!r} has exited.')
+
+        if error is not None:
+            raise error
+        return result
+
+    def _start_on_request(self, method: str):
+        """
+        Starts the worker process on the first request. Raises RuntimeError if the proxy has been closed.
+
+        :param method: the name of the requested method
+        """
+        if self._process is not None:
+            return
+        if self._closed:
+            raise RuntimeError(f'Cannot request {method} of the agent {self._agent!r}, the proxy has been closed. '
+                               f'Use the start method to host the agent again or fetch the final agent.')
+        self.start()
+
+    def initialize(self, manifest: Manifest):
+        self._send('initialize', manifest)
+
+    def act(self, state):
+        return self._call('act', state)
+
+    def episode_started(self, episode: int):
+        self._send('episode_started', episode)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args: self._call(name, *args)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class IsolatedLearner(IsolatedPlayer, Learner):
+    """
+    The class hosting the learner in the separate worker process. The rewards are sent to the learner
+    without waiting, the errors raised while learning are raised by the next act or do_start_episode.
+    """
+
+    def do_start_episode(self, episode: int) -> bool:
+        return self._call('do_start_episode', episode)
+
+    def receive_reward(self, previous_state, action, reward: float, accumulated_reward: float, next_state):
+        self._send('receive_reward', previous_state, action, reward, accumulated_reward, next_state)
+
+    def episode_ended(self, terminal_state, accumulated_reward):
+        self._send('episode_ended', terminal_state, accumulated_reward)
+
+
+def isolate(agent: Player, context: str = None) -> Union[IsolatedPlayer, IsolatedLearner]:
+    """
+    Creates the proxy hosting the agent in the separate worker process.
+
+    :param agent: the agent implementing the Player or Learner interface
+    :param context: the start method of the process (eg. 'fork' or 'spawn'), the default if None
+    :return: an IsolatedLearner if the agent is a Learner, an IsolatedPlayer otherwise
+    """
+    assert not isinstance(agent, IsolatedPlayer), f'Agent {agent!r} is already isolated.'
+    if isinstance(agent, Learner):
+        return IsolatedLearner(agent, context)
+    return IsolatedPlayer(agent, context)
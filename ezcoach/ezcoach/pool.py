@@ -0,0 +1,390 @@
+"""
+This module introduces the EnvironmentPool class which launches a number of game processes (eg. headless builds
+of the game) on free ports, connects the RemoteEnvironment to each of them and lends the environments to
+the runners. Crashed game processes are restarted by the health checks.
+The command launching the game is a template in which {port}, {ip} and {index} are replaced for each process.
+::
+    from ezcoach import Runner
+    from ezcoach.pool import EnvironmentPool
+
+    with EnvironmentPool('./Game.x86_64 -batchmode -port {port}', size=8) as pool:
+        with pool.lend() as environment:
+            Runner(agent, environment).train()
+
+The Python stand-in of the game can be launched with the command: python -m ezcoach.testing --port {port}.
+"""
+
+import contextlib
+import queue
+import shlex
+import socket
+import subprocess
+import threading
+import time
+from typing import Iterable, Union, List
+
+from ezcoach.communication import Communicator
+from ezcoach.enviroment import RemoteEnvironment
+from ezcoach.log import log
+
+
+def find_free_port(ip: str = '127.0.0.1') -> int:
+    """
+    Returns the port that is not used at the moment. The port is selected by the operating system, so it may be
+    taken by other process before the game starts listening on it.
+
+    :param ip: the IP address the port is bound to
+    :return: the port number
+    """
+    with socket.socket() as probe_socket:
+        probe_socket.bind((ip, 0))
+        return probe_socket.getsockname()[1]
+
+
+class _PoolSlot:
+    """
+    The class representing the game process of the pool and the environment connected to it.
+    """
+
+    def __init__(self, index: int):
+        """
+        Initializes the slot without the process.
+
+        :param index: the index of the slot in the pool
+        """
+        self.index = index
+        self.port = None
+        self.process = None
+        self.environment = None
+        self.lent = False
+        self.lock = threading.Lock()
+
+    def alive(self) -> bool:
+        """
+        Returns if the game process is running and the environment is connected.
+
+        :return: True if the slot can be used, False otherwise
+        """
+        return (self.process is not None and self.process.poll() is None
+                and self.environment is not None and self.environment.connected)
+
+
+class EnvironmentPool:
+    """
+    The class managing the pool of the game processes. Each process is launched with the command template
+    on a free port, and the RemoteEnvironment is connected to it when the game starts listening.
+    The environments are lent with the acquire method (or the lend context manager) and must be returned with
+    the release method, so each environment is used by one runner at a time. The pool can be used by the runners
+    running on different threads.
+    The health checks performed on the separate thread restart the processes that are not lent and have crashed.
+    The lent environments are checked when they are acquired and released.
+    Each slot of the pool is restarted holding only its own lock, so the games are launched and connected without
+    blocking the other slots, and the new process and environment are published when they are connected.
+    """
+
+    def __init__(self, command: Union[str, Iterable[str]], size: int, ip: str = '127.0.0.1',
+                 startup_timeout: float = 30., health_check_interval: float = 1., working_directory: str = None,
+                 verbose=None, **communicator_kwargs):
+        """
+        Initializes the pool with the command template and the number of game processes.
+
+        :param command: a command launching the game as a string or a list of arguments, {port}, {ip} and {index}
+            are replaced with the port, the IP address and the index of the process
+        :param size: the number of the game processes
+        :param ip: the IP address the games listen on
+        :param startup_timeout: the maximal time in seconds to wait for the game to start listening
+        :param health_check_interval: the time in seconds between the health checks, no checks are performed
+            on the separate thread if None
+        :param working_directory: the working directory of the game processes, the current directory if None
+        :param verbose: the value representing the frequency of logging
+        :param communicator_kwargs: keyword arguments of the Communicator.with_tcp_connection (eg. framing)
+        """
+        assert size > 0, f'Size of the pool must be positive ({size}).'
+        self._command = shlex.split(command) if isinstance(command, str) else list(command)
+        self._size = size
+        self._ip = ip
+        self._startup_timeout = startup_timeout
+        self._health_check_interval = health_check_interval
+        self._working_directory = working_directory
+        self._verbose = verbose
+        self._communicator_kwargs = communicator_kwargs
+
+        self._slots = [_PoolSlot(index) for index in range(size)]
+        self._available = queue.Queue()
+        self._lock = threading.Lock()
+        self._running = False
+        self._stopped = threading.Event()
+        self._health_thread = None
+        self._restarts = 0
+
+    def start(self):
+        """
+        Launches all game processes and connects the environments. Returns when all environments are connected.
+        If any game cannot be started, the games launched so far are terminated and the error is raised.
+        """
+        self._running = True
+        self._stopped.clear()
+        try:
+            for slot in self._slots:
+                self._publish(slot, *self._launch(slot))
+        except BaseException:
+            self._running = False
+            for slot in self._slots:
+                self._terminate(slot)
+            raise
+
+        for slot in self._slots:
+            self._available.put(slot)
+
+        if self._health_check_interval is not None:
+            self._health_thread = threading.Thread(target=self._check_health_periodically, daemon=True)
+            self._health_thread.start()
+        log(f'Environment pool started {self._size} games', self._verbose, level=1)
+
+    def stop(self):
+        """
+        Disconnects the environments and terminates all game processes.
+        """
+        self._running = False
+        self._stopped.set()
+        if self._health_thread is not None:
+            self._health_thread.join()
+            self._health_thread = None
+
+        for slot in self._slots:
+            with slot.lock:
+                self._terminate(slot)
+        log('Environment pool stopped', self._verbose, level=1)
+
+    def acquire(self, timeout: float = None) -> RemoteEnvironment:
+        """
+        Lends the connected environment. Waits until any environment is available. The game is restarted
+        if it has crashed while it was not lent.
+
+        :param timeout: the maximal time in seconds to wait for the environment, waits without limit if None
+        :return: the connected environment
+        """
+        assert self._running, 'Environment pool not started.'
+        slot = self._available.get(timeout=timeout)
+        with slot.lock:
+            if not slot.alive():
+                try:
+                    self._restart(slot)
+                except BaseException:
+                    self._available.put(slot)
+                    raise
+            slot.lent = True
+        log(f'Environment pool lent game {slot.index}', self._verbose, level=2)
+        return slot.environment
+
+    def release(self, environment: RemoteEnvironment):
+        """
+        Returns the environment to the pool. The game is restarted if it has crashed while it was lent.
+
+        :param environment: the environment obtained with the acquire method
+        """
+        with self._lock:
+            slot = next((slot for slot in self._slots if slot.environment is environment and slot.lent), None)
+        assert slot is not None, 'Environment was not lent by the pool.'
+        with slot.lock:
+            slot.lent = False
+            try:
+                if self._running and not slot.alive():
+                    self._restart(slot)
+            finally:
+                self._available.put(slot)
+        log(f'Environment pool released game {slot.index}', self._verbose, level=2)
+
+    @contextlib.contextmanager
+    def lend(self, timeout: float = None):
+        """
+        Lends the environment for the duration of the with statement.
+
+        :param timeout: the maximal time in seconds to wait for the environment, waits without limit if None
+        :return: the context manager providing the connected environment
+        """
+        environment = self.acquire(timeout)
+        try:
+            yield environment
+        finally:
+            self.release(environment)
+
+    def check_health(self) -> int:
+        """
+        Restarts the game processes that are not lent and have crashed.
+
+        :return: the number of restarted processes
+        """
+        restarted = 0
+        for slot in self._slots:
+            # the slots being restarted by other thread are skipped
+            if not slot.lock.acquire(blocking=False):
+                continue
+            try:
+                if self._running and not slot.lent and not slot.alive():
+                    self._restart(slot)
+                    restarted += 1
+            finally:
+                slot.lock.release()
+        return restarted
+
+    def _check_health_periodically(self):
+        """
+        Performs the health checks until the pool is stopped.
+        """
+        while not self._stopped.wait(self._health_check_interval):
+            self.check_health()
+
+    def _launch(self, slot: _PoolSlot):
+        """
+        Launches the game process on a free port and connects the environment when the game starts listening.
+        The process is launched again on other port if it exits before it starts listening
+        (eg. the port was taken by other process). The slot is not modified, the process is terminated
+        if the environment cannot be connected.
+
+        :param slot: the slot of the launched process
+        :return: a tuple consisting of the port, the process and the connected environment
+        """
+        deadline = time.monotonic() + self._startup_timeout
+        while True:
+            port = find_free_port(self._ip)
+            arguments = [argument.format(port=port, ip=self._ip, index=slot.index) for argument in self._command]
+            log(f'Environment pool launching game {slot.index}: {" ".join(arguments)}', self._verbose, level=2)
+            process = subprocess.Popen(arguments, cwd=self._working_directory, stdout=subprocess.DEVNULL)
+            if self._wait_until_listening(process, port, deadline):
+                break
+
+            self._terminate_process(process)
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f'Game {slot.index} did not start listening in {self._startup_timeout}s.')
+
+        try:
+            communicator = Communicator.with_tcp_connection(self._ip, port, verbose=self._verbose,
+                                                            **self._communicator_kwargs)
+            environment = RemoteEnvironment(communicator, verbose=self._verbose)
+            environment.connect()
+        except BaseException:
+            self._terminate_process(process)
+            raise
+        return port, process, environment
+
+    def _publish(self, slot: _PoolSlot, port: int, process: subprocess.Popen, environment: RemoteEnvironment):
+        """
+        Sets the launched process and the connected environment of the slot.
+
+        :param slot: the slot of the launched process
+        :param port: the port of the game
+        :param process: the game process
+        :param environment: the environment connected to the game
+        """
+        with self._lock:
+            slot.port = port
+            slot.process = process
+            slot.environment = environment
+
+    def _wait_until_listening(self, process: subprocess.Popen, port: int, deadline: float) -> bool:
+        """
+        Waits until the game accepts the connections on its port.
+
+        :param process: the launched game process
+        :param port: the port of the game
+        :param deadline: the time (time.monotonic) when the waiting is abandoned
+        :return: True if the game is listening, False if the process has exited or the time has passed
+        """
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                return False
+            try:
+                with socket.create_connection((self._ip, port), timeout=.1):
+                    return True
+            except OSError:
+                time.sleep(.05)
+        return False
+
+    def _restart(self, slot: _PoolSlot):
+        """
+        Terminates the game process and launches it again. Must be invoked with the lock of the slot acquired.
+
+        :param slot: the slot of the restarted process
+        """
+        log(f'Environment pool restarting game {slot.index}', self._verbose, level=1)
+        self._terminate(slot)
+        self._publish(slot, *self._launch(slot))
+        with self._lock:
+            self._restarts += 1
+
+    def _terminate(self, slot: _PoolSlot):
+        """
+        Disconnects the environment and terminates the game process of the slot.
+
+        :param slot: the slot of the terminated process
+        """
+        with self._lock:
+            environment, process = slot.environment, slot.process
+            slot.environment = None
+            slot.process = None
+
+        if environment is not None:
+            environment.disconnect()
+        if process is not None:
+            self._terminate_process(process)
+
+    @staticmethod
+    def _terminate_process(process: subprocess.Popen, timeout: float = 5.):
+        """
+        Terminates the game process. The process is killed if it does not finish in the given time.
+
+        :param process: the terminated process
+        :param timeout: the time in seconds to wait for the process to finish
+        """
+        process.terminate()
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the number of the game processes.
+
+        :return: the size of the pool
+        """
+        return self._size
+
+    @property
+    def ports(self) -> List[int]:
+        """
+        Returns the ports of the game processes.
+
+        :return: a list of the port numbers
+        """
+        with self._lock:
+            return [slot.port for slot in self._slots]
+
+    @property
+    def processes(self) -> List[subprocess.Popen]:
+        """
+        Returns the game processes.
+
+        :return: a list of Popen objects
+        """
+        with self._lock:
+            return [slot.process for slot in self._slots]
+
+    @property
+    def restarts(self) -> int:
+        """
+        Returns the number of the restarted game processes.
+
+        :return: the number of restarts
+        """
+        return self._restarts
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
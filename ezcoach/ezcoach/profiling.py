@@ -0,0 +1,391 @@
+"""
+This module introduces the Profiler class recording the durations of the phases of the training and testing
+procedures (eg. waiting for the game, decoding the messages, the actions of the agents). The durations are measured
+with time.perf_counter_ns and recorded in the LatencyHistogram objects of fixed size, so the overhead of the profiling
+does not grow with the length of the procedure. The profile of the last procedure is available from the Runner:
+::
+    runner.train()
+    print(runner.profile.summary())
+    print(runner.profile.episodes())
+
+The profiling is enabled by default and can be disabled in the Runner (profile=False), the disabled profiler
+records no durations, so the measuring of the phases does not slow down the procedures.
+
+The durations are presented in seconds. The spans of the phases can be additionally written to the timeline
+with the Tracer (see the ezcoach.tracing module) set as the tracer of the profiler.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from ezcoach.tracing import Tracer
+
+
+class Phases:
+    """
+    The class aggregating the names of the phases recorded by the framework.
+    """
+    RESET = 'reset'
+    STEP = 'step'
+    DISTRIBUTE = 'distribute'
+    ENVIRONMENT_ACT = 'environment_act'
+
+    VALIDATE = 'validate'
+    SEND = 'send'
+    WAIT = 'wait'
+    PARSE = 'parse'
+    DECODE = 'decode'
+
+    ADAPT = 'adapt'
+    ACT = 'act'
+    RECEIVE_REWARD = 'receive_reward'
+
+
+_SUB_BUCKET_BITS = 2
+_NUM_OCTAVES = 41
+_LAST_BUCKET = ((_NUM_OCTAVES + 1) << _SUB_BUCKET_BITS) - 1
+
+
+class LatencyHistogram:
+    """
+    The histogram of the durations in nanoseconds with the logarithmic buckets. Each power of two is divided
+    into four buckets, so the relative error of the percentiles is below 25%. The number of buckets is fixed
+    and the durations longer than the last bucket (about 2.5 hours) are counted in the last bucket.
+    """
+
+    NUM_BUCKETS = (_NUM_OCTAVES + 1) << _SUB_BUCKET_BITS
+
+    def __init__(self):
+        """
+        Initializes the empty histogram.
+        """
+        self._counts = [0] * self.NUM_BUCKETS
+        self._count = 0
+        self._total = 0
+        self._max = 0
+
+    def record(self, duration: int):
+        """
+        Records the duration.
+
+        :param duration: the duration in nanoseconds
+        """
+        octave = duration.bit_length() - _SUB_BUCKET_BITS - 1
+        if octave < 0:
+            index = duration
+        else:
+            index = min((octave << _SUB_BUCKET_BITS) + (duration >> octave), _LAST_BUCKET)
+
+        self._counts[index] += 1
+        self._count += 1
+        self._total += duration
+        if duration > self._max:
+            self._max = duration
+
+    def percentile(self, q: float) -> int:
+        """
+        Returns the duration below which the given fraction of the recorded durations fall. The upper bound
+        of the bucket is returned, but not more than the longest recorded duration.
+
+        :param q: a fraction between 0 and 1 (eg. 0.99 for the 99th percentile)
+        :return: the duration in nanoseconds, 0 if the histogram is empty
+        """
+        if self._count == 0:
+            return 0
+
+        rank = max(1, math.ceil(q * self._count))
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(self._bucket_upper_bound(index), self._max)
+        return self._max
+
+    def _bucket_upper_bound(self, index: int) -> int:
+        """
+        Returns the largest duration counted in the bucket.
+
+        :param index: the index of the bucket
+        :return: the duration in nanoseconds
+        """
+        sub_buckets = 1 << _SUB_BUCKET_BITS
+        if index < sub_buckets:
+            return index
+
+        octave = (index >> _SUB_BUCKET_BITS) - 1
+        mantissa = (index & (sub_buckets - 1)) + sub_buckets
+        return ((mantissa + 1) << octave) - 1
+
+    def merge(self, other: 'LatencyHistogram'):
+        """
+        Adds the durations recorded by the other histogram.
+
+        :param other: a LatencyHistogram object
+        """
+        self._counts = [count + other_count for count, other_count in zip(self._counts, other._counts)]
+        self._count += other._count
+        self._total += other._total
+        self._max = max(self._max, other._max)
+
+    def reset(self):
+        """
+        Removes all recorded durations.
+        """
+        self.__init__()
+
+    @property
+    def count(self) -> int:
+        """
+        Returns the number of the recorded durations.
+
+        :return: the number of the recorded durations
+        """
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        """
+        Returns the mean of the recorded durations.
+
+        :return: the mean duration in nanoseconds, 0 if the histogram is empty
+        """
+        return self._total / self._count if self._count else 0.
+
+    @property
+    def max(self) -> int:
+        """
+        Returns the longest recorded duration.
+
+        :return: the duration in nanoseconds
+        """
+        return self._max
+
+    def __len__(self):
+        return self._count
+
+
+_PERCENTILES = (.5, .9, .99)
+_SUMMARY_COLUMNS = ['count', 'mean', 'p50', 'p90', 'p99', 'max']
+
+
+def _summarize(histogram: LatencyHistogram) -> Tuple:
+    """
+    Summarizes the histogram with the number of the durations, the mean, the percentiles and the maximum
+    in seconds.
+
+    :param histogram: a LatencyHistogram object
+    :return: a tuple of the values of the summary
+    """
+    percentiles = tuple(histogram.percentile(q) / 1e9 for q in _PERCENTILES)
+    return (histogram.count, histogram.mean / 1e9) + percentiles + (histogram.max / 1e9,)
+
+
+class DeferredRecorder:
+    """
+    The class collecting the durations of the phases on the worker thread (eg. the agent callbacks dispatched
+    to the thread pool), so they are recorded in the Profiler by the thread owning the phases. The spans are passed
+    to the tracer immediately, so they are presented on the track of the worker thread.
+    """
+
+    def __init__(self, tracer: Tracer = None):
+        """
+        Initializes the recorder with no durations.
+
+        :param tracer: the tracer receiving the spans of the phases, no spans are traced if None
+        """
+        self.tracer: Optional[Tracer] = tracer
+        self._durations: List[Tuple[str, int]] = []
+
+    def record_since(self, phase: str, start: int):
+        """
+        Collects the duration of the phase started at the given time.
+
+        :param phase: the name of the phase
+        :param start: the start of the phase obtained with time.perf_counter_ns
+        """
+        end = time.perf_counter_ns()
+        self._durations.append((phase, end - start))
+        if self.tracer is not None:
+            self.tracer.span(phase, start, end)
+
+    def trace(self, name: str, start: int):
+        """
+        Passes the span started at the given time to the tracer. Ignored if the tracer is not set.
+
+        :param name: the name of the span
+        :param start: the start of the span obtained with time.perf_counter_ns
+        """
+        if self.tracer is not None:
+            self.tracer.span(name, start)
+
+    def flush(self, profiler: 'Profiler'):
+        """
+        Records the collected durations in the profiler and clears them.
+
+        :param profiler: the Profiler object
+        """
+        for phase, duration in self._durations:
+            profiler.record(phase, duration)
+        self._durations.clear()
+
+
+class Profiler:
+    """
+    The class recording the durations of the phases in the histograms of the current episode. At the end of each
+    episode the summaries of the phases are stored and the histograms are merged into the histograms
+    of the whole procedure, so the memory used by the profiler grows only with the number of episodes.
+    The durations can be recorded from a number of threads (eg. the messages are decoded on the communicator thread),
+    the histograms are guarded by the lock, so the episode can be ended while the durations are recorded.
+    If the tracer is set, the spans of the phases are also passed to the tracer. If the profiler is disabled,
+    no durations are recorded, but the spans are still passed to the tracer.
+    """
+
+    def __init__(self, tracer: Tracer = None, enabled: bool = True):
+        """
+        Initializes the empty profiler.
+
+        :param tracer: the tracer receiving the spans of the phases, no spans are traced if None
+        :param enabled: if False then the durations of the phases are not recorded
+        """
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._totals: Dict[str, LatencyHistogram] = {}
+        self._episodes: List[Tuple[int, str, Tuple]] = []
+        self._lock = threading.Lock()
+        self.tracer: Optional[Tracer] = tracer
+        self.enabled = enabled
+
+    def record(self, phase: str, duration: int):
+        """
+        Records the duration of the phase. Ignored if the profiler is disabled.
+
+        :param phase: the name of the phase (eg. one of the values defined in the Phases class)
+        :param duration: the duration in nanoseconds
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            histogram = self._histograms.get(phase)
+            if histogram is None:
+                histogram = self._histograms[phase] = LatencyHistogram()
+            histogram.record(duration)
+
+    def record_since(self, phase: str, start: int):
+        """
+        Records the duration of the phase started at the given time.
+
+        :param phase: the name of the phase
+        :param start: the start of the phase obtained with time.perf_counter_ns
+        """
+        if self.enabled or self.tracer is not None:
+            self.record_span(phase, start, time.perf_counter_ns())
+
+    def record_span(self, phase: str, start: int, end: int):
+        """
+        Records the duration of the phase between the given times and passes the span to the tracer.
+
+        :param phase: the name of the phase
+        :param start: the start of the phase obtained with time.perf_counter_ns
+        :param end: the end of the phase obtained with time.perf_counter_ns
+        """
+        self.record(phase, end - start)
+        if self.tracer is not None:
+            self.tracer.span(phase, start, end)
+
+    def trace(self, name: str, start: int):
+        """
+        Passes the span started at the given time to the tracer without recording its duration.
+        Ignored if the tracer is not set.
+
+        :param name: the name of the span
+        :param start: the start of the span obtained with time.perf_counter_ns
+        """
+        if self.tracer is not None:
+            self.tracer.span(name, start)
+
+    def end_episode(self, episode: int):
+        """
+        Stores the summaries of the phases recorded during the episode and clears the histograms of the episode.
+
+        :param episode: the number of the episode
+        """
+        with self._lock:
+            for phase, histogram in self._histograms.items():
+                if histogram.count:
+                    self._episodes.append((episode, phase, _summarize(histogram)))
+                    self._totals.setdefault(phase, LatencyHistogram()).merge(histogram)
+                    histogram.reset()
+
+    def reset(self):
+        """
+        Removes all recorded durations.
+        """
+        with self._lock:
+            self._histograms = {}
+            self._totals = {}
+            self._episodes = []
+
+    def histogram(self, phase: str) -> LatencyHistogram:
+        """
+        Returns the histogram of the durations of the phase recorded during the whole procedure.
+
+        :param phase: the name of the phase
+        :return: a LatencyHistogram object
+        """
+        histogram = LatencyHistogram()
+        with self._lock:
+            for histograms in (self._totals, self._histograms):
+                if phase in histograms:
+                    histogram.merge(histograms[phase])
+        return histogram
+
+    def percentiles(self, phase: str, fractions: Iterable[float] = _PERCENTILES) -> Tuple[float, ...]:
+        """
+        Returns the percentiles of the durations of the phase in seconds.
+
+        :param phase: the name of the phase
+        :param fractions: the fractions of the percentiles (eg. 0.99 for the 99th percentile)
+        :return: a tuple of the percentiles in seconds
+        """
+        histogram = self.histogram(phase)
+        return tuple(histogram.percentile(q) / 1e9 for q in fractions)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns the summary of each phase recorded during the whole procedure: the number of the durations,
+        the mean, the 50th, 90th and 99th percentiles and the maximum in seconds.
+
+        :return: a pandas DataFrame indexed with the names of the phases
+        """
+        phases = self.phases
+        return pd.DataFrame([_summarize(self.histogram(phase)) for phase in phases],
+                            index=pd.Index(phases, name='phase'), columns=_SUMMARY_COLUMNS)
+
+    def episodes(self) -> pd.DataFrame:
+        """
+        Returns the summaries of the phases recorded during each finished episode.
+
+        :return: a pandas DataFrame indexed with the numbers of the episodes and the names of the phases
+        """
+        with self._lock:
+            episodes = list(self._episodes)
+        index = pd.MultiIndex.from_tuples([(episode, phase) for episode, phase, __ in episodes],
+                                          names=['episode', 'phase'])
+        return pd.DataFrame([summary for __, __, summary in episodes], index=index, columns=_SUMMARY_COLUMNS)
+
+    @property
+    def phases(self) -> Tuple[str, ...]:
+        """
+        Returns the names of the recorded phases.
+
+        :return: a tuple of the names of the phases
+        """
+        with self._lock:
+            return tuple(dict.fromkeys(list(self._totals) + list(self._histograms)))
+
+    def __str__(self):
+        return str(self.summary())
@@ -0,0 +1,31 @@
+"""
+The testing package contains the stand-in for the game engine Plugin written in Python. The GameServer class speaks
+the same protocol as the Unity plugin, so the Training Module can be tested without running the game.
+The games simulated by the server are introduced in the ezcoach.testing.games module, including GridWorldGame and
+PongGame reimplementing the examples of the Unity plugin. The step latency of the server, the size of the states
+(the size of the board or the view) and the number of players can be configured to load test the Training Module
+with realistic messages.
+::
+    from ezcoach import RemoteEnvironment, Runner
+    from ezcoach.communication import Communicator
+    from ezcoach.testing import GameServer, CounterGame
+
+    with GameServer(CounterGame()) as server:
+        environment = RemoteEnvironment(Communicator.with_tcp_connection(port=server.port))
+        runner = Runner(agent, environment)
+        runner.train()
+
+The InProcessEnvironment class runs the simulated game in the same thread as the Training Module, without
+the encoding and the transport of the messages.
+The ConstantLearner and RandomLearner classes drive the simulated games when the behaviour of the agent
+does not matter.
+The GameProcess class runs the server in a separate process and allows to use the shared memory connection
+instead of TCP when the game runs on the same host.
+The server can also be launched as a separate program (eg. by the EnvironmentPool): python -m ezcoach.testing --port 6666.
+"""
+
+from ezcoach.testing.agents import ConstantLearner, RandomLearner
+from ezcoach.testing.games import BaseGame, GameState, CounterGame, ImageGame, GridWorldGame, PongGame
+from ezcoach.testing.server import GameServer
+from ezcoach.testing.environment import InProcessEnvironment
+from ezcoach.testing.process import GameProcess, measure_steps_per_second
@@ -0,0 +1,47 @@
+"""
+Runs the GameServer with one of the simulated games until the process is terminated, so the stand-in can be launched
+in the same way as the headless build of the game (eg. by the EnvironmentPool):
+::
+    python -m ezcoach.testing --game pong --port 6666
+"""
+
+import argparse
+
+from ezcoach.testing.games import CounterGame, ImageGame, GridWorldGame, PongGame
+from ezcoach.testing.server import GameServer
+
+GAMES = {
+    'counter': CounterGame,
+    'image': ImageGame,
+    'grid_world': GridWorldGame,
+    'pong': PongGame,
+}
+
+
+def main(args=None):
+    """
+    Parses the command line arguments and serves the selected game.
+
+    :param args: a list of the command line arguments, sys.argv is used if None
+    """
+    parser = argparse.ArgumentParser(prog='python -m ezcoach.testing',
+                                     description='Runs the stand-in of the game engine Plugin.')
+    parser.add_argument('--game', choices=sorted(GAMES), default='counter', help='the simulated game')
+    parser.add_argument('--ip', default='127.0.0.1', help='the IP address to listen on')
+    parser.add_argument('--port', type=int, default=6666, help='the port to listen on')
+    parser.add_argument('--step-latency', type=float, default=0., help='the time in seconds of each step')
+    parser.add_argument('--max-instances', type=int, default=1, help='the maximal number of instances of the game')
+    parser.add_argument('--verbose', type=int, default=0, help='the frequency of logging')
+    arguments = parser.parse_args(args)
+
+    server = GameServer(GAMES[arguments.game](), arguments.ip, arguments.port, verbose=arguments.verbose,
+                        step_latency=arguments.step_latency, max_instances=arguments.max_instances)
+    server.start()
+    try:
+        server.wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
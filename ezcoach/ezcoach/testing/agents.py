@@ -0,0 +1,74 @@
+"""
+This module introduces the simple agents used to drive the simulated games in the tests and the benchmarks,
+where the behaviour of the agent does not matter, only the messages exchanged with the game. The agents count
+the started and ended episodes and keep the received rewards, so the tests can check what reached the agent.
+"""
+
+import numpy as np
+
+from ezcoach.agent import Learner
+
+
+class ConstantLearner(Learner):
+    """
+    The learner selecting the same action in every state for the given number of episodes. The rewards are
+    only recorded (see the rewards attribute), as well as the numbers of the started episodes
+    (the started_episodes attribute) and the number of the ended episodes (the ended_episodes attribute).
+    """
+
+    def __init__(self, num_episodes: int, action=1):
+        """
+        Initializes the learner with the number of episodes and the selected action.
+
+        :param num_episodes: the number of episodes started by the learner
+        :param action: the action selected in every state, ValueError is raised by act if None
+        """
+        self._num_episodes = num_episodes
+        self._action = action
+        self.started_episodes = []
+        self.ended_episodes = 0
+        self.rewards = []
+
+    def initialize(self, manifest):
+        pass
+
+    def do_start_episode(self, episode: int) -> bool:
+        return episode <= self._num_episodes
+
+    def episode_started(self, episode: int):
+        self.started_episodes.append(episode)
+
+    def act(self, state):
+        if self._action is None:
+            raise ValueError('No action')
+        return self._action
+
+    def receive_reward(self, previous_state, action, reward: float, accumulated_reward: float, next_state):
+        self.rewards.append(reward)
+
+    def episode_ended(self, terminal_state, accumulated_reward):
+        self.ended_episodes += 1
+
+
+class RandomLearner(ConstantLearner):
+    """
+    The learner selecting the actions uniformly from the range of the actions defined in the manifest.
+    It inherits from the ConstantLearner class.
+    """
+
+    def __init__(self, num_episodes: int, seed: int = 0):
+        """
+        Initializes the learner with the number of episodes and the seed of the random actions.
+
+        :param num_episodes: the number of episodes started by the learner
+        :param seed: the seed of the generator of the actions
+        """
+        super().__init__(num_episodes)
+        self._random = np.random.default_rng(seed)
+        self._actions_range = None
+
+    def initialize(self, manifest):
+        self._actions_range = manifest.actions_definition.range
+
+    def act(self, state):
+        return int(self._random.integers(self._actions_range.min, self._actions_range.max + 1))
@@ -0,0 +1,70 @@
+"""
+This module introduces the InProcessEnvironment class which runs the simulated game in the same thread as
+the Training Module. The messages of the game are passed to the environment as dictionaries, so neither
+the encoding nor the transport is involved and the overhead of the framework can be measured apart from the game.
+"""
+
+from ezcoach.enviroment import BaseRemoteEnvironment
+from ezcoach.log import log
+from ezcoach.testing.games import BaseGame, state_message
+
+
+class InProcessEnvironment(BaseRemoteEnvironment):
+    """
+    The environment running the simulated game in process. The manifest and the state messages created by the game
+    are parsed in the same way as the messages received from the remote game.
+    """
+
+    def __init__(self, game: BaseGame, verbose=None, validate: str = 'full'):
+        """
+        Initializes the environment with the simulated game.
+
+        :param game: the game simulated in the process
+        :param verbose: the value representing the frequency of logging
+        :param validate: the mode of the validation of the actions ('full', 'sampled' or 'off')
+        """
+        super(InProcessEnvironment, self).__init__(verbose, validate)
+        self._game = game
+
+    def connect(self):
+        if self._connected:
+            log('Environment already connected', self._verbose, level=2)
+            return
+
+        self._parse_messages([self._game.manifest_message()])
+        log('Environment connected', self._verbose, level=2)
+
+    def reset(self, num_players=None, options=None):
+        if num_players is None:
+            num_players = self._manifest.possible_players[0]
+
+        self._running = False
+        self._states = None
+        self._parse_messages([state_message(self._game.reset(num_players, options))])
+        self._running = True
+        log(f'Environment reset for {num_players} players.', self._verbose, level=2)
+
+    def act(self, actions):
+        log(f'Environment acting: {actions}', self._verbose, level=2)
+        self._states_ready = False
+        self._check_actions(actions)
+        self._parse_messages([state_message(self._game.step(list(actions)))])
+
+    def stop(self):
+        self._running = False
+
+    def disconnect(self):
+        """
+        Disconnects from the game.
+        """
+        self._connected = False
+        self._running = False
+
+    @property
+    def game(self) -> BaseGame:
+        """
+        Returns the simulated game.
+
+        :return: the simulated game
+        """
+        return self._game
@@ -0,0 +1,658 @@
+"""
+This module introduces the games simulated by the GameServer class (ezcoach.testing.server module).
+Each game implements the BaseGame interface and is described by the same manifest that the game built with
+the game engine would send. GridWorldGame and PongGame reimplement the examples distributed with the Unity plugin,
+so the Training Module can be tested and benchmarked with the message shapes of the real games.
+"""
+
+import abc
+import math
+import random
+from collections import namedtuple
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+import ezcoach.value as val
+from ezcoach.communication import IncomingMessageTypes, MessageAttributes
+from ezcoach.range import Range
+
+GameState = namedtuple('GameState', 'states, accumulated_rewards, running, metrics')
+
+
+def state_message(game_state: GameState) -> dict:
+    """
+    Creates the state message sent to the Training Module.
+
+    :param game_state: the state of the game
+    :return: a dictionary representing the state message
+    """
+    return {MessageAttributes.TYPE: IncomingMessageTypes.STATE,
+            MessageAttributes.STATES: game_state.states,
+            MessageAttributes.ACCUMULATED_REWARDS: game_state.accumulated_rewards,
+            MessageAttributes.RUNNING: game_state.running,
+            MessageAttributes.METRICS: game_state.metrics}
+
+
+class BaseGame(abc.ABC):
+    """
+    The abstract class representing the game simulated by the GameServer. The game is described by its name,
+    description, supported number of players, and definitions of actions and state observations.
+    An episode is started with the reset method and advanced with the step method.
+    """
+
+    @property
+    @abc.abstractmethod
+    def name(self) -> str:
+        """
+        Returns the name of the game.
+
+        :return: the name of the game
+        """
+
+    @property
+    @abc.abstractmethod
+    def description(self) -> str:
+        """
+        Returns the textual description of the game.
+
+        :return: the description of the game
+        """
+
+    @property
+    @abc.abstractmethod
+    def possible_players(self) -> Tuple[int]:
+        """
+        Returns the tuple of supported number of players.
+
+        :return: a tuple of integers representing the possible number of players
+        """
+
+    @property
+    @abc.abstractmethod
+    def actions_definition(self) -> val.BaseValue:
+        """
+        Returns the definition of the actions accepted by the game.
+
+        :return: a BaseValue object defining the actions
+        """
+
+    @property
+    @abc.abstractmethod
+    def states_definition(self) -> val.BaseValue:
+        """
+        Returns the definition of the state observations sent by the game.
+
+        :return: a BaseValue object defining the state observations
+        """
+
+    @property
+    def metrics_names(self) -> Iterable[str]:
+        """
+        Returns the names of the metrics sent by the game.
+
+        :return: a tuple of the metrics names
+        """
+        return ()
+
+    @abc.abstractmethod
+    def reset(self, num_players: int, options=None) -> GameState:
+        """
+        Starts a new episode.
+
+        :param num_players: a number of players interacting with the game
+        :param options: a dictionary of options sent in the start message
+        :return: a GameState object representing the first state of the episode
+        """
+
+    @abc.abstractmethod
+    def step(self, actions) -> GameState:
+        """
+        Performs the actions of the players and advances the game.
+
+        :param actions: a list of actions for each player (None for the players whose episode has ended)
+        :return: a GameState object representing the state after the actions were performed
+        """
+
+    def manifest_message(self) -> dict:
+        """
+        Creates the manifest message describing the game.
+
+        :return: a dictionary representing the manifest message
+        """
+        return {MessageAttributes.TYPE: IncomingMessageTypes.MANIFEST,
+                MessageAttributes.NAME: self.name,
+                MessageAttributes.DESCRIPTION: self.description,
+                MessageAttributes.PLAYERS: list(self.possible_players),
+                MessageAttributes.ACTIONS: self.actions_definition.to_json(),
+                MessageAttributes.STATES: self.states_definition.to_json(),
+                MessageAttributes.METRICS_NAMES: list(self.metrics_names)}
+
+
+class CounterGame(BaseGame):
+    """
+    The minimal game in which each player selects 0 or 1 in each step and is rewarded with the selected value.
+    The state observation of each player is the number of steps left until the end of the episode.
+    """
+
+    def __init__(self, episode_length: int = 10, possible_players: Iterable[int] = (1, 2)):
+        """
+        Initializes the game with the length of an episode and the supported number of players.
+
+        :param episode_length: a number of steps in each episode
+        :param possible_players: an iterable of supported number of players
+        """
+        self._episode_length = episode_length
+        self._possible_players = tuple(possible_players)
+        self._actions_definition = val.IntValue(Range(0, 1), 'Reward received by the player')
+        self._states_definition = val.IntList([Range(0, episode_length)], 'Steps left')
+
+        self._steps_left = 0
+        self._rewards = []
+
+    @property
+    def name(self):
+        return 'Counter'
+
+    @property
+    def description(self):
+        return 'Each player selects the reward (0 or 1) until the end of the episode.'
+
+    @property
+    def possible_players(self):
+        return self._possible_players
+
+    @property
+    def actions_definition(self):
+        return self._actions_definition
+
+    @property
+    def states_definition(self):
+        return self._states_definition
+
+    def reset(self, num_players, options=None):
+        self._steps_left = self._episode_length
+        self._rewards = [0. for __ in range(num_players)]
+        return self._state()
+
+    def step(self, actions):
+        self._steps_left = max(self._steps_left - 1, 0)
+        for player, action in enumerate(actions):
+            if action is not None:
+                self._rewards[player] += action
+        return self._state()
+
+    def _state(self) -> GameState:
+        """
+        Creates the current state of the game.
+
+        :return: a GameState object
+        """
+        num_players = len(self._rewards)
+        states = [[self._steps_left] for __ in range(num_players)]
+        running = [self._steps_left > 0 for __ in range(num_players)]
+        return GameState(states, list(self._rewards), running, [])
+
+
+class ImageGame(BaseGame):
+    """
+    The game in which the state observations are images (8-bit channels) filled with random noise.
+    Each player selects 0 or 1 in each step and is rewarded with the selected value.
+    It is used to test and measure the transfer of large state observations.
+    """
+
+    def __init__(self, width: int = 64, height: int = 64, channels: int = 3, episode_length: int = 10,
+                 possible_players: Iterable[int] = (1, 2)):
+        """
+        Initializes the game with the size of the images, the length of an episode and the supported
+        number of players.
+
+        :param width: a width of the images
+        :param height: a height of the images
+        :param channels: a number of channels of the images
+        :param episode_length: a number of steps in each episode
+        :param possible_players: an iterable of supported number of players
+        """
+        self._episode_length = episode_length
+        self._possible_players = tuple(possible_players)
+        self._actions_definition = val.IntValue(Range(0, 1), 'Reward received by the player')
+        channel_range, data_type = val.PixelList.DEFINED_RANGES['bit8']
+        self._states_definition = val.PixelList(width, height, channels, channel_range, data_type, 'Noise')
+        self._shape = (height, width, channels)
+
+        self._steps_left = 0
+        self._rewards = []
+        self._states = None
+
+    @property
+    def name(self):
+        return 'Image'
+
+    @property
+    def description(self):
+        return 'Each player observes an image of random noise and selects the reward (0 or 1).'
+
+    @property
+    def possible_players(self):
+        return self._possible_players
+
+    @property
+    def actions_definition(self):
+        return self._actions_definition
+
+    @property
+    def states_definition(self):
+        return self._states_definition
+
+    def reset(self, num_players, options=None):
+        self._steps_left = self._episode_length
+        self._rewards = [0. for __ in range(num_players)]
+        return self._state()
+
+    def step(self, actions):
+        self._steps_left = max(self._steps_left - 1, 0)
+        for player, action in enumerate(actions):
+            if action is not None:
+                self._rewards[player] += action
+        return self._state()
+
+    def _state(self) -> GameState:
+        """
+        Creates the current state of the game with new random images.
+
+        :return: a GameState object
+        """
+        num_players = len(self._rewards)
+        self._states = np.random.randint(0, 256, size=(num_players,) + self._shape, dtype=np.uint8)
+        running = [self._steps_left > 0 for __ in range(num_players)]
+        return GameState(self._states, list(self._rewards), running, [])
+
+    @property
+    def last_states(self) -> np.ndarray:
+        """
+        Returns the images sent in the last state.
+
+        :return: a numpy array of shape (players, height, width, channels)
+        """
+        return self._states
+
+
+class GridWorldGame(BaseGame):
+    """
+    The reimplementation of the EZ Grid World example. Each player moves on its own board until it reaches one of
+    the end points or makes the maximal number of moves. The state observation of a player is the flattened board
+    (column by column) with empty cells (0), the player (1) and the end points (2). The defaults reproduce
+    the board of the example scene, the size of the board determines the size of the state observations.
+    """
+    EMPTY = 0
+    PLAYER = 1
+    END = 2
+
+    _MOVES = {'left': (-1, 0), 'right': (1, 0), 'up': (0, 1), 'down': (0, -1)}
+
+    def __init__(self, width: int = 3, height: int = 2, starting_position: Tuple[int, int] = (1, 1),
+                 end_points: Iterable[Tuple[int, int]] = ((0, 0), (2, 1)),
+                 rewards: Dict[Tuple[int, int], float] = None, default_action_reward: float = -.01,
+                 max_moves: int = 100, max_moves_reward: float = -.5, possible_players: Iterable[int] = (1,)):
+        """
+        Initializes the game with the layout of the board and the rewards.
+
+        :param width: a width of the board
+        :param height: a height of the board
+        :param starting_position: the (x, y) position of the players at the start of an episode
+        :param end_points: an iterable of (x, y) positions ending the episode
+        :param rewards: a dictionary mapping (x, y) positions to the rewards received when entering them,
+            -1 for (0, 0) and 1 for (2, 1) if not provided
+        :param default_action_reward: the reward for selecting a move that would leave the board
+        :param max_moves: the maximal number of moves in an episode, unlimited if 0
+        :param max_moves_reward: the reward received when the maximal number of moves is reached
+        :param possible_players: an iterable of supported number of players
+        """
+        self._size = (width, height)
+        self._starting_position = tuple(starting_position)
+        self._end_points = tuple(tuple(end_point) for end_point in end_points)
+        self._rewards = rewards if rewards is not None else {(0, 0): -1., (2, 1): 1.}
+        self._default_action_reward = default_action_reward
+        self._max_moves = max_moves
+        self._max_moves_reward = max_moves_reward
+        self._possible_players = tuple(possible_players)
+
+        self._actions = [move for move in self._MOVES
+                         if (move in ('left', 'right') and width > 1) or (move in ('up', 'down') and height > 1)]
+        actions_description = 'move action' + ''.join(f', {i}:{action}' for i, action in enumerate(self._actions))
+        self._actions_definition = val.IntValue(Range(0, len(self._actions) - 1), actions_description)
+        self._states_definition = val.IntList([Range(self.EMPTY, self.END)] * (width * height),
+                                              f'flattened cells of size {width}x{height}: empty:{self.EMPTY}, '
+                                              f'player:{self.PLAYER}, end:{self.END}')
+
+        self._positions = []
+        self._moves = 0
+        self._accumulated_rewards = []
+        self._running = []
+
+    @property
+    def name(self):
+        return 'EZ Grid World'
+
+    @property
+    def description(self):
+        return ('The Grid World is a game where player can occupy a cell on a two-dimensional grid. '
+                'Player can move up, down, left and right.')
+
+    @property
+    def possible_players(self):
+        return self._possible_players
+
+    @property
+    def actions_definition(self):
+        return self._actions_definition
+
+    @property
+    def states_definition(self):
+        return self._states_definition
+
+    def reset(self, num_players, options=None):
+        self._positions = [self._starting_position for __ in range(num_players)]
+        self._moves = 0
+        self._accumulated_rewards = [0. for __ in range(num_players)]
+        self._running = [True for __ in range(num_players)]
+        return self._state()
+
+    def step(self, actions):
+        self._moves += 1
+        for player, action in enumerate(actions):
+            if action is None or not self._running[player]:
+                continue
+
+            self._accumulated_rewards[player] += self._move(player, self._actions[int(action)])
+            if self._max_moves > 0 and self._moves >= self._max_moves and self._running[player]:
+                self._accumulated_rewards[player] += self._max_moves_reward
+                self._running[player] = False
+        return self._state()
+
+    def _move(self, player: int, action: str) -> float:
+        """
+        Moves the player in the direction selected by the action. The player stays in place if the move
+        would leave the board.
+
+        :param player: the number of the player
+        :param action: the name of the move
+        :return: the reward for the move
+        """
+        reward = 0.
+        (x, y), (dx, dy) = self._positions[player], self._MOVES[action]
+        if 0 <= x + dx < self._size[0] and 0 <= y + dy < self._size[1]:
+            x, y = x + dx, y + dy
+        else:
+            reward += self._default_action_reward
+
+        self._positions[player] = (x, y)
+        reward += self._rewards.get((x, y), 0.)
+        if (x, y) in self._end_points:
+            self._running[player] = False
+        return reward
+
+    def _state(self) -> GameState:
+        """
+        Creates the current state of the game.
+
+        :return: a GameState object
+        """
+        width, height = self._size
+        board = [self.EMPTY] * (width * height)
+        for x, y in self._end_points:
+            board[x * height + y] = self.END
+
+        states = []
+        for x, y in self._positions:
+            state = list(board)
+            state[x * height + y] = self.PLAYER
+            states.append(state)
+        return GameState(states, list(self._accumulated_rewards), list(self._running), [])
+
+
+class PongGame(BaseGame):
+    """
+    The reimplementation of the EZ Pong example. The players control the rackets on the left and on the right side
+    of the court and the episode ends when the ball passes one of the rackets. If one player is selected then
+    the right racket follows the ball. The state is sent each time_step seconds of the game time.
+
+    The state observation is a vector of the racket position, the position and the velocity of the ball and
+    the opponent position, flipped so that the player is on the left. If the view size is provided then the state
+    observations are images of the court instead, which allows to choose the size of the states.
+    """
+    HALF_WIDTH = 32
+    HALF_HEIGHT = 22
+    RACKET_X = 30.5
+    RACKET_HALF_HEIGHT = 2
+    BALL_RADIUS = .5
+
+    def __init__(self, time_step: float = .1, ball_speed: float = 40., player_speed: float = 28.,
+                 dead_bounce_zone: float = 1.3, bounce_change: float = 3., winning_score: int = 1,
+                 view_size: Tuple[int, int] = None, possible_players: Iterable[int] = (1, 2), seed: int = None):
+        """
+        Initializes the game with the settings of the example scene.
+
+        :param time_step: the game time in seconds between the states
+        :param ball_speed: the initial speed of the ball
+        :param player_speed: the speed of the rackets
+        :param dead_bounce_zone: the distance from the center of the racket in which the ball bounces without
+            changing its vertical velocity
+        :param bounce_change: the change of the vertical velocity of the ball per unit of distance from the dead zone
+        :param winning_score: a number of points ending the episode
+        :param view_size: the (width, height) of the images sent as states, the vector states are used if None
+        :param possible_players: an iterable of supported number of players
+        :param seed: the seed of the random generator of the ball directions
+        """
+        self._time_step = time_step
+        self._ball_speed = ball_speed
+        self._player_speed = player_speed
+        self._dead_bounce_zone = dead_bounce_zone
+        self._bounce_change = bounce_change
+        self._winning_score = winning_score
+        self._view_size = view_size
+        self._possible_players = tuple(possible_players)
+        self._random = random.Random(seed)
+
+        self._actions_definition = val.IntValue(Range(-1, 1), 'Move: up (-1), stay (0), down (1)')
+        if view_size is None:
+            ranges = [Range(-20., 20.), Range(-34.5, 34.5), Range(-21., 21.),
+                      Range(-40., 40.), Range(-40., 40.), Range(-19., 19.)]
+            self._states_definition = val.FloatList(ranges, 'Vector of values, automatically flipped so that '
+                                                            'the current player is on the left):\n[player position y, '
+                                                            'ball position x and y, ball velocity x and y, '
+                                                            'opponent position y]')
+        else:
+            channel_range, data_type = val.PixelList.DEFINED_RANGES['bit8']
+            self._states_definition = val.PixelList(view_size[0], view_size[1], 3, channel_range, data_type,
+                                                    'View of the court')
+
+        self._num_players = 0
+        self._rackets = [0., 0.]
+        self._ball = [0., 0., 0., 0.]
+        self._points = [0, 0]
+        self._bounces = [0, 0]
+        self._round_bounces = [0, 0]
+        self._start_right = False
+        self._running = False
+
+    @property
+    def name(self):
+        return 'EZ Pong'
+
+    @property
+    def description(self):
+        return ('Up to two players can be selected. If one player is selected then second player is controlled '
+                'by simple following algorithm. If two players are selected then they play against each other.')
+
+    @property
+    def possible_players(self):
+        return self._possible_players
+
+    @property
+    def actions_definition(self):
+        return self._actions_definition
+
+    @property
+    def states_definition(self):
+        return self._states_definition
+
+    @property
+    def metrics_names(self):
+        return 'bounces_1', 'bounces_2'
+
+    def reset(self, num_players, options=None):
+        self._num_players = num_players
+        self._points = [0, 0]
+        self._bounces = [0, 0]
+        self._start_right = self._random.random() < .5
+        self._start_round()
+        return self._state()
+
+    def step(self, actions):
+        directions = [0, 0]
+        for player, action in enumerate(actions[:2]):
+            if action is not None:
+                directions[player] = int(action)
+        if self._num_players == 1:
+            ball_y, racket_y = self._ball[1], self._rackets[1]
+            directions[1] = 0 if abs(ball_y - racket_y) < 1. else int(math.copysign(1, ball_y - racket_y))
+
+        max_position = self.HALF_HEIGHT - self.RACKET_HALF_HEIGHT
+        for racket, direction in enumerate(directions):
+            position = self._rackets[racket] + direction * self._player_speed * self._time_step
+            self._rackets[racket] = min(max(position, -max_position), max_position)
+
+        distance = math.hypot(self._ball[2], self._ball[3]) * self._time_step
+        num_substeps = max(1, math.ceil(distance / self.BALL_RADIUS))
+        for __ in range(num_substeps):
+            if not self._running:
+                break
+            self._move_ball(self._time_step / num_substeps)
+        return self._state()
+
+    def _start_round(self):
+        """
+        Places the ball in the center of the court and the rackets in the middle of their sides.
+        The ball moves diagonally towards the side that alternates between the rounds.
+        """
+        direction_x = 1. if self._start_right else -1.
+        direction_y = 1. if self._random.random() < .5 else -1.
+        speed = self._ball_speed / math.sqrt(2.)
+        self._ball = [0., 0., direction_x * speed, direction_y * speed]
+        self._start_right = not self._start_right
+        self._rackets = [0., 0.]
+        self._round_bounces = [0, 0]
+        self._running = True
+
+    def _move_ball(self, time: float):
+        """
+        Moves the ball and handles its collisions with the walls and the rackets.
+
+        :param time: the game time of the movement
+        """
+        x, y, velocity_x, velocity_y = self._ball
+        x += velocity_x * time
+        y += velocity_y * time
+
+        wall = self.HALF_HEIGHT - self.BALL_RADIUS
+        if abs(y) > wall:
+            y = math.copysign(2 * wall, y) - y
+            velocity_y = -velocity_y
+
+        racket = 0 if velocity_x < 0 else 1
+        face = self.RACKET_X - self.BALL_RADIUS
+        bounced = False
+        if abs(x) >= face > abs(x - velocity_x * time):
+            bounce_position = y - self._rackets[racket]
+            if abs(bounce_position) <= self.RACKET_HALF_HEIGHT + self.BALL_RADIUS:
+                x = math.copysign(2 * face, x) - x
+                velocity_x = -velocity_x
+                if abs(bounce_position) >= self._dead_bounce_zone:
+                    velocity_y += (math.copysign(abs(bounce_position) - self._dead_bounce_zone, bounce_position)
+                                   * self._bounce_change)
+                bounced = True
+
+        self._ball = [x, y, velocity_x, velocity_y]
+        if bounced:
+            self._bounce(racket)
+        elif abs(x) >= self.HALF_WIDTH:
+            self._win(0 if x > 0 else 1)
+
+    def _bounce(self, racket: int):
+        """
+        Counts the bounce of the ball. Both players receive a point after 100 bounces in one round.
+
+        :param racket: the number of the racket that bounced the ball
+        """
+        self._bounces[racket] += 1
+        self._round_bounces[racket] += 1
+        if self._round_bounces[racket] >= 100:
+            self._points = [points + 1 for points in self._points]
+            self._end_round()
+
+    def _win(self, player: int):
+        """
+        Gives the point to the player and ends the round.
+
+        :param player: the number of the player that won the round
+        """
+        self._points[player] += 1
+        self._end_round()
+
+    def _end_round(self):
+        """
+        Ends the episode if the winning score is reached, otherwise starts the next round.
+        """
+        if max(self._points) >= self._winning_score:
+            self._running = False
+        else:
+            self._start_round()
+
+    def _state(self) -> GameState:
+        """
+        Creates the current state of the game.
+
+        :return: a GameState object
+        """
+        left_points, right_points = self._points
+        accumulated_rewards = [float(left_points - right_points), float(right_points - left_points)]
+        states = [self._view(player) if self._view_size is not None else self._vector(player)
+                  for player in range(self._num_players)]
+        running = [self._running] * self._num_players
+        return GameState(states, accumulated_rewards[:self._num_players], running, list(self._bounces))
+
+    def _vector(self, player: int) -> list:
+        """
+        Creates the vector state observation of the player.
+
+        :param player: the number of the player
+        :return: a list of values as seen by the player
+        """
+        flip = 1. if player == 0 else -1.
+        x, y, velocity_x, velocity_y = self._ball
+        return [self._rackets[player], x * flip, y, velocity_x * flip, velocity_y, self._rackets[1 - player]]
+
+    def _view(self, player: int) -> np.ndarray:
+        """
+        Renders the court as seen by the player.
+
+        :param player: the number of the player
+        :return: an image of shape (height, width, 3)
+        """
+        width, height = self._view_size
+        view = np.zeros((height, width, 3), dtype=np.uint8)
+
+        def to_pixels(x, y):
+            column = int((x + self.HALF_WIDTH) / (2 * self.HALF_WIDTH) * (width - 1))
+            row = int((self.HALF_HEIGHT - y) / (2 * self.HALF_HEIGHT) * (height - 1))
+            return min(max(column, 0), width - 1), min(max(row, 0), height - 1)
+
+        for racket, racket_x in ((0, -self.RACKET_X), (1, self.RACKET_X)):
+            column, top = to_pixels(racket_x, self._rackets[racket] + self.RACKET_HALF_HEIGHT)
+            __, bottom = to_pixels(racket_x, self._rackets[racket] - self.RACKET_HALF_HEIGHT)
+            view[top:bottom + 1, column] = 255
+
+        column, row = to_pixels(self._ball[0], self._ball[1])
+        view[row, column] = 255
+        return view if player == 0 else view[:, ::-1]
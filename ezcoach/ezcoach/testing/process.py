@@ -0,0 +1,147 @@
+"""
+This module introduces the GameProcess class which runs the simulated game in a separate process, so the
+Training Module communicates with it in the same way as with the game engine. The game can be reached by TCP
+or by the shared memory connection, which allows to compare the transports with measure_steps_per_second function.
+"""
+
+import multiprocessing
+import time
+
+from ezcoach.communication import Communicator, SharedMemoryConnection
+from ezcoach.enviroment import BaseEnvironment
+from ezcoach.testing.games import BaseGame
+from ezcoach.testing.server import GameServer
+
+
+def _serve_tcp(game, server_kwargs, port_connection):
+    """
+    Runs the game server listening on TCP until the process is terminated.
+
+    :param game: the simulated game
+    :param server_kwargs: a dictionary of keyword arguments of the GameServer
+    :param port_connection: the pipe connection used to report the port of the server
+    """
+    server = GameServer(game, **server_kwargs)
+    server.start()
+    port_connection.send(server.port)
+    server.wait()
+
+
+def _serve_shared_memory(game, server_kwargs, connection):
+    """
+    Serves the Training Module using the shared memory connection until it is disconnected.
+
+    :param game: the simulated game
+    :param server_kwargs: a dictionary of keyword arguments of the GameServer
+    :param connection: the shared memory connection of the game
+    """
+    GameServer(game, **server_kwargs).serve(connection)
+    connection.close()
+
+
+class GameProcess:
+    """
+    The class running the GameServer with the simulated game in a separate process. If the shared memory
+    is used then the game is served by the SharedMemoryConnection, otherwise the server listens on TCP.
+    The communicator method creates the Communicator connected with the game.
+    """
+
+    def __init__(self, game: BaseGame, shared_memory: bool = False, size: int = 1 << 20, **server_kwargs):
+        """
+        Initializes the process with the simulated game.
+
+        :param game: the game simulated in the process
+        :param shared_memory: if True then the shared memory connection is used instead of TCP
+        :param size: the size of the ring buffers of the shared memory connection in bytes
+        :param server_kwargs: keyword arguments of the GameServer (eg. framings)
+        """
+        self._game = game
+        self._shared_memory = shared_memory
+        self._size = size
+        self._server_kwargs = server_kwargs
+
+        self._process = None
+        self._connection = None
+        self._port = None
+
+    def start(self):
+        """
+        Starts the process. Returns when the game is ready to be connected.
+        """
+        if self._shared_memory:
+            self._connection, game_connection = SharedMemoryConnection.pair(self._size)
+            self._process = multiprocessing.Process(target=_serve_shared_memory, daemon=True,
+                                                    args=(self._game, self._server_kwargs, game_connection))
+            self._process.start()
+        else:
+            receiving_connection, sending_connection = multiprocessing.Pipe(duplex=False)
+            self._process = multiprocessing.Process(target=_serve_tcp, daemon=True,
+                                                    args=(self._game, self._server_kwargs, sending_connection))
+            self._process.start()
+            self._port = receiving_connection.recv()
+
+    def stop(self, timeout: float = 5.):
+        """
+        Stops the process. The process is terminated if it does not finish in the given time.
+
+        :param timeout: the time in seconds to wait for the process to finish
+        """
+        if self._connection is not None:
+            self._connection.close()
+        else:
+            self._process.terminate()
+
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+
+    def communicator(self, **kwargs) -> Communicator:
+        """
+        Creates the Communicator with the connection to the game.
+
+        :param kwargs: keyword arguments of the Communicator (eg. framing)
+        :return: the Communicator
+        """
+        if self._shared_memory:
+            return Communicator.with_shared_memory_connection(self._connection, **kwargs)
+        return Communicator.with_tcp_connection(port=self._port, **kwargs)
+
+    @property
+    def port(self) -> int:
+        """
+        Returns the TCP port of the game or None if the shared memory is used.
+
+        :return: the port number
+        """
+        return self._port
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def measure_steps_per_second(environment: BaseEnvironment, num_steps: int = 1000, num_players: int = None) -> float:
+    """
+    Measures the number of steps per second performed in the connected environment. The actions are selected
+    randomly and the episodes are restarted when they end.
+
+    :param environment: a connected environment
+    :param num_steps: the number of measured steps
+    :param num_players: the number of players, the first possible number of players is used if not provided
+    :return: the number of steps per second
+    """
+    manifest = environment.manifest
+    num_players = num_players or manifest.possible_players[0]
+    actions = [manifest.actions_definition.random() for __ in range(num_players)]
+
+    start = time.perf_counter()
+    environment.reset(num_players)
+    for __ in range(num_steps):
+        environment.act(actions)
+        if not environment.obtain_states().running.any():
+            environment.reset(num_players)
+    return num_steps / (time.perf_counter() - start)
@@ -0,0 +1,402 @@
+"""
+This module introduces the GameServer class which is a stand-in for the game engine Plugin. It listens for
+the connection of the Training Module and exchanges the same messages as the Unity plugin.
+"""
+
+import copy
+import json
+import os
+import socket
+import threading
+import time
+from typing import Iterable
+
+import numpy as np
+
+from ezcoach.codec import JsonCodec, available_codecs, available_compressors, create_codec, create_compressor, \
+    to_builtin
+from ezcoach.communication import (Framing, FrameFlags, IncomingMessageTypes, MessageAttributes,
+                                   RawMessageDecoder, FrameDecoder, TCPConnection, encode_frame, encode_binary_payload,
+                                   compute_delta)
+from ezcoach.exception import Disconnected
+from ezcoach.log import log
+from ezcoach.testing.games import BaseGame, GameState, state_message
+from ezcoach.value import PixelList
+
+
+class GameServer:
+    """
+    The class simulating the game engine Plugin. It accepts connections of the Training Module on the separate
+    thread and serves one client at a time. Messages received from the client are passed to the game.
+    The framings listed in the constructor are accepted if requested by the client in the connect message.
+    Binary states are sent if requested by the client, the length-prefixed framing is used and the states
+    of the game are images (PixelList). With the length-prefixed framing the first of the codecs requested
+    by the client that is supported by the server is used. If requested by the client and the states are not sent
+    as raw bytes, only the changes relative to the previous state are sent after the first state of an episode.
+    The previous state is acknowledged by the client when it sends the actions.
+    With the length-prefixed framing the frames larger than the threshold requested by the client are compressed
+    if the requested compressor is supported by the server. The manifest is never compressed.
+    The step latency simulates the time the game engine needs to advance the game before the state is sent.
+    If the maximal number of instances is greater than 1, the server supports the batches: the client can request
+    a number of independent instances of the game (copies of the provided game) which are started, reset
+    and stepped with single messages. The changes of the states are not sent for the batches.
+    """
+
+    def __init__(self, game: BaseGame, ip: str = '127.0.0.1', port: int = 0,
+                 framings: Iterable[str] = (Framing.RAW, Framing.LENGTH_PREFIXED), codecs: Iterable[str] = None,
+                 buffer_size: int = 4096, verbose=None, path: str = None, compressors: Iterable[str] = None,
+                 step_latency: float = 0., max_instances: int = 1):
+        """
+        Initializes the server with the simulated game and the address to listen on. If the port is 0
+        then a free port is selected when the server is started. If the path is provided then the server
+        listens on the Unix domain socket instead of TCP.
+
+        :param game: the game simulated by the server
+        :param ip: a string representing the IP address to listen on
+        :param port: a port number
+        :param framings: an iterable of framings supported by the server
+        :param codecs: an iterable of names of the codecs supported by the server, all available codecs
+            are supported if not provided
+        :param buffer_size: a size of the buffer of the client connection
+        :param verbose: the value representing the frequency of logging
+        :param path: the path of the Unix domain socket to listen on
+        :param compressors: an iterable of names of the compressors supported by the server, all registered
+            compressors are supported if not provided
+        :param step_latency: the time in seconds the server waits before sending each state
+        :param max_instances: the maximal number of instances of the game run for a single client
+        """
+        self._game = game
+        self._ip = ip
+        self._port = port
+        self._path = path
+        self._framings = tuple(framings)
+        self._codecs = tuple(codecs) if codecs is not None else tuple(available_codecs())
+        self._compressors = tuple(compressors) if compressors is not None else tuple(available_compressors())
+        self._buffer_size = buffer_size
+        self._step_latency = step_latency
+        self._max_instances = max_instances
+        self._verbose = verbose
+
+        self._socket = None
+        self._thread = None
+        self._running = False
+        self._connection = None
+        self._framing = Framing.RAW
+        self._codec = JsonCodec()
+        self._compressor = None
+        self._compression_threshold = 0
+        self._decoder = RawMessageDecoder()
+        self._binary_states = False
+        self._delta_states = False
+        self._previous_state = None
+        self._games = [game]
+        self._batched = False
+        self._instances_states = None
+        self._players = None
+        self._options = None
+
+    def start(self):
+        """
+        Starts listening for the connections on the separate thread.
+        """
+        if self._path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.bind(self._path)
+        else:
+            self._socket = socket.socket()
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket.bind((self._ip, self._port))
+            self._port = self._socket.getsockname()[1]
+        self._socket.listen(1)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        log(f'Game server listening on {self._path or self._port}', self._verbose, level=2)
+
+    def stop(self):
+        """
+        Stops the server and disconnects the client.
+        """
+        self._running = False
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+            if self._path is not None and os.path.exists(self._path):
+                os.unlink(self._path)
+
+        if self._connection is not None:
+            self._connection.close()
+
+        self.wait()
+        log('Game server stopped', self._verbose, level=2)
+
+    def wait(self):
+        """
+        Blocks until the server is stopped.
+        """
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        """
+        Accepts the clients one after another while the server is running.
+        """
+        while self._running:
+            try:
+                client_socket, address = self._socket.accept()
+            except OSError:
+                break
+
+            log(f'Game server accepted connection from {address}', self._verbose, level=2)
+            self._connection = TCPConnection.from_socket(client_socket, self._buffer_size, self._verbose)
+            self.serve(self._connection)
+
+    def serve(self, connection):
+        """
+        Exchanges the messages with the client until it is disconnected.
+
+        :param connection: the connection with the client
+        """
+        self._use_framing(Framing.RAW)
+        while True:
+            try:
+                messages = self._decoder.receive(connection)
+            except Disconnected:
+                break
+
+            for message in messages:
+                log(f'Game server received message {message}', self._verbose, level=3)
+                handling_method = getattr(self, '_handle_' + message[MessageAttributes.TYPE])
+                handling_method(connection, message)
+
+    def _handle_connect(self, connection, message):
+        """
+        Sends the manifest of the game. The framing, the codec and the compressor requested by the client are used
+        after the manifest is sent if they are supported by the server.
+
+        :param connection: the connection with the client
+        :param message: a connect message
+        """
+        self._codec = JsonCodec()
+        self._compressor = None
+        self._use_framing(Framing.RAW)
+        manifest = self._game.manifest_message()
+        framing = message.get(MessageAttributes.FRAMING)
+        if framing is not None and framing in self._framings:
+            manifest[MessageAttributes.FRAMING] = framing
+
+        codec = JsonCodec.name
+        if manifest.get(MessageAttributes.FRAMING) == Framing.LENGTH_PREFIXED:
+            codec = next((c for c in message.get(MessageAttributes.CODECS, ()) if c in self._codecs), codec)
+            manifest[MessageAttributes.CODEC] = codec
+
+        compression = None
+        if (manifest.get(MessageAttributes.FRAMING) == Framing.LENGTH_PREFIXED
+                and message.get(MessageAttributes.COMPRESSION) in self._compressors):
+            compression = message[MessageAttributes.COMPRESSION]
+            manifest[MessageAttributes.COMPRESSION] = compression
+            self._compression_threshold = message.get(MessageAttributes.COMPRESSION_THRESHOLD, 1024)
+
+        self._binary_states = (message.get(MessageAttributes.BINARY_STATES, False)
+                               and manifest.get(MessageAttributes.FRAMING) == Framing.LENGTH_PREFIXED
+                               and isinstance(self._game.states_definition, PixelList))
+        if self._binary_states:
+            manifest[MessageAttributes.BINARY_STATES] = True
+
+        self._batched = MessageAttributes.INSTANCES in message and self._max_instances > 1
+        if self._batched:
+            num_instances = max(1, min(message[MessageAttributes.INSTANCES], self._max_instances))
+            manifest[MessageAttributes.INSTANCES] = num_instances
+            self._games = [self._game] + [copy.deepcopy(self._game) for __ in range(num_instances - 1)]
+            self._instances_states = [None] * num_instances
+        else:
+            self._games = [self._game]
+
+        self._delta_states = (message.get(MessageAttributes.DELTA_STATES, False)
+                              and not self._binary_states and not self._batched)
+        if self._delta_states:
+            manifest[MessageAttributes.DELTA_STATES] = True
+
+        self._send(connection, manifest)
+        self._codec = create_codec(codec)
+        self._compressor = create_compressor(compression) if compression is not None else None
+        self._use_framing(manifest.get(MessageAttributes.FRAMING, Framing.RAW))
+
+    def _handle_start(self, connection, message):
+        """
+        Starts the episode and sends the first state.
+
+        :param connection: the connection with the client
+        :param message: a start message
+        """
+        self._players = message[MessageAttributes.PLAYERS]
+        self._options = message.get(MessageAttributes.OPTIONS)
+        if self._batched:
+            for instance in message.get(MessageAttributes.INSTANCES, range(len(self._games))):
+                self._instances_states[instance] = self._games[instance].reset(self._players, self._options)
+            self._send_state(connection, self._batch_state())
+            return
+
+        game_state = self._game.reset(self._players, self._options)
+        self._previous_state = None
+        self._send_state(connection, game_state)
+
+    def _handle_action(self, connection, message):
+        """
+        Performs the actions and sends the next state.
+
+        :param connection: the connection with the client
+        :param message: an action message
+        """
+        if self._batched:
+            reset = message.get(MessageAttributes.RESET, ())
+            for instance, actions in enumerate(message[MessageAttributes.ACTIONS]):
+                if instance in reset:
+                    self._instances_states[instance] = self._games[instance].reset(self._players, self._options)
+                elif actions is not None:
+                    self._instances_states[instance] = self._games[instance].step(actions)
+            self._send_state(connection, self._batch_state())
+            return
+
+        game_state = self._game.step(message[MessageAttributes.ACTIONS])
+        self._send_state(connection, game_state)
+
+    def _batch_state(self) -> GameState:
+        """
+        Stacks the states of the instances of the game. Instances that were not started yet are not allowed.
+
+        :return: a GameState object containing lists of the values for each instance
+        """
+        assert all(state is not None for state in self._instances_states), 'Not all instances were started.'
+        return GameState(*(list(values) for values in zip(*self._instances_states)))
+
+    def _handle_stop(self, connection, message):
+        """
+        Informs the client that the episode has been stopped.
+
+        :param connection: the connection with the client
+        :param message: a stop message
+        """
+        self._send(connection, {MessageAttributes.TYPE: IncomingMessageTypes.STOPPED})
+
+    def _send_state(self, connection, game_state: GameState):
+        """
+        Sends the state message after the step latency.
+
+        :param connection: the connection with the client
+        :param game_state: the state of the game
+        """
+        if self._step_latency > 0:
+            time.sleep(self._step_latency)
+
+        message = state_message(game_state)
+
+        if self._binary_states:
+            states = np.ascontiguousarray(game_state.states, dtype=self._game.states_definition.wire_data_type)
+            payload = encode_binary_payload(message, MessageAttributes.STATES, states, self._codec)
+            self._send_bytes(connection, self._encode_frame(payload, FrameFlags.BINARY))
+        elif self._delta_states:
+            self._send(connection, self._delta_message(message))
+        else:
+            self._send(connection, message)
+
+    def _delta_message(self, message: dict) -> dict:
+        """
+        Replaces the states, rewards and running flags in the state message with their changes relative to
+        the previously sent state. The message is not changed if there is no previous state of the same shape.
+
+        :param message: a state message
+        :return: the state message with the changes
+        """
+        attributes = (MessageAttributes.STATES, MessageAttributes.ACCUMULATED_REWARDS, MessageAttributes.RUNNING)
+        current_state = tuple(np.array(message[attribute]) for attribute in attributes)
+        previous_state, self._previous_state = self._previous_state, current_state
+        if previous_state is None or any(p.shape != c.shape for p, c in zip(previous_state, current_state)):
+            return message
+
+        delta_message = dict(message)
+        delta_message[MessageAttributes.DELTA] = True
+        for attribute, previous, current in zip(attributes, previous_state, current_state):
+            delta_message[attribute] = compute_delta(previous, current)
+        return delta_message
+
+    def _send(self, connection, message):
+        """
+        Encodes the message according to the framing and the codec in use and sends it to the client.
+
+        :param connection: the connection with the client
+        :param message: a message as a dictionary
+        """
+        if self._framing == Framing.LENGTH_PREFIXED:
+            self._send_bytes(connection, self._encode_frame(self._codec.encode(message)))
+        else:
+            self._send_bytes(connection, json.dumps(message, default=to_builtin).encode('UTF-8'))
+
+    def _encode_frame(self, payload, flags=0) -> bytes:
+        """
+        Creates the frame of the payload, compressed if the compressor is in use and the payload is large enough.
+
+        :param payload: the encoded message
+        :param flags: the flags of the frame
+        :return: the frame
+        """
+        return encode_frame(payload, flags, self._compressor, self._compression_threshold)
+
+    def _send_bytes(self, connection, data: bytes):
+        """
+        Sends the encoded message to the client.
+
+        :param connection: the connection with the client
+        :param data: the encoded message
+        """
+        try:
+            connection.send_bytes(data)
+        except (OSError, Disconnected):
+            log('Game server could not send the message - client disconnected', self._verbose, level=2)
+
+    def _use_framing(self, framing):
+        """
+        Sets the framing of the messages exchanged with the client.
+
+        :param framing: one of the values defined in the Framing class
+        """
+        self._framing = framing
+        self._decoder = FrameDecoder(self._codec, self._compressor) if framing == Framing.LENGTH_PREFIXED else RawMessageDecoder()
+
+    @property
+    def port(self) -> int:
+        """
+        Returns the port the server is listening on.
+
+        :return: the port number
+        """
+        return self._port
+
+    @property
+    def path(self) -> str:
+        """
+        Returns the path of the Unix domain socket the server is listening on or None if TCP is used.
+
+        :return: the path of the socket
+        """
+        return self._path
+
+    @property
+    def game(self) -> BaseGame:
+        """
+        Returns the game simulated by the server.
+
+        :return: the simulated game
+        """
+        return self._game
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
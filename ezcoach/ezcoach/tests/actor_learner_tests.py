@@ -0,0 +1,77 @@
+import unittest
+
+from ezcoach.actor_learner import ActorLearnerRunner, BatchLearner, ParameterizedPlayer
+from ezcoach.testing import CounterGame, InProcessEnvironment
+
+
+def _create_environment(actor):
+    return InProcessEnvironment(CounterGame(episode_length=5), verbose=0)
+
+
+class _ConstantPlayer(ParameterizedPlayer):
+
+    def __init__(self):
+        self._action = 0
+
+    def initialize(self, manifest):
+        pass
+
+    def act(self, state):
+        return self._action
+
+    def set_parameters(self, parameters):
+        self._action = parameters
+
+
+class _RewardLearner(BatchLearner):
+
+    def __init__(self):
+        self.manifest = None
+        self.transitions = []
+
+    def initialize(self, manifest):
+        self.manifest = manifest
+
+    def learn(self, transitions):
+        self.transitions.extend(transitions)
+
+    def get_parameters(self):
+        return 1 if self.transitions else 0
+
+
+class TestActorLearnerRunner(unittest.TestCase):
+
+    def test_training(self):
+        learner = _RewardLearner()
+        runner = ActorLearnerRunner(_ConstantPlayer(), learner, _create_environment, num_actors=2, batch_size=2,
+                                    verbose=0)
+        runner.train(num_episodes=20)
+
+        self.assertEqual('Counter', learner.manifest.name, 'Learner not initialized')
+        self.assertEqual(20, len(runner.metrics.get_episode_reward()), 'Episodes not recorded')
+        self.assertTrue({transition.actor for transition in learner.transitions} <= {0, 1}, 'Wrong actors')
+        self.assertEqual(runner.num_transitions, len(learner.transitions), 'Wrong number of transitions')
+        self.assertGreater(runner.num_pushes, 1, 'Parameters not pushed')
+        self.assertEqual(5., runner.metrics.get_episode_reward().max(), 'Parameters not used by the actors')
+
+    def test_transitions(self):
+        learner = _RewardLearner()
+        runner = ActorLearnerRunner(_ConstantPlayer(), learner, _create_environment, num_actors=1, batch_size=100,
+                                    verbose=0)
+        runner.train(num_episodes=1)
+
+        episode = learner.transitions[:5]
+        self.assertEqual([4, 3, 2, 1, 0], [int(transition.next_state[0]) for transition in episode],
+                         'Wrong next states')
+        self.assertEqual([True] * 4 + [False], [transition.running for transition in episode],
+                         'Wrong running flags')
+
+    def test_multiple_players(self):
+        learner = _RewardLearner()
+        runner = ActorLearnerRunner(_ConstantPlayer(), learner, _create_environment, num_actors=2, verbose=0)
+        runner.train(num_episodes=2, num_players=2)
+
+        rewards = runner.metrics.get_episode_reward()
+        self.assertEqual([2, 2], [len(player_rewards) for player_rewards in rewards], 'Episodes not recorded')
+        self.assertEqual({0, 1}, {transition.player for transition in learner.transitions},
+                         'Transitions not collected for all players')
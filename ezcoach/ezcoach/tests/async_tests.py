@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+
+from ezcoach.communication import AsyncCommunicator, Framing
+from ezcoach.core import Runner
+from ezcoach.enviroment import AsyncRemoteEnvironment
+from ezcoach.testing import ConstantLearner, GameServer, CounterGame, ImageGame
+
+
+class TestAsyncRemoteEnvironment(unittest.IsolatedAsyncioTestCase):
+
+    def _server(self, game):
+        server = GameServer(game, verbose=0)
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    async def _connect(self, server, framing=None, binary_states=False):
+        communicator = AsyncCommunicator(port=server.port, framing=framing, binary_states=binary_states, verbose=0)
+        environment = AsyncRemoteEnvironment(communicator, verbose=0)
+        await environment.connect()
+        self.addAsyncCleanup(environment.disconnect)
+        return environment, communicator
+
+    async def test_episode(self):
+        for framing in (None, Framing.LENGTH_PREFIXED):
+            with self.subTest(framing=framing):
+                server = self._server(CounterGame(episode_length=2))
+                environment, communicator = await self._connect(server, framing)
+                self.assertEqual(framing or Framing.RAW, communicator.framing, 'Wrong framing negotiated')
+
+                await environment.reset(1)
+                self.assertEqual([[2]], (await environment.obtain_states()).states.tolist(), 'Wrong first state')
+                await environment.act([1])
+                await environment.act([1])
+                states = await environment.obtain_states()
+                self.assertEqual([[0]], states.states.tolist(), 'Wrong last state')
+                self.assertEqual([2.], states.accumulated_rewards.tolist(), 'Wrong rewards')
+                self.assertEqual([False], states.running.tolist(), 'Episode not ended')
+
+    async def test_binary_states(self):
+        server = self._server(ImageGame(width=8, height=8, channels=3))
+        environment, communicator = await self._connect(server, Framing.LENGTH_PREFIXED, binary_states=True)
+        self.assertTrue(communicator.binary_states, 'Binary states not negotiated')
+
+        await environment.reset(2)
+        states = await environment.obtain_states()
+        self.assertEqual((2, 8, 8, 3), states.states.shape, 'Wrong shape of images')
+        self.assertEqual(server.game.last_states.tolist(), states.states.tolist(), 'Wrong images')
+
+    async def test_runners_share_event_loop(self):
+        runners = []
+        for episode_length in (3, 5, 7):
+            server = self._server(CounterGame(episode_length=episode_length))
+            environment, __ = await self._connect(server, Framing.LENGTH_PREFIXED)
+            runners.append(Runner(ConstantLearner(num_episodes=4), environment, verbose=0))
+
+        await asyncio.gather(*(runner.train_async() for runner in runners))
+
+        for runner, episode_length in zip(runners, (3, 5, 7)):
+            self.assertEqual([float(episode_length)] * 4, runner.metrics.get_episode_reward().tolist(),
+                             'Wrong rewards')
+
+    async def test_synchronous_environment_rejected(self):
+        runner = Runner(ConstantLearner(num_episodes=1), verbose=0)
+        with self.assertRaises(AssertionError):
+            await runner.train_async()
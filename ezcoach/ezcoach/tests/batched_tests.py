@@ -0,0 +1,129 @@
+import threading
+import unittest
+
+from ezcoach.communication import Communicator, Framing
+from ezcoach.core import Runner
+from ezcoach.enviroment import BatchedRemoteEnvironment
+from ezcoach.testing import GameServer, CounterGame, GridWorldGame, PongGame, RandomLearner
+
+
+class TestBatchedRemoteEnvironment(unittest.TestCase):
+
+    def _environment(self, server, num_instances, framing=None, binary_states=False):
+        communicator = Communicator.with_tcp_connection(port=server.port, verbose=0, framing=framing,
+                                                        binary_states=binary_states)
+        environment = BatchedRemoteEnvironment(communicator, num_instances, verbose=0)
+        environment.connect()
+        self.addCleanup(environment.disconnect)
+        return environment
+
+    def test_independent_instances(self):
+        with GameServer(CounterGame(), max_instances=3) as server:
+            environment = self._environment(server, 3)
+            self.assertEqual(3, environment.num_instances, 'Wrong number of instances')
+
+            environment.reset(1)
+            environment.act([[1], None, [1]])
+            environment.act([[1], [1], None], reset=[2])
+            states = environment.obtain_states()
+            self.assertEqual(3, len(states), 'States not returned for each instance')
+            self.assertEqual([[2], [1], [0]],
+                             [instance_states.accumulated_rewards.tolist() for instance_states in states],
+                             'Instances not stepped independently')
+
+    def test_instances_capped_by_server(self):
+        with GameServer(CounterGame(), max_instances=2) as server:
+            environment = self._environment(server, 4)
+            self.assertEqual(2, environment.num_instances, 'Number of instances not capped')
+
+    def test_fallback_without_batches(self):
+        with GameServer(CounterGame()) as server:
+            environment = self._environment(server, 4)
+            self.assertEqual(1, environment.num_instances, 'Batches used without support of the game')
+
+            environment.reset(1)
+            environment.act([[1]])
+            environment.act([[1]])
+            self.assertEqual([2], environment.obtain_states()[0].accumulated_rewards.tolist(),
+                             'Actions not performed')
+            environment.act([None], reset=[0])
+            self.assertEqual([0], environment.obtain_states()[0].accumulated_rewards.tolist(),
+                             'Instance not restarted')
+
+    def test_binary_states(self):
+        with GameServer(PongGame(view_size=(16, 12), seed=0), max_instances=2) as server:
+            environment = self._environment(server, 2, Framing.LENGTH_PREFIXED, binary_states=True)
+            environment.reset(2)
+            environment.act([[1, 0], [0, 1]])
+            states = environment.obtain_states()
+            self.assertEqual([(2, 12, 16, 3)] * 2, [instance_states.states.shape for instance_states in states],
+                             'Wrong shape of the states')
+
+
+class TestBatchedRunner(unittest.TestCase):
+
+    def _runner(self, server, agent, num_instances=3, **kwargs):
+        communicator = Communicator.with_tcp_connection(port=server.port, verbose=0)
+        environment = BatchedRemoteEnvironment(communicator, num_instances, verbose=0)
+        self.addCleanup(environment.disconnect)
+        return Runner(agent, environment, verbose=0, **kwargs)
+
+    def test_refused_without_agent_factory(self):
+        learner = RandomLearner(7)
+        with GameServer(GridWorldGame(width=8, height=8, max_moves=20), max_instances=3) as server:
+            runner = self._runner(server, learner)
+            with self.assertRaises(ValueError):
+                runner.train()
+            with self.assertRaises(ValueError):
+                runner.play(num_episodes=3)
+
+        self.assertEqual([], learner.started_episodes, 'Episodes started with the shared learner')
+
+    def test_training_instance_agents(self):
+        learner = RandomLearner(3)
+        with GameServer(GridWorldGame(width=8, height=8, max_moves=20), max_instances=3) as server:
+            runner = self._runner(server, learner, agent_factory=lambda instance: RandomLearner(3))
+            runner.train()
+
+        learners = runner.instance_agents
+        self.assertEqual(3, len(set(map(id, learners))), 'Learners shared by the instances')
+        self.assertIs(learner, learners[0], 'Agent of the runner not used by the first instance')
+        self.assertEqual([[1, 2, 3]] * 3, [learner.started_episodes for learner in learners], 'Episodes not started')
+        self.assertEqual([3] * 3, [learner.ended_episodes for learner in learners], 'Episodes not ended')
+        self.assertEqual(9, len(runner.metrics.get_episode_reward()), 'Metrics not recorded')
+
+    def test_training_single_instance(self):
+        learner = RandomLearner(3)
+        with GameServer(GridWorldGame(width=8, height=8, max_moves=20)) as server:
+            runner = self._runner(server, learner)
+            runner.train()
+
+        self.assertEqual([1, 2, 3], learner.started_episodes, 'Episodes not started')
+        self.assertEqual(3, learner.ended_episodes, 'Episodes not ended')
+        self.assertEqual(3, len(runner.metrics.get_episode_reward()), 'Metrics not recorded')
+
+    def test_playing_multiple_agents(self):
+        for agent_threads in (None, 2):
+            with self.subTest(agent_threads=agent_threads), \
+                    GameServer(PongGame(seed=0), max_instances=3) as server:
+                runner = self._runner(server, [RandomLearner(0) for __ in range(2)], agent_threads=agent_threads,
+                                      agent_factory=lambda instance: [RandomLearner(0) for __ in range(2)])
+                runner.play(num_episodes=5)
+
+                rewards = runner.metrics.get_episode_reward()
+                self.assertEqual([5, 5], [len(agent_rewards) for agent_rewards in rewards], 'Episodes not played')
+                for player in range(2):
+                    learners = [learners[player] for learners in runner.instance_agents]
+                    self.assertEqual(5, sum(len(learner.started_episodes) for learner in learners),
+                                     'Episodes not started')
+                self.assertFalse(any(thread.name.startswith('Agent') for thread in threading.enumerate()),
+                                 'Threads of the pool not stopped')
+
+    def test_playing_fewer_episodes_than_instances(self):
+        with GameServer(GridWorldGame(width=4, height=4, max_moves=10), max_instances=3) as server:
+            runner = self._runner(server, RandomLearner(0), agent_factory=lambda instance: RandomLearner(0))
+            runner.play(num_episodes=2)
+
+        self.assertEqual([[1], [1], []], [learner.started_episodes for learner in runner.instance_agents],
+                         'Wrong episodes played')
+        self.assertEqual(2, len(runner.metrics.get_episode_reward()), 'Metrics not recorded')
@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+import unittest
+
+from ezcoach.bench import Scenario, main, run_scenario, scenarios
+
+
+class TestBench(unittest.TestCase):
+
+    def test_single_agent_scenarios_with_one_player(self):
+        suite = scenarios(transports=('inprocess',), state_sizes=(16,), adapters=(0,), players=(1, 2))
+        self.assertEqual(5, len(suite), 'Wrong number of scenarios')
+        self.assertNotIn(Scenario('train', 'inprocess', 'single', 16, 0, 2), suite,
+                         'Single agent distributor used with two players')
+
+    def test_scenario_measured(self):
+        for transport in ('inprocess', 'tcp'):
+            with self.subTest(transport=transport):
+                scenario = Scenario('train', transport, 'multi', 16, 3, 2)
+                result = run_scenario(scenario, num_steps=50, memory_steps=20, episode_length=10)
+                self.assertEqual(50, result['steps'], 'Wrong number of steps')
+                self.assertGreater(result['steps_per_second'], 0, 'Steps per second not measured')
+                self.assertLessEqual(result['latency_us']['p50'], result['latency_us']['p99'], 'Wrong percentiles')
+                self.assertGreater(result['allocated_bytes_per_step'], 0, 'Memory not measured')
+
+    def test_results_written_as_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            main(['--steps', '20', '--memory-steps', '0', '--episode-length', '10', '--transports', 'inprocess',
+                  '--modes', 'train', 'play', '--state-sizes', '4', '--adapters', '1', '--players', '1',
+                  '--output', path, '--quiet'])
+            with open(path) as file:
+                results = json.load(file)
+
+        self.assertEqual(6, len(results['results']), 'Wrong number of results')
+        self.assertEqual({'train', 'play'}, {result['mode'] for result in results['results']}, 'Modes not measured')
+        self.assertIsNone(results['results'][0]['allocated_bytes_per_step'], 'Memory measured')
@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import unittest
+
+from ezcoach.cluster import Coordinator, Worker
+from ezcoach.testing import ConstantLearner, CounterGame, InProcessEnvironment
+
+
+def _create_agent(config, num_episodes):
+    return ConstantLearner(num_episodes, config['action'])
+
+
+def _create_stopping_agent(config, num_episodes):
+    return ConstantLearner(num_episodes - 1, config['action'])
+
+
+def _create_environment():
+    return InProcessEnvironment(CounterGame(episode_length=4), verbose=0)
+
+
+def _create_crashing_environment():
+    os._exit(1)
+
+
+class _DroppingEnvironment(InProcessEnvironment):
+
+    def __init__(self, game):
+        super(_DroppingEnvironment, self).__init__(game, verbose=0)
+        self._num_resets = 0
+
+    def reset(self, num_players=None, options=None):
+        self._num_resets += 1
+        if self._num_resets > 1:
+            self._parse_disconnected({})
+        super(_DroppingEnvironment, self).reset(num_players, options)
+
+
+def _create_dropping_environment():
+    return _DroppingEnvironment(CounterGame(episode_length=4))
+
+
+def _run_worker(port, environment_factory=_create_environment):
+    Worker('127.0.0.1', port, environment_factory, verbose=0).run()
+
+
+class TestCluster(unittest.TestCase):
+
+    def _start_workers(self, coordinator, num_workers, num_crashing=0, environment_factory=_create_environment):
+        workers = [multiprocessing.Process(target=_run_worker,
+                                           args=(coordinator.port,
+                                                 _create_crashing_environment if index < num_crashing
+                                                 else environment_factory),
+                                           daemon=True)
+                   for index in range(num_workers)]
+        for worker in workers:
+            worker.start()
+            self.addCleanup(worker.join, 5.)
+        return workers
+
+    def test_sweep(self):
+        with Coordinator('127.0.0.1', verbose=0) as coordinator:
+            for action in (0, 1, 1, 0, 1):
+                coordinator.submit(_create_agent, {'action': action}, num_episodes=3)
+            self._start_workers(coordinator, 3)
+            results = coordinator.wait(timeout=60.)
+
+        self.assertEqual(list(range(5)), [result.job_id for result in results], 'Results not collected')
+        self.assertTrue(all(result.error is None for result in results), 'Jobs failed')
+        self.assertEqual([[4. * action] * 3 for action in (0, 1, 1, 0, 1)],
+                         [result.metrics.get_episode_reward().tolist() for result in results], 'Wrong metrics')
+
+    def test_playing(self):
+        with Coordinator('127.0.0.1', verbose=0) as coordinator:
+            coordinator.submit(_create_agent, {'action': 1}, num_episodes=2, training=False)
+            self._start_workers(coordinator, 1)
+            result, = coordinator.wait(timeout=60.)
+
+        self.assertEqual([4., 4.], result.metrics.get_episode_reward().tolist(), 'Episodes not played')
+
+    def test_jobs_of_failed_workers_requeued(self):
+        with Coordinator('127.0.0.1', max_attempts=5, verbose=0) as coordinator:
+            self._start_workers(coordinator, 2, num_crashing=1)
+            for action in (1, 1, 1, 1):
+                coordinator.submit(_create_agent, {'action': action}, num_episodes=2)
+            results = coordinator.wait(timeout=60.)
+
+        self.assertTrue(all(result.error is None for result in results), 'Jobs of the failed worker not requeued')
+        self.assertEqual([[4., 4.]] * 4, [result.metrics.get_episode_reward().tolist() for result in results],
+                         'Wrong metrics')
+
+    def test_learner_stopping_early(self):
+        with Coordinator('127.0.0.1', max_attempts=1, verbose=0) as coordinator:
+            self._start_workers(coordinator, 1)
+            coordinator.submit(_create_stopping_agent, {'action': 1}, num_episodes=3)
+            result, = coordinator.wait(timeout=60.)
+
+        self.assertIsNone(result.error, 'Training stopped by the learner reported as failure')
+        self.assertEqual([4., 4.], result.metrics.get_episode_reward().tolist(), 'Wrong metrics')
+
+    def test_idle_workers_killed(self):
+        with Coordinator('127.0.0.1', max_attempts=1, verbose=0) as coordinator:
+            for __ in range(3):
+                idle_socket = socket.create_connection(('127.0.0.1', coordinator.port))
+                idle_socket.close()
+            time.sleep(.5)
+            coordinator.submit(_create_agent, {'action': 1}, num_episodes=2)
+            time.sleep(.5)
+            self._start_workers(coordinator, 1)
+            result, = coordinator.wait(timeout=60.)
+
+        self.assertIsNone(result.error, 'Attempts used up by the idle workers')
+        self.assertEqual(1, result.attempts, 'Job not started on the idle workers counted')
+        self.assertEqual([4., 4.], result.metrics.get_episode_reward().tolist(), 'Wrong metrics')
+
+    def test_failing_job(self):
+        with Coordinator('127.0.0.1', max_attempts=2, verbose=0) as coordinator:
+            self._start_workers(coordinator, 1)
+            coordinator.submit(_create_agent, {'action': None})
+            result, = coordinator.wait(timeout=60.)
+
+        self.assertEqual(2, result.attempts, 'Job not retried')
+        self.assertIn('No action', result.error, 'Error not reported')
+
+    def test_disconnected_game_reported(self):
+        with Coordinator('127.0.0.1', max_attempts=1, verbose=0) as coordinator:
+            self._start_workers(coordinator, 1, environment_factory=_create_dropping_environment)
+            coordinator.submit(_create_agent, {'action': 1}, num_episodes=3)
+            result, = coordinator.wait(timeout=60.)
+
+        self.assertIsNone(result.metrics, 'Dropped game reported as result')
+        self.assertIn('after 1 of 3 episodes', result.error, 'Disconnection not reported')
+
+    def test_workers_shut_down(self):
+        errors = []
+        self.addCleanup(setattr, threading, 'excepthook', threading.excepthook)
+        threading.excepthook = errors.append
+
+        with Coordinator('127.0.0.1', verbose=0) as coordinator:
+            workers = self._start_workers(coordinator, 2, num_crashing=1)
+            coordinator.submit(_create_agent, {'action': 1}, num_episodes=1)
+            coordinator.wait(timeout=60.)
+
+        for worker in workers:
+            worker.join(10.)
+        self.assertEqual([], [error.exc_value for error in errors], 'Errors raised while serving the workers')
+        self.assertFalse(any(worker.is_alive() for worker in workers), 'Workers not shut down')
@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+
+import ezcoach.codec
+from ezcoach.codec import (BaseCodec, JsonCodec, MsgpackCodec, ZlibCompressor, available_codecs,
+                           available_compressors, codec, create_codec, create_compressor, orjson)
+
+message = {'type': 'action', 'actions': [1, 2.5, [True, None]], 'name': 'źdźbło'}
+numpy_message = {'type': 'action', 'actions': np.array([[1, 2], [3, 4]], dtype=np.int64),
+                 'scalars': [np.float32(0.5), np.int16(3), np.bool_(True)]}
+expected_numpy_message = {'type': 'action', 'actions': [[1, 2], [3, 4]], 'scalars': [0.5, 3, True]}
+
+
+class TestCodecs(unittest.TestCase):
+
+    def _codecs(self):
+        codecs = [JsonCodec(use_orjson=False)]
+        if orjson is not None:
+            codecs.append(JsonCodec())
+        if MsgpackCodec.available():
+            codecs.append(MsgpackCodec())
+        return codecs
+
+    def test_round_trip(self):
+        for c in self._codecs():
+            with self.subTest(codec=c):
+                self.assertEqual(message, c.decode(c.encode(message)), 'Message changed')
+
+    def test_numpy_values_encoded(self):
+        for c in self._codecs():
+            with self.subTest(codec=c):
+                self.assertEqual(expected_numpy_message, c.decode(c.encode(numpy_message)),
+                                 'Numpy values not encoded')
+
+    def test_decode_memoryview(self):
+        for c in self._codecs():
+            with self.subTest(codec=c):
+                self.assertEqual(message, c.decode(memoryview(c.encode(message))), 'Memoryview not decoded')
+
+    def test_json_codecs_compatible(self):
+        if orjson is None:
+            self.skipTest('orjson is not installed')
+        self.assertEqual(message, JsonCodec(use_orjson=False).decode(JsonCodec().encode(message)),
+                         'orjson output not compatible')
+
+    def test_available_codecs_ordered(self):
+        names = available_codecs(preferred=('json',))
+        self.assertEqual('json', names[0], 'Preferred codec not first')
+        self.assertEqual(MsgpackCodec.available(), 'msgpack' in names, 'Wrong available codecs')
+
+    def test_codec_registered(self):
+        @codec
+        class ReversedJsonCodec(BaseCodec):
+            name = 'reversed_json'
+
+            def encode(self, message) -> bytes:
+                return JsonCodec().encode(message)[::-1]
+
+            def decode(self, data) -> dict:
+                return JsonCodec().decode(bytes(data)[::-1])
+
+        self.addCleanup(ezcoach.codec._codecs_classes.pop, 'reversed_json')
+
+        self.assertIn('reversed_json', available_codecs(), 'Codec not registered')
+        reversed_codec = create_codec('reversed_json')
+        self.assertEqual(message, reversed_codec.decode(reversed_codec.encode(message)), 'Message changed')
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            create_codec('unknown')
+
+    def test_unavailable_codec(self):
+        @codec
+        class UnavailableCodec(JsonCodec):
+            name = 'unavailable'
+
+            @classmethod
+            def available(cls) -> bool:
+                return False
+
+        self.addCleanup(ezcoach.codec._codecs_classes.pop, 'unavailable')
+
+        self.assertNotIn('unavailable', available_codecs(), 'Unavailable codec listed')
+        with self.assertRaises(ImportError):
+            create_codec('unavailable')
+
+
+class TestCompressors(unittest.TestCase):
+
+    def test_round_trip(self):
+        data = bytes(range(256)) * 16
+        compressor = ZlibCompressor()
+        compressed = compressor.compress(data)
+        self.assertLess(len(compressed), len(data), 'Data not compressed')
+        self.assertEqual(data, compressor.decompress(memoryview(compressed)), 'Data changed')
+
+    def test_compressor_registered(self):
+        self.assertIn('zlib', available_compressors(), 'Compressor not registered')
+        self.assertIsInstance(create_compressor('zlib'), ZlibCompressor, 'Wrong compressor created')
+
+    def test_unknown_compressor(self):
+        with self.assertRaises(ValueError):
+            create_compressor('unknown')
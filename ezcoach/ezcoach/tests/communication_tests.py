@@ -0,0 +1,693 @@
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from ezcoach.codec import MsgpackCodec, ZlibCompressor
+from ezcoach.communication import (ByteCounters, Communicator, Framing, FrameFlags, FrameReader, FrameDecoder,
+                                   RawMessageDecoder, MessageProtocol, SharedMemoryRing, SharedMemoryConnection,
+                                   TCPConnection, FRAME_HEADER, encode_frame, encode_binary_frame, compute_delta,
+                                   apply_delta, MessageQueue, ReceivePolicy)
+from ezcoach.core import Runner
+from ezcoach.enviroment import RemoteEnvironment
+from ezcoach.exception import Disconnected, NegotiationError
+from ezcoach.profiling import Phases, Profiler
+from ezcoach.range import Range
+from ezcoach.testing import (ConstantLearner, GameServer, GameProcess, CounterGame, ImageGame,
+                             measure_steps_per_second)
+from ezcoach.value import IntList
+
+messages = ({'type': 'state', 'states': [[1, 2], [3, 4]], 'acc_rewards': [0., 1.], 'running': [True, False]},
+            {'type': 'manifest', 'name': '}{', 'description': '{"nested": {"object": []}}'},
+            {'type': 'stopped'})
+
+
+class _WideCounterGame(CounterGame):
+
+    def __init__(self, width, **kwargs):
+        super(_WideCounterGame, self).__init__(**kwargs)
+        self._width = width
+        self._states_definition = IntList([Range(0, 100)] * width, 'Steps left followed by zeros')
+
+    def _state(self):
+        game_state = super(_WideCounterGame, self)._state()
+        states = [state + [0] * (self._width - 1) for state in game_state.states]
+        return game_state._replace(states=states)
+
+
+class _CountingGameServer(GameServer):
+
+    def __init__(self, *args, **kwargs):
+        super(_CountingGameServer, self).__init__(*args, **kwargs)
+        self.bytes_sent = 0
+
+    def _send_bytes(self, connection, data):
+        self.bytes_sent += len(data)
+        super(_CountingGameServer, self)._send_bytes(connection, data)
+
+
+def _skip_unavailable_codecs(test_case, codecs):
+    if codecs is not None and 'msgpack' in codecs and not MsgpackCodec.available():
+        test_case.skipTest('msgpack is not installed')
+
+
+class TestFrameReader(unittest.TestCase):
+
+    def test_single_frame(self):
+        reader = FrameReader()
+        frames = reader.feed(encode_frame(b'payload', 3))
+        self.assertEqual([(3, b'payload')], frames, 'Frame not read')
+
+    def test_multiple_frames_in_one_chunk(self):
+        reader = FrameReader()
+        frames = reader.feed(b''.join(encode_frame(str(i).encode()) for i in range(5)))
+        self.assertEqual([str(i).encode() for i in range(5)], [payload for __, payload in frames], 'Frames not read')
+
+    def test_frames_split_at_every_position(self):
+        stream = b''.join(encode_frame(json.dumps(m).encode()) for m in messages)
+        for position in range(len(stream) + 1):
+            with self.subTest(position=position):
+                decoder = FrameDecoder()
+                decoded = decoder.feed(stream[:position]) + decoder.feed(stream[position:])
+                self.assertEqual(list(messages), decoded, 'Frames not decoded')
+
+    def test_partial_frame_buffered(self):
+        reader = FrameReader()
+        frame = encode_frame(b'payload')
+        self.assertEqual([], reader.feed(frame[:-1]), 'Partial frame returned')
+        self.assertEqual(len(frame) - 1, reader.buffered, 'Partial frame not buffered')
+        self.assertEqual([(0, b'payload')], reader.feed(frame[-1:]), 'Frame not completed')
+        self.assertEqual(0, reader.buffered, 'Buffer not emptied')
+
+
+class TestRawMessageDecoder(unittest.TestCase):
+
+    @staticmethod
+    def _random_message(generator):
+        text = ''.join(generator.choice('ab{}[]"\\ ł') for __ in range(generator.randint(0, 20)))
+        return {'type': 'state', 'text': text, 'nested': {'list': [generator.random() for __ in range(3)]}}
+
+    @staticmethod
+    def _decode_in_chunks(stream, chunk_size):
+        decoder = RawMessageDecoder()
+        decoded = []
+        for start in range(0, len(stream), chunk_size):
+            decoded += decoder.feed(stream[start:start + chunk_size])
+        return decoded
+
+    def test_messages_split_at_every_position(self):
+        stream = ''.join(json.dumps(m) for m in messages)
+        for position in range(len(stream) + 1):
+            with self.subTest(position=position):
+                decoder = RawMessageDecoder()
+                decoded = decoder.feed(stream[:position]) + decoder.feed(stream[position:])
+                self.assertEqual(list(messages), decoded, 'Messages not decoded')
+
+    def test_partial_message_buffered(self):
+        decoder = RawMessageDecoder()
+        message = json.dumps(messages[1])
+        self.assertEqual([], decoder.feed(message[:-1]), 'Partial message returned')
+        self.assertEqual(len(message) - 1, decoder.buffered, 'Partial message not buffered')
+        self.assertEqual([messages[1]], decoder.feed(message[-1:]), 'Message not completed')
+        self.assertEqual(0, decoder.buffered, 'Buffer not emptied')
+
+    def test_randomly_fragmented_streams(self):
+        generator = random.Random(0)
+        for i in range(200):
+            with self.subTest(i=i):
+                expected = [self._random_message(generator) for __ in range(generator.randint(1, 10))]
+                stream = (' ' if generator.random() < 0.5 else '').join(json.dumps(m) for m in expected)
+
+                decoder = RawMessageDecoder()
+                decoded = []
+                start = 0
+                while start < len(stream):
+                    end = start + generator.randint(1, 40)
+                    decoded += decoder.feed(stream[start:end])
+                    start = end
+
+                self.assertEqual(expected, decoded, 'Messages not decoded exactly once')
+
+    def test_characters_split_between_chunks(self):
+        protocol = MessageProtocol()
+        data = json.dumps({'type': 'state', 'name': 'źdźbło'}, ensure_ascii=False).encode('UTF-8')
+        position = data.index('ź'.encode('UTF-8')) + 1
+        decoded = protocol.decode(data[:position]) + protocol.decode(data[position:])
+        self.assertEqual([{'type': 'state', 'name': 'źdźbło'}], decoded, 'Split character not decoded')
+
+    def test_received_bytes_counted(self):
+        counters = ByteCounters()
+        data = json.dumps({'type': 'state', 'name': 'źdźbło'}, ensure_ascii=False)
+        RawMessageDecoder(counters).feed(data)
+        self.assertEqual(len(data.encode('UTF-8')), counters.wire_bytes_received, 'Characters counted as bytes')
+        self.assertEqual(len(data.encode('UTF-8')), counters.payload_bytes_received, 'Characters counted as bytes')
+
+    def test_codec_not_requested(self):
+        protocol = MessageProtocol(framing=Framing.LENGTH_PREFIXED, codecs=('json',))
+        manifest = json.dumps({'type': 'manifest', 'framing': Framing.LENGTH_PREFIXED, 'codec': 'msgpack'})
+        with self.assertRaises(NegotiationError):
+            protocol.decode(manifest.encode('UTF-8'))
+
+    def test_decoding_time_linear(self):
+        def decoding_time(size):
+            stream = json.dumps({'type': 'state', 'states': [[i, '}{'] for i in range(size)]})
+            times = []
+            for __ in range(3):
+                start = time.perf_counter()
+                decoded = self._decode_in_chunks(stream, 1024)
+                times.append(time.perf_counter() - start)
+            self.assertEqual(1, len(decoded), 'Message not decoded')
+            return min(times)
+
+        small, large = decoding_time(20000), decoding_time(80000)
+        self.assertLess(large, 10 * small, 'Decoding time grows faster than linearly')
+
+
+class TestDelta(unittest.TestCase):
+
+    def test_delta_applied(self):
+        previous = np.arange(12).reshape(3, 4)
+        current = previous.copy()
+        current[1, 2] = -1
+        current[2, 3] = -2
+
+        delta = compute_delta(previous, current)
+        self.assertEqual([6, 11], delta['indices'].tolist(), 'Wrong indices')
+        apply_delta(previous, json.loads(json.dumps({k: v.tolist() for k, v in delta.items()})))
+        np.testing.assert_array_equal(current, previous, 'Delta not applied')
+
+    def test_empty_delta(self):
+        previous = np.array([True, False])
+        delta = compute_delta(previous, previous.copy())
+        apply_delta(previous, delta)
+        self.assertEqual([True, False], previous.tolist(), 'Buffer changed')
+
+
+def _state(step, delta=False):
+    return {'type': 'state', 'step': step, 'delta': delta}
+
+
+class TestMessageQueue(unittest.TestCase):
+
+    def test_keep_all(self):
+        messages = MessageQueue(ReceivePolicy.KEEP_ALL, max_size=1)
+        for step in range(3):
+            self.assertTrue(messages.put(_state(step), timeout=0.), 'Message not put')
+        self.assertEqual([0, 1, 2], [message['step'] for message in messages.get_all()], 'Messages not kept')
+        self.assertEqual(0, messages.dropped, 'Messages dropped')
+
+    def test_keep_latest(self):
+        messages = MessageQueue(ReceivePolicy.KEEP_LATEST)
+        messages.put(_state(0))
+        messages.put(_state(1))
+        messages.put({'type': 'stopped'})
+        messages.put(_state(2))
+        self.assertEqual(['stopped', 'state'], [message['type'] for message in messages.get_all()],
+                         'Older states not dropped')
+        self.assertEqual(2, messages.dropped, 'Wrong number of dropped states')
+
+    def test_keep_latest_delta_states_kept(self):
+        messages = MessageQueue(ReceivePolicy.KEEP_LATEST)
+        messages.put(_state(0))
+        messages.put(_state(1, delta=True))
+        self.assertEqual([0, 1], [message['step'] for message in messages.get_all()], 'Delta states dropped')
+        self.assertEqual(0, messages.dropped, 'States dropped')
+
+    def test_block_sender(self):
+        messages = MessageQueue(ReceivePolicy.BLOCK_SENDER, max_size=2)
+        self.assertTrue(messages.put(_state(0)), 'Message not put')
+        self.assertTrue(messages.put(_state(1)), 'Message not put')
+        self.assertFalse(messages.put(_state(2), timeout=.01), 'Message put to the full queue')
+        self.assertTrue(messages.put(_state(2), block=False), 'Message not put without blocking')
+
+        sender = threading.Thread(target=lambda: [messages.put(_state(step)) for step in range(3, 10)])
+        sender.start()
+        received = []
+        while len(received) < 10:
+            received.extend(message['step'] for message in messages.get_all(timeout=5.))
+            self.assertLessEqual(len(messages), 2, 'Queue not bounded')
+        sender.join()
+        self.assertEqual(list(range(10)), received, 'Messages not received in order')
+
+    def test_bounded_by_default(self):
+        messages = MessageQueue(max_size=1)
+        self.assertEqual(ReceivePolicy.BLOCK_SENDER, messages.policy, 'Wrong default policy')
+        self.assertTrue(messages.put(_state(0)), 'Message not put')
+        self.assertFalse(messages.put(_state(1), timeout=.01), 'Message put to the full queue')
+
+    def test_get_all_timeout(self):
+        self.assertEqual([], MessageQueue().get_all(timeout=.01), 'Messages obtained from the empty queue')
+
+
+class TestBinaryFrame(unittest.TestCase):
+
+    def test_binary_attribute_decoded(self):
+        data = np.arange(24, dtype=np.uint8)
+        message = {'type': 'state', 'states': None, 'running': [True]}
+        decoded, = FrameDecoder().feed(encode_binary_frame(message, 'states', data))
+        self.assertEqual([True], decoded['running'], 'JSON header not decoded')
+        self.assertEqual(data.tobytes(), bytes(decoded['states']), 'Raw bytes not decoded')
+        self.assertNotIn('binary', decoded, 'Binary attribute not removed')
+
+    def test_binary_frames_split(self):
+        data = np.arange(100, dtype=np.uint8)
+        stream = encode_binary_frame({'type': 'state'}, 'states', data) * 2
+        decoder = FrameDecoder()
+        decoded = decoder.feed(stream[:7]) + decoder.feed(stream[7:150]) + decoder.feed(stream[150:])
+        self.assertEqual(2, len(decoded), 'Frames not decoded')
+        for message in decoded:
+            self.assertEqual(data.tobytes(), bytes(message['states']), 'Raw bytes not decoded')
+
+
+class TestCompressedFrame(unittest.TestCase):
+
+    def test_compressed_frame_decoded(self):
+        payload = json.dumps({'type': 'state', 'states': [[0] * 500]}).encode('UTF-8')
+        frame = encode_frame(payload, 0, ZlibCompressor(), threshold=100)
+        length, flags = FRAME_HEADER.unpack_from(frame)
+        self.assertTrue(flags & FrameFlags.COMPRESSED, 'Frame not compressed')
+        self.assertLess(length, len(payload), 'Payload not compressed')
+
+        decoder = FrameDecoder(compressor=ZlibCompressor())
+        decoded = decoder.feed(frame[:5]) + decoder.feed(frame[5:])
+        self.assertEqual([json.loads(payload)], decoded, 'Compressed frame not decoded')
+
+    def test_compressed_frame_requires_compressor(self):
+        payload = json.dumps({'type': 'state', 'states': [[0] * 500]}).encode('UTF-8')
+        with self.assertRaises(NegotiationError):
+            FrameDecoder().feed(encode_frame(payload, 0, ZlibCompressor(), threshold=100))
+
+    def test_small_frame_not_compressed(self):
+        payload = b'{"type":"stopped"}'
+        frame = encode_frame(payload, 0, ZlibCompressor(), threshold=len(payload) + 1)
+        self.assertEqual(0, FRAME_HEADER.unpack_from(frame)[1], 'Frame below threshold compressed')
+        self.assertEqual(payload, frame[FRAME_HEADER.size:], 'Payload changed')
+
+    def test_incompressible_frame_not_compressed(self):
+        payload = np.random.default_rng(0).integers(0, 256, 1000, dtype=np.uint8).tobytes()
+        frame = encode_frame(payload, FrameFlags.BINARY, ZlibCompressor(), threshold=0)
+        self.assertEqual(FrameFlags.BINARY, FRAME_HEADER.unpack_from(frame)[1], 'Larger payload sent')
+
+
+class TestGameServerCommunication(unittest.TestCase):
+
+    def _connect(self, server, framing, binary_states=False, codecs=None, delta_states=False, compression=None,
+                 compression_threshold=1024):
+        communicator = Communicator.with_tcp_connection(port=server.port, framing=framing, verbose=0,
+                                                        binary_states=binary_states, codecs=codecs,
+                                                        delta_states=delta_states, compression=compression,
+                                                        compression_threshold=compression_threshold)
+        environment = RemoteEnvironment(communicator, verbose=0)
+        environment.connect()
+        self.addCleanup(environment.disconnect)
+        return environment, communicator
+
+    def test_raw_framing_by_default(self):
+        with GameServer(CounterGame()) as server:
+            environment, communicator = self._connect(server, None)
+            self.assertEqual(Framing.RAW, communicator.framing, 'Wrong framing negotiated')
+            self.assertEqual('Counter', environment.manifest.name, 'Manifest not received')
+
+    def test_length_prefixed_framing_negotiated(self):
+        with GameServer(CounterGame()) as server:
+            environment, communicator = self._connect(server, Framing.LENGTH_PREFIXED)
+            self.assertEqual(Framing.LENGTH_PREFIXED, communicator.framing, 'Wrong framing negotiated')
+            self.assertEqual('Counter', environment.manifest.name, 'Manifest not received')
+
+    def test_length_prefixed_framing_not_supported(self):
+        with GameServer(CounterGame(), framings=(Framing.RAW,)) as server:
+            environment, communicator = self._connect(server, Framing.LENGTH_PREFIXED)
+            self.assertEqual(Framing.RAW, communicator.framing, 'Unsupported framing used')
+
+    @unittest.skipUnless(MsgpackCodec.available(), 'msgpack is not installed')
+    def test_codec_negotiated(self):
+        with GameServer(CounterGame()) as server:
+            environment, communicator = self._connect(server, Framing.LENGTH_PREFIXED, codecs=('msgpack', 'json'))
+            self.assertEqual('msgpack', communicator.codec, 'Wrong codec negotiated')
+            self.assertEqual('Counter', environment.manifest.name, 'Manifest not received')
+
+    @unittest.skipUnless(MsgpackCodec.available(), 'msgpack is not installed')
+    def test_codec_not_supported(self):
+        with GameServer(CounterGame(), codecs=('json',)) as server:
+            environment, communicator = self._connect(server, Framing.LENGTH_PREFIXED, codecs=('msgpack', 'json'))
+            self.assertEqual('json', communicator.codec, 'Unsupported codec used')
+
+    def test_codec_requires_length_prefixed_framing(self):
+        with GameServer(CounterGame()) as server:
+            environment, communicator = self._connect(server, None, codecs=('msgpack', 'json'))
+            self.assertEqual('json', communicator.codec, 'Codec used with raw framing')
+
+    def test_episode(self):
+        for framing, codecs in ((None, None), (Framing.LENGTH_PREFIXED, ('json',)),
+                                (Framing.LENGTH_PREFIXED, ('msgpack',))):
+            with self.subTest(framing=framing, codecs=codecs), \
+                    GameServer(CounterGame(episode_length=3)) as server:
+                _skip_unavailable_codecs(self, codecs)
+                environment, communicator = self._connect(server, framing, codecs=codecs)
+                environment.reset(2)
+                self.assertEqual([[3], [3]], environment.obtain_states().states.tolist(), 'Wrong first state')
+
+                for steps_left in (2, 1, 0):
+                    environment.act(np.array([1, 0]))
+                    self.assertEqual([[steps_left], [steps_left]], environment.obtain_states().states.tolist(),
+                                     'Wrong state')
+
+                states = environment.obtain_states()
+                self.assertEqual([3., 0.], states.accumulated_rewards.tolist(), 'Wrong rewards')
+                self.assertEqual([False, False], states.running.tolist(), 'Episode not ended')
+
+    def test_bounded_receive_queue_episode(self):
+        for policy in (ReceivePolicy.KEEP_LATEST, ReceivePolicy.BLOCK_SENDER):
+            with self.subTest(policy=policy), GameServer(CounterGame(episode_length=3)) as server:
+                communicator = Communicator.with_tcp_connection(port=server.port, verbose=0, receive_policy=policy,
+                                                                max_queued_messages=1)
+                environment = RemoteEnvironment(communicator, verbose=0)
+                environment.connect()
+                self.addCleanup(environment.disconnect)
+                environment.reset(1)
+                for steps_left in (2, 1, 0):
+                    environment.act([1])
+                    self.assertEqual([[steps_left]], environment.obtain_states().states.tolist(), 'Wrong state')
+                self.assertEqual(policy, communicator.receive_policy, 'Wrong policy')
+                self.assertEqual(0, environment.dropped_states, 'States dropped')
+                self.assertEqual(0, environment.coalesced_states, 'States coalesced')
+
+    def test_profiled_episode(self):
+        with GameServer(CounterGame(episode_length=3)) as server:
+            environment = RemoteEnvironment(Communicator.with_tcp_connection(port=server.port, verbose=0), verbose=0)
+            profiler = Profiler()
+            environment.profiler = profiler
+            environment.connect()
+            self.addCleanup(environment.disconnect)
+            environment.reset(1)
+            for __ in range(3):
+                environment.act([1])
+
+        for phase in (Phases.VALIDATE, Phases.SEND):
+            self.assertEqual(3, profiler.histogram(phase).count, f'Phase {phase} not recorded for each step')
+        for phase in (Phases.WAIT, Phases.PARSE, Phases.DECODE):
+            self.assertLessEqual(3, profiler.histogram(phase).count, f'Phase {phase} not recorded')
+
+    def test_delta_states_episode(self):
+        for framing, codecs in ((None, None), (Framing.LENGTH_PREFIXED, ('msgpack',))):
+            with self.subTest(framing=framing), GameServer(_WideCounterGame(10, episode_length=3)) as server:
+                _skip_unavailable_codecs(self, codecs)
+                environment, communicator = self._connect(server, framing, codecs=codecs, delta_states=True)
+                self.assertTrue(communicator.delta_states, 'Delta states not negotiated')
+                for episode in range(2):
+                    environment.reset(2)
+                    all_states = [environment.obtain_states()]
+                    for __ in range(3):
+                        environment.act([1, 0])
+                        all_states.append(environment.obtain_states())
+
+                    for steps_left, states in zip((3, 2, 1, 0), all_states):
+                        self.assertEqual([[steps_left] + [0] * 9] * 2, states.states.tolist(),
+                                         'Wrong states or previous states modified')
+                    self.assertEqual([3., 0.], all_states[-1].accumulated_rewards.tolist(), 'Wrong rewards')
+                    self.assertEqual([False, False], all_states[-1].running.tolist(), 'Episode not ended')
+
+    def test_delta_states_not_copied_without_copy_on_read(self):
+        with GameServer(_WideCounterGame(10, episode_length=3)) as server:
+            environment, communicator = self._connect(server, None, delta_states=True)
+            environment.copy_on_read = False
+            environment.reset(2)
+            environment.obtain_states()
+            patched = []
+            for __ in range(2):
+                environment.act([1, 0])
+                patched.append(environment.obtain_states().states)
+
+            self.assertEqual([[1] + [0] * 9] * 2, patched[-1].tolist(), 'Wrong states')
+            self.assertTrue(np.shares_memory(patched[0], patched[1]), 'Patched states copied')
+            self.assertFalse(patched[-1].flags.writeable, 'Patched buffer writeable by the agents')
+
+    def test_delta_states_reduce_bytes_sent(self):
+        bytes_sent = []
+        for delta_states in (False, True):
+            with _CountingGameServer(_WideCounterGame(500, episode_length=20)) as server:
+                environment, communicator = self._connect(server, None, delta_states=delta_states)
+                server.bytes_sent = 0
+                runner = Runner(ConstantLearner(num_episodes=2), environment, verbose=0)
+                runner.train()
+                bytes_sent.append(server.bytes_sent)
+        self.assertLess(bytes_sent[1], bytes_sent[0] / 5, 'Delta states not smaller')
+
+    def test_compression_negotiated(self):
+        with GameServer(CounterGame()) as server:
+            environment, communicator = self._connect(server, Framing.LENGTH_PREFIXED, compression='zlib')
+            self.assertEqual('zlib', communicator.compression, 'Compression not negotiated')
+            self.assertEqual('Counter', environment.manifest.name, 'Manifest not received')
+
+    def test_compression_not_supported(self):
+        for framing, compressors in ((None, None), (Framing.LENGTH_PREFIXED, ())):
+            with self.subTest(framing=framing), GameServer(CounterGame(), compressors=compressors) as server:
+                environment, communicator = self._connect(server, framing, compression='zlib')
+                self.assertIsNone(communicator.compression, 'Unsupported compression used')
+
+    def test_compressed_episode(self):
+        for codecs in (('json',), ('msgpack',)):
+            with self.subTest(codecs=codecs), GameServer(_WideCounterGame(500, episode_length=5)) as server:
+                _skip_unavailable_codecs(self, codecs)
+                environment, communicator = self._connect(server, Framing.LENGTH_PREFIXED, codecs=codecs,
+                                                          compression='zlib', compression_threshold=256)
+                communicator.byte_counters.reset()
+                runner = Runner(ConstantLearner(num_episodes=2), environment, verbose=0)
+                runner.train()
+                self.assertEqual([5., 5.], runner.metrics.get_episode_reward().tolist(), 'Wrong rewards')
+
+                counters = communicator.byte_counters
+                self.assertLess(counters.wire_bytes_received, counters.payload_bytes_received / 5,
+                                'Received states not compressed')
+                self.assertEqual(counters.payload_bytes_sent, counters.wire_bytes_sent,
+                                 'Messages below threshold compressed')
+
+    def test_compressed_binary_image_states(self):
+        game = ImageGame(width=16, height=8, channels=3)
+        with GameServer(game) as server:
+            environment, communicator = self._connect(server, Framing.LENGTH_PREFIXED, binary_states=True,
+                                                      compression='zlib', compression_threshold=0)
+            environment.reset(2)
+            environment.act([1, 1])
+            np.testing.assert_array_equal(game.last_states, environment.obtain_states().states, 'Wrong images')
+
+    def test_delta_states_not_used_with_binary_states(self):
+        with GameServer(ImageGame(width=4, height=4)) as server:
+            environment, communicator = self._connect(server, Framing.LENGTH_PREFIXED, binary_states=True,
+                                                      delta_states=True)
+            self.assertTrue(communicator.binary_states, 'Binary states not negotiated')
+            self.assertFalse(communicator.delta_states, 'Delta states used with binary states')
+
+    def test_runner_training(self):
+        for framing in (None, Framing.LENGTH_PREFIXED):
+            with self.subTest(framing=framing), GameServer(CounterGame(episode_length=5)) as server:
+                environment, communicator = self._connect(server, framing)
+                runner = Runner(ConstantLearner(num_episodes=3), environment, verbose=0)
+                runner.train()
+                self.assertEqual([5., 5., 5.], runner.metrics.get_episode_reward().tolist(), 'Wrong rewards')
+
+    def test_binary_image_states(self):
+        with GameServer(ImageGame(width=16, height=8, channels=3)) as server:
+            environment, communicator = self._connect(server, Framing.LENGTH_PREFIXED, binary_states=True)
+            self.assertTrue(communicator.binary_states, 'Binary states not negotiated')
+
+            environment.copy_on_read = False
+            environment.reset(2)
+            environment.act([1, 1])
+            states = environment.obtain_states().states
+            self.assertEqual((2, 8, 16, 3), states.shape, 'Wrong shape of images')
+            self.assertEqual(np.uint8, states.dtype, 'Wrong type of images')
+            self.assertFalse(states.flags.owndata, 'Images copied from the received bytes')
+            np.testing.assert_array_equal(server.game.last_states, states, 'Wrong images')
+
+    def test_binary_image_states_require_length_prefixed_framing(self):
+        with GameServer(ImageGame(width=4, height=4, channels=1)) as server:
+            environment, communicator = self._connect(server, None, binary_states=True)
+            self.assertFalse(communicator.binary_states, 'Binary states used with raw framing')
+
+            environment.reset(1)
+            np.testing.assert_array_equal(server.game.last_states, environment.obtain_states().states,
+                                          'Wrong images')
+
+
+class TestTCPConnection(unittest.TestCase):
+
+    def test_buffer_grows_with_messages(self):
+        game_socket, training_socket = socket.socketpair()
+        connection = TCPConnection.from_socket(training_socket, buffer_size=16)
+        self.addCleanup(connection.close)
+        self.addCleanup(game_socket.close)
+
+        data = bytes(range(100))
+        game_socket.sendall(data)
+        received = b''
+        while len(received) < len(data):
+            received += bytes(connection.recv_bytes())
+        self.assertEqual(data, received, 'Wrong data received')
+        self.assertGreater(connection.buffer_size, 16, 'Buffer not enlarged')
+
+    def test_socket_options(self):
+        listening_socket = socket.socket()
+        listening_socket.bind(('127.0.0.1', 0))
+        listening_socket.listen(1)
+        self.addCleanup(listening_socket.close)
+
+        connection = TCPConnection('127.0.0.1', listening_socket.getsockname()[1], receive_buffer_size=1 << 16,
+                                   send_buffer_size=1 << 16)
+        connection.connect()
+        self.addCleanup(connection.close)
+        connected_socket = connection.socket
+        self.assertTrue(connected_socket.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY), 'Nagle not disabled')
+        self.assertGreaterEqual(connected_socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF), 1 << 16,
+                                'Receive buffer not set')
+        self.assertGreaterEqual(connected_socket.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF), 1 << 16,
+                                'Send buffer not set')
+
+    def test_closed_while_receiving(self):
+        game_socket, training_socket = socket.socketpair()
+        connection = TCPConnection.from_socket(training_socket)
+        self.addCleanup(game_socket.close)
+        connection.close()
+        self.assertIsNone(connection.socket, 'Socket not released')
+        with self.assertRaises(Disconnected):
+            connection.recv_bytes()
+
+    def test_unix_socket_buffer_sizes(self):
+        path = os.path.join(tempfile.mkdtemp(), 'game.sock')
+        with GameServer(CounterGame(episode_length=5), path=path) as server:
+            communicator = Communicator.with_unix_socket_connection(server.path, receive_buffer_size=1 << 16,
+                                                                    send_buffer_size=1 << 16, verbose=0)
+            communicator.connect()
+            self.addCleanup(communicator.disconnect)
+            connected_socket = communicator.connection.socket
+            self.assertGreaterEqual(connected_socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF), 1 << 16,
+                                    'Receive buffer not set')
+            self.assertGreaterEqual(connected_socket.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF), 1 << 16,
+                                    'Send buffer not set')
+
+    def test_unix_socket_episode(self):
+        path = os.path.join(tempfile.mkdtemp(), 'game.sock')
+        for framing in (None, Framing.LENGTH_PREFIXED):
+            with self.subTest(framing=framing), GameServer(CounterGame(episode_length=5), path=path) as server:
+                communicator = Communicator.with_unix_socket_connection(server.path, framing=framing, verbose=0)
+                environment = RemoteEnvironment(communicator, verbose=0)
+                environment.connect()
+                self.addCleanup(environment.disconnect)
+                runner = Runner(ConstantLearner(num_episodes=2), environment, verbose=0)
+                runner.train()
+                self.assertEqual(framing or Framing.RAW, communicator.framing, 'Wrong framing negotiated')
+                self.assertEqual([5., 5.], runner.metrics.get_episode_reward().tolist(), 'Wrong rewards')
+
+
+class TestSharedMemoryRing(unittest.TestCase):
+
+    def _ring(self, size):
+        ring = SharedMemoryRing(size)
+        self.addCleanup(ring.close)
+        return ring
+
+    def test_write_and_read_wrapped(self):
+        ring = self._ring(16)
+        for i in range(5):
+            data = bytes(range(i, i + 10))
+            ring.write(data)
+            self.assertEqual(data, ring.read(), 'Wrong data read')
+
+    def test_write_larger_than_ring(self):
+        ring = self._ring(64)
+        data = bytes(random.Random(0).getrandbits(8) for __ in range(10000))
+        received = []
+
+        def read():
+            while sum(len(chunk) for chunk in received) < len(data):
+                received.append(ring.read())
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        ring.write(data)
+        reader.join(5)
+        self.assertEqual(data, b''.join(received), 'Wrong data read')
+
+    def test_read_closed(self):
+        ring = self._ring(16)
+        ring.write(b'data')
+        ring.close()
+        self.assertEqual(b'data', ring.read(), 'Data written before closing not read')
+        with self.assertRaises(Disconnected):
+            ring.read()
+
+    def test_read_released(self):
+        ring = self._ring(16)
+        ring.write(b'data')
+        ring.release()
+        self.assertTrue(ring.closed, 'Released ring not closed')
+        with self.assertRaises(Disconnected):
+            ring.read()
+        with self.assertRaises(Disconnected):
+            ring.write(b'data')
+
+    def test_connection_closed_while_receiving(self):
+        connection, game_connection = SharedMemoryConnection.pair(1024)
+        errors = []
+
+        def receive():
+            try:
+                connection.recv_bytes()
+            except Disconnected as error:
+                errors.append(error)
+
+        receiver = threading.Thread(target=receive)
+        receiver.start()
+        time.sleep(0.1)
+        connection.close()
+        receiver.join(5)
+        self.assertFalse(receiver.is_alive(), 'Receiving thread not released')
+        self.assertEqual(1, len(errors), 'Disconnected not raised')
+        with self.assertRaises(Disconnected):
+            game_connection.send_bytes(b'manifest')
+
+    def test_connection_pair(self):
+        connection, game_connection = SharedMemoryConnection.pair(1024)
+        self.addCleanup(connection.close)
+        connection.send('{"type": "connect"}')
+        self.assertEqual('{"type": "connect"}', game_connection.recv(), 'Message not received')
+        game_connection.send_bytes(b'manifest')
+        self.assertEqual(b'manifest', connection.recv_bytes(), 'Bytes not received')
+
+
+class TestGameProcess(unittest.TestCase):
+
+    def _connect(self, process, **kwargs):
+        environment = RemoteEnvironment(process.communicator(verbose=0, **kwargs), verbose=0)
+        environment.connect()
+        self.addCleanup(environment.disconnect)
+        return environment
+
+    def test_runner_training(self):
+        for shared_memory in (False, True):
+            with self.subTest(shared_memory=shared_memory), \
+                    GameProcess(CounterGame(episode_length=5), shared_memory=shared_memory) as process:
+                environment = self._connect(process, framing=Framing.LENGTH_PREFIXED)
+                runner = Runner(ConstantLearner(num_episodes=3), environment, verbose=0)
+                runner.train()
+                self.assertEqual([5., 5., 5.], runner.metrics.get_episode_reward().tolist(), 'Wrong rewards')
+
+    def test_binary_image_states_in_shared_memory(self):
+        with GameProcess(ImageGame(width=32, height=32), shared_memory=True, size=4096) as process:
+            environment = self._connect(process, framing=Framing.LENGTH_PREFIXED, binary_states=True)
+            environment.reset(2)
+            environment.act([1, 1])
+            self.assertEqual((2, 32, 32, 3), environment.obtain_states().states.shape, 'Wrong shape of images')
+
+    def test_steps_per_second_measured(self):
+        for shared_memory in (False, True):
+            with self.subTest(shared_memory=shared_memory), \
+                    GameProcess(CounterGame(episode_length=10), shared_memory=shared_memory) as process:
+                environment = self._connect(process)
+                self.assertGreater(measure_steps_per_second(environment, num_steps=50), 0, 'Steps not measured')
@@ -0,0 +1,151 @@
+import threading
+import unittest
+
+import numpy as np
+
+from ezcoach.agent import BatchMultiLearner, MultiLearner
+from ezcoach.core import Runner
+from ezcoach.testing import ConstantLearner, CounterGame, InProcessEnvironment
+
+
+class _RecordingLearner(ConstantLearner):
+
+    def __init__(self, action, num_episodes, barrier=None):
+        super().__init__(num_episodes, action)
+        self._barrier = barrier
+        self.callbacks = []
+        self.threads = set()
+
+    def episode_started(self, episode: int):
+        self.callbacks.append(('started', episode))
+
+    def act(self, state):
+        self.threads.add(threading.current_thread().name)
+        if self._barrier is not None:
+            self._barrier.wait()
+        self.callbacks.append(('act', int(state[0])))
+        return self._action
+
+    def receive_reward(self, previous_state, action, reward: float, accumulated_reward: float, next_state):
+        self.callbacks.append(('reward', reward))
+
+    def episode_ended(self, terminal_state, accumulated_reward):
+        self.threads.add(threading.current_thread().name)
+        if self._barrier is not None:
+            self._barrier.wait()
+        self.callbacks.append(('ended', accumulated_reward))
+
+
+class _SequentialMultiLearner(MultiLearner):
+
+    def __init__(self, num_episodes):
+        self._num_episodes = num_episodes
+        self._player = None
+        self.act_calls = 0
+        self.rewards = []
+        self.ended = []
+
+    def initialize(self, manifest):
+        pass
+
+    def do_start_episode(self, episode: int) -> bool:
+        return episode <= self._num_episodes
+
+    def set_players(self, players):
+        pass
+
+    def set_acting_player(self, player):
+        self._player = player
+
+    def act(self, state):
+        self.act_calls += 1
+        return self._player % 2
+
+    def receive_reward(self, previous_state, action, reward: float, accumulated_reward: float, next_state):
+        self.rewards.append((self._player, int(previous_state[0]), action, reward, int(next_state[0])))
+
+    def episode_ended(self, terminal_state, accumulated_reward):
+        self.ended.append((self._player, accumulated_reward))
+
+
+class _BatchLearner(_SequentialMultiLearner, BatchMultiLearner):
+
+    def act_batch(self, states, players):
+        self.act_calls += 1
+        assert states.shape == (len(players), 1)
+        return [player % 2 for player in players]
+
+    def receive_rewards_batch(self, previous_states, actions, rewards, accumulated_rewards, next_states, players):
+        for index, player in enumerate(players):
+            self.rewards.append((player, int(previous_states[index][0]), actions[index], rewards[index],
+                                 int(next_states[index][0])))
+
+
+def _train(agents, agent_threads=None):
+    environment = InProcessEnvironment(CounterGame(episode_length=4), verbose=0)
+    runner = Runner(agents, environment, verbose=0, agent_threads=agent_threads)
+    runner.train()
+    return runner
+
+
+class TestParallelAgentCallbacks(unittest.TestCase):
+
+    def test_same_callbacks_as_sequential(self):
+        sequential = [_RecordingLearner(action, 2) for action in (1, 0)]
+        parallel = [_RecordingLearner(action, 2) for action in (1, 0)]
+        sequential_runner = _train(sequential, None)
+        parallel_runner = _train(parallel, 2)
+
+        self.assertEqual([agent.callbacks for agent in sequential], [agent.callbacks for agent in parallel],
+                         'Callbacks differ from the sequential procedure')
+        self.assertEqual([rewards.tolist() for rewards in sequential_runner.metrics.get_episode_reward()],
+                         [rewards.tolist() for rewards in parallel_runner.metrics.get_episode_reward()],
+                         'Metrics differ')
+        self.assertEqual(sequential_runner.profile.histogram('act').count,
+                         parallel_runner.profile.histogram('act').count, 'Actions not profiled')
+
+    def test_callbacks_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=10.)
+        agents = [_RecordingLearner(1, 1, barrier) for __ in range(2)]
+        _train(agents, 2)
+
+        self.assertFalse(barrier.broken, 'Callbacks not invoked concurrently')
+        self.assertTrue(all(name.startswith('Agent') for agent in agents for name in agent.threads),
+                        'Callbacks not invoked in the thread pool')
+
+    def test_threads_stopped_after_procedure(self):
+        agents = [_RecordingLearner(1, 1) for __ in range(2)]
+        _train(agents, 2)
+        _train([_RecordingLearner(1, 1) for __ in range(2)], 2)
+        self.assertEqual([], [thread.name for thread in threading.enumerate() if thread.name.startswith('Agent')],
+                         'Threads of the pool not stopped')
+
+    def test_error_raised(self):
+        agents = [_RecordingLearner(1, 1), _RecordingLearner(None, 1)]
+        agents[1].act = lambda state: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            _train(agents, 2)
+
+
+class TestBatchMultiLearner(unittest.TestCase):
+
+    def test_same_rewards_as_sequential(self):
+        sequential, batch = _SequentialMultiLearner(2), _BatchLearner(2)
+        sequential_runner = _train(sequential)
+        batch_runner = _train(batch)
+
+        self.assertEqual(sequential.rewards, batch.rewards, 'Rewards differ from the sequential procedure')
+        self.assertEqual(sequential.ended, batch.ended, 'Episodes ended differently')
+        self.assertEqual([rewards.tolist() for rewards in sequential_runner.metrics.get_episode_reward()],
+                         [rewards.tolist() for rewards in batch_runner.metrics.get_episode_reward()],
+                         'Metrics differ')
+        self.assertEqual(sequential.act_calls / 2, batch.act_calls, 'Actions not selected in a single call')
+
+    def test_default_receive_rewards_batch(self):
+        learner = _BatchLearner(1)
+        BatchMultiLearner.receive_rewards_batch(learner, np.array([[3], [2]]), [1, 0], np.array([1., 0.]),
+                                                np.array([2., 0.]), np.array([[2], [1]]), np.array([0, 1]))
+        self.assertEqual([(0, 3, 1, 1., 2), (1, 2, 0, 0., 1)], learner.rewards, 'Rewards not received per player')
+
+    def test_act_abstract(self):
+        self.assertIn('act', BatchMultiLearner.__abstractmethods__, 'Act not abstract')
@@ -0,0 +1,192 @@
+import unittest
+
+import numpy as np
+
+from ezcoach.communication import IncomingMessageTypes, MessageAttributes
+from ezcoach.enviroment import StatesDecoder, StatesInfo
+from ezcoach.range import Range
+from ezcoach.testing import CounterGame, InProcessEnvironment
+from ezcoach.value import IntList
+
+
+def _state_message(states, accumulated_rewards, running, metrics=()):
+    return {MessageAttributes.TYPE: IncomingMessageTypes.STATE,
+            MessageAttributes.STATES: states,
+            MessageAttributes.ACCUMULATED_REWARDS: accumulated_rewards,
+            MessageAttributes.RUNNING: running,
+            MessageAttributes.METRICS: list(metrics)}
+
+
+class TestStatesInfo(unittest.TestCase):
+
+    def setUp(self):
+        self.decoder = StatesDecoder(IntList([Range(0, 10)] * 2))
+
+    def test_values_decoded(self):
+        states = StatesInfo.from_message(_state_message([[1, 2], [3, 4]], [1., -1.], [True, False], [.5]),
+                                         self.decoder)
+        np.testing.assert_array_equal([[1, 2], [3, 4]], states.states, 'Wrong states')
+        np.testing.assert_array_equal([1., -1.], states.accumulated_rewards, 'Wrong rewards')
+        np.testing.assert_array_equal([True, False], states.running, 'Wrong running flags')
+        self.assertEqual((.5,), states.game_metrics, 'Wrong metrics')
+
+    def test_values_decoded_lazily(self):
+        message = _state_message(None, [1.], [True])
+        del message[MessageAttributes.STATES]
+        states = StatesInfo.from_message(message, self.decoder)
+        self.assertEqual([True], states.running.tolist(), 'Running flags not decoded without the states')
+
+    def test_reused_arrays_bound_to_message(self):
+        decoder = StatesDecoder(IntList([Range(0, 10)] * 2), copy_on_read=False)
+        first = StatesInfo.from_message(_state_message([[1, 2]], [1.], [True]), decoder)
+        second = StatesInfo.from_message(_state_message([[3, 4]], [2.], [True]), decoder)
+        self.assertEqual([[3, 4]], second.states.tolist(), 'Wrong states')
+        self.assertEqual([[1, 2]], first.states.tolist(), 'States decoded into the arrays of the newer message')
+        self.assertEqual([1.], first.accumulated_rewards.tolist(), 'Rewards decoded into the newer arrays')
+
+    def test_agent_views_cached(self):
+        states = StatesInfo.from_message(_state_message([[1, 2], [3, 4]], [1., 2.], [True, True]), self.decoder)
+        self.assertIs(states[1], states[1], 'View not cached')
+        state, accumulated_reward, running = states[1]
+        self.assertEqual([3, 4], state.tolist(), 'Wrong state of the agent')
+        self.assertEqual(2., accumulated_reward, 'Wrong reward of the agent')
+        self.assertEqual(2, len(states), 'Wrong number of agents')
+        self.assertEqual([1., 2.], [view.accumulated_reward for view in states], 'Wrong iteration')
+
+    def test_eager_values(self):
+        states = StatesInfo(np.array([[1, 2]]), np.array([3.]), np.array([True]), ())
+        self.assertEqual(3., states[0].accumulated_reward, 'Wrong reward of the agent')
+        states.accumulated_rewards = np.array([4.])
+        self.assertEqual(4., states[0].accumulated_reward, 'Views not invalidated')
+
+    def test_slots(self):
+        states = StatesInfo(np.array([[1, 2]]), np.array([3.]), np.array([True]), ())
+        with self.assertRaises(AttributeError):
+            states.other = 1
+
+
+class TestStatesDecoder(unittest.TestCase):
+
+    def test_arrays_reused_alternately(self):
+        decoder = StatesDecoder(IntList([Range(0, 10)]), copy_on_read=False)
+        first = decoder.decode_accumulated_rewards([1., 2.])
+        second = decoder.decode_accumulated_rewards([3., 4.])
+        third = decoder.decode_accumulated_rewards([5., 6.])
+        self.assertIsNot(first, second, 'Previous values overwritten')
+        self.assertIs(first, third, 'Array not reused')
+        self.assertEqual([3., 4.], second.tolist(), 'Wrong values')
+
+    def test_arrays_reallocated_for_other_number_of_players(self):
+        decoder = StatesDecoder(IntList([Range(0, 10)]), copy_on_read=False)
+        decoder.decode_running([True, True])
+        decoder.decode_running([True, True])
+        self.assertEqual([False, True, True], decoder.decode_running([False, True, True]).tolist(),
+                         'Array not reallocated')
+
+
+class TestStatesBuffers(unittest.TestCase):
+
+    def _play(self, copy_on_read):
+        environment = InProcessEnvironment(CounterGame(episode_length=10), verbose=0)
+        environment.copy_on_read = copy_on_read
+        environment.connect()
+        environment.reset(num_players=1)
+        states = [environment.obtain_states().states]
+        for __ in range(3):
+            environment.act([1])
+            states.append(environment.obtain_states().states)
+        return states
+
+    def test_buffers_reused(self):
+        states = self._play(copy_on_read=False)
+        self.assertIs(states[1], states[3], 'Buffer not reused')
+        self.assertEqual([[[8]], [[7]]], [states[2].tolist(), states[3].tolist()], 'Wrong states')
+
+    def test_copy_on_read(self):
+        states = self._play(copy_on_read=True)
+        self.assertEqual([[[10]], [[9]], [[8]], [[7]]], [s.tolist() for s in states], 'States overwritten')
+
+    def test_copy_on_read_by_default(self):
+        environment = InProcessEnvironment(CounterGame(), verbose=0)
+        self.assertTrue(environment.copy_on_read, 'States not copied on read by default')
+
+
+class TestCoalescedStates(unittest.TestCase):
+
+    def test_states_coalesced(self):
+        environment = InProcessEnvironment(CounterGame(), verbose=0)
+        environment.connect()
+        environment._parse_messages([_state_message([[step]], [0.], [True]) for step in range(3)])
+        self.assertEqual([[2]], environment.obtain_states().states.tolist(), 'Latest state not parsed')
+        self.assertEqual(2, environment.coalesced_states, 'Wrong number of coalesced states')
+
+
+def _delta(indices, values):
+    return {'indices': indices, 'values': values}
+
+
+def _delta_message(states, accumulated_rewards, running):
+    message = _state_message(states, accumulated_rewards, running)
+    message[MessageAttributes.DELTA] = True
+    return message
+
+
+class TestDeltaStates(unittest.TestCase):
+
+    def _environment(self, copy_on_read=True):
+        environment = InProcessEnvironment(CounterGame(), verbose=0)
+        environment.copy_on_read = copy_on_read
+        environment.connect()
+        return environment
+
+    def test_fractional_reward_patched_into_integer_baseline(self):
+        environment = self._environment()
+        environment._parse_messages([_state_message([[3]], [0], [1])])
+        environment.obtain_states()
+        environment._parse_messages([_delta_message(_delta([0], [2]), _delta([0], [0.75]), _delta([0], [False]))])
+        states = environment.obtain_states()
+        self.assertEqual([0.75], states.accumulated_rewards.tolist(), 'Fractional reward truncated')
+        self.assertEqual(np.float64, states.accumulated_rewards.dtype, 'Wrong type of rewards')
+        self.assertEqual(np.bool_, states.running.dtype, 'Wrong type of running flags')
+        self.assertEqual([[2]], states.states.tolist(), 'Wrong states')
+
+    def test_full_states_not_decoded_again(self):
+        environment = self._environment(copy_on_read=False)
+        environment._parse_messages([_state_message([[3]], [0.], [True])])
+        first = environment.obtain_states().states
+        environment._parse_messages([_delta_message(_delta([0], [2]), _delta([], []), _delta([], []))])
+        environment.obtain_states()
+        environment._parse_messages([_state_message([[1]], [0.], [True])])
+        self.assertIsNot(first, environment.obtain_states().states, 'Buffer of the previous full states reused')
+        self.assertEqual([[3]], first.tolist(), 'Previous full states overwritten')
+
+
+class TestActionsValidation(unittest.TestCase):
+
+    def _create_environment(self, validate):
+        environment = InProcessEnvironment(CounterGame(episode_length=100), verbose=0, validate=validate)
+        environment.connect()
+        environment.reset(num_players=2)
+        return environment
+
+    def test_full(self):
+        environment = self._create_environment('full')
+        environment.act([1, None])
+        with self.assertRaises(ValueError):
+            environment.act([1, 5])
+
+    def test_sampled(self):
+        environment = self._create_environment('sampled')
+        environment.sampled_validation_interval = 3
+        with self.assertRaises(ValueError):
+            environment.act([1, 5])
+        environment.act([1, 5])
+        environment.act([1, 5])
+        with self.assertRaises(ValueError):
+            environment.act([1, 5])
+
+    def test_off(self):
+        environment = self._create_environment('full')
+        environment.validate = 'off'
+        environment.act([1, 5])
+        self.assertEqual('off', environment.validate, 'Wrong validation mode')
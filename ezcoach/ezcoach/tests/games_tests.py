@@ -0,0 +1,127 @@
+import time
+import unittest
+
+import numpy as np
+
+from ezcoach.communication import Communicator, Framing
+from ezcoach.core import Runner
+from ezcoach.enviroment import RemoteEnvironment
+from ezcoach.testing import GameServer, GridWorldGame, InProcessEnvironment, PongGame, RandomLearner
+
+
+class TestGridWorldGame(unittest.TestCase):
+
+    def test_example_board(self):
+        game = GridWorldGame()
+        state = game.reset(1)
+        self.assertEqual([[2, 0, 0, 1, 0, 2]], state.states, 'Wrong first state')
+
+        state = game.step([1])
+        self.assertEqual([[2, 0, 0, 0, 0, 1]], state.states, 'Player not moved right')
+        self.assertEqual([1.], state.accumulated_rewards, 'Reward of the end point not received')
+        self.assertEqual([False], state.running, 'Episode not ended at the end point')
+
+    def test_move_outside_board(self):
+        game = GridWorldGame()
+        game.reset(1)
+        state = game.step([2])
+        self.assertEqual([[2, 0, 0, 1, 0, 2]], state.states, 'Player left the board')
+        self.assertAlmostEqual(-.01, state.accumulated_rewards[0], msg='Wrong default action reward')
+
+    def test_max_moves(self):
+        game = GridWorldGame(width=10, height=10, end_points=(), max_moves=3, possible_players=(1, 2))
+        game.reset(2)
+        for __ in range(3):
+            state = game.step([3, 3])
+        self.assertEqual([False, False], state.running, 'Episode not ended after the maximal number of moves')
+        self.assertEqual([-.52] * 2, [round(reward, 2) for reward in state.accumulated_rewards], 'Wrong rewards')
+        self.assertEqual(100, len(state.states[0]), 'Wrong size of the states')
+
+
+class TestPongGame(unittest.TestCase):
+
+    def _play(self, game, num_players, actions):
+        state = game.reset(num_players)
+        for __ in range(10000):
+            if not all(state.running):
+                return state
+            state = game.step(actions)
+        self.fail('Episode not ended')
+
+    def test_episode_ends_with_point(self):
+        state = self._play(PongGame(seed=0), 2, [0, 0])
+        self.assertIn(state.accumulated_rewards, ([1., -1.], [-1., 1.]), 'Point not scored')
+
+    def test_vector_states_flipped(self):
+        game = PongGame(seed=0)
+        game.reset(2)
+        first, second = game.step([1, -1]).states
+        self.assertEqual(6, len(first), 'Wrong size of the states')
+        self.assertEqual(first[0], second[5], 'Opponent position not flipped')
+        self.assertEqual(first[1], -second[1], 'Ball position not flipped')
+        self.assertGreater(first[0], 0., 'Racket not moved up')
+
+    def test_follower_follows_ball(self):
+        game = PongGame(seed=0)
+        game.reset(1)
+        for __ in range(3):
+            state, = game.step([0]).states
+        self.assertNotEqual(0., state[5], 'Follower not moved')
+        self.assertEqual(np.sign(state[2]), np.sign(state[5]), 'Follower not moved towards the ball')
+
+    def test_view_states(self):
+        game = PongGame(view_size=(32, 24), seed=0)
+        state = game.reset(2)
+        self.assertEqual((24, 32, 3), state.states[0].shape, 'Wrong shape of the view')
+        np.testing.assert_array_equal(state.states[0], state.states[1][:, ::-1], 'View not flipped')
+
+
+class TestSimulatedGamesServer(unittest.TestCase):
+
+    def _runner(self, server, num_episodes, framing=None, binary_states=False):
+        communicator = Communicator.with_tcp_connection(port=server.port, verbose=0, framing=framing,
+                                                        binary_states=binary_states)
+        environment = RemoteEnvironment(communicator, verbose=0)
+        environment.connect()
+        self.addCleanup(environment.disconnect)
+        return Runner([RandomLearner(num_episodes) for __ in range(2)], environment, verbose=0)
+
+    def test_runner_training(self):
+        games = (GridWorldGame(width=8, height=8, max_moves=20, possible_players=(1, 2)),
+                 PongGame(seed=0), PongGame(view_size=(16, 12), seed=0))
+        for game in games:
+            for framing, binary_states in ((None, False), (Framing.LENGTH_PREFIXED, True)):
+                with self.subTest(game=game.name, framing=framing), GameServer(game) as server:
+                    runner = self._runner(server, 2, framing, binary_states)
+                    runner.train()
+                    rewards = runner.metrics.get_episode_reward()
+                    self.assertEqual([2, 2], [len(agent_rewards) for agent_rewards in rewards],
+                                     'Episodes not played')
+
+    def test_step_latency(self):
+        with GameServer(GridWorldGame(width=10, height=1, max_moves=5, possible_players=(2,)),
+                        step_latency=.02) as server:
+            runner = self._runner(server, 1)
+            start = time.perf_counter()
+            runner.train()
+            self.assertGreaterEqual(time.perf_counter() - start, .1, 'Step latency not simulated')
+
+
+class TestInProcessEnvironment(unittest.TestCase):
+
+    def test_runner_training(self):
+        environment = InProcessEnvironment(GridWorldGame(width=8, height=8, max_moves=20, possible_players=(2,)),
+                                           verbose=0)
+        runner = Runner([RandomLearner(3) for __ in range(2)], environment, verbose=0)
+        runner.train()
+        rewards = runner.metrics.get_episode_reward()
+        self.assertEqual([3, 3], [len(agent_rewards) for agent_rewards in rewards], 'Episodes not played')
+
+    def test_states_parsed(self):
+        environment = InProcessEnvironment(PongGame(view_size=(16, 12), seed=0), verbose=0)
+        environment.connect()
+        environment.reset(2)
+        environment.act([1, 0])
+        states = environment.obtain_states()
+        self.assertEqual((2, 12, 16, 3), states.states.shape, 'Wrong shape of the states')
+        self.assertEqual([True, True], states.running.tolist(), 'Wrong running flags')
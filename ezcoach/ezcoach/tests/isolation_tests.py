@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import unittest
+
+from ezcoach.agent import Learner, Player
+from ezcoach.core import Runner
+from ezcoach.isolation import IsolatedLearner, IsolatedPlayer, isolate
+from ezcoach.testing import ConstantLearner, CounterGame, InProcessEnvironment
+
+
+class _CountingLearner(ConstantLearner):
+
+    def __init__(self, action, num_episodes):
+        super().__init__(num_episodes, action)
+        self.pids = set()
+
+    def act(self, state):
+        self.pids.add(os.getpid())
+        return super().act(state)
+
+    def receive_reward(self, previous_state, action, reward: float, accumulated_reward: float, next_state):
+        if reward < 0:
+            raise ValueError('Negative reward')
+        super().receive_reward(previous_state, action, reward, accumulated_reward, next_state)
+
+    def total_reward(self, scale):
+        return sum(self.rewards) * scale
+
+
+class _ConstantPlayer(Player):
+
+    def initialize(self, manifest):
+        pass
+
+    def act(self, state):
+        return 1
+
+
+def _train(agents, **kwargs):
+    environment = InProcessEnvironment(CounterGame(episode_length=3), verbose=0)
+    runner = Runner(agents, environment, verbose=0, **kwargs)
+    runner.train()
+    return runner
+
+
+class TestIsolatedAgents(unittest.TestCase):
+
+    def test_isolate(self):
+        self.assertIsInstance(isolate(_CountingLearner(1, 1)), IsolatedLearner, 'Learner not isolated as learner')
+        player = isolate(_ConstantPlayer())
+        self.assertIsInstance(player, IsolatedPlayer, 'Player not isolated')
+        self.assertNotIsInstance(player, Learner, 'Player isolated as learner')
+
+    def test_self_play(self):
+        agents = [_CountingLearner(action, 2) for action in (1, 0)]
+        runner = _train(agents, agent_processes=True)
+        self.addCleanup(runner.close)
+
+        self.assertEqual([3., 0.], [runner.agent[index].total_reward(.5) for index in range(2)],
+                         'Methods not forwarded to the hosted agents')
+        self.assertEqual([[], []], [agent.rewards for agent in agents], 'Agents not isolated')
+        self.assertEqual([[3., 3.], [0., 0.]], [rewards.tolist() for rewards in runner.metrics.get_episode_reward()],
+                         'Wrong metrics')
+
+        runner.close()
+        hosted = [agent.fetch() for agent in runner.agent]
+        self.assertEqual([[1.] * 6, [0.] * 6], [agent.rewards for agent in hosted], 'Final states not fetched')
+        pids = [agent.pids for agent in hosted]
+        self.assertNotIn(os.getpid(), pids[0] | pids[1], 'Agents acted in the main process')
+        self.assertTrue(pids[0].isdisjoint(pids[1]), 'Agents hosted in the same process')
+
+    def test_processes_stopped_by_context_manager(self):
+        agents = [_CountingLearner(action, 1) for action in (1, None)]
+        environment = InProcessEnvironment(CounterGame(episode_length=3), verbose=0)
+        with self.assertRaises(ValueError):
+            with Runner(agents, environment, verbose=0, agent_processes=True) as runner:
+                runner.train()
+
+        self.assertEqual([], multiprocessing.active_children(), 'Processes not stopped')
+        self.assertEqual([[], []], [agent.rewards for agent in agents], 'Agents passed to the runner trained')
+        self.assertTrue(runner.agent[0].fetch().pids, 'Final state not fetched')
+
+    def test_error_raised(self):
+        with isolate(_CountingLearner(None, 1)) as agent:
+            agent.initialize(None)
+            with self.assertRaises(ValueError):
+                agent.act(None)
+            agent.receive_reward(None, 1, -1., -1., None)
+            agent.receive_reward(None, 1, 1., 0., None)
+            with self.assertRaises(ValueError):
+                agent.do_start_episode(1)
+            self.assertTrue(agent.do_start_episode(1), 'Agent not recovered after the error')
+            self.assertEqual([], agent.fetch().rewards, 'Requests after the error not skipped')
+
+    def test_closed_proxy_not_restarted(self):
+        agent = isolate(_CountingLearner(1, 1))
+        self.addCleanup(agent.close)
+        agent.initialize(None)
+        self.assertEqual(1, agent.act(None), 'Action not forwarded')
+        agent.close()
+
+        for request in (lambda: agent.act(None), lambda: agent.episode_started(1), lambda: agent.total_reward(1)):
+            with self.assertRaises(RuntimeError):
+                request()
+        self.assertEqual([], multiprocessing.active_children(), 'Process started by the closed proxy')
+        self.assertTrue(agent.fetch().pids, 'Final state not fetched')
+
+        agent.start()
+        self.assertEqual(1, agent.act(None), 'Process not started again')
+        self.assertEqual(2, len(agent.fetch().pids), 'Fetched agent not hosted again')
@@ -0,0 +1,103 @@
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+
+import ezcoach
+from ezcoach.core import Runner
+from ezcoach.pool import EnvironmentPool, find_free_port
+from ezcoach.testing import ConstantLearner
+
+_WORKING_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(ezcoach.__file__)))
+_COMMAND = [sys.executable, '-m', 'ezcoach.testing', '--game', 'counter', '--ip', '{ip}', '--port', '{port}']
+# only the first game starts listening
+_FIRST_ONLY_COMMAND = [sys.executable, '-c', 'import sys; from ezcoach.testing.__main__ import main; '
+                                             'sys.exit() if {index} else main(["--ip", "{ip}", "--port", "{port}"])']
+
+
+class TestEnvironmentPool(unittest.TestCase):
+
+    def _pool(self, size, health_check_interval=None):
+        pool = EnvironmentPool(_COMMAND, size, health_check_interval=health_check_interval,
+                               working_directory=_WORKING_DIRECTORY, verbose=0)
+        pool.start()
+        self.addCleanup(pool.stop)
+        return pool
+
+    def _wait_for_restart(self, pool, restarts, timeout=30.):
+        deadline = time.monotonic() + timeout
+        while pool.restarts < restarts and time.monotonic() < deadline:
+            time.sleep(.05)
+
+    def test_free_port(self):
+        port = find_free_port()
+        self.assertGreater(port, 0, 'Port not found')
+
+    def test_games_launched_on_distinct_ports(self):
+        pool = self._pool(2)
+        self.assertEqual(2, len(set(pool.ports)), 'Games launched on the same port')
+        self.assertTrue(all(process.poll() is None for process in pool.processes), 'Games not running')
+
+    def test_runners_on_threads(self):
+        pool = self._pool(2)
+        learners = [ConstantLearner(3) for __ in range(4)]
+
+        def train(learner):
+            with pool.lend(timeout=30.) as environment:
+                Runner(learner, environment, verbose=0).train()
+
+        threads = [threading.Thread(target=train, args=(learner,)) for learner in learners]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([3] * 4, [learner.ended_episodes for learner in learners], 'Episodes not played')
+
+    def test_crashed_game_restarted_by_health_check(self):
+        pool = self._pool(1, health_check_interval=.05)
+        crashed_process = pool.processes[0]
+        crashed_process.kill()
+        self._wait_for_restart(pool, 1)
+
+        self.assertEqual(1, pool.restarts, 'Game not restarted')
+        with pool.lend(timeout=30.) as environment:
+            runner = Runner(ConstantLearner(2), environment, verbose=0)
+            runner.train()
+        self.assertEqual(2, len(runner.metrics.get_episode_reward()), 'Restarted game not used')
+
+    def test_crashed_lent_game_restarted_on_release(self):
+        pool = self._pool(1)
+        with pool.lend() as environment:
+            pool.processes[0].kill()
+            pool.processes[0].wait()
+        self.assertEqual(1, pool.restarts, 'Game not restarted')
+        self.assertIsNot(environment, pool.acquire(), 'Environment of the crashed game lent')
+
+    def test_game_failing_to_start(self):
+        pool = EnvironmentPool([sys.executable, '-c', 'pass'], 1, startup_timeout=.5, verbose=0)
+        with self.assertRaises(TimeoutError):
+            pool.start()
+        pool.stop()
+
+    def test_launched_games_terminated_when_start_fails(self):
+        pool = EnvironmentPool(_FIRST_ONLY_COMMAND, 2, startup_timeout=2., working_directory=_WORKING_DIRECTORY,
+                               verbose=0)
+        with self.assertRaises(TimeoutError):
+            pool.start()
+
+        self.assertEqual([None, None], pool.processes, 'Games not terminated')
+        with self.assertRaises(OSError):
+            socket.create_connection(('127.0.0.1', pool.ports[0]), timeout=1.).close()
+
+    def test_crashed_game_restarted_on_acquire(self):
+        pool = self._pool(2)
+        pool.processes[0].kill()
+        pool.processes[0].wait()
+        with pool.lend(timeout=30.) as first, pool.lend(timeout=30.):
+            pass
+        self.assertEqual(1, pool.restarts, 'Game not restarted')
+        self.assertEqual(0, pool.check_health(), 'Running games restarted')
+        self.assertTrue(first.connected, 'Environment of the restarted game not connected')
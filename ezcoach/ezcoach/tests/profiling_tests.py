@@ -0,0 +1,99 @@
+import threading
+import unittest
+
+from ezcoach.core import Runner
+from ezcoach.profiling import LatencyHistogram, Phases, Profiler
+from ezcoach.testing import ConstantLearner, CounterGame, InProcessEnvironment
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentiles_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        for duration in range(1, 1001):
+            histogram.record(duration * 1000)
+
+        for q in (.5, .9, .99):
+            exact = q * 1000 * 1000
+            self.assertLessEqual(exact, histogram.percentile(q), 'Percentile below the exact value')
+            self.assertLess(histogram.percentile(q), exact * 1.25, 'Percentile above the bucket error')
+        self.assertEqual(1000 * 1000, histogram.percentile(1.), 'Maximum not returned')
+        self.assertEqual(1000, histogram.count, 'Wrong number of durations')
+        self.assertAlmostEqual(500500., histogram.mean, msg='Wrong mean')
+
+    def test_small_and_huge_durations(self):
+        histogram = LatencyHistogram()
+        for duration in (0, 1, 2, 3, 1 << 60):
+            histogram.record(duration)
+        self.assertEqual(2, histogram.percentile(.5), 'Small durations not counted exactly')
+        self.assertEqual(1 << 60, histogram.max, 'Wrong maximum')
+
+    def test_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(100)
+        second.record(200)
+        second.record(300)
+        first.merge(second)
+        self.assertEqual(3, len(first), 'Durations not merged')
+        self.assertEqual(300, first.max, 'Maximum not merged')
+        first.reset()
+        self.assertEqual(0, first.percentile(.5), 'Histogram not reset')
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_summaries(self):
+        profiler = Profiler()
+        for episode in (1, 2):
+            for __ in range(episode * 10):
+                profiler.record(Phases.ACT, 1023)
+            profiler.end_episode(episode)
+        profiler.record(Phases.ACT, 2047)
+
+        summary = profiler.summary()
+        self.assertEqual(31, summary.loc[Phases.ACT, 'count'], 'Unfinished episode not summarized')
+        self.assertAlmostEqual(2.047e-6, summary.loc[Phases.ACT, 'max'], msg='Durations not in seconds')
+        self.assertEqual([10, 20], profiler.episodes()['count'].tolist(), 'Wrong summaries of the episodes')
+        self.assertEqual((1.023e-6, 1.023e-6), profiler.percentiles(Phases.ACT, (.5, .9)), 'Wrong percentiles')
+
+    def test_runner_profile(self):
+        environment = InProcessEnvironment(CounterGame(episode_length=5), verbose=0)
+        runner = Runner(ConstantLearner(num_episodes=3), environment, verbose=0)
+        runner.train()
+
+        summary = runner.profile.summary()
+        for phase in (Phases.RESET, Phases.STEP, Phases.DISTRIBUTE, Phases.ENVIRONMENT_ACT, Phases.VALIDATE,
+                      Phases.ADAPT, Phases.ACT, Phases.RECEIVE_REWARD):
+            self.assertIn(phase, summary.index, f'Phase {phase} not recorded')
+        self.assertEqual(3, summary.loc[Phases.RESET, 'count'], 'Wrong number of resets')
+        self.assertEqual([1, 2, 3], sorted(set(runner.profile.episodes().index.get_level_values('episode'))),
+                         'Episodes not summarized')
+
+    def test_disabled(self):
+        environment = InProcessEnvironment(CounterGame(episode_length=5), verbose=0)
+        runner = Runner(ConstantLearner(num_episodes=2), environment, verbose=0, profile=False)
+        runner.train()
+
+        self.assertFalse(runner.profile.enabled, 'Profiler not disabled')
+        self.assertEqual((), runner.profile.phases, 'Durations recorded by the disabled profiler')
+        self.assertEqual(2, len(runner.metrics.get_episode_reward()), 'Episodes not played')
+
+    def test_episodes_ended_while_recording(self):
+        profiler = Profiler()
+        stopped = threading.Event()
+
+        def record():
+            while not stopped.is_set():
+                profiler.record(Phases.DECODE, 1023)
+
+        thread = threading.Thread(target=record)
+        thread.start()
+        for episode in range(200):
+            profiler.end_episode(episode)
+        stopped.set()
+        thread.join()
+        profiler.end_episode(200)
+
+        histogram = profiler.histogram(Phases.DECODE)
+        self.assertEqual(sum(profiler.episodes()['count']), histogram.count, 'Durations lost between the episodes')
+        self.assertEqual(histogram.count, len(histogram), 'Inconsistent histogram')
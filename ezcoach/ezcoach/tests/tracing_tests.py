@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from ezcoach.communication import Communicator
+from ezcoach.core import Runner
+from ezcoach.enviroment import RemoteEnvironment
+from ezcoach.testing import ConstantLearner, CounterGame, GameServer, InProcessEnvironment
+from ezcoach.tracing import Tracer
+
+
+def _double(state):
+    return state * 2
+
+
+class TestTracer(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'trace.json')
+
+    def _load(self):
+        with open(self.path) as file:
+            return json.load(file)
+
+    def _spans(self):
+        return [event for event in self._load() if event['ph'] == 'X']
+
+    def test_buffered_spans_written(self):
+        with Tracer(self.path, buffer_size=3) as tracer:
+            for index in range(10):
+                start = time.perf_counter_ns()
+                tracer.span(f'span "{index}"', start, start + 2000)
+
+        spans = self._spans()
+        self.assertEqual([f'span "{index}"' for index in range(10)], [span['name'] for span in spans],
+                         'Spans not written')
+        self.assertEqual({2.}, {span['dur'] for span in spans}, 'Durations not in microseconds')
+
+    def test_spans_over_limit_dropped(self):
+        with Tracer(self.path, max_events=4) as tracer:
+            for __ in range(10):
+                tracer.span('span', time.perf_counter_ns())
+
+        self.assertEqual(4, len(self._spans()), 'Spans over the limit written')
+        self.assertEqual(6, tracer.dropped, 'Dropped spans not counted')
+
+    def test_spans_dropped_when_writer_behind(self):
+        written = threading.Event()
+        release = threading.Event()
+
+        class _SlowTracer(Tracer):
+
+            def _write(self, events):
+                written.set()
+                release.wait(10.)
+                super(_SlowTracer, self)._write(events)
+
+        with _SlowTracer(self.path, buffer_size=2, max_pending_buffers=1) as tracer:
+            for __ in range(2):
+                tracer.span('span', time.perf_counter_ns())
+            written.wait(10.)
+            start = time.perf_counter_ns()
+            for __ in range(6):
+                tracer.span('span', time.perf_counter_ns())
+            self.assertLess(time.perf_counter_ns() - start, 5e9, 'Spans added waiting for the writer')
+            release.set()
+
+        self.assertEqual(4, len(self._spans()), 'Spans of the pending buffers not written')
+        self.assertEqual(4, tracer.dropped, 'Dropped spans not counted')
+        self.assertEqual(4, tracer.num_events, 'Dropped spans counted as added')
+
+    def test_threads_on_separate_tracks(self):
+        with Tracer(self.path) as tracer:
+            tracer.span('main', time.perf_counter_ns())
+            thread = threading.Thread(target=lambda: tracer.span('other', time.perf_counter_ns()), name='Other')
+            thread.start()
+            thread.join()
+
+        events = self._load()
+        tracks = {event['args']['name']: event['tid'] for event in events if event['ph'] == 'M'}
+        spans = {span['name']: span['tid'] for span in self._spans()}
+        self.assertEqual(tracks['Other'], spans['other'], 'Span not on the track of the thread')
+        self.assertNotEqual(spans['main'], spans['other'], 'Threads on the same track')
+
+    def test_runner_timeline(self):
+        with Tracer(self.path) as tracer:
+            environment = InProcessEnvironment(CounterGame(episode_length=3), verbose=0)
+            Runner(ConstantLearner(num_episodes=2), environment, state_adapters=[_double], verbose=0,
+                   tracer=tracer).train()
+
+        names = [span['name'] for span in self._spans()]
+        for name in ('reset', 'obtain_states', 'act', 'receive_reward', '_double', 'episode_started',
+                     'episode_ended', 'environment_act', 'step'):
+            self.assertIn(name, names, f'Span {name} not traced')
+        self.assertEqual(2, names.count('reset'), 'Wrong number of resets')
+
+    def test_communicator_track(self):
+        with Tracer(self.path) as tracer, GameServer(CounterGame(episode_length=3)) as server:
+            environment = RemoteEnvironment(Communicator.with_tcp_connection(port=server.port, verbose=0), verbose=0)
+            runner = Runner(ConstantLearner(num_episodes=1), environment, verbose=0, tracer=tracer)
+            runner.train()
+            environment.disconnect()
+
+        tracks = {event['tid']: event['args']['name'] for event in self._load() if event['ph'] == 'M'}
+        spans = self._spans()
+        self.assertEqual({'Communicator'}, {tracks[span['tid']] for span in spans if span['name'] == 'decode'},
+                         'Messages not decoded on the communicator track')
+        self.assertIn('wait', {span['name'] for span in spans if tracks[span['tid']] != 'Communicator'},
+                      'Waiting for the messages not traced on the main track')
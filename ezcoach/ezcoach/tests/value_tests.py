@@ -1,6 +1,9 @@
 import unittest
+import warnings
+
 import numpy as np
-from ezcoach.value import BoolValue, IntValue, FloatValue, BoolList, IntList, FloatList
+from ezcoach.value import BoolValue, IntValue, FloatValue, BoolList, IntList, FloatList, TypedList, ValueValidator, \
+    PixelList
 from ezcoach.range import Range, UnboundRange
 
 
@@ -69,6 +72,14 @@ class TestIntValueContains(unittest.TestCase):
         value = IntValue(UnboundRange())
         self.assertTrue(value.contains(0), 'Contains failed')
 
+    def test_int_range_contains_numpy_int(self):
+        value = IntValue(Range(1, 5))
+        self.assertTrue(value.contains(np.int64(3)), 'Contains failed')
+
+    def test_int_range_not_contains_numpy_float(self):
+        value = IntValue(Range(1, 5))
+        self.assertFalse(value.contains(np.float32(3)), 'Contains failed')
+
 
 class TestFloatValueContains(unittest.TestCase):
 
@@ -259,3 +270,105 @@ class TestFloatListValueContains(unittest.TestCase):
     def test_size_10_contains_wrong_len_list(self):
         value = FloatList([Range(.5, 2.5) for __ in range(10)])
         self.assertFalse(value.contains([1.5, 2.]), 'Contains failed')
+
+
+class TestValueValidator(unittest.TestCase):
+
+    def test_int_value(self):
+        validator = ValueValidator(IntValue(Range(1, 5)))
+        self.assertTrue(validator.validate([1, 5, np.int64(3)]), 'Validate failed')
+        self.assertFalse(validator.validate([1, 6]), 'Validate failed')
+        self.assertFalse(validator.validate([1, 2.5]), 'Validate failed')
+        self.assertFalse(validator.validate([[1]]), 'Validate failed')
+
+    def test_float_value(self):
+        validator = ValueValidator(FloatValue(UnboundRange()))
+        self.assertTrue(validator.validate([-1e9, 2.5]), 'Validate failed')
+        self.assertFalse(validator.validate([5, 6]), 'Validate failed')
+
+    def test_bool_list(self):
+        validator = ValueValidator(BoolList(2))
+        self.assertTrue(validator.validate([[True, False], np.array([False, False])]), 'Validate failed')
+        self.assertFalse(validator.validate([[True, 1]]), 'Validate failed')
+
+    def test_int_list(self):
+        validator = ValueValidator(IntList([Range(2, 5), Range(0, 1)]))
+        self.assertTrue(validator.validate(np.array([[2, 0], [5, 1]])), 'Validate failed')
+        self.assertFalse(validator.validate([[2, 0], [6, 1]]), 'Validate failed')
+        self.assertFalse(validator.validate([[2, 0], [2, 0, 1]]), 'Validate failed')
+        self.assertFalse(validator.validate([[2, 0, 1]]), 'Validate failed')
+
+    def test_mixed_types_list(self):
+        validator = ValueValidator(TypedList([int, float], [Range(0, 2), Range(0., 1.)]))
+        self.assertTrue(validator.validate([[1, .5]]), 'Validate failed')
+        self.assertFalse(validator.validate([[.5, .5]]), 'Validate failed')
+
+    def test_none_skipped(self):
+        validator = ValueValidator(IntValue(Range(1, 5)))
+        self.assertTrue(validator.validate([None, 2, None]), 'Validate failed')
+        self.assertTrue(validator.validate([None]), 'Validate failed')
+
+    def test_consistent_with_contains(self):
+        definition = IntList([Range(1, 5) for __ in range(3)])
+        validator = ValueValidator(definition)
+        for value in ([1, 2, 3], [0, 2, 3], [1, 2, 6], [1, 2], [1., 2., 3.], [True, 2, 3]):
+            self.assertEqual(definition.contains(value), validator.validate([value]), f'Validate failed for {value}')
+
+    def test_ragged_values(self):
+        validator = ValueValidator(IntList([Range(0, 5) for __ in range(2)]))
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.assertFalse(validator.validate([[1, 2], [1, 2, 3]]), 'Validate failed')
+            self.assertFalse(validator.validate([[1, 2], [[1], [2, 3]]]), 'Validate failed')
+            self.assertFalse(validator.validate([[1, 2], 1]), 'Validate failed')
+
+    def test_independent_of_other_players(self):
+        validator = ValueValidator(FloatValue(Range(0., 5.)))
+        self.assertFalse(validator.validate([1]), 'Validate failed')
+        self.assertFalse(validator.validate([1, 2.5]), 'Validate failed')
+        self.assertTrue(validator.validate([1., 2.5]), 'Validate failed')
+
+    def test_consistent_with_contains_per_player(self):
+        definitions = (FloatValue(Range(0., 5.)), IntValue(Range(0, 5)), BoolValue(),
+                       FloatList([Range(0., 5.) for __ in range(2)]), IntList([Range(0, 5) for __ in range(2)]))
+        values = (1, 2.5, True, np.int64(2), np.float64(2.), [1, 2], [1., 2.], [1., 2], [True, 2], [1, 2, 3])
+        for definition in definitions:
+            validator = ValueValidator(definition)
+            for value in values:
+                self.assertEqual(definition.contains(value), validator.validate([value]),
+                                 f'Validate failed for {value} in {definition.__class__.__name__}')
+
+
+class TestValueDecoder(unittest.TestCase):
+
+    def test_arrays_reused_alternately(self):
+        decoder = IntList([Range(0, 10) for __ in range(2)]).decoder(copy_on_read=False)
+        first = decoder.decode([[1, 2], [3, 4]])
+        second = decoder.decode([[5, 6], [7, 8]])
+        third = decoder.decode([[9, 10], [0, 1]])
+        self.assertIsNot(first, second, 'Previous values overwritten')
+        self.assertIs(first, third, 'Array not reused')
+        self.assertEqual([[5, 6], [7, 8]], second.tolist(), 'Wrong values')
+        self.assertEqual(np.int64, third.dtype, 'Wrong type')
+
+    def test_arrays_reallocated_for_other_number_of_players(self):
+        decoder = FloatValue(Range(0., 1.)).decoder(copy_on_read=False)
+        decoder.decode([.5, .5])
+        decoder.decode([.5, .5])
+        self.assertEqual([.1, .2, .3], decoder.decode([.1, .2, .3]).tolist(), 'Array not reallocated')
+
+    def test_images(self):
+        decoder = PixelList(2, 1, 3, Range(0, 255), np.uint8, 'image').decoder()
+        flat = decoder.decode([list(range(6))])
+        nested = decoder.decode([[[[0, 1, 2], [3, 4, 5]]]])
+        self.assertEqual((1, 1, 2, 3), flat.shape, 'Wrong shape')
+        self.assertEqual(flat.tolist(), nested.tolist(), 'Wrong values')
+        self.assertEqual(np.uint8, flat.dtype, 'Wrong type')
+
+    def test_copy_on_read(self):
+        decoder = BoolList(2).decoder(copy_on_read=True)
+        first = decoder.decode([[True, False]])
+        decoder.decode([[False, False]])
+        third = decoder.decode([[False, True]])
+        self.assertIsNot(first, third, 'Array reused')
+        self.assertEqual([[True, False]], first.tolist(), 'Values overwritten')
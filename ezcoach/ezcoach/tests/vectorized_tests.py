@@ -0,0 +1,77 @@
+import contextlib
+import time
+import unittest
+
+from ezcoach.communication import Framing, SelectorCommunicator
+from ezcoach.enviroment import VectorizedRemoteEnvironment
+from ezcoach.exception import Disconnected
+from ezcoach.testing import GameServer, CounterGame, ImageGame
+
+
+class TestVectorizedRemoteEnvironment(unittest.TestCase):
+
+    def _environment(self, games, auto_reset=True, step_latency=0., framing=None, binary_states=False):
+        stack = contextlib.ExitStack()
+        self.addCleanup(stack.close)
+        servers = [stack.enter_context(GameServer(game, step_latency=step_latency)) for game in games]
+        communicator = SelectorCommunicator([('127.0.0.1', server.port) for server in servers], verbose=0,
+                                            framing=framing, binary_states=binary_states)
+        environment = VectorizedRemoteEnvironment(communicator, auto_reset, verbose=0)
+        environment.connect()
+        stack.callback(environment.disconnect)
+        return environment, servers
+
+    def test_stacked_states(self):
+        environment, __ = self._environment([CounterGame() for __ in range(3)])
+        self.assertEqual(3, environment.num_games, 'Wrong number of games')
+
+        environment.reset(2)
+        environment.act([[1, 0], [0, 0], [1, 1]])
+        states = environment.obtain_states()
+        self.assertEqual((3, 2, 1), states.states.shape, 'States not stacked')
+        self.assertEqual([[1, 0], [0, 0], [1, 1]], states.accumulated_rewards.tolist(), 'Wrong rewards')
+        self.assertEqual((3, 2), states.running.shape, 'Running flags not stacked')
+        self.assertEqual(3, len(states.game_metrics), 'Metrics not provided for each game')
+
+    def test_auto_reset(self):
+        environment, __ = self._environment([CounterGame(episode_length=1), CounterGame(episode_length=3)])
+        environment.reset(1)
+        environment.act([[1], [1]])
+        self.assertEqual([True, False], environment.episodes_ended.tolist(), 'Wrong ended episodes')
+        self.assertEqual([[1], [1]], environment.obtain_states().accumulated_rewards.tolist(),
+                         'Terminal state not obtained')
+
+        environment.act([[1], [1]])
+        states = environment.obtain_states()
+        self.assertEqual([[0], [2]], states.accumulated_rewards.tolist(), 'Ended game not reset')
+        self.assertEqual([[True], [True]], states.running.tolist(), 'Reset game not running')
+
+    def test_without_auto_reset(self):
+        environment, __ = self._environment([CounterGame(episode_length=1)], auto_reset=False)
+        environment.reset(1)
+        environment.act([[1]])
+        environment.act([[1]])
+        self.assertEqual([[2]], environment.obtain_states().accumulated_rewards.tolist(), 'Game reset')
+
+    def test_binary_states(self):
+        environment, __ = self._environment([ImageGame(8, 6, 3) for __ in range(2)],
+                                            framing=Framing.LENGTH_PREFIXED, binary_states=True)
+        environment.reset(1)
+        environment.act([[1], [0]])
+        self.assertEqual((2, 1, 6, 8, 3), environment.obtain_states().states.shape, 'Wrong shape of the states')
+
+    def test_games_advance_concurrently(self):
+        environment, __ = self._environment([CounterGame(episode_length=100) for __ in range(4)],
+                                            step_latency=.05)
+        environment.reset(1)
+        start = time.perf_counter()
+        for __ in range(5):
+            environment.act([[1]] * 4)
+        self.assertLess(time.perf_counter() - start, 4 * 5 * .05, 'Games not stepped concurrently')
+
+    def test_game_disconnected(self):
+        environment, servers = self._environment([CounterGame() for __ in range(2)])
+        environment.reset(1)
+        servers[1].stop()
+        with self.assertRaises(Disconnected):
+            environment.act([[1], [1]])
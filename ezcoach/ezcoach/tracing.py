@@ -0,0 +1,209 @@
+"""
+This module introduces the Tracer class writing the spans of the training and testing procedures to a file
+in the Chrome trace event format, which can be opened in chrome://tracing or https://ui.perfetto.dev.
+The timeline shows the spans of the main loop (eg. reset, obtain_states, act, wait for the messages, adapters
+and the callbacks of the agents) and the spans of the communicator thread receiving and decoding the messages
+on separate tracks, so the stalls of the pipeline are visible.
+The tracing is opt-in, the tracer is passed to the Runner and closed when the procedure is finished:
+::
+    with Tracer('train.json') as tracer:
+        runner = Runner(agent, environment, tracer=tracer)
+        runner.train()
+
+The spans are collected in a buffer of a fixed size. The full buffer is passed to the writer thread, which formats
+the spans and writes them to the file, so the thread adding the spans never waits for the file. The number
+of the buffers waiting for the writer is bounded, the spans of the buffers exceeding the bound are dropped (and
+counted), so the memory used by the tracer does not grow when the file cannot keep up. The number of the written
+spans is limited with max_events (about a million spans by default), the spans exceeding the limit are dropped
+as well.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+_CATEGORY = 'ezcoach'
+
+
+class Tracer:
+    """
+    The class collecting the spans and writing them to the file in the JSON array format of the Chrome trace events.
+    The spans can be added from a number of threads, each thread is presented on a separate track named after
+    the thread. The spans are formatted and written by the writer thread started with the tracer.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 8192, max_events: int = 1 << 20, max_pending_buffers: int = 8):
+        """
+        Initializes the tracer, opens the file and starts the writer thread.
+
+        :param path: the path of the created trace file
+        :param buffer_size: the number of the spans collected before they are passed to the writer thread
+        :param max_events: the maximal number of the written spans, unlimited if None
+        :param max_pending_buffers: the maximal number of the full buffers waiting for the writer thread,
+            the spans of the buffers exceeding the number are dropped
+        """
+        assert buffer_size > 0, f'Buffer size must be positive ({buffer_size}).'
+        assert max_pending_buffers > 0, f'Number of the pending buffers must be positive ({max_pending_buffers}).'
+        self._path = path
+        self._buffer_size = buffer_size
+        self._max_events = max_events
+
+        self._pid = os.getpid()
+        self._origin = time.perf_counter_ns()
+        self._events = []
+        self._threads = {}
+        self._written_threads = set()
+        self._names = {}
+        self._num_events = 0
+        self._dropped = 0
+        self._first = True
+        self._lock = threading.Lock()
+        self._pending = queue.Queue(max_pending_buffers)
+        self._file = open(path, 'w')
+        self._file.write('[\n')
+        self._writer = threading.Thread(target=self._write_pending, name='Tracer', daemon=True)
+        self._writer.start()
+
+    def span(self, name: str, start: int, end: int = None):
+        """
+        Adds the span of the current thread.
+
+        :param name: the name of the span
+        :param start: the start of the span obtained with time.perf_counter_ns
+        :param end: the end of the span obtained with time.perf_counter_ns, the current time if None
+        """
+        if end is None:
+            end = time.perf_counter_ns()
+
+        with self._lock:
+            if self._max_events is not None and self._num_events >= self._max_events:
+                self._dropped += 1
+                return
+
+            thread = threading.get_ident()
+            if thread not in self._threads:
+                self._threads[thread] = threading.current_thread().name
+
+            self._num_events += 1
+            self._events.append((name, thread, start, end))
+            if len(self._events) >= self._buffer_size:
+                self._pass_events(block=False)
+
+    def flush(self):
+        """
+        Passes the collected spans to the writer thread and waits until all spans are written to the file.
+        """
+        with self._lock:
+            self._pass_events(block=True)
+        self._pending.join()
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        """
+        Writes the collected spans, stops the writer thread and closes the file. The spans added after closing
+        are ignored.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+
+            self._pass_events(block=True)
+            self._max_events = 0
+        self._pending.put(None)
+        self._writer.join()
+
+        self._file.write('\n]\n')
+        self._file.close()
+        self._file = None
+
+    def _pass_events(self, block: bool):
+        """
+        Passes the collected spans to the writer thread. If the writer thread is behind and block is False,
+        the spans are dropped. Must be invoked with the lock acquired.
+
+        :param block: if True then waits until the writer thread accepts the spans
+        """
+        if not self._events:
+            return
+
+        events, self._events = self._events, []
+        try:
+            self._pending.put(events, block)
+        except queue.Full:
+            self._num_events -= len(events)
+            self._dropped += len(events)
+
+    def _write_pending(self):
+        """
+        Writes the spans passed to the writer thread until the tracer is closed.
+        """
+        while True:
+            events = self._pending.get()
+            try:
+                if events is None:
+                    return
+                self._write(events)
+            finally:
+                self._pending.task_done()
+
+    def _write(self, events):
+        """
+        Formats the spans and writes them to the file. Invoked by the writer thread.
+
+        :param events: a list of the spans
+        """
+        lines = []
+        for name, thread, start, end in events:
+            if thread not in self._written_threads:
+                self._written_threads.add(thread)
+                lines.append(f'{{"name": "thread_name", "ph": "M", "pid": {self._pid}, "tid": {thread}, '
+                             f'"args": {{"name": {json.dumps(self._threads[thread])}}}}}')
+
+            encoded_name = self._names.get(name)
+            if encoded_name is None:
+                encoded_name = self._names[name] = json.dumps(name)
+            lines.append(f'{{"name": {encoded_name}, "cat": "{_CATEGORY}", "ph": "X", '
+                         f'"ts": {(start - self._origin) / 1000:.3f}, "dur": {(end - start) / 1000:.3f}, '
+                         f'"pid": {self._pid}, "tid": {thread}}}')
+
+        if not self._first:
+            self._file.write(',\n')
+        self._file.write(',\n'.join(lines))
+        self._first = False
+
+    @property
+    def path(self) -> str:
+        """
+        Returns the path of the trace file.
+
+        :return: the path of the trace file
+        """
+        return self._path
+
+    @property
+    def num_events(self) -> int:
+        """
+        Returns the number of the spans added to the trace (excluding the dropped spans).
+
+        :return: the number of the spans
+        """
+        return self._num_events
+
+    @property
+    def dropped(self) -> int:
+        """
+        Returns the number of the spans dropped because of the limit of the written spans or because the writer
+        thread was behind.
+
+        :return: the number of the dropped spans
+        """
+        return self._dropped
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -6,6 +6,7 @@ the RemoteEnvironment class (ezcoach.environment module).
 
 import abc
 import typing
+import warnings
 from collections.abc import Iterable, Sized
 from typing import Iterator
 
@@ -15,6 +16,22 @@ import ezcoach.range
 
 _range = range
 
+_numpy_types = {int: np.integer, float: np.floating, bool: np.bool_}
+
+_RaggedArrayWarning = getattr(np, 'VisibleDeprecationWarning', UserWarning)
+
+
+def _is_instance(value, element_type) -> bool:
+    """
+    Checks if the value is of the given type. Numpy scalars of the corresponding kind (eg. numpy.int64 for int)
+    are accepted as well, so the values selected with numpy can be checked without conversion.
+
+    :param value: a value to be checked
+    :param element_type: one of the types int, float or bool
+    :return: True if the value is of the given type, False otherwise
+    """
+    return isinstance(value, element_type) or isinstance(value, _numpy_types.get(element_type, ()))
+
 
 # TODO: add __repr__ and __str__ to all value definitions
 class BaseValue(abc.ABC, Iterable, Sized):
@@ -82,6 +99,25 @@ class BaseValue(abc.ABC, Iterable, Sized):
         """
         return np.array(raw_values)
 
+    def parse_buffer(self, buffer):
+        """
+        Parses the value sent as raw bytes and returns the value as numpy array.
+        Raises the ValueError if the value definition does not support raw bytes.
+
+        :param buffer: an object supporting the buffer protocol (eg. bytes or memoryview)
+        :return: a numpy array
+        """
+        raise ValueError(f'{self.__class__.__name__} does not support values sent as raw bytes')
+
+    def decoder(self, copy_on_read: bool = True) -> 'ValueDecoder':
+        """
+        Creates the decoder of the values of all players compiled from the definition.
+
+        :param copy_on_read: if True then the decoded values are not reused (see ValueDecoder)
+        :return: a ValueDecoder object
+        """
+        return ValueDecoder(self, copy_on_read=copy_on_read)
+
     @abc.abstractmethod
     def to_json(self):
         """
@@ -172,7 +208,7 @@ class TypedList(BaseValue):
         if len(value) != self._size:
             return False
 
-        if not all(isinstance(v, t) for v, t in zip(value, self._types)):
+        if not all(_is_instance(v, t) for v, t in zip(value, self._types)):
             return False
 
         return all((r is None or r.contains(v) for r, v in zip(self._ranges, value)))
@@ -184,6 +220,9 @@ class TypedList(BaseValue):
     def normalize(self, value, zero_centered=False):
         return np.hstack([r.normalize(v, zero_centered) for r, v in zip(self._ranges, value)])
 
+    def decoder(self, copy_on_read: bool = True):
+        return ValueDecoder(self, (self._size,), np.result_type(*self._types), copy_on_read)
+
     def __getitem__(self, item):
         return self._ranges[item]
 
@@ -410,7 +449,7 @@ class _SingleValue(BaseValue, abc.ABC):
         self._description = description
 
     def contains(self, value):
-        if not isinstance(value, self._element_type):
+        if not _is_instance(value, self._element_type):
             return False
 
         return self._range is None or self._range.contains(value)
@@ -422,6 +461,9 @@ class _SingleValue(BaseValue, abc.ABC):
     def normalize(self, value, zero_centered=True):
         return self._range.normalize(value, zero_centered)
 
+    def decoder(self, copy_on_read: bool = True):
+        return ValueDecoder(self, (), np.result_type(self._element_type), copy_on_read)
+
     @property
     def range(self):
         """
@@ -648,16 +690,250 @@ class PixelList(BaseValue):
         values = values.reshape((values.shape[0], self._height, self._width, self._channels))
         return values
 
+    def parse_buffer(self, buffer):
+        """
+        Parses the images sent as raw bytes. The bytes are not copied - the returned array uses the provided buffer.
+        Values are expected in the little-endian byte order.
+
+        :param buffer: an object supporting the buffer protocol containing the images for each player
+        :return: a numpy array of shape (players, height, width, channels)
+        """
+        values = np.frombuffer(buffer, dtype=self.wire_data_type)
+        return values.reshape((-1, self._height, self._width, self._channels))
+
+    def decoder(self, copy_on_read: bool = True):
+        return ValueDecoder(self, self.shape, self._data_type, copy_on_read)
+
+    @property
+    def data_type(self):
+        """
+        Returns the numpy type of the values.
+
+        :return: a numpy type
+        """
+        return self._data_type
+
+    @property
+    def wire_data_type(self) -> np.dtype:
+        """
+        Returns the numpy type of the values sent as raw bytes (little-endian byte order).
+
+        :return: a numpy dtype object
+        """
+        return np.dtype(self._data_type).newbyteorder('<')
+
+    @property
+    def shape(self) -> typing.Tuple[int, int, int]:
+        """
+        Returns the shape of the image.
+
+        :return: a tuple consisting of the height, width and number of channels
+        """
+        return self._height, self._width, self._channels
+
     def to_json(self):
         json_dict = {'type': f'{self.__class__.__name__}',
                      'width': self._width,
                      'height': self._height,
                      'channels': self._channels,
-                     'description': self._description,
-                     'range': self._range}
+                     'description': self._description}
+
+        for name, (range, data_type) in self.DEFINED_RANGES.items():
+            if self._data_type == data_type and (self._range.min, self._range.max) == (range.min, range.max):
+                json_dict['channel_range'] = name
+                break
+        else:
+            json_dict['range'] = self._range.to_json()
+
         return json_dict
 
 
+class ValueDecoder:
+    """
+    The class decoding the values of all players into the numpy arrays of the shape and type given by the value
+    definition. By default each value is decoded into a new array (copied on read), so the values may be kept
+    by the agents. If the values are not copied on read, two preallocated arrays are used alternately, so the values
+    decoded previously remain valid only until the values of two following messages are decoded, and the arrays
+    are reallocated only when the number of players changes.
+    The values sent as raw bytes are not copied - the arrays use the buffers of the messages.
+    """
+
+    def __init__(self, definition: typing.Optional[BaseValue], shape: typing.Tuple[int, ...] = None,
+                 data_type=None, copy_on_read: bool = True):
+        """
+        Initializes the decoder with the shape and the numpy type of the value of a single player.
+        If the shape is None, the values are parsed with the parse method of the definition.
+
+        :param definition: a value definition, may be None if the values are not sent as raw bytes
+        :param shape: the shape of the value of a single player
+        :param data_type: the numpy type of the decoded values
+        :param copy_on_read: if True then the values are decoded into the new arrays instead of the reused ones
+        """
+        self._definition = definition
+        self._shape = shape
+        self._data_type = data_type
+        self._copy_on_read = copy_on_read
+        self._buffers = None
+        self._index = 0
+
+    def decode(self, raw_values) -> np.ndarray:
+        """
+        Decodes the values of all players.
+
+        :param raw_values: a list of the values of each player
+        :return: a numpy array of shape (players,) + shape
+        """
+        if self._shape is None:
+            return self._definition.parse(raw_values)
+
+        num_values = len(raw_values)
+        if self._copy_on_read:
+            return np.array(raw_values, dtype=self._data_type).reshape((num_values,) + self._shape)
+
+        if self._buffers is None or len(self._buffers[0]) != num_values:
+            self._buffers = tuple(np.empty((num_values,) + self._shape, self._data_type) for __ in _range(2))
+
+        buffer = self._buffers[self._index]
+        self._index = 1 - self._index
+        if len(self._shape) > 1:
+            try:
+                buffer.reshape((num_values, -1))[...] = raw_values
+                return buffer
+            except ValueError:
+                pass
+
+        buffer[...] = raw_values
+        return buffer
+
+    def decode_buffer(self, buffer) -> np.ndarray:
+        """
+        Decodes the values of all players sent as raw bytes.
+
+        :param buffer: an object supporting the buffer protocol containing the values of each player
+        :return: a numpy array of shape (players,) + shape
+        """
+        values = self._definition.parse_buffer(buffer)
+        return values.copy() if self._copy_on_read else values
+
+    @property
+    def copy_on_read(self) -> bool:
+        """
+        Returns if the values are decoded into the new arrays.
+
+        :return: True if the values are copied on read, False if the arrays are reused
+        """
+        return self._copy_on_read
+
+
+class ValueValidator:
+    """
+    The class checking the values of all players against the value definition in a single vectorized call.
+    The definition is compiled once into the expected shape, the accepted numpy kinds and the arrays of the bounds,
+    and the values are checked with the numpy comparisons instead of checking each element in Python.
+    The value of each player is converted to a numpy array separately, so the result agrees with the contains method
+    of the definition for each player and does not depend on the values of the other players. The lists of elements
+    of different types and unknown definitions are checked with the contains method of the definition.
+    """
+
+    _type_kinds = {int: 'biu', float: 'f', bool: 'b'}
+
+    def __init__(self, definition: BaseValue):
+        """
+        Compiles the value definition.
+
+        :param definition: a value definition
+        """
+        self._definition = definition
+        self._shape = None
+        self._kinds = None
+        self._min = None
+        self._max = None
+
+        if isinstance(definition, _SingleValue):
+            self._compile((), (definition._element_type,), (definition.range,))
+        elif isinstance(definition, TypedList) and len(set(definition.types)) <= 1:
+            self._compile((len(definition),), definition.types, definition.ranges)
+        elif isinstance(definition, PixelList):
+            self._shape = definition.shape
+            self._kinds = 'biuf'
+            self._min = np.asarray(definition.range.min, dtype=float)
+            self._max = np.asarray(definition.range.max, dtype=float)
+
+    def _compile(self, shape, types, ranges):
+        """
+        Sets the expected shape, the accepted kinds and the bounds of the elements.
+
+        :param shape: the shape of the value
+        :param types: the types of the elements
+        :param ranges: the ranges of the elements, None or the BoolRange if the element is not bound
+        """
+        self._shape = shape
+        self._kinds = self._type_kinds[types[0]] if types else 'biuf'
+        bounded = [r is not None and not isinstance(r, ezcoach.range.BoolRange) for r in ranges]
+        self._min = np.array([r.min if b else -np.inf for r, b in zip(ranges, bounded)], dtype=float).reshape(shape)
+        self._max = np.array([r.max if b else np.inf for r, b in zip(ranges, bounded)], dtype=float).reshape(shape)
+
+    def validate(self, values) -> bool:
+        """
+        Checks if all values are compliant with the definition. None values (players not acting) are skipped.
+
+        :param values: an iterable of the values of each player
+        :return: True if all values are compliant with the definition, False otherwise
+        """
+        values = [value for value in values if value is not None]
+        if not values:
+            return True
+
+        if self._shape is None:
+            return all(self._definition.contains(value) for value in values)
+
+        arrays = [self._to_array(value) for value in values]
+        if any(array is None for array in arrays):
+            return False
+
+        array = np.stack(arrays)
+        return bool(np.all((array >= self._min) & (array <= self._max)))
+
+    def _to_array(self, value) -> typing.Optional[np.ndarray]:
+        """
+        Converts the value of a single player to a numpy array and checks its shape and the types of its elements.
+        The lengths of the lists are checked before the conversion, the nested ragged lists are rejected.
+
+        :param value: the value of a player
+        :return: a numpy array of the value or None if the shape or the types do not match the definition
+        """
+        if not isinstance(value, np.ndarray):
+            if self._shape and (not isinstance(value, Sized) or len(value) != self._shape[0]):
+                return None
+            try:
+                with warnings.catch_warnings():
+                    # the ragged nested lists are converted to the object arrays with the warning by older numpy
+                    warnings.simplefilter('error', _RaggedArrayWarning)
+                    array = np.asarray(value)
+            except (ValueError, _RaggedArrayWarning):
+                return None
+        else:
+            array = value
+
+        if array.shape != self._shape or array.dtype.kind not in self._kinds:
+            return None
+
+        # the integers mixed with the floats in a list are converted to floats, but are not contained in the definition
+        if self._kinds == 'f' and array.ndim > 0 and not isinstance(value, np.ndarray) \
+                and not all(_is_instance(element, float) for element in value):
+            return None
+        return array
+
+    @property
+    def definition(self) -> BaseValue:
+        """
+        Returns the compiled value definition.
+
+        :return: the value definition
+        """
+        return self._definition
+
+
 def from_json(json):
     """
     Parses the JSON-like dictionary and creates a value definition. Checks the classes marked with